@@ -17,6 +17,7 @@ FastAPI 应用工厂模块
 
 import mimetypes
 import os
+import threading
 from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
@@ -31,6 +32,7 @@ from api.v1 import api_v1_router
 from api.middlewares.auth import add_auth_middleware
 from api.middlewares.error_handler import add_error_handlers
 from api.v1.schemas.common import HealthResponse
+from src.services.stock_search_index import get_stock_search_index
 from src.services.system_config_service import SystemConfigService
 
 
@@ -38,6 +40,8 @@ from src.services.system_config_service import SystemConfigService
 async def app_lifespan(app: FastAPI):
     """Initialize and release shared services for the app lifecycle."""
     app.state.system_config_service = SystemConfigService()
+    # 后台预建股票搜索索引，避免首个搜索请求承担构建耗时
+    threading.Thread(target=get_stock_search_index, daemon=True, name="stock-search-index").start()
     try:
         yield
     finally:
@@ -205,11 +205,12 @@ class SessionMessagesResponse(BaseModel):
 
 
 @router.get("/chat/sessions", response_model=SessionsResponse)
-async def list_chat_sessions(limit: int = 50, user_id: Optional[str] = None):
+async def list_chat_sessions(limit: int = 50, user_id: Optional[str] = None, offset: int = 0):
     """获取聊天会话列表
 
     Args:
         limit: Maximum number of sessions to return.
+        offset: Number of sessions to skip, for pagination.
         user_id: Optional platform-prefixed user identifier for session
             isolation.  When provided, only sessions whose session_id
             starts with this prefix are returned.  The value must
@@ -221,6 +222,7 @@ async def list_chat_sessions(limit: int = 50, user_id: Optional[str] = None):
         limit=limit,
         session_prefix=user_id,
         extra_session_ids=[user_id] if user_id else None,
+        offset=offset,
     )
     return SessionsResponse(sessions=sessions)
 
@@ -23,7 +23,7 @@ import re
 from datetime import datetime
 from typing import Optional, Union, Dict, Any
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from fastapi.responses import JSONResponse, StreamingResponse
 
 from api.deps import get_config_dep
@@ -37,6 +37,7 @@ from api.v1.schemas.analysis import (
     TaskStatus,
     TaskInfo,
     TaskListResponse,
+    TaskQueueStatsResponse,
     DuplicateTaskErrorResponse,
 )
 from api.v1.schemas.common import ErrorResponse
@@ -48,6 +49,7 @@ from api.v1.schemas.history import (
     ReportDetails,
 )
 from data_provider.base import canonical_stock_code, normalize_stock_code
+from src.auth import get_client_ip
 from src.config import Config
 from src.report_language import get_localized_stock_name, normalize_report_language
 from src.services.name_to_code_resolver import resolve_name_to_code
@@ -141,7 +143,8 @@ def _resolve_and_normalize_input(raw_value: str) -> str:
 )
 def trigger_analysis(
         request: AnalyzeRequest,
-        config: Config = Depends(get_config_dep)
+        config: Config = Depends(get_config_dep),
+        http_request: Request = None,
 ) -> Union[AnalysisResultResponse, JSONResponse]:
     """
     触发股票分析
@@ -156,6 +159,7 @@ def trigger_analysis(
     Args:
         request: 分析请求参数
         config: 配置依赖
+        http_request: 原始 HTTP 请求（按客户端 IP 区分任务队列提交方）
         
     Returns:
         AnalysisResultResponse: 分析结果（同步模式）
@@ -231,15 +235,20 @@ def trigger_analysis(
         return _handle_sync_analysis(stock_codes[0], request)
 
     # Async mode submits one task per stock.
-    return _handle_async_analysis_batch(stock_codes, request)
+    requester = f"api:{get_client_ip(http_request)}" if http_request is not None else None
+    return _handle_async_analysis_batch(stock_codes, request, requester=requester)
 
 
 def _handle_async_analysis_batch(
     stock_codes: list,
-    request: AnalyzeRequest
+    request: AnalyzeRequest,
+    requester: Optional[str] = None,
 ) -> JSONResponse:
     """
     Handle asynchronous analysis requests, including batch submission.
+
+    ``requester`` identifies the client for fair share inside a queue lane,
+    so repeated submissions from one client do not crowd out others.
     """
     task_queue = get_task_queue()
     
@@ -263,6 +272,11 @@ def _handle_async_analysis_batch(
         force_refresh=request.force_refresh,
         notify=notify,
     )
+    lane = getattr(request, "lane", None)
+    if lane:
+        submit_kwargs["lane"] = lane
+    if requester:
+        submit_kwargs["requester"] = requester
 
     accepted_tasks, duplicate_errors = task_queue.submit_tasks_batch(**submit_kwargs)
 
@@ -450,6 +464,7 @@ def get_task_list(
             error=t.error,
             original_query=t.original_query,
             selection_source=t.selection_source,
+            lane=t.lane,
         )
         for t in all_tasks
     ]
@@ -462,6 +477,29 @@ def get_task_list(
     )
 
 
+# ============================================================
+# GET /tasks/stats - 任务队列通道统计
+# ============================================================
+
+@router.get(
+    "/tasks/stats",
+    response_model=TaskQueueStatsResponse,
+    responses={
+        200: {"description": "任务队列统计"},
+    },
+    summary="获取任务队列统计",
+    description="按优先级通道（interactive / scheduled / bulk）返回排队深度、运行数、并发上限及等待/运行耗时"
+)
+def get_task_queue_stats() -> TaskQueueStatsResponse:
+    """
+    获取任务队列统计
+
+    Returns:
+        TaskQueueStatsResponse: 任务状态计数与各通道统计
+    """
+    return TaskQueueStatsResponse(**get_task_queue().get_task_stats())
+
+
 # ============================================================
 # GET /tasks/stream - SSE 实时推送
 # ============================================================
@@ -482,8 +520,10 @@ async def task_stream():
     - connected: 连接成功
     - task_created: 新任务创建
     - task_started: 任务开始执行
+    - task_progress: 分析进度更新（LLM_STREAM_ENABLED 时按报告字段推送，progress/message 变化）
     - task_completed: 任务完成
     - task_failed: 任务失败
+    - lagged: 连接过慢，部分事件已丢弃（data.dropped 为丢弃数，客户端可重新拉取任务列表）
     - heartbeat: 心跳（每 30 秒）
     
     Returns:
@@ -491,7 +531,6 @@ async def task_stream():
     """
     async def event_generator():
         task_queue = get_task_queue()
-        event_queue: asyncio.Queue = asyncio.Queue()
         
         # 发送连接成功事件
         yield _format_sse_event("connected", {"message": "Connected to task stream"})
@@ -501,14 +540,14 @@ async def task_stream():
         for task in pending_tasks:
             yield _format_sse_event("task_created", task.to_dict())
         
-        # 订阅任务事件
-        task_queue.subscribe(event_queue)
+        # 订阅任务事件（有界缓冲，同任务的中间状态会被合并）
+        subscription = task_queue.subscribe()
         
         try:
             while True:
                 try:
                     # 等待事件，超时发送心跳
-                    event = await asyncio.wait_for(event_queue.get(), timeout=30)
+                    event = await subscription.get(timeout=30)
                     yield _format_sse_event(event["type"], event["data"])
                 except asyncio.TimeoutError:
                     # 心跳
@@ -519,7 +558,7 @@ async def task_stream():
             # 客户端断开连接
             pass
         finally:
-            task_queue.unsubscribe(event_queue)
+            task_queue.unsubscribe(subscription)
     
     return StreamingResponse(
         event_generator(),
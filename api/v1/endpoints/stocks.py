@@ -7,8 +7,9 @@
 职责：
 1. POST /api/v1/stocks/extract-from-image 从图片提取股票代码
 2. POST /api/v1/stocks/parse-import 解析 CSV/Excel/剪贴板
-3. GET /api/v1/stocks/{code}/quote 实时行情接口
-4. GET /api/v1/stocks/{code}/history 历史行情接口
+3. GET /api/v1/stocks/search 股票代码/名称/拼音搜索（自动补全）
+4. GET /api/v1/stocks/{code}/quote 实时行情接口
+5. GET /api/v1/stocks/{code}/history 历史行情接口
 """
 
 import logging
@@ -22,6 +23,8 @@ from api.v1.schemas.stocks import (
     KLineData,
     StockHistoryResponse,
     StockQuote,
+    StockSearchItem,
+    StockSearchResponse,
 )
 from api.v1.schemas.common import ErrorResponse
 from src.services.image_stock_extractor import (
@@ -34,6 +37,7 @@ from src.services.import_parser import (
     parse_import_from_bytes,
     parse_import_from_text,
 )
+from src.services.stock_search_index import get_stock_search_index
 from src.services.stock_service import StockService
 
 logger = logging.getLogger(__name__)
@@ -239,6 +243,22 @@ async def parse_import(request: Request) -> ExtractFromImageResponse:
     return ExtractFromImageResponse(codes=codes, items=extract_items, raw_text=None)
 
 
+@router.get(
+    "/search",
+    response_model=StockSearchResponse,
+    summary="搜索股票",
+    description="按代码、名称、拼音全拼/首字母或别名搜索股票，结果排序与 WebUI 自动补全一致。",
+)
+def search_stocks(
+    q: str = Query(..., min_length=1, max_length=64, description="查询词"),
+    limit: int = Query(10, ge=1, le=50, description="返回条数"),
+    active_only: bool = Query(True, description="是否只返回正常交易的股票"),
+) -> StockSearchResponse:
+    """基于进程内预建索引的股票搜索"""
+    items = get_stock_search_index().search(q, limit=limit, active_only=active_only)
+    return StockSearchResponse(query=q, items=[StockSearchItem(**item) for item in items])
+
+
 @router.get(
     "/{stock_code}/quote",
     response_model=StockQuote,
@@ -56,6 +56,7 @@ def get_usage_summary(
         to_date=to_dt.date().isoformat(),
         total_calls=data["total_calls"],
         total_tokens=data["total_tokens"],
+        cache_hits=data.get("cache_hits", 0),
         by_call_type=data["by_call_type"],
         by_model=data["by_model"],
     )
@@ -10,7 +10,7 @@
 3. 定义异步任务队列相关模型
 """
 
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Dict
 from enum import Enum
 
 from pydantic import BaseModel, Field
@@ -71,6 +71,11 @@ class AnalyzeRequest(BaseModel):
         True,
         description="是否发送推送通知（Telegram/企业微信等）"
     )
+    lane: Optional[str] = Field(
+        None,
+        description="异步任务队列通道：interactive | scheduled | bulk（默认单只 interactive、多只 bulk；外部定时调用可传 scheduled）",
+        pattern="^(interactive|scheduled|bulk)$",
+    )
 
     class Config:
         json_schema_extra = {
@@ -274,6 +279,7 @@ class TaskInfo(BaseModel):
         description="选择来源",
         pattern=SELECTION_SOURCE_PATTERN,
     )
+    lane: Optional[str] = Field(None, description="优先级通道：interactive / scheduled / bulk")
     
     class Config:
         json_schema_extra = {
@@ -314,6 +320,44 @@ class TaskListResponse(BaseModel):
         }
 
 
+class TaskLaneStats(BaseModel):
+    """单个优先级通道的统计"""
+
+    queued: int = Field(..., description="排队中的任务数")
+    running: int = Field(..., description="运行中的任务数")
+    max_concurrency: int = Field(..., description="通道并发上限")
+    requesters_waiting: int = Field(..., description="有任务排队的提交方数量")
+    started: int = Field(..., description="累计开始执行的任务数")
+    finished: int = Field(..., description="累计执行结束的任务数")
+    avg_wait_ms: int = Field(..., description="平均排队等待时间（毫秒）")
+    max_wait_ms: int = Field(..., description="最长排队等待时间（毫秒）")
+    avg_run_ms: int = Field(..., description="平均运行时间（毫秒）")
+    max_run_ms: int = Field(..., description="最长运行时间（毫秒）")
+
+
+class TaskEventStats(BaseModel):
+    """SSE 事件广播统计"""
+
+    subscribers: int = Field(0, description="当前订阅连接数")
+    published: int = Field(0, description="累计发布事件数")
+    batches: int = Field(0, description="累计跨线程投递批次数")
+    coalesced: int = Field(0, description="被同任务后续事件覆盖的事件数")
+    dropped: int = Field(0, description="因订阅者缓冲区满而丢弃的事件数")
+    max_backlog: int = Field(0, description="当前订阅者中最大的积压事件数")
+
+
+class TaskQueueStatsResponse(BaseModel):
+    """任务队列统计响应模型"""
+
+    total: int = Field(..., description="任务总数")
+    pending: int = Field(..., description="等待中的任务数")
+    processing: int = Field(..., description="处理中的任务数")
+    completed: int = Field(..., description="已完成的任务数")
+    failed: int = Field(..., description="失败的任务数")
+    lanes: Dict[str, TaskLaneStats] = Field(..., description="各优先级通道统计（interactive / scheduled / bulk）")
+    events: Optional[TaskEventStats] = Field(None, description="SSE 事件广播统计")
+
+
 class DuplicateTaskErrorResponse(BaseModel):
     """重复任务错误响应模型"""
     
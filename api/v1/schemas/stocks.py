@@ -7,6 +7,7 @@
 职责：
 1. 定义股票实时行情模型
 2. 定义历史 K 线数据模型
+3. 定义股票搜索（自动补全）模型
 """
 
 from typing import Optional, List
@@ -109,3 +110,25 @@ class StockHistoryResponse(BaseModel):
                 "data": []
             }
         }
+
+
+class StockSearchItem(BaseModel):
+    """股票搜索候选"""
+
+    canonical_code: str = Field(..., description="标准代码（如 600519.SH）")
+    display_code: str = Field(..., description="展示代码（如 600519）")
+    name: str = Field(..., description="股票名称")
+    pinyin_full: Optional[str] = Field(None, description="全拼")
+    pinyin_abbr: Optional[str] = Field(None, description="拼音首字母")
+    market: Optional[str] = Field(None, description="市场：CN/HK/US/BSE 等")
+    asset_type: Optional[str] = Field(None, description="资产类型")
+    match_type: str = Field(..., description="匹配类型：exact/prefix/contains")
+    match_field: str = Field(..., description="匹配字段：code/name/pinyin/alias")
+    score: int = Field(..., description="匹配得分（与前端自动补全一致）")
+
+
+class StockSearchResponse(BaseModel):
+    """股票搜索响应"""
+
+    query: str = Field(..., description="原始查询")
+    items: List[StockSearchItem] = Field(default_factory=list, description="按得分、热度排序的候选")
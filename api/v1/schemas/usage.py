@@ -26,5 +26,6 @@ class UsageSummaryResponse(BaseModel):
     to_date: str = Field(..., description="ISO date string")
     total_calls: int
     total_tokens: int
+    cache_hits: int = Field(0, description="Analysis cache hits (served without an LLM call, not in total_calls)")
     by_call_type: List[CallTypeBreakdown]
     by_model: List[ModelBreakdown]
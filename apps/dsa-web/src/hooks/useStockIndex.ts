@@ -6,7 +6,7 @@
 
 import { useState, useEffect } from 'react';
 import type { StockIndexItem } from '../types/stockIndex';
-import { loadStockIndex } from '../utils/stockIndexLoader';
+import { loadShardedStockIndex } from '../utils/stockIndexLoader';
 import type { IndexLoadResult } from '../utils/stockIndexLoader';
 
 export interface UseStockIndexResult {
@@ -25,6 +25,9 @@ export interface UseStockIndexResult {
 /**
  * Stock index loading Hook
  *
+ * Loading starts once the browser is idle so the index does not compete with
+ * first paint; shards become searchable as soon as they arrive.
+ *
  * @returns Index state and data
  */
 export function useStockIndex(): UseStockIndexResult {
@@ -40,7 +43,11 @@ export function useStockIndex(): UseStockIndexResult {
       setLoading(true);
       setError(null);
 
-      const result: IndexLoadResult = await loadStockIndex();
+      const result: IndexLoadResult = await loadShardedStockIndex(partial => {
+        if (mounted) {
+          setIndex(partial);
+        }
+      });
 
       if (mounted) {
         setIndex(result.data);
@@ -52,10 +59,19 @@ export function useStockIndex(): UseStockIndexResult {
       }
     }
 
-    load();
+    const idle = typeof window !== 'undefined' && 'requestIdleCallback' in window
+      ? window.requestIdleCallback(() => void load(), { timeout: 2000 })
+      : undefined;
+    const timer = idle === undefined ? setTimeout(() => void load(), 0) : undefined;
 
     return () => {
       mounted = false;
+      if (idle !== undefined) {
+        window.cancelIdleCallback(idle);
+      }
+      if (timer !== undefined) {
+        clearTimeout(timer);
+      }
     };
   }, []);
 
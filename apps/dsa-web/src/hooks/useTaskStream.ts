@@ -9,6 +9,7 @@ export type SSEEventType =
   | 'connected'
   | 'task_created'
   | 'task_started'
+  | 'task_progress'
   | 'task_completed'
   | 'task_failed'
   | 'heartbeat';
@@ -30,6 +31,8 @@ export interface UseTaskStreamOptions {
   onTaskCreated?: (task: TaskInfo) => void;
   /** Task started callback */
   onTaskStarted?: (task: TaskInfo) => void;
+  /** Task progress callback (streamed LLM output, progress/message updated) */
+  onTaskProgress?: (task: TaskInfo) => void;
   /** Task completed callback */
   onTaskCompleted?: (task: TaskInfo) => void;
   /** Task failed callback */
@@ -65,6 +68,7 @@ export function useTaskStream(options: UseTaskStreamOptions = {}): UseTaskStream
   const {
     onTaskCreated,
     onTaskStarted,
+    onTaskProgress,
     onTaskCompleted,
     onTaskFailed,
     onConnected,
@@ -83,6 +87,7 @@ export function useTaskStream(options: UseTaskStreamOptions = {}): UseTaskStream
   const callbacksRef = useRef({
     onTaskCreated,
     onTaskStarted,
+    onTaskProgress,
     onTaskCompleted,
     onTaskFailed,
     onConnected,
@@ -94,6 +99,7 @@ export function useTaskStream(options: UseTaskStreamOptions = {}): UseTaskStream
     callbacksRef.current = {
       onTaskCreated,
       onTaskStarted,
+      onTaskProgress,
       onTaskCompleted,
       onTaskFailed,
       onConnected,
@@ -159,6 +165,12 @@ export function useTaskStream(options: UseTaskStreamOptions = {}): UseTaskStream
       if (task) callbacksRef.current.onTaskStarted?.(task);
     });
 
+    // Task progress event
+    eventSource.addEventListener('task_progress', (e) => {
+      const task = parseEventData(e.data);
+      if (task) callbacksRef.current.onTaskProgress?.(task);
+    });
+
     // Task completed event
     eventSource.addEventListener('task_completed', (e) => {
       const task = parseEventData(e.data);
@@ -75,3 +75,41 @@ export type StockIndexTuple = [
  * Stock index data (supports two formats)
  */
 export type StockIndexData = StockIndexItem[] | StockIndexTuple[];
+
+/**
+ * Sharded index manifest (stocks.index/manifest.json)
+ */
+export interface StockIndexManifest {
+  /** Format version */
+  version: number;
+  /** Total row count across shards */
+  count: number;
+  /** Shards ordered by load priority (CN/HK first) */
+  shards: Array<{
+    file: string;
+    market: string;
+    count: number;
+    /** First/last display code of the shard's code range */
+    first: string;
+    last: string;
+  }>;
+}
+
+/**
+ * Columnar shard: one array per field. Constant columns are stored as a scalar,
+ * `canonicalCode` is null (same as displayCode) or a suffix such as ".SZ",
+ * pinyin columns hold 0 when identical to nameZh, aliases are sparse by row.
+ */
+export interface StockIndexShard {
+  count: number;
+  displayCode: string[];
+  canonicalCode: Array<string | null>;
+  nameZh: string[];
+  pinyinFull: Array<string | 0 | null>;
+  pinyinAbbr: Array<string | 0 | null>;
+  aliases: Record<string, string[]>;
+  market: Market | Market[];
+  assetType: AssetType | AssetType[];
+  active: boolean | boolean[];
+  popularity: number | number[];
+}
@@ -6,12 +6,14 @@
 
 import {
   loadStockIndex,
+  loadShardedStockIndex,
+  decodeShard,
   compressIndex,
   findStockInIndex,
   getPopularStocks,
   groupStocksByMarket,
 } from '../stockIndexLoader';
-import type { StockIndexItem } from '../../types/stockIndex';
+import type { StockIndexItem, StockIndexShard } from '../../types/stockIndex';
 import { beforeEach, describe, expect, test, vi } from 'vitest';
 
 // Mock fetch
@@ -482,4 +484,73 @@ describe('stockIndexLoader', () => {
       expect(compressed[0][5]).toEqual(['测试(集团)']);
     });
   });
+
+  describe('sharded columnar index', () => {
+    const shard: StockIndexShard = {
+      count: 2,
+      displayCode: ['600519', 'AAPL'],
+      canonicalCode: ['.SH', null],
+      nameZh: ['贵州茅台', 'APPLE'],
+      pinyinFull: ['guizhoumaotai', 0],
+      pinyinAbbr: ['gzmt', 0],
+      aliases: { '0': ['茅台'] },
+      market: ['CN', 'US'],
+      assetType: 'stock',
+      active: true,
+      popularity: 100,
+    };
+
+    test('decodeShard expands compact columns', () => {
+      const items = decodeShard(shard);
+
+      expect(items[0]).toEqual({
+        canonicalCode: '600519.SH',
+        displayCode: '600519',
+        nameZh: '贵州茅台',
+        pinyinFull: 'guizhoumaotai',
+        pinyinAbbr: 'gzmt',
+        aliases: ['茅台'],
+        market: 'CN',
+        assetType: 'stock',
+        active: true,
+        popularity: 100,
+      });
+      expect(items[1].canonicalCode).toBe('AAPL');
+      expect(items[1].pinyinFull).toBe('APPLE');
+      expect(items[1].aliases).toEqual([]);
+      expect(items[1].market).toBe('US');
+    });
+
+    test('loads shards listed in the manifest', async () => {
+      mockFetch
+        .mockResolvedValueOnce({
+          ok: true,
+          json: async () => ({
+            version: 2,
+            count: 2,
+            shards: [{ file: 'cn-0.json', market: 'CN', count: 2, first: '600519', last: 'AAPL' }],
+          }),
+        } as unknown as Response)
+        .mockResolvedValueOnce({ ok: true, json: async () => shard } as unknown as Response);
+
+      const progress = vi.fn();
+      const result = await loadShardedStockIndex(progress);
+
+      expect(mockFetch.mock.calls[1][0]).toContain('/stocks.index/cn-0.json');
+      expect(result.loaded).toBe(true);
+      expect(result.data).toHaveLength(2);
+      expect(progress).toHaveBeenCalledTimes(1);
+    });
+
+    test('falls back to the single-file index without a manifest', async () => {
+      mockFetch
+        .mockResolvedValueOnce({ ok: false, status: 404, statusText: 'Not Found' } as unknown as Response)
+        .mockResolvedValueOnce({ ok: true, json: async () => mockIndexData } as unknown as Response);
+
+      const result = await loadShardedStockIndex();
+
+      expect(mockFetch.mock.calls[1][0]).toContain('/stocks.index.json');
+      expect(result.data).toEqual(mockIndexData);
+    });
+  });
 });
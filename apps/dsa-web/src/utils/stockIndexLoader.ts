@@ -4,7 +4,13 @@
  * Responsible for loading and parsing stock index data
  */
 
-import type { StockIndexData, StockIndexItem, StockIndexTuple } from '../types/stockIndex';
+import type {
+  StockIndexData,
+  StockIndexItem,
+  StockIndexManifest,
+  StockIndexShard,
+  StockIndexTuple,
+} from '../types/stockIndex';
 import { INDEX_FIELD } from './stockIndexFields';
 
 export interface IndexLoadResult {
@@ -26,7 +32,7 @@ export interface IndexLoadResult {
 export async function loadStockIndex(): Promise<IndexLoadResult> {
   try {
     // Add time parameter to bypass cache (in case the backend doesn't handle ETag/Cache-Control)
-    const response = await fetch(`/stocks.index.json?_t=${Math.floor(Date.now() / 3600000)}`);
+    const response = await fetch(`/stocks.index.json?${cacheBust()}`);
 
     if (!response.ok) {
       throw new Error(`Failed to load index: ${response.status} ${response.statusText}`);
@@ -55,6 +61,93 @@ export async function loadStockIndex(): Promise<IndexLoadResult> {
   }
 }
 
+const SHARD_BASE = '/stocks.index';
+
+function cacheBust(): string {
+  return `_t=${Math.floor(Date.now() / 3600000)}`;
+}
+
+function columnValue<T>(column: T | T[], row: number): T {
+  return Array.isArray(column) ? column[row] : column;
+}
+
+/**
+ * Decode a columnar shard into index items
+ */
+export function decodeShard(shard: StockIndexShard): StockIndexItem[] {
+  const items: StockIndexItem[] = [];
+  for (let i = 0; i < shard.count; i++) {
+    const displayCode = shard.displayCode[i];
+    const nameZh = shard.nameZh[i];
+    const canonical = shard.canonicalCode[i];
+    const pinyinFull = shard.pinyinFull[i];
+    const pinyinAbbr = shard.pinyinAbbr[i];
+    items.push({
+      canonicalCode: canonical == null
+        ? displayCode
+        : canonical.startsWith('.') ? displayCode + canonical : canonical,
+      displayCode,
+      nameZh,
+      pinyinFull: pinyinFull === 0 ? nameZh : pinyinFull ?? undefined,
+      pinyinAbbr: pinyinAbbr === 0 ? nameZh : pinyinAbbr ?? undefined,
+      aliases: shard.aliases[String(i)] || [],
+      market: columnValue(shard.market, i),
+      assetType: columnValue(shard.assetType, i),
+      active: columnValue(shard.active, i),
+      popularity: columnValue(shard.popularity, i),
+    });
+  }
+  return items;
+}
+
+/**
+ * Load the sharded columnar index (stocks.index/manifest.json + shards)
+ *
+ * Shards are fetched in parallel; `onProgress` receives the rows decoded so far
+ * (in manifest order) so autocomplete can start before the US shards arrive.
+ * Falls back to the single-file stocks.index.json when no manifest is published.
+ */
+export async function loadShardedStockIndex(
+  onProgress?: (items: StockIndexItem[]) => void
+): Promise<IndexLoadResult> {
+  let manifest: StockIndexManifest;
+  try {
+    const response = await fetch(`${SHARD_BASE}/manifest.json?${cacheBust()}`);
+    if (!response.ok) {
+      return loadStockIndex();
+    }
+    manifest = await response.json();
+    if (!manifest || !Array.isArray(manifest.shards)) {
+      return loadStockIndex();
+    }
+  } catch {
+    return loadStockIndex();
+  }
+
+  try {
+    const decoded: Array<StockIndexItem[] | undefined> = new Array(manifest.shards.length);
+    const collect = () => decoded.flatMap(part => part || []);
+
+    await Promise.all(manifest.shards.map(async (shard, position) => {
+      const response = await fetch(`${SHARD_BASE}/${shard.file}?${cacheBust()}`);
+      if (!response.ok) {
+        throw new Error(`Failed to load index shard ${shard.file}: ${response.status} ${response.statusText}`);
+      }
+      decoded[position] = decodeShard(await response.json());
+      onProgress?.(collect());
+    }));
+
+    return {
+      data: collect(),
+      loaded: true,
+      fallback: false,
+    };
+  } catch (error) {
+    console.error('[StockIndexLoader] Failed to load sharded stock index:', error);
+    return loadStockIndex();
+  }
+}
+
 /**
  * Check if data is in compressed format
  */
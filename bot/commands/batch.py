@@ -100,13 +100,12 @@ class BatchCommand(BotCommand):
         """后台执行批量分析"""
         try:
             from src.config import get_config
-            from main import StockAnalysisPipeline
+            from src.core.analysis_engine import get_analysis_engine
             
             config = get_config()
             
-            # 创建分析管道
-            pipeline = StockAnalysisPipeline(
-                config=config,
+            # 创建分析管道（复用常驻分析引擎的组件）
+            pipeline = get_analysis_engine(config).create_pipeline(
                 source_message=message,
                 query_id=uuid.uuid4().hex,
                 query_source="bot"
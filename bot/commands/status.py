@@ -83,8 +83,34 @@ class StatusCommand(BotCommand):
         status["notify_feishu"] = bool(config.feishu_webhook_url)
         status["notify_telegram"] = bool(config.telegram_bot_token and config.telegram_chat_id)
         status["notify_email"] = bool(config.email_sender and config.email_password)
+
+        # 进行中的分析任务（含 LLM 流式进度）
+        status["running_tasks"] = self._collect_running_tasks()
         
         return status
+
+    def _collect_running_tasks(self) -> List[str]:
+        """返回进行中分析任务的进度描述"""
+        try:
+            from src.services.task_service import get_task_service
+
+            tasks = get_task_service().list_tasks()
+        except Exception:
+            return []
+
+        lines = []
+        for task in tasks:
+            if task.get("status") != "running":
+                continue
+            progress = task.get("progress") or {}
+            if progress.get("type") == "llm_stream_restart":
+                detail = "输出格式异常，正在重新生成"
+            elif progress.get("fields_expected"):
+                detail = f"正在生成报告（{progress.get('fields_done', 0)}/{progress['fields_expected']}）"
+            else:
+                detail = "分析中"
+            lines.append(f"{task.get('code')}: {detail}")
+        return lines
     
     def _format_status(self, status: dict, platform: str) -> str:
         """格式化状态信息"""
@@ -132,6 +158,10 @@ class StatusCommand(BotCommand):
             f"• 邮件: {icon(status['notify_email'])}",
         ])
         
+        if status.get("running_tasks"):
+            lines.extend(["", "**⏳ 进行中的分析**"])
+            lines.extend(f"• {item}" for item in status["running_tasks"])
+        
         # AI 服务总体状态
         ai_available = status['ai_gemini'] or status['ai_openai']
         if ai_available:
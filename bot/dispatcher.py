@@ -675,8 +675,10 @@ User: "analyze TSLA and NVDA using trend strategy"
     def _resolve_stock_code_from_text(cls, text: str) -> Optional[str]:
         """Best-effort stock name/code resolution for NL-routed analysis requests."""
         from data_provider.base import canonical_stock_code
-        from src.data.stock_mapping import STOCK_NAME_MAP
         from src.services.name_to_code_resolver import resolve_name_to_code
+        from src.services.stock_name_index import get_local_name_index
+
+        name_index = get_local_name_index()
 
         def _iter_candidates(raw_text: str) -> List[str]:
             candidates: List[str] = []
@@ -702,11 +704,7 @@ User: "analyze TSLA and NVDA using trend strategy"
         def _unique_partial_match(candidate: str) -> Optional[str]:
             if not re.search(r'[\u4e00-\u9fff]', candidate):
                 return None
-            matches = [
-                code for code, stock_name in STOCK_NAME_MAP.items()
-                if candidate and candidate in stock_name
-            ]
-            unique_matches = list(dict.fromkeys(matches))
+            unique_matches = name_index.partial_codes(candidate)
             if len(unique_matches) == 1:
                 return canonical_stock_code(unique_matches[0])
             return None
@@ -27,20 +27,46 @@
 6. YfinanceFetcher (Priority 4) - 来自 yfinance 库
 
 提示：优先级数字越小越优先，同优先级按初始化顺序排列
+
+各数据源按名称登记在 base.FETCHER_REGISTRY 中，模块在首次使用时才导入。
 """
 
-from .base import BaseFetcher, DataFetcherManager
-from .efinance_fetcher import EfinanceFetcher
-from .akshare_fetcher import AkshareFetcher, is_hk_stock_code
-from .tushare_fetcher import TushareFetcher
-from .pytdx_fetcher import PytdxFetcher
-from .baostock_fetcher import BaostockFetcher
-from .yfinance_fetcher import YfinanceFetcher
-from .us_index_mapping import is_us_index_code, is_us_stock_code, get_us_index_yf_symbol, US_INDEX_MAPPING
+import importlib
+from typing import Any
+
+from .base import FETCHER_REGISTRY, BaseFetcher, DataFetcherManager, load_fetcher_class
+
+# 各数据源模块会连带导入 efinance/akshare/tushare 等重量级依赖，
+# 改为首次访问对应名称时再导入（PEP 562 模块级 __getattr__）
+_LAZY_EXPORTS = {
+    'EfinanceFetcher': '.efinance_fetcher',
+    'AkshareFetcher': '.akshare_fetcher',
+    'is_hk_stock_code': '.akshare_fetcher',
+    'TushareFetcher': '.tushare_fetcher',
+    'PytdxFetcher': '.pytdx_fetcher',
+    'BaostockFetcher': '.baostock_fetcher',
+    'YfinanceFetcher': '.yfinance_fetcher',
+    'is_us_index_code': '.us_index_mapping',
+    'is_us_stock_code': '.us_index_mapping',
+    'get_us_index_yf_symbol': '.us_index_mapping',
+    'US_INDEX_MAPPING': '.us_index_mapping',
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     'BaseFetcher',
     'DataFetcherManager',
+    'FETCHER_REGISTRY',
+    'load_fetcher_class',
     'EfinanceFetcher',
     'AkshareFetcher',
     'TushareFetcher',
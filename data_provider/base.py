@@ -14,10 +14,11 @@
 3. 指数退避重试机制
 """
 
+import importlib
 import logging
 import random
 import time
-from threading import BoundedSemaphore, RLock, Thread
+from threading import RLock
 from abc import ABC, abstractmethod
 from datetime import datetime
 from typing import Callable, Optional, List, Tuple, Dict, Any
@@ -26,10 +27,14 @@ import pandas as pd
 import numpy as np
 from src.data.stock_mapping import STOCK_NAME_MAP, is_meaningful_stock_name
 from .fundamental_adapter import AkshareFundamentalAdapter
+from .fundamental_executor import FundamentalExecutor, get_fundamental_executor
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# Scheduling slack on top of the per-block budget before a block counts as timed out.
+_FUNDAMENTAL_STAGE_GRACE_SECONDS = 0.2
+
 
 # === 标准化列名定义 ===
 STANDARD_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume', 'amount', 'pct_chg']
@@ -467,6 +472,27 @@ class BaseFetcher(ABC):
         time.sleep(sleep_time)
 
 
+# 默认数据源注册表：名称 -> (模块, 类名)，按初始化顺序排列。
+# 模块在首次使用时才导入，避免 import data_provider 时加载全部第三方数据源库。
+FETCHER_REGISTRY: Dict[str, Tuple[str, str]] = {
+    "efinance": ("data_provider.efinance_fetcher", "EfinanceFetcher"),
+    "akshare": ("data_provider.akshare_fetcher", "AkshareFetcher"),
+    "tushare": ("data_provider.tushare_fetcher", "TushareFetcher"),
+    "pytdx": ("data_provider.pytdx_fetcher", "PytdxFetcher"),
+    "baostock": ("data_provider.baostock_fetcher", "BaostockFetcher"),
+    "yfinance": ("data_provider.yfinance_fetcher", "YfinanceFetcher"),
+}
+
+
+def load_fetcher_class(name: str) -> type:
+    """按注册名导入并返回数据源类"""
+    try:
+        module_name, class_name = FETCHER_REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"未注册的数据源: {name}") from None
+    return getattr(importlib.import_module(module_name), class_name)
+
+
 class DataFetcherManager:
     """
     数据源策略管理器
@@ -503,8 +529,9 @@ class DataFetcherManager:
         self._tickflow_lock = RLock()
         self._fundamental_cache: Dict[str, Dict[str, Any]] = {}
         self._fundamental_cache_lock = RLock()
-        self._fundamental_timeout_worker_limit = 8
-        self._fundamental_timeout_slots = BoundedSemaphore(self._fundamental_timeout_worker_limit)
+        # None -> process-wide pools from get_fundamental_executor(); tests may inject their own.
+        self._fundamental_executor: Optional[FundamentalExecutor] = None
+        self._fundamental_stage_executor: Optional[FundamentalExecutor] = None
 
     def _get_tickflow_fetcher(self):
         """Lazily create a TickFlow fetcher for market-review-only calls."""
@@ -752,29 +779,9 @@ class DataFetcherManager:
           3. BaostockFetcher (Priority 3)
           4. YfinanceFetcher (Priority 4)
         """
-        from .efinance_fetcher import EfinanceFetcher
-        from .akshare_fetcher import AkshareFetcher
-        from .tushare_fetcher import TushareFetcher
-        from .pytdx_fetcher import PytdxFetcher
-        from .baostock_fetcher import BaostockFetcher
-        from .yfinance_fetcher import YfinanceFetcher
-        # 创建所有数据源实例（优先级在各 Fetcher 的 __init__ 中确定）
-        efinance = EfinanceFetcher()
-        akshare = AkshareFetcher()
-        tushare = TushareFetcher()  # 会根据 Token 配置自动调整优先级
-        pytdx = PytdxFetcher()      # 通达信数据源（可配 PYTDX_HOST/PYTDX_PORT）
-        baostock = BaostockFetcher()
-        yfinance = YfinanceFetcher()
-
-        # 初始化数据源列表
-        self._fetchers = [
-            efinance,
-            akshare,
-            tushare,
-            pytdx,
-            baostock,
-            yfinance,
-        ]
+        # 创建所有数据源实例（优先级在各 Fetcher 的 __init__ 中确定；
+        # Tushare 会根据 Token 配置自动调整优先级，Pytdx 可配 PYTDX_HOST/PYTDX_PORT）
+        self._fetchers = [load_fetcher_class(name)() for name in FETCHER_REGISTRY]
 
         # 按优先级排序（Tushare 如果配置了 Token 且初始化成功，优先级为 0）
         self._fetchers.sort(key=lambda f: f.priority)
@@ -1473,6 +1480,18 @@ class DataFetcherManager:
                 continue
         return {}
 
+    def _get_fundamental_executor(self) -> FundamentalExecutor:
+        executor = getattr(self, "_fundamental_executor", None)
+        return executor if executor is not None else get_fundamental_executor("fundamental")
+
+    def _get_fundamental_stage_executor(self) -> FundamentalExecutor:
+        executor = getattr(self, "_fundamental_stage_executor", None)
+        return executor if executor is not None else get_fundamental_executor("fundamental-stage")
+
+    def get_fundamental_executor_stats(self) -> Dict[str, Any]:
+        """Metrics of the fundamental worker pool (timeouts, rejections, leaked/overrunning tasks)."""
+        return self._get_fundamental_executor().get_stats()
+
     def _run_with_timeout(
         self,
         task: Callable[[], Any],
@@ -1480,47 +1499,16 @@ class DataFetcherManager:
         task_name: str,
     ) -> Tuple[Optional[Any], Optional[str], int]:
         """
-        Execute a task in a short-lived thread and enforce a timeout.
+        Execute a task on the bounded fundamental executor and enforce a timeout.
+
+        On timeout the task is cancelled cooperatively (see
+        ``fundamental_executor.fundamental_cancelled``) rather than left to
+        hold a thread indefinitely.
 
         Returns:
             (result, error, duration_ms)
         """
-        start = time.time()
-        timeout_value = max(0.0, timeout_seconds)
-        if timeout_value <= 0:
-            return None, f"{task_name} timeout", 0
-        result_holder: Dict[str, Any] = {}
-        error_holder: Dict[str, Exception] = {}
-
-        if not self._fundamental_timeout_slots.acquire(blocking=False):
-            return None, f"{task_name} timeout worker pool exhausted", int(timeout_value * 1000)
-
-        def runner() -> None:
-            try:
-                result_holder["value"] = task()
-            except Exception as exc:
-                error_holder["value"] = exc
-            finally:
-                try:
-                    self._fundamental_timeout_slots.release()
-                except ValueError:
-                    pass
-
-        worker = Thread(target=runner, daemon=True, name=f"fundamental-{task_name}")
-        try:
-            worker.start()
-        except Exception as exc:
-            try:
-                self._fundamental_timeout_slots.release()
-            except ValueError:
-                pass
-            return None, str(exc), int((time.time() - start) * 1000)
-        worker.join(timeout=timeout_value)
-        if worker.is_alive():
-            return None, f"{task_name} timeout", int(timeout_value * 1000)
-        if "value" in error_holder:
-            return None, str(error_holder["value"]), int((time.time() - start) * 1000)
-        return result_holder.get("value"), None, int((time.time() - start) * 1000)
+        return self._get_fundamental_executor().run(task, timeout_seconds, task_name)
 
     def _run_with_retry(
         self,
@@ -1800,7 +1788,6 @@ class DataFetcherManager:
                     if age <= cache_ttl:
                         return cache_item.get("context", {})
 
-        remaining_seconds = stage_timeout
         result_ctx: Dict[str, Any] = {
             "market": market,
             "valuation": {},
@@ -1816,21 +1803,71 @@ class DataFetcherManager:
         }
 
         start_ts = time.time()
+        block_timeout = min(fetch_timeout, stage_timeout)
+        stage_executor = self._get_fundamental_stage_executor()
+        stage_jobs: Dict[str, Any] = {}
+        inline_results: Dict[str, Any] = {}
+
+        def _submit_block(name: str, fn: Callable[[], Any]) -> None:
+            # Independent blocks run concurrently within the stage budget; the
+            # leaf calls inside them are bounded by the fundamental executor.
+            if block_timeout <= 0:
+                return
+            job = stage_executor.submit(fn, block_timeout, f"stage_{name}")
+            if job is None:
+                # Stage pool saturated: degrade to the sequential path.
+                inline_results[name] = fn()
+            else:
+                stage_jobs[name] = job
+
+        def _collect_block(name: str) -> Tuple[Optional[Any], Optional[str]]:
+            if name in inline_results:
+                return inline_results[name], None
+            job = stage_jobs.get(name)
+            if job is None:
+                return None, "fundamental stage timeout"
+            wait_seconds = max(0.0, start_ts + block_timeout + _FUNDAMENTAL_STAGE_GRACE_SECONDS - time.time())
+            try:
+                return job.future.result(timeout=wait_seconds), None
+            except Exception:
+                FundamentalExecutor.cancel(job)
+                return None, "fundamental stage timeout"
 
-        def _consume_budget(consumed_ms: int) -> None:
-            nonlocal remaining_seconds
-            remaining_seconds = max(0.0, remaining_seconds - consumed_ms / 1000.0)
-
-        valuation_timeout = min(fetch_timeout, remaining_seconds)
-        if valuation_timeout > 0:
-            quote_payload, valuation_err, valuation_ms = self._run_with_retry(
+        _submit_block(
+            "valuation",
+            lambda: self._run_with_retry(
                 lambda: self.get_realtime_quote(stock_code),
-                valuation_timeout,
+                block_timeout,
                 "fundamental_valuation",
+            ),
+        )
+        _submit_block(
+            "bundle",
+            lambda: self._run_with_retry(
+                lambda: self._fundamental_adapter.get_fundamental_bundle(stock_code),
+                block_timeout,
+                "fundamental_bundle",
+            ),
+        )
+        if not is_etf:
+            _submit_block(
+                "capital_flow",
+                lambda: self.get_capital_flow_context(stock_code, budget_seconds=block_timeout),
+            )
+            _submit_block(
+                "dragon_tiger",
+                lambda: self.get_dragon_tiger_context(stock_code, budget_seconds=block_timeout),
+            )
+            _submit_block(
+                "boards",
+                lambda: self.get_board_context(stock_code, budget_seconds=block_timeout),
             )
-            _consume_budget(valuation_ms)
+
+        valuation_result, valuation_stage_err = _collect_block("valuation")
+        if isinstance(valuation_result, tuple) and len(valuation_result) == 3:
+            quote_payload, valuation_err, valuation_ms = valuation_result
         else:
-            quote_payload, valuation_err, valuation_ms = None, "fundamental stage timeout", 0
+            quote_payload, valuation_err, valuation_ms = None, valuation_stage_err or "fundamental stage timeout", 0
 
         valuation_payload = {
             "pe_ratio": getattr(quote_payload, "pe_ratio", None) if quote_payload else None,
@@ -1857,19 +1894,14 @@ class DataFetcherManager:
         )
 
         # growth / earnings / institution (one AkShare call)
-        if remaining_seconds <= 0:
+        bundle_result, bundle_stage_err = _collect_block("bundle")
+        if not (isinstance(bundle_result, tuple) and len(bundle_result) == 3):
             bundle_status = "failed"
             bundle_payload: Dict[str, Any] = {}
-            bundle_errors = ["fundamental stage timeout"]
+            bundle_errors = [bundle_stage_err or "fundamental stage timeout"]
             bundle_ms = 0
         else:
-            bundle_timeout = min(fetch_timeout, remaining_seconds)
-            bundle_payload, bundle_err_msg, bundle_ms = self._run_with_retry(
-                lambda: self._fundamental_adapter.get_fundamental_bundle(stock_code),
-                bundle_timeout,
-                "fundamental_bundle",
-            )
-            _consume_budget(bundle_ms)
+            bundle_payload, bundle_err_msg, bundle_ms = bundle_result
             if not isinstance(bundle_payload, dict):
                 bundle_status = "failed"
                 bundle_payload = {}
@@ -1993,26 +2025,16 @@ class DataFetcherManager:
             )
             result_ctx["status"] = "partial"
         else:
-            capital_flow_budget = min(fetch_timeout, remaining_seconds)
-            capital_flow_start = time.time()
-            result_ctx["capital_flow"] = self.get_capital_flow_context(
-                stock_code,
-                budget_seconds=capital_flow_budget,
-            )
-            _consume_budget(int((time.time() - capital_flow_start) * 1000))
-
-            dragon_tiger_budget = min(fetch_timeout, remaining_seconds)
-            dragon_tiger_start = time.time()
-            result_ctx["dragon_tiger"] = self.get_dragon_tiger_context(
-                stock_code,
-                budget_seconds=dragon_tiger_budget,
-            )
-            _consume_budget(int((time.time() - dragon_tiger_start) * 1000))
-
-            result_ctx["boards"] = self.get_board_context(
-                stock_code,
-                budget_seconds=min(fetch_timeout, remaining_seconds),
-            )
+            for block_name in ("capital_flow", "dragon_tiger", "boards"):
+                block_payload, block_err = _collect_block(block_name)
+                if not isinstance(block_payload, dict):
+                    block_payload = self._build_fundamental_block(
+                        "failed",
+                        {},
+                        [{"provider": "fundamental_pipeline", "result": "failed", "duration_ms": 0}],
+                        [block_err or f"{block_name} failed"],
+                    )
+                result_ctx[block_name] = block_payload
 
         block_statuses = {
             "valuation": result_ctx["valuation"].get("status", "not_supported"),
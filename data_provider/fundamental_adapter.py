@@ -15,6 +15,9 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import pandas as pd
 
+from .fundamental_executor import fundamental_cancelled
+from .fundamental_table_cache import FundamentalTableCache, get_fundamental_table_cache
+
 logger = logging.getLogger(__name__)
 
 _DIVIDEND_KEYWORD_MAP: Dict[str, List[str]] = {
@@ -264,21 +267,48 @@ def _extract_latest_row(df: pd.DataFrame, stock_code: str) -> Optional[pd.Series
 class AkshareFundamentalAdapter:
     """AkShare adapter for fundamentals, capital flow and dragon-tiger signals."""
 
+    def __init__(self, table_cache: Optional[FundamentalTableCache] = None):
+        # None -> use the process-wide cache resolved from config on each call.
+        self._table_cache = table_cache
+
+    def _get_table_cache(self) -> Optional[FundamentalTableCache]:
+        if self._table_cache is not None:
+            return self._table_cache
+        return get_fundamental_table_cache()
+
     def _call_df_candidates(
         self,
         candidates: List[Tuple[str, Dict[str, Any]]],
+        stock_code: Optional[str] = None,
     ) -> Tuple[Optional[pd.DataFrame], Optional[str], List[str]]:
+        """
+        Return the first non-empty frame from ``candidates``.
+
+        Market-wide candidates (empty kwargs) are served from the table cache
+        when ``stock_code`` is given; the returned frame then only contains the
+        rows for that code (possibly zero rows with the original columns).
+        """
         errors: List[str] = []
         try:
             import akshare as ak
         except Exception as exc:
             return None, None, [f"import_akshare:{type(exc).__name__}"]
 
+        table_cache = self._get_table_cache() if stock_code else None
         for func_name, kwargs in candidates:
+            if fundamental_cancelled():
+                # Caller already timed out; stop probing and free the worker.
+                errors.append("cancelled")
+                break
             fn = getattr(ak, func_name, None)
             if fn is None:
                 continue
             try:
+                if table_cache is not None and table_cache.is_cacheable(func_name, kwargs):
+                    table = table_cache.get_table(func_name, lambda: fn(**kwargs))
+                    if table is not None:
+                        return table.rows_for(stock_code), func_name, errors
+                    continue
                 df = fn(**kwargs)
                 if isinstance(df, pd.Series):
                     df = df.to_frame().T
@@ -303,11 +333,14 @@ class AkshareFundamentalAdapter:
         }
 
         # Financial indicators
-        fin_df, fin_source, fin_errors = self._call_df_candidates([
-            ("stock_financial_abstract", {"symbol": stock_code}),
-            ("stock_financial_analysis_indicator", {"symbol": stock_code}),
-            ("stock_financial_analysis_indicator", {}),
-        ])
+        fin_df, fin_source, fin_errors = self._call_df_candidates(
+            [
+                ("stock_financial_abstract", {"symbol": stock_code}),
+                ("stock_financial_analysis_indicator", {"symbol": stock_code}),
+                ("stock_financial_analysis_indicator", {}),
+            ],
+            stock_code=stock_code,
+        )
         result["errors"].extend(fin_errors)
         if fin_df is not None:
             row = _extract_latest_row(fin_df, stock_code)
@@ -340,12 +373,15 @@ class AkshareFundamentalAdapter:
                 result["source_chain"].append(f"growth:{fin_source}")
 
         # Earnings forecast
-        forecast_df, forecast_source, forecast_errors = self._call_df_candidates([
-            ("stock_yjyg_em", {"symbol": stock_code}),
-            ("stock_yjyg_em", {}),
-            ("stock_yjbb_em", {"symbol": stock_code}),
-            ("stock_yjbb_em", {}),
-        ])
+        forecast_df, forecast_source, forecast_errors = self._call_df_candidates(
+            [
+                ("stock_yjyg_em", {"symbol": stock_code}),
+                ("stock_yjyg_em", {}),
+                ("stock_yjbb_em", {"symbol": stock_code}),
+                ("stock_yjbb_em", {}),
+            ],
+            stock_code=stock_code,
+        )
         result["errors"].extend(forecast_errors)
         if forecast_df is not None:
             row = _extract_latest_row(forecast_df, stock_code)
@@ -356,10 +392,13 @@ class AkshareFundamentalAdapter:
                 result["source_chain"].append(f"earnings_forecast:{forecast_source}")
 
         # Earnings quick report
-        quick_df, quick_source, quick_errors = self._call_df_candidates([
-            ("stock_yjkb_em", {"symbol": stock_code}),
-            ("stock_yjkb_em", {}),
-        ])
+        quick_df, quick_source, quick_errors = self._call_df_candidates(
+            [
+                ("stock_yjkb_em", {"symbol": stock_code}),
+                ("stock_yjkb_em", {}),
+            ],
+            stock_code=stock_code,
+        )
         result["errors"].extend(quick_errors)
         if quick_df is not None:
             row = _extract_latest_row(quick_df, stock_code)
@@ -370,11 +409,14 @@ class AkshareFundamentalAdapter:
                 result["source_chain"].append(f"earnings_quick:{quick_source}")
 
         # Dividend details (cash dividend, pre-tax)
-        dividend_df, dividend_source, dividend_errors = self._call_df_candidates([
-            ("stock_fhps_detail_em", {"symbol": stock_code}),
-            ("stock_history_dividend_detail", {"symbol": stock_code, "indicator": "分红", "date": ""}),
-            ("stock_dividend_cninfo", {"symbol": stock_code}),
-        ])
+        dividend_df, dividend_source, dividend_errors = self._call_df_candidates(
+            [
+                ("stock_fhps_detail_em", {"symbol": stock_code}),
+                ("stock_history_dividend_detail", {"symbol": stock_code, "indicator": "分红", "date": ""}),
+                ("stock_dividend_cninfo", {"symbol": stock_code}),
+            ],
+            stock_code=stock_code,
+        )
         result["errors"].extend(dividend_errors)
         if dividend_df is not None:
             dividend_payload = _build_dividend_payload(dividend_df, stock_code, max_events=5)
@@ -383,10 +425,13 @@ class AkshareFundamentalAdapter:
                 result["source_chain"].append(f"dividend:{dividend_source}")
 
         # Institution / top shareholders
-        inst_df, inst_source, inst_errors = self._call_df_candidates([
-            ("stock_institute_hold", {}),
-            ("stock_institute_recommend", {}),
-        ])
+        inst_df, inst_source, inst_errors = self._call_df_candidates(
+            [
+                ("stock_institute_hold", {}),
+                ("stock_institute_recommend", {}),
+            ],
+            stock_code=stock_code,
+        )
         result["errors"].extend(inst_errors)
         if inst_df is not None:
             row = _extract_latest_row(inst_df, stock_code)
@@ -395,12 +440,15 @@ class AkshareFundamentalAdapter:
                 result["institution"]["institution_holding_change"] = inst_change
                 result["source_chain"].append(f"institution:{inst_source}")
 
-        top10_df, top10_source, top10_errors = self._call_df_candidates([
-            ("stock_gdfx_top_10_em", {"symbol": stock_code}),
-            ("stock_gdfx_top_10_em", {}),
-            ("stock_zh_a_gdhs_detail_em", {"symbol": stock_code}),
-            ("stock_zh_a_gdhs_detail_em", {}),
-        ])
+        top10_df, top10_source, top10_errors = self._call_df_candidates(
+            [
+                ("stock_gdfx_top_10_em", {"symbol": stock_code}),
+                ("stock_gdfx_top_10_em", {}),
+                ("stock_zh_a_gdhs_detail_em", {"symbol": stock_code}),
+                ("stock_zh_a_gdhs_detail_em", {}),
+            ],
+            stock_code=stock_code,
+        )
         result["errors"].extend(top10_errors)
         if top10_df is not None:
             row = _extract_latest_row(top10_df, stock_code)
@@ -425,13 +473,16 @@ class AkshareFundamentalAdapter:
             "errors": [],
         }
 
-        stock_df, stock_source, stock_errors = self._call_df_candidates([
-            ("stock_individual_fund_flow", {"stock": stock_code}),
-            ("stock_individual_fund_flow", {"symbol": stock_code}),
-            ("stock_individual_fund_flow", {}),
-            ("stock_main_fund_flow", {"symbol": stock_code}),
-            ("stock_main_fund_flow", {}),
-        ])
+        stock_df, stock_source, stock_errors = self._call_df_candidates(
+            [
+                ("stock_individual_fund_flow", {"stock": stock_code}),
+                ("stock_individual_fund_flow", {"symbol": stock_code}),
+                ("stock_individual_fund_flow", {}),
+                ("stock_main_fund_flow", {"symbol": stock_code}),
+                ("stock_main_fund_flow", {}),
+            ],
+            stock_code=stock_code,
+        )
         result["errors"].extend(stock_errors)
         if stock_df is not None:
             row = _extract_latest_row(stock_df, stock_code)
@@ -446,10 +497,13 @@ class AkshareFundamentalAdapter:
                 }
                 result["source_chain"].append(f"capital_stock:{stock_source}")
 
-        sector_df, sector_source, sector_errors = self._call_df_candidates([
-            ("stock_sector_fund_flow_rank", {}),
-            ("stock_sector_fund_flow_summary", {}),
-        ])
+        sector_df, sector_source, sector_errors = self._call_df_candidates(
+            [
+                ("stock_sector_fund_flow_rank", {}),
+                ("stock_sector_fund_flow_summary", {}),
+            ],
+            stock_code=stock_code,
+        )
         result["errors"].extend(sector_errors)
         if sector_df is not None:
             name_col = next((c for c in sector_df.columns if any(k in str(c) for k in ("板块", "行业", "名称", "name"))), None)
@@ -483,11 +537,14 @@ class AkshareFundamentalAdapter:
             "errors": [],
         }
 
-        df, source, errors = self._call_df_candidates([
-            ("stock_lhb_stock_statistic_em", {}),
-            ("stock_lhb_detail_em", {}),
-            ("stock_lhb_jgmmtj_em", {}),
-        ])
+        df, source, errors = self._call_df_candidates(
+            [
+                ("stock_lhb_stock_statistic_em", {}),
+                ("stock_lhb_detail_em", {}),
+                ("stock_lhb_jgmmtj_em", {}),
+            ],
+            stock_code=stock_code,
+        )
         result["errors"].extend(errors)
         if df is None:
             return result
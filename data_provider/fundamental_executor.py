@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+Bounded executor for the fundamental aggregation stage.
+
+Replaces the former "one daemon Thread per sub-task" approach used by
+``DataFetcherManager._run_with_timeout``:
+
+- A fixed set of daemon worker threads serves all fundamental sub-tasks of
+  the process, so timed-out calls no longer spawn an unbounded number of
+  threads (daemon, so a hanging third-party call never blocks shutdown).
+- In-flight work (queued + running) is bounded; beyond that, submissions are
+  rejected immediately instead of piling up behind hanging calls.
+- Cancellation is cooperative: on timeout the task's cancel event is set and
+  long-running adapters can poll :func:`fundamental_cancelled` between
+  network calls to exit early and free their worker.
+- Metrics record timeouts, rejections, tasks still running past their
+  deadline ("leaked") and tasks that eventually finished late ("overrun").
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import time
+from concurrent.futures import CancelledError, Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from threading import BoundedSemaphore, Event, Lock, Thread, local
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_thread_state = local()
+
+
+@dataclass
+class _Job:
+    fn: Callable[[], Any]
+    task_name: str
+    deadline: float
+    future: Future = field(default_factory=Future)
+    cancel_event: Event = field(default_factory=Event)
+    started_at: Optional[float] = None
+
+
+def fundamental_cancelled() -> bool:
+    """
+    Return True when the fundamental task running on this thread timed out.
+
+    Adapters call this between endpoint probes to stop early instead of
+    holding a worker after their result is no longer awaited.
+    """
+    job = getattr(_thread_state, "job", None)
+    return job is not None and job.cancel_event.is_set()
+
+
+def fundamental_time_left() -> Optional[float]:
+    """
+    Seconds until the deadline of the fundamental task running on this
+    thread, or None outside the executor.
+    """
+    job = getattr(_thread_state, "job", None)
+    if job is None:
+        return None
+    return max(0.0, job.deadline - time.monotonic())
+
+
+class FundamentalExecutor:
+    """Fixed-size daemon worker pool with per-task deadlines."""
+
+    def __init__(self, max_workers: int = 8, max_in_flight: Optional[int] = None, name: str = "fundamental"):
+        self.max_workers = max(1, int(max_workers))
+        self.max_in_flight = max(1, int(max_in_flight if max_in_flight is not None else self.max_workers * 2))
+        self.name = name
+        # None is the per-worker shutdown sentinel.
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self._slots = BoundedSemaphore(self.max_in_flight)
+        self._lock = Lock()
+        self._threads: List[Thread] = []
+        self._shutdown = False
+        self._running: Dict[int, _Job] = {}
+        self._metrics: Dict[str, float] = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "timed_out": 0,
+            "rejected": 0,
+            "cancelled_before_start": 0,
+            "overrun": 0,
+            "max_overrun_ms": 0,
+        }
+
+    def _incr(self, key: str, value: float = 1) -> None:
+        with self._lock:
+            self._metrics[key] = self._metrics.get(key, 0) + value
+
+    def _ensure_workers(self) -> None:
+        with self._lock:
+            if self._shutdown:
+                return
+            self._threads = [t for t in self._threads if t.is_alive()]
+            missing = self.max_workers - len(self._threads)
+            for idx in range(missing):
+                worker = Thread(
+                    target=self._worker_loop,
+                    daemon=True,
+                    name=f"{self.name}-worker-{len(self._threads) + idx}",
+                )
+                worker.start()
+                self._threads.append(worker)
+
+    def _release_slot(self) -> None:
+        try:
+            self._slots.release()
+        except ValueError:
+            pass
+
+    def _worker_loop(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                if job.cancel_event.is_set() or not job.future.set_running_or_notify_cancel():
+                    self._incr("cancelled_before_start")
+                    continue
+                job.started_at = time.monotonic()
+                with self._lock:
+                    self._running[id(job)] = job
+                _thread_state.job = job
+                try:
+                    result = job.fn()
+                except BaseException as exc:  # noqa: BLE001 - forwarded to the waiting caller
+                    self._incr("failed")
+                    job.future.set_exception(exc)
+                else:
+                    self._incr("completed")
+                    job.future.set_result(result)
+                finally:
+                    _thread_state.job = None
+                    finished = time.monotonic()
+                    with self._lock:
+                        self._running.pop(id(job), None)
+                    if finished > job.deadline:
+                        overrun_ms = int((finished - job.deadline) * 1000)
+                        with self._lock:
+                            self._metrics["overrun"] += 1
+                            self._metrics["max_overrun_ms"] = max(self._metrics["max_overrun_ms"], overrun_ms)
+                        logger.debug("[%s] %s 超出预算 %dms 后才结束", self.name, job.task_name, overrun_ms)
+            finally:
+                self._release_slot()
+
+    def submit(self, fn: Callable[[], Any], timeout_seconds: float, task_name: str) -> Optional[_Job]:
+        """Queue ``fn``; return None when the in-flight bound is reached."""
+        if not self._slots.acquire(blocking=False):
+            self._incr("rejected")
+            return None
+        job = _Job(fn=fn, task_name=task_name, deadline=time.monotonic() + max(0.0, timeout_seconds))
+        try:
+            self._ensure_workers()
+            with self._lock:
+                # Checked and queued under the lock so no job lands behind the
+                # shutdown sentinels.
+                if self._shutdown:
+                    raise RuntimeError(f"{self.name} executor is shut down")
+                self._metrics["submitted"] += 1
+                self._queue.put(job)
+        except Exception:
+            self._release_slot()
+            raise
+        return job
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop accepting work; workers exit once the queued jobs are drained.
+
+        With ``wait=False`` a worker stuck in a hanging call is left behind
+        (it is a daemon) and exits as soon as that call returns.
+        """
+        with self._lock:
+            if self._shutdown:
+                threads: List[Thread] = []
+            else:
+                self._shutdown = True
+                threads = list(self._threads)
+            for _ in threads:
+                self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    @staticmethod
+    def cancel(job: _Job) -> None:
+        """Signal cooperative cancellation and drop the job if not started yet."""
+        job.cancel_event.set()
+        job.future.cancel()
+
+    def run(
+        self,
+        fn: Callable[[], Any],
+        timeout_seconds: float,
+        task_name: str,
+    ) -> Tuple[Optional[Any], Optional[str], int]:
+        """
+        Run ``fn`` with a deadline.
+
+        Returns:
+            (result, error, duration_ms)
+        """
+        start = time.time()
+        timeout_value = max(0.0, timeout_seconds)
+        if timeout_value <= 0:
+            return None, f"{task_name} timeout", 0
+        try:
+            job = self.submit(fn, timeout_value, task_name)
+        except Exception as exc:
+            return None, str(exc), int((time.time() - start) * 1000)
+        if job is None:
+            return None, f"{task_name} timeout worker pool exhausted", int(timeout_value * 1000)
+        try:
+            result = job.future.result(timeout=timeout_value)
+        except (FutureTimeoutError, CancelledError):
+            self.cancel(job)
+            self._incr("timed_out")
+            return None, f"{task_name} timeout", int(timeout_value * 1000)
+        except Exception as exc:
+            return None, str(exc), int((time.time() - start) * 1000)
+        return result, None, int((time.time() - start) * 1000)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of executor metrics, including currently leaked tasks."""
+        now = time.monotonic()
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._metrics)
+            leaked = [job for job in self._running.values() if now > job.deadline]
+            stats["running"] = len(self._running)
+            stats["queued"] = self._queue.qsize()
+            stats["leaked_running"] = len(leaked)
+            stats["leaked_tasks"] = sorted({job.task_name for job in leaked})
+            stats["max_workers"] = self.max_workers
+            stats["max_in_flight"] = self.max_in_flight
+        return stats
+
+
+_shared_executors: Dict[str, FundamentalExecutor] = {}
+_shared_lock = Lock()
+
+
+def get_fundamental_executor(name: str = "fundamental", max_workers: Optional[int] = None) -> FundamentalExecutor:
+    """
+    Return the process-wide executor ``name``.
+
+    Two pools are used by ``DataFetcherManager``: ``fundamental`` for leaf
+    network calls and ``fundamental-stage`` for block orchestration, so that
+    orchestration never waits on a pool it occupies itself.
+    """
+    if max_workers is None:
+        try:
+            from src.config import get_config
+
+            max_workers = int(getattr(get_config(), "fundamental_executor_max_workers", 8))
+        except Exception:
+            max_workers = 8
+    max_workers = max(1, int(max_workers))
+    with _shared_lock:
+        executor = _shared_executors.get(name)
+        if executor is None or executor.max_workers != max_workers:
+            if executor is not None:
+                # The old pool drains its queue, then its workers exit.
+                executor.shutdown(wait=False)
+            executor = FundamentalExecutor(max_workers=max_workers, name=name)
+            _shared_executors[name] = executor
+        return executor
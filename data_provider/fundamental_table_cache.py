@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+"""
+Table-level cache for market-wide AkShare fundamental frames.
+
+Several AkShare endpoints used by ``AkshareFundamentalAdapter`` (e.g.
+``stock_financial_analysis_indicator`` called with ``{}``) return the whole
+market in one DataFrame.  Without a cache the same table is downloaded once
+per analysed stock.  This module keeps each such table once per refresh
+window, persists it to disk, and indexes rows by normalized stock code so the
+per-stock lookup is a dict access instead of a full column scan.
+
+Refresh windows follow the table kind:
+
+- ``report``: keyed by the latest financial report period (quarter end).
+  Inside a disclosure window (Jan-Apr, Jul-Aug, Oct) filings land daily, so
+  the key also carries the calendar date; outside the window a table is
+  downloaded once per report period.
+- ``daily``: market data (capital flow, dragon-tiger) keyed by calendar date
+  and additionally bounded by ``daily_ttl_seconds``.
+
+The cache is fail-open: any disk or index error degrades to a cache miss.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import pickle
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from .fundamental_executor import fundamental_time_left
+
+logger = logging.getLogger(__name__)
+
+TABLE_KIND_REPORT = "report"
+TABLE_KIND_DAILY = "daily"
+
+# Market-wide endpoints and how often their content changes.
+MARKET_TABLE_KINDS: Dict[str, str] = {
+    "stock_financial_analysis_indicator": TABLE_KIND_REPORT,
+    "stock_yjyg_em": TABLE_KIND_REPORT,
+    "stock_yjbb_em": TABLE_KIND_REPORT,
+    "stock_yjkb_em": TABLE_KIND_REPORT,
+    "stock_institute_hold": TABLE_KIND_REPORT,
+    "stock_gdfx_top_10_em": TABLE_KIND_REPORT,
+    "stock_zh_a_gdhs_detail_em": TABLE_KIND_REPORT,
+    "stock_institute_recommend": TABLE_KIND_DAILY,
+    "stock_individual_fund_flow": TABLE_KIND_DAILY,
+    "stock_main_fund_flow": TABLE_KIND_DAILY,
+    "stock_sector_fund_flow_rank": TABLE_KIND_DAILY,
+    "stock_sector_fund_flow_summary": TABLE_KIND_DAILY,
+    "stock_lhb_stock_statistic_em": TABLE_KIND_DAILY,
+    "stock_lhb_detail_em": TABLE_KIND_DAILY,
+    "stock_lhb_jgmmtj_em": TABLE_KIND_DAILY,
+}
+
+_CODE_COLUMN_KEYWORDS = ("代码", "股票代码", "证券代码", "symbol", "ts_code")
+_QUARTER_ENDS = ((3, 31), (6, 30), (9, 30), (12, 31))
+# Months in which periodic reports are being published (annual + Q1, H1, Q3).
+_DISCLOSURE_MONTHS = frozenset({1, 2, 3, 4, 7, 8, 10})
+
+
+def _normalize_code(raw: Any) -> str:
+    s = ("" if raw is None else str(raw)).strip().upper()
+    if "." in s:
+        s = s.split(".", 1)[0]
+    return re.sub(r"^(SH|SZ|BJ)", "", s)
+
+
+def latest_report_period(today: Optional[date] = None) -> date:
+    """Return the most recent quarter end on or before ``today``."""
+    today = today or date.today()
+    candidates = [date(today.year, m, d) for m, d in _QUARTER_ENDS]
+    candidates.append(date(today.year - 1, 12, 31))
+    return max(c for c in candidates if c <= today)
+
+
+def is_disclosure_window(today: Optional[date] = None) -> bool:
+    """Return True when periodic financial reports are still being published."""
+    today = today or date.today()
+    return today.month in _DISCLOSURE_MONTHS
+
+
+def refresh_token(kind: str, today: Optional[date] = None) -> str:
+    """Build the refresh-window token used in cache keys for ``kind``."""
+    today = today or date.today()
+    if kind == TABLE_KIND_REPORT:
+        period = latest_report_period(today).isoformat()
+        if is_disclosure_window(today):
+            return f"{period}@{today.isoformat()}"
+        return period
+    return today.isoformat()
+
+
+@dataclass
+class MarketTable:
+    """A cached market-wide frame plus its code -> row positions index."""
+
+    endpoint: str
+    token: str
+    frame: pd.DataFrame
+    fetched_at: float
+    code_index: Dict[str, List[int]] = field(default_factory=dict)
+    has_code_column: bool = False
+
+    @classmethod
+    def build(cls, endpoint: str, token: str, frame: pd.DataFrame, fetched_at: float) -> "MarketTable":
+        frame = frame.reset_index(drop=True)
+        code_cols = [c for c in frame.columns if any(k in str(c) for k in _CODE_COLUMN_KEYWORDS)]
+        index: Dict[str, List[int]] = {}
+        for col in code_cols:
+            try:
+                normalized = frame[col].astype(str).map(_normalize_code).tolist()
+            except Exception:
+                continue
+            col_index: Dict[str, List[int]] = {}
+            for pos, code in enumerate(normalized):
+                if code:
+                    col_index.setdefault(code, []).append(pos)
+            # Every code column is indexed; per code the first column that
+            # contains it wins, mirroring _filter_rows_by_code.
+            for code, positions in col_index.items():
+                index.setdefault(code, positions)
+        return cls(
+            endpoint=endpoint,
+            token=token,
+            frame=frame,
+            fetched_at=fetched_at,
+            code_index=index,
+            has_code_column=bool(code_cols),
+        )
+
+    def rows_for(self, stock_code: str) -> pd.DataFrame:
+        """
+        Return rows for ``stock_code`` via the index.
+
+        Tables without a code column are returned whole so callers keep their
+        "latest row" fallback; tables with a code column but no match return a
+        zero-row frame with the original columns.
+        """
+        if not self.has_code_column:
+            return self.frame
+        positions = self.code_index.get(_normalize_code(stock_code))
+        if not positions:
+            return self.frame.iloc[0:0]
+        return self.frame.iloc[positions]
+
+
+class FundamentalTableCache:
+    """Process-wide, disk-backed cache of market-wide AkShare tables."""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        daily_ttl_seconds: int = 1800,
+        persist: bool = True,
+        clock: Callable[[], float] = time.time,
+        today: Callable[[], date] = date.today,
+        lock_timeout_seconds: float = 30.0,
+    ):
+        self.cache_dir = cache_dir
+        self.lock_timeout_seconds = max(0.0, float(lock_timeout_seconds))
+        self.daily_ttl_seconds = max(0, int(daily_ttl_seconds))
+        self.persist = bool(persist and cache_dir)
+        self._clock = clock
+        self._today = today
+        self._tables: Dict[str, MarketTable] = {}
+        self._lock = Lock()
+        self._key_locks: Dict[str, Lock] = {}
+        self.stats: Dict[str, int] = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "lock_timeouts": 0,
+        }
+
+    @staticmethod
+    def is_cacheable(endpoint: str, kwargs: Dict[str, Any]) -> bool:
+        """Only market-wide calls (no per-stock kwargs) of known endpoints are cached."""
+        return not kwargs and endpoint in MARKET_TABLE_KINDS
+
+    def _token_for(self, endpoint: str) -> str:
+        return refresh_token(MARKET_TABLE_KINDS.get(endpoint, TABLE_KIND_DAILY), self._today())
+
+    def _is_fresh(self, table: MarketTable, token: str) -> bool:
+        if table.token != token:
+            return False
+        if MARKET_TABLE_KINDS.get(table.endpoint) == TABLE_KIND_DAILY and self.daily_ttl_seconds > 0:
+            return self._clock() - table.fetched_at <= self.daily_ttl_seconds
+        return True
+
+    def _key_lock(self, endpoint: str) -> Lock:
+        with self._lock:
+            lock = self._key_locks.get(endpoint)
+            if lock is None:
+                lock = Lock()
+                self._key_locks[endpoint] = lock
+            return lock
+
+    def _disk_path(self, endpoint: str, token: str) -> str:
+        safe_token = re.sub(r"[^0-9A-Za-z_-]", "_", token)
+        return os.path.join(self.cache_dir or "", f"{endpoint}__{safe_token}.pkl")
+
+    def _load_from_disk(self, endpoint: str, token: str) -> Optional[MarketTable]:
+        if not self.persist:
+            return None
+        path = self._disk_path(endpoint, token)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as fh:
+                payload = pickle.load(fh)
+            frame = payload.get("frame")
+            fetched_at = float(payload.get("fetched_at", 0))
+            if not isinstance(frame, pd.DataFrame) or frame.empty:
+                return None
+        except Exception as exc:
+            logger.debug("[FundamentalTableCache] 读取磁盘缓存失败 %s: %s", path, exc)
+            return None
+        return MarketTable.build(endpoint, token, frame, fetched_at)
+
+    def _save_to_disk(self, table: MarketTable) -> None:
+        if not self.persist:
+            return
+        path = self._disk_path(table.endpoint, table.token)
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "wb") as fh:
+                pickle.dump({"frame": table.frame, "fetched_at": table.fetched_at}, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self._remove_stale_files(table.endpoint, keep=path)
+        except Exception as exc:
+            logger.debug("[FundamentalTableCache] 写入磁盘缓存失败 %s: %s", path, exc)
+
+    def _remove_stale_files(self, endpoint: str, keep: str) -> None:
+        prefix = f"{endpoint}__"
+        for name in os.listdir(self.cache_dir):
+            full = os.path.join(self.cache_dir, name)
+            if name.startswith(prefix) and full != keep:
+                try:
+                    os.remove(full)
+                except OSError:
+                    pass
+
+    def get_table(self, endpoint: str, loader: Callable[[], Optional[pd.DataFrame]]) -> Optional[MarketTable]:
+        """
+        Return the cached table for ``endpoint``, downloading it via ``loader``
+        at most once per refresh window (concurrent callers wait for the
+        in-flight download instead of issuing their own).
+
+        Inside a fundamental executor task the wait is bounded by that task's
+        remaining fetch budget (``lock_timeout_seconds`` elsewhere). A waiter
+        that times out returns None so the caller degrades to its per-stock
+        path: it neither re-downloads the whole table nor pins a bounded
+        fetch worker behind a stuck AkShare call.
+        """
+        token = self._token_for(endpoint)
+        table = self._tables.get(endpoint)
+        if table is not None and self._is_fresh(table, token):
+            self.stats["memory_hits"] += 1
+            return table
+
+        key_lock = self._key_lock(endpoint)
+        time_left = fundamental_time_left()
+        wait_seconds = self.lock_timeout_seconds if time_left is None else time_left
+        if not key_lock.acquire(timeout=wait_seconds):
+            self.stats["lock_timeouts"] += 1
+            logger.debug("[FundamentalTableCache] 等待 %s 在途下载超时（%.1fs），本次跳过整表", endpoint, wait_seconds)
+            return None
+        try:
+            table = self._tables.get(endpoint)
+            if table is not None and self._is_fresh(table, token):
+                self.stats["memory_hits"] += 1
+                return table
+
+            table = self._load_from_disk(endpoint, token)
+            if table is not None and self._is_fresh(table, token):
+                self._tables[endpoint] = table
+                self.stats["disk_hits"] += 1
+                return table
+
+            self.stats["misses"] += 1
+            table = self._build_table(endpoint, token, loader)
+            if table is None:
+                return None
+            self._tables[endpoint] = table
+            self.stats["stores"] += 1
+            self._save_to_disk(table)
+            return table
+        finally:
+            key_lock.release()
+
+    def _build_table(
+        self, endpoint: str, token: str, loader: Callable[[], Optional[pd.DataFrame]]
+    ) -> Optional[MarketTable]:
+        frame = loader()
+        if isinstance(frame, pd.Series):
+            frame = frame.to_frame().T
+        if not isinstance(frame, pd.DataFrame) or frame.empty:
+            return None
+        return MarketTable.build(endpoint, token, frame, self._clock())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tables.clear()
+
+
+_shared_cache: Optional[FundamentalTableCache] = None
+_shared_cache_lock = Lock()
+
+
+def get_fundamental_table_cache() -> Optional[FundamentalTableCache]:
+    """
+    Return the process-wide table cache, or None when disabled by config.
+
+    Shared across ``DataFetcherManager`` instances so that every pipeline run
+    in the same process reuses already downloaded market tables.
+    """
+    global _shared_cache
+    try:
+        from src.config import get_config
+
+        config = get_config()
+        enabled = bool(getattr(config, "fundamental_table_cache_enabled", True))
+        cache_dir = getattr(config, "fundamental_table_cache_dir", "./data/fundamental_cache")
+        daily_ttl = int(getattr(config, "fundamental_table_cache_daily_ttl_seconds", 1800))
+    except Exception as exc:
+        logger.debug("[FundamentalTableCache] 读取配置失败，使用默认值: %s", exc)
+        enabled, cache_dir, daily_ttl = True, "./data/fundamental_cache", 1800
+
+    if not enabled:
+        return None
+    with _shared_cache_lock:
+        if (
+            _shared_cache is None
+            or _shared_cache.cache_dir != cache_dir
+            or _shared_cache.daily_ttl_seconds != max(0, daily_ttl)
+        ):
+            _shared_cache = FundamentalTableCache(cache_dir=cache_dir, daily_ttl_seconds=daily_ttl)
+        return _shared_cache
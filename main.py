@@ -43,10 +43,6 @@ import uuid
 from datetime import datetime, timezone, timedelta
 from typing import List, Optional, Tuple
 
-from data_provider.base import canonical_stock_code
-from src.core.pipeline import StockAnalysisPipeline
-from src.core.market_review import run_market_review
-from src.webui_frontend import prepare_webui_frontend_assets
 from src.config import get_config, Config
 from src.logging_config import setup_logging
 
@@ -69,6 +65,7 @@ def parse_arguments() -> argparse.Namespace:
   python main.py --single-notify    # 启用单股推送模式（每分析完一只立即推送）
   python main.py --schedule         # 启用定时任务模式
   python main.py --market-review    # 仅运行大盘复盘
+  python main.py --profile-startup  # 分析启动导入耗时
         '''
     )
 
@@ -210,6 +207,12 @@ def parse_arguments() -> argparse.Namespace:
         help='强制回测（即使已有回测结果也重新计算）'
     )
 
+    parser.add_argument(
+        '--profile-startup',
+        action='store_true',
+        help='分析各入口模块的导入耗时（python -X importtime）后退出'
+    )
+
     return parser.parse_args()
 
 
@@ -255,16 +258,38 @@ def _compute_trading_day_filter(
     return (filtered_codes, effective_region, should_skip_all)
 
 
+def _submit_to_scheduled_lane(config: Config, args: argparse.Namespace, stock_codes: List[str]) -> None:
+    """将定时任务的个股分析提交到任务队列 scheduled 通道，与 Web/API 请求共享并发上限"""
+    from src.services.task_queue import LANE_SCHEDULED, get_task_queue
+
+    accepted, duplicates = get_task_queue().submit_tasks_batch(
+        stock_codes,
+        report_type=getattr(config, 'report_type', 'simple'),
+        notify=not args.no_notify,
+        lane=LANE_SCHEDULED,
+        requester="scheduler",
+    )
+    logger.info(
+        "定时任务已提交到任务队列 scheduled 通道: 接受 %d 只，重复跳过 %d 只",
+        len(accepted), len(duplicates),
+    )
+
+
 def run_full_analysis(
     config: Config,
     args: argparse.Namespace,
-    stock_codes: Optional[List[str]] = None
+    stock_codes: Optional[List[str]] = None,
+    use_task_queue: bool = False,
 ):
     """
     执行完整的分析流程（个股 + 大盘复盘）
 
-    这是定时任务调用的主函数
+    这是定时任务调用的主函数；use_task_queue=True 时个股分析提交到任务队列
+    scheduled 通道异步执行（逐股推送），本函数只同步执行大盘复盘
     """
+    from src.core.market_review import run_market_review
+    from src.core.pipeline import StockAnalysisPipeline
+
     try:
         # Issue #529: Hot-reload STOCK_LIST from .env on each scheduled run
         if stock_codes is None:
@@ -311,12 +336,17 @@ def run_full_analysis(
         )
 
         # 1. 运行个股分析
-        results = pipeline.run(
-            stock_codes=stock_codes,
-            dry_run=args.dry_run,
-            send_notification=not args.no_notify,
-            merge_notification=merge_notification
-        )
+        if use_task_queue and not args.dry_run:
+            results = []
+            if stock_codes:
+                _submit_to_scheduled_lane(config, args, stock_codes)
+        else:
+            results = pipeline.run(
+                stock_codes=stock_codes,
+                dry_run=args.dry_run,
+                send_notification=not args.no_notify,
+                merge_notification=merge_notification
+            )
 
         # Issue #128: 分析间隔 - 在个股分析和大盘分析之间添加延迟
         analysis_delay = getattr(config, 'analysis_delay', 0)
@@ -526,6 +556,11 @@ def main() -> int:
     # 解析命令行参数
     args = parse_arguments()
 
+    if getattr(args, 'profile_startup', False):
+        from src.startup_profile import run_startup_profile
+
+        return run_startup_profile()
+
     # 加载配置（在设置日志前加载，以获取日志目录）
     config = get_config()
 
@@ -545,6 +580,8 @@ def main() -> int:
     # 解析股票列表（统一为大写 Issue #355）
     stock_codes = None
     if args.stocks:
+        from data_provider.base import canonical_stock_code
+
         stock_codes = [canonical_stock_code(c) for c in args.stocks.split(',') if (c or "").strip()]
         logger.info(f"使用命令行指定的股票列表: {stock_codes}")
 
@@ -570,6 +607,8 @@ def main() -> int:
 
     bot_clients_started = False
     if start_serve:
+        from src.webui_frontend import prepare_webui_frontend_assets
+
         if not prepare_webui_frontend_assets():
             logger.warning("前端静态资源未就绪，继续启动 FastAPI 服务（Web 页面可能不可用）")
         try:
@@ -690,7 +729,12 @@ def main() -> int:
             scheduled_stock_codes = _resolve_scheduled_stock_codes(stock_codes)
 
             def scheduled_task():
-                run_full_analysis(config, args, scheduled_stock_codes)
+                run_full_analysis(
+                    config,
+                    args,
+                    scheduled_stock_codes,
+                    use_task_queue=getattr(config, 'schedule_use_task_queue', False),
+                )
 
             background_tasks = []
             if getattr(config, 'agent_event_monitor_enabled', False):
@@ -714,6 +758,16 @@ def main() -> int:
                 else:
                     logger.info("EventMonitor 已启用，但未加载到有效规则，跳过后台提醒任务")
 
+            if getattr(config, 'retention_enabled', False):
+                from src.services.retention_service import run_retention
+
+                background_tasks.append({
+                    "task": run_retention,
+                    "interval_seconds": max(1, getattr(config, 'retention_interval_hours', 24)) * 3600,
+                    "run_immediately": False,
+                    "name": "data_retention",
+                })
+
             run_with_schedule(
                 task=scheduled_task,
                 schedule_time=config.schedule_time,
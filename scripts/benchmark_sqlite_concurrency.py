@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite 并发基准
+
+在临时数据库上同时运行三类负载，对比 legacy（SQLite 默认：DELETE 日志、
+synchronous=FULL、读写共用连接池）与 tuned（WAL + 调优 PRAGMA + 只读连接池）：
+- pipeline：写入日线数据（save_daily_data）与 LLM 用量
+- task-queue：入队 → 认领 → 完成（database 任务队列）
+- api：历史分页、会话列表、用量统计等读请求
+
+锁等待体现为各负载的延迟长尾，以及超过 busy_timeout 后抛出的 "database is locked"。
+
+使用方法：
+    python scripts/benchmark_sqlite_concurrency.py
+    python scripts/benchmark_sqlite_concurrency.py --seconds 10 --readers 8 --profile tuned
+"""
+
+import argparse
+import logging
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pandas as pd
+from sqlalchemy.exc import OperationalError
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.config import get_config  # noqa: E402
+from src.repositories.task_repo import AnalysisTaskRepository  # noqa: E402
+from src.storage import AnalysisHistory, DatabaseManager  # noqa: E402
+
+PROFILES: Dict[str, Dict[str, object]] = {
+    "legacy": {
+        "sqlite_journal_mode": "DELETE",
+        "sqlite_synchronous": "FULL",
+        "sqlite_busy_timeout_ms": 5000,
+        "sqlite_cache_size_mb": 2,
+        "sqlite_mmap_size_mb": 0,
+        "sqlite_read_pool_size": 0,
+    },
+    "tuned": {
+        "sqlite_journal_mode": "WAL",
+        "sqlite_synchronous": "NORMAL",
+        "sqlite_busy_timeout_ms": 5000,
+        "sqlite_cache_size_mb": 64,
+        "sqlite_mmap_size_mb": 256,
+        "sqlite_read_pool_size": 8,
+    },
+}
+
+LANES = ("interactive", "scheduled", "bulk")
+
+
+class WorkloadStats:
+    """单类负载的延迟与错误统计（线程安全）"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.locked = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def run(self, op: Callable[[], None]) -> None:
+        started = time.perf_counter()
+        try:
+            op()
+        except OperationalError as exc:
+            with self._lock:
+                if "locked" in str(exc).lower():
+                    self.locked += 1
+                else:
+                    self.errors += 1
+            return
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.latencies.append(elapsed)
+
+    def summary(self, seconds: float, slow_ms: float) -> str:
+        values = sorted(self.latencies)
+        if not values:
+            return f"  {self.name:<10} ops=0 locked={self.locked} errors={self.errors}"
+
+        def pct(p: float) -> float:
+            return values[min(len(values) - 1, int(p * len(values)))]
+
+        slow = sum(1 for v in values if v >= slow_ms)
+        return (
+            f"  {self.name:<10} ops={len(values):>6} ({len(values) / seconds:7.1f}/s)  "
+            f"p50={pct(0.5):7.2f}ms  p95={pct(0.95):7.2f}ms  p99={pct(0.99):7.2f}ms  "
+            f"max={values[-1]:8.2f}ms  >={slow_ms:g}ms={slow:<5} locked={self.locked} errors={self.errors}"
+        )
+
+
+def _bars(code: str, days: int = 60) -> pd.DataFrame:
+    start = date(2025, 1, 1)
+    rows = []
+    price = random.uniform(5, 100)
+    for i in range(days):
+        price *= random.uniform(0.97, 1.03)
+        rows.append({
+            "date": start + timedelta(days=i),
+            "open": price, "high": price * 1.01, "low": price * 0.99, "close": price,
+            "volume": random.randint(10_000, 1_000_000), "amount": price * 1e5, "pct_chg": 0.0,
+        })
+    return pd.DataFrame(rows)
+
+
+def _seed(db: DatabaseManager, history_rows: int) -> None:
+    now = datetime.now()
+    with db.session_scope() as session:
+        session.add_all([
+            AnalysisHistory(
+                query_id=uuid.uuid4().hex, code=f"{600000 + i % 300}", name="示例",
+                report_type="simple", sentiment_score=random.randint(0, 100),
+                operation_advice="持有", analysis_summary="x" * 400, raw_result="{}" * 200,
+                created_at=now - timedelta(minutes=i),
+            )
+            for i in range(history_rows)
+        ])
+    for i in range(200):
+        db.save_conversation_message(f"bench_{i % 20}:chat_{i}", "user", f"问题 {i}")
+
+
+def run_profile(name: str, args: argparse.Namespace) -> List[WorkloadStats]:
+    config = get_config()
+    for key, value in PROFILES[name].items():
+        setattr(config, key, value)
+    config.llm_usage_buffer_enabled = False  # 让用量写入直接参与写锁竞争
+
+    work_dir = Path(tempfile.mkdtemp(prefix=f"dsa-bench-{name}-"))
+    DatabaseManager.reset_instance()
+    db = DatabaseManager(db_url=f"sqlite:///{work_dir / 'bench.db'}")
+    _seed(db, args.history_rows)
+    tasks = AnalysisTaskRepository(db)
+
+    pipeline = WorkloadStats("pipeline")
+    queue = WorkloadStats("task-queue")
+    api = WorkloadStats("api")
+    stop = threading.Event()
+
+    def pipeline_worker(idx: int) -> None:
+        while not stop.is_set():
+            code = f"{600000 + random.randint(0, 299)}"
+            pipeline.run(lambda: db.save_daily_data(_bars(code), code, "bench"))
+            pipeline.run(lambda: db.record_llm_usage("analysis", "bench/model", 100, 200, 300, code))
+
+    def queue_worker(idx: int) -> None:
+        worker_id = f"bench-worker-{idx}"
+        while not stop.is_set():
+            task_id = uuid.uuid4().hex
+            queue.run(lambda: tasks.enqueue([{
+                "task_id": task_id, "stock_code": "600519", "dedupe_key": task_id,
+                "lane": random.choice(LANES), "requester": f"u{idx}",
+            }]))
+
+            def claim_and_complete() -> None:
+                claimed = tasks.claim(worker_id, 60, LANES)
+                if claimed:
+                    tasks.complete(claimed["task_id"], worker_id, {"ok": True})
+
+            queue.run(claim_and_complete)
+
+    def api_worker(idx: int) -> None:
+        reads = [
+            lambda: db.get_analysis_history_paginated(offset=random.randint(0, 200), limit=20),
+            lambda: db.get_analysis_history(code=f"{600000 + random.randint(0, 299)}", days=30, limit=20),
+            lambda: db.get_chat_sessions(limit=20, session_prefix=f"bench_{random.randint(0, 19)}"),
+            lambda: db.get_llm_usage_summary(datetime.now() - timedelta(days=30), datetime.now()),
+        ]
+        while not stop.is_set():
+            api.run(random.choice(reads))
+
+    threads = (
+        [threading.Thread(target=pipeline_worker, args=(i,)) for i in range(args.writers)]
+        + [threading.Thread(target=queue_worker, args=(i,)) for i in range(args.queue_workers)]
+        + [threading.Thread(target=api_worker, args=(i,)) for i in range(args.readers)]
+    )
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    DatabaseManager.reset_instance()
+    return [pipeline, queue, api]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="SQLite 并发基准（pipeline 写 + 任务队列写 + API 读）")
+    parser.add_argument("--profile", choices=["both", *PROFILES], default="both")
+    parser.add_argument("--seconds", type=float, default=5.0, help="每个 profile 的运行时长")
+    parser.add_argument("--writers", type=int, default=2, help="pipeline 写线程数")
+    parser.add_argument("--queue-workers", type=int, default=2, help="任务队列线程数")
+    parser.add_argument("--readers", type=int, default=4, help="API 读线程数")
+    parser.add_argument("--history-rows", type=int, default=2000, help="预置分析历史条数")
+    parser.add_argument("--slow-ms", type=float, default=100.0, help="计为锁等待的慢操作阈值（毫秒）")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    random.seed(42)
+    names = list(PROFILES) if args.profile == "both" else [args.profile]
+    for name in names:
+        results = run_profile(name, args)
+        print(f"[{name}] {args.seconds:g}s, writers={args.writers} "
+              f"queue={args.queue_workers} readers={args.readers}")
+        for stats in results:
+            print(stats.summary(args.seconds, args.slow_ms))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
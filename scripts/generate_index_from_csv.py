@@ -8,6 +8,7 @@ Input:
   - AkShare format: logs/stock_basic_*.csv
 
 Output: apps/dsa-web/public/stocks.index.json
+        apps/dsa-web/public/stocks.index/ (columnar shards for lazy loading)
 
 Usage:
     python3 scripts/generate_index_from_csv.py              # 默认使用 Tushare
@@ -35,6 +36,8 @@ except ImportError:
     print("[Warning] pypinyin not available, pinyin fields will be empty")
     print("[Info] Install with: pip install pypinyin")
 
+from src.services.stock_search_index import write_sharded_index  # noqa: E402
+
 
 def load_csv_data(csv_path: Path) -> List[Dict[str, Any]]:
     """
@@ -638,6 +641,9 @@ def main():
             test_data = json.load(f)
             print(f"      验证通过：{len(test_data)} 条记录")
 
+        manifest = write_sharded_index(compressed, output_path.parent / "stocks.index")
+        print(f"      分片：{len(manifest['shards'])} 片")
+
     # 统计信息
     market_stats = {}
     for item in index:
@@ -4,7 +4,8 @@
 Stock Index Generation Script
 
 Generate stock index file for frontend autocomplete functionality
-Output to apps/dsa-web/public/stocks.index.json
+Output to apps/dsa-web/public/stocks.index.json, plus the columnar sharded
+format under apps/dsa-web/public/stocks.index/ (manifest.json + shards)
 
 Two-phase strategy:
 1. MVP: Use existing STOCK_NAME_MAP
@@ -12,21 +13,26 @@ Two-phase strategy:
 
 Usage:
     python3 scripts/generate_stock_index.py
+    python3 scripts/generate_stock_index.py --shards-only   # rebuild shards from existing stocks.index.json
 """
 
 import argparse
 import json
-import re
 import sys
-import unicodedata
 from pathlib import Path
 from typing import List, Dict, Any
 
 # Add the project root to sys.path.
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.services.stock_name_index import (  # noqa: E402
+    get_local_name_index,
+    pinyin_fields,
+)
+from src.services.stock_search_index import write_sharded_index  # noqa: E402
+
 try:
-    from pypinyin import lazy_pinyin
+    import pypinyin  # noqa: F401
     PYPINYIN_AVAILABLE = True
 except ImportError:
     PYPINYIN_AVAILABLE = False
@@ -34,47 +40,24 @@ except ImportError:
     print("[Info] Install with: pip install pypinyin")
 
 
-def normalize_name_for_pinyin(name: str) -> str:
-    """
-    Normalize stock name to avoid special prefixes and full-width characters polluting pinyin index
-
-    Args:
-        name: Original stock name
-
-    Returns:
-        Normalized name for pinyin generation
-    """
-    normalized = unicodedata.normalize('NFKC', name).strip()
-
-    # Strip common A-share prefixes while preserving the core name.
-    normalized = re.sub(r'^(?:\*?ST|N)+', '', normalized, flags=re.IGNORECASE)
-
-    return normalized.strip() or unicodedata.normalize('NFKC', name).strip()
-
-
 def generate_stock_index_from_map() -> List[Dict[str, Any]]:
     """
-    Generate index from STOCK_NAME_MAP (MVP)
+    Generate index from STOCK_NAME_MAP (MVP), via the same name index the
+    backend resolver uses.
 
     Returns:
         List of stock index
     """
-    from src.data.stock_mapping import STOCK_NAME_MAP
-
     index = []
 
-    for code, name in STOCK_NAME_MAP.items():
+    for code, name in get_local_name_index().entries:
         # Generate pinyin fields.
         pinyin_full = None
         pinyin_abbr = None
-        if PYPINYIN_AVAILABLE:
-            try:
-                normalized_name = normalize_name_for_pinyin(name)
-                py = lazy_pinyin(normalized_name)
-                pinyin_full = ''.join(py)
-                pinyin_abbr = ''.join([p[0] for p in py])
-            except Exception:
-                pass
+        try:
+            pinyin_full, pinyin_abbr = pinyin_fields(name)
+        except Exception:
+            pass
 
         # Determine market and asset type.
         market, asset_type = determine_market_and_type(code)
@@ -265,6 +248,7 @@ def main():
   python3 scripts/generate_stock_index.py              # 默认：生成索引文件
   python3 scripts/generate_stock_index.py --test       # 测试模式：只读取不写入
   python3 scripts/generate_stock_index.py --test -v    # 测试模式 + 显示详细数据
+  python3 scripts/generate_stock_index.py --shards-only  # 仅由现有 stocks.index.json 重建分片
         """
     )
     parser.add_argument(
@@ -277,8 +261,23 @@ def main():
         action='store_true',
         help='详细模式：显示前10条数据预览'
     )
+    parser.add_argument(
+        '--shards-only',
+        action='store_true',
+        help='仅由现有 stocks.index.json 重建列式分片（不覆盖 JSON）'
+    )
     args = parser.parse_args()
 
+    # 输出路径
+    output_path = Path(__file__).parent.parent / "apps" / "dsa-web" / "public" / "stocks.index.json"
+    shard_dir = output_path.parent / "stocks.index"
+
+    if args.shards_only:
+        with open(output_path, 'r', encoding='utf-8') as f:
+            manifest = write_sharded_index(json.load(f), shard_dir)
+        print(f"分片已生成：{shard_dir}（{len(manifest['shards'])} 片，{manifest['count']} 条）")
+        return 0
+
     print("开始生成股票索引...")
 
     # 生成索引（MVP：使用现有映射）
@@ -308,8 +307,6 @@ def main():
         print("\n✓ 测试通过，数据格式正确")
         return 0
 
-    # 输出路径
-    output_path = Path(__file__).parent.parent / "apps" / "dsa-web" / "public" / "stocks.index.json"
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
     # 写入文件
@@ -332,6 +329,9 @@ def main():
         test_data = json.load(f)
         print(f"验证通过：{len(test_data)} 条记录")
 
+    manifest = write_sharded_index(compressed, shard_dir)
+    print(f"分片已生成：{shard_dir}（{len(manifest['shards'])} 片）")
+
     return 0
 
 
@@ -13,9 +13,6 @@ import uuid
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
-import litellm
-from litellm import Router
-
 from src.config import (
     extra_litellm_params,
     get_api_keys_for_model,
@@ -24,9 +21,18 @@ from src.config import (
     get_effective_agent_models_to_try,
     get_effective_agent_primary_model,
 )
+from src.utils.lazy_import import lazy_module
 
 logger = logging.getLogger(__name__)
 
+# litellm 导入耗时数秒，推迟到首次调用时再加载
+litellm = lazy_module("litellm")
+
+
+def Router(*args, **kwargs):
+    """litellm.Router 的延迟构造入口（保留模块级名称，便于测试替换）"""
+    return litellm.Router(*args, **kwargs)
+
 
 # ============================================================
 # Unified response types
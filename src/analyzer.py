@@ -10,16 +10,16 @@ A股自选股智能分析系统 - AI分析层
 3. 解析 LLM 响应为结构化 AnalysisResult
 """
 
+import functools
+import hashlib
 import json
 import logging
 import math
 import time
 from dataclasses import dataclass
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List, Tuple, Callable
 
-import litellm
 from json_repair import repair_json
-from litellm import Router
 
 from src.agent.llm_adapter import get_thinking_extra_body
 from src.agent.skills.defaults import CORE_TRADING_SKILL_POLICY_ZH
@@ -45,9 +45,28 @@ from src.report_language import (
 )
 from src.schemas.report_schema import AnalysisReportSchema
 from src.market_context import get_market_role, get_market_guidelines
+from src.utils.lazy_import import lazy_module
+from src.utils.prompt_cache import (
+    build_messages,
+    cached_prompt_tokens,
+    estimate_tokens,
+    supports_cache_control,
+)
+from src.utils.stream_json import DashboardStreamMonitor, StreamAbort
 
 logger = logging.getLogger(__name__)
 
+# 提示词结构版本：修改分析提示词的组装方式时递增，使本地结果缓存失效
+ANALYSIS_PROMPT_VERSION = "dashboard-v2.1"
+
+# litellm 导入耗时数秒，推迟到首次调用时再加载
+litellm = lazy_module("litellm")
+
+
+def Router(*args, **kwargs):
+    """litellm.Router 的延迟构造入口（保留模块级名称，便于测试替换）"""
+    return litellm.Router(*args, **kwargs)
+
 
 def check_content_integrity(result: "AnalysisResult") -> Tuple[bool, List[str]]:
     """
@@ -86,6 +105,8 @@ def check_content_integrity(result: "AnalysisResult") -> Tuple[bool, List[str]]:
 def apply_placeholder_fill(result: "AnalysisResult", missing_fields: List[str]) -> None:
     """Fill missing mandatory fields with placeholders (in-place). Module-level for pipeline."""
     placeholder = get_placeholder_text(getattr(result, "report_language", "zh"))
+    if missing_fields:
+        result.placeholder_filled = True
     for field in missing_fields:
         if field == "sentiment_score":
             result.sentiment_score = 50
@@ -376,6 +397,7 @@ class AnalysisResult:
     data_sources: str = ""  # 数据来源说明
     success: bool = True
     error_message: Optional[str] = None
+    placeholder_filled: bool = False  # 必填字段为占位补全（降级结果，不写入本地结果缓存）
 
     # ========== 价格数据（分析时快照）==========
     current_price: Optional[float] = None  # 分析时的股价
@@ -480,6 +502,45 @@ class AnalysisResult:
         return star_map.get(str(self.confidence_level or "").strip().lower(), "⭐⭐")
 
 
+def _compact_table(headers: List[str], values: List[Any]) -> str:
+    """单行数据的紧凑表格：字段行 + 数值行，以 | 分隔，缺失值记为 N/A"""
+    cells = [
+        "N/A" if value is None or value == "N/A" else str(value).replace("|", "/").replace("\n", " ")
+        for value in values
+    ]
+    return "|".join(headers) + "\n" + "|".join(cells)
+
+
+@dataclass
+class AnalysisPrompt:
+    """
+    分析提示词的分段结构
+
+    static_prefix 与股票无关（同一次运行内逐字节一致），sections 为按阶段标记的个股数据区块。
+    """
+    static_prefix: str
+    sections: List[Tuple[str, str]]
+
+    @property
+    def data(self) -> str:
+        return "".join(text for _, text in self.sections)
+
+    @property
+    def text(self) -> str:
+        return self.static_prefix + self.data
+
+    def stage_tokens(self, system_prompt: str = "") -> Dict[str, int]:
+        """各阶段估算 token 数（system / static 为可缓存前缀）"""
+        stages: Dict[str, int] = {
+            "system": estimate_tokens(system_prompt),
+            "static": estimate_tokens(self.static_prefix),
+        }
+        for stage, text in self.sections:
+            stages[stage] = stages.get(stage, 0) + estimate_tokens(text)
+        stages["total"] = sum(stages.values())
+        return stages
+
+
 class GeminiAnalyzer:
     """
     Gemini AI 分析器
@@ -995,6 +1056,8 @@ class GeminiAnalyzer:
         generation_config: dict,
         *,
         system_prompt: Optional[str] = None,
+        cacheable_prefix: Optional[str] = None,
+        stream_monitor_factory: Optional[Callable[[], DashboardStreamMonitor]] = None,
     ) -> Tuple[str, str, Dict[str, Any]]:
         """Call LLM via litellm with fallback across configured models.
 
@@ -1006,10 +1069,18 @@ class GeminiAnalyzer:
         Args:
             prompt: User prompt text.
             generation_config: Dict with optional keys: temperature, max_output_tokens, max_tokens.
+            cacheable_prefix: Static head of *prompt*; with LLM_PROMPT_CACHE_ENABLED it gets a
+                ``cache_control`` breakpoint (together with the system prompt) on Claude models.
+            stream_monitor_factory: When given, the response is streamed and every delta is fed
+                to a monitor created fresh for each model attempt; reading stops once the JSON
+                object closes. A :class:`StreamAbort` raised by the monitor propagates to the
+                caller with ``model`` set (a content problem, not a provider failure, so fallback
+                models are not tried).
 
         Returns:
             Tuple of (response text, model_used, usage). On success model_used is the full model
-            name and usage is a dict with prompt_tokens, completion_tokens, total_tokens.
+            name and usage is a dict with prompt_tokens, completion_tokens, total_tokens and
+            cached_tokens (prompt tokens served from the provider cache).
         """
         config = self._get_runtime_config()
         max_tokens = (
@@ -1023,24 +1094,37 @@ class GeminiAnalyzer:
         models_to_try = [m for m in models_to_try if m]
 
         use_channel_router = self._has_channel_config(config)
+        prompt_cache_enabled = getattr(config, "llm_prompt_cache_enabled", True)
+        deployment_models = {
+            entry.get("model_name"): (entry.get("litellm_params") or {}).get("model", "")
+            for entry in (config.llm_model_list or [])
+        }
 
         last_error = None
         effective_system_prompt = system_prompt or self.TEXT_SYSTEM_PROMPT
         for model in models_to_try:
             try:
                 model_short = model.split("/")[-1] if "/" in model else model
+                cache_control = prompt_cache_enabled and (
+                    supports_cache_control(model) or supports_cache_control(deployment_models.get(model, ""))
+                )
                 call_kwargs: Dict[str, Any] = {
                     "model": model,
-                    "messages": [
-                        {"role": "system", "content": effective_system_prompt},
-                        {"role": "user", "content": prompt},
-                    ],
+                    "messages": build_messages(
+                        effective_system_prompt,
+                        prompt,
+                        cacheable_prefix=cacheable_prefix,
+                        cache_control=cache_control,
+                    ),
                     "temperature": temperature,
                     "max_tokens": max_tokens,
                 }
                 extra = get_thinking_extra_body(model_short)
                 if extra:
                     call_kwargs["extra_body"] = extra
+                if stream_monitor_factory is not None:
+                    call_kwargs["stream"] = True
+                    call_kwargs["stream_options"] = {"include_usage": True}
 
                 _router_model_names = set(get_configured_llm_models(config.llm_model_list))
                 if use_channel_router and self._router and model in _router_model_names:
@@ -1059,6 +1143,17 @@ class GeminiAnalyzer:
                     call_kwargs.update(extra_litellm_params(model, config))
                     response = litellm.completion(**call_kwargs)
 
+                if stream_monitor_factory is not None:
+                    # 每个模型独立的解析状态，避免中途失败的前一个模型的残留文本混入
+                    text, usage = self._consume_stream(
+                        response,
+                        stream_monitor_factory(),
+                        prompt_tokens=estimate_tokens(effective_system_prompt) + estimate_tokens(prompt),
+                    )
+                    if text:
+                        return (text, model, usage)
+                    raise ValueError("LLM returned empty response")
+
                 if response and response.choices and response.choices[0].message.content:
                     usage: Dict[str, Any] = {}
                     if response.usage:
@@ -1066,10 +1161,14 @@ class GeminiAnalyzer:
                             "prompt_tokens": response.usage.prompt_tokens or 0,
                             "completion_tokens": response.usage.completion_tokens or 0,
                             "total_tokens": response.usage.total_tokens or 0,
+                            "cached_tokens": cached_prompt_tokens(response.usage),
                         }
                     return (response.choices[0].message.content, model, usage)
                 raise ValueError("LLM returned empty response")
 
+            except StreamAbort as abort:
+                abort.model = model
+                raise
             except Exception as e:
                 logger.warning(f"[LiteLLM] {model} failed: {e}")
                 last_error = e
@@ -1077,6 +1176,62 @@ class GeminiAnalyzer:
 
         raise Exception(f"All LLM models failed (tried {len(models_to_try)} model(s)). Last error: {last_error}")
 
+    @staticmethod
+    def _consume_stream(
+        response: Any, monitor: DashboardStreamMonitor, prompt_tokens: int = 0
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Read a litellm stream into *monitor*; returns (text, usage).
+
+        Once the JSON object closes the remaining chunks are no longer parsed,
+        only drained until the trailing usage chunk (``include_usage``) or the
+        chunk after the finish chunk. *prompt_tokens* is the estimate used when
+        the provider sent no usage at all.
+        """
+        usage: Dict[str, Any] = {}
+        finished = False
+        try:
+            for chunk in response:
+                chunk_usage = getattr(chunk, "usage", None)
+                if chunk_usage:
+                    usage = {
+                        "prompt_tokens": getattr(chunk_usage, "prompt_tokens", 0) or 0,
+                        "completion_tokens": getattr(chunk_usage, "completion_tokens", 0) or 0,
+                        "total_tokens": getattr(chunk_usage, "total_tokens", 0) or 0,
+                        "cached_tokens": cached_prompt_tokens(chunk_usage),
+                    }
+                    if monitor.closed or finished:
+                        break
+                elif finished and monitor.closed:
+                    # 结束块之后仍无 usage：服务商不返回用量，停止读取
+                    break
+                choices = getattr(chunk, "choices", None) or []
+                if choices and getattr(choices[0], "finish_reason", None):
+                    finished = True
+                if monitor.closed:
+                    # 对象已闭合：后续内容不再解析，只为读到末尾的 usage 块
+                    continue
+                delta = getattr(choices[0], "delta", None) if choices else None
+                content = getattr(delta, "content", None) if delta is not None else None
+                if content:
+                    monitor.feed(content)
+        finally:
+            close = getattr(response, "close", None)
+            if callable(close):
+                try:
+                    close()
+                except Exception:
+                    pass
+        if not usage:
+            # 服务商未返回 usage 块时按提示词与已生成文本估算
+            completion = estimate_tokens(monitor.text)
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion,
+                "total_tokens": prompt_tokens + completion,
+            }
+        return monitor.text, usage
+
     def generate_text(
         self,
         prompt: str,
@@ -1114,7 +1269,9 @@ class GeminiAnalyzer:
     def analyze(
         self, 
         context: Dict[str, Any],
-        news_context: Optional[str] = None
+        news_context: Optional[str] = None,
+        force_refresh: bool = False,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
     ) -> AnalysisResult:
         """
         分析单只股票
@@ -1128,6 +1285,8 @@ class GeminiAnalyzer:
         Args:
             context: 从 storage.get_analysis_context() 获取的上下文数据
             news_context: 预先搜索的新闻内容（可选）
+            force_refresh: 跳过本地结果缓存，强制调用 LLM（结果仍会写回缓存）
+            progress_callback: 流式模式（LLM_STREAM_ENABLED）下接收字段级进度事件
             
         Returns:
             AnalysisResult 对象
@@ -1136,6 +1295,19 @@ class GeminiAnalyzer:
         config = self._get_runtime_config()
         report_language = normalize_report_language(getattr(config, "report_language", "zh"))
         system_prompt = self._get_analysis_system_prompt(report_language, stock_code=code)
+
+        # 本地结果缓存（LLM_RESPONSE_CACHE_ENABLED）：输入未变时直接复用上次结果
+        response_cache, cache_key = None, None
+        if self.is_available():
+            response_cache, cache_key = self._lookup_response_cache(
+                config, context, news_context, system_prompt
+            )
+            if response_cache is not None and not force_refresh:
+                cached = response_cache.get(cache_key)
+                if isinstance(cached, AnalysisResult):
+                    logger.info(f"[LLM缓存] {code} 命中本地结果缓存，跳过 LLM 调用")
+                    persist_llm_usage({}, cached.model_used or "unknown", call_type="analysis_cache_hit", stock_code=code)
+                    return cached
         
         # 请求前增加延时（防止连续请求触发限流）
         request_delay = config.gemini_request_delay
@@ -1143,15 +1315,7 @@ class GeminiAnalyzer:
             logger.debug(f"[LLM] 请求前等待 {request_delay:.1f} 秒...")
             time.sleep(request_delay)
         
-        # 优先从上下文获取股票名称（由 main.py 传入）
-        name = context.get('stock_name')
-        if not name or name.startswith('股票'):
-            # 备选：从 realtime 中获取
-            if 'realtime' in context and context['realtime'].get('name'):
-                name = context['realtime']['name']
-            else:
-                # 最后从映射表获取
-                name = STOCK_NAME_MAP.get(code, f'股票{code}')
+        name = self._resolve_stock_name(context, code)
         
         # 如果模型不可用，返回默认结果
         if not self.is_available():
@@ -1172,7 +1336,10 @@ class GeminiAnalyzer:
         
         try:
             # 格式化输入（包含技术面数据和新闻）
-            prompt = self._format_prompt(context, name, news_context, report_language=report_language)
+            analysis_prompt = self._build_analysis_prompt(
+                context, name, news_context, report_language=report_language
+            )
+            prompt = analysis_prompt.text
             
             config = self._get_runtime_config()
             model_name = config.litellm_model or "unknown"
@@ -1180,6 +1347,12 @@ class GeminiAnalyzer:
             logger.info(f"[LLM配置] 模型: {model_name}")
             logger.info(f"[LLM配置] Prompt 长度: {len(prompt)} 字符")
             logger.info(f"[LLM配置] 是否包含新闻: {'是' if news_context else '否'}")
+            stage_tokens = analysis_prompt.stage_tokens(system_prompt)
+            logger.info(
+                "[LLM Prompt] 估算 tokens: "
+                + ", ".join(f"{stage}={count}" for stage, count in stage_tokens.items())
+                + f"（可缓存前缀 system+static={stage_tokens['system'] + stage_tokens['static']}）"
+            )
 
             # 记录完整 prompt 到日志（INFO级别记录摘要，DEBUG记录完整）
             prompt_preview = prompt[:500] + "..." if len(prompt) > 500 else prompt
@@ -1198,15 +1371,60 @@ class GeminiAnalyzer:
             current_prompt = prompt
             retry_count = 0
             max_retries = config.report_integrity_retry if config.report_integrity_enabled else 0
+            stream_enabled = bool(getattr(config, "llm_stream_enabled", False))
+            stream_restarts = max(0, int(getattr(config, "llm_stream_max_restarts", 1)))
 
             while True:
                 start_time = time.time()
-                response_text, model_used, llm_usage = self._call_litellm(
-                    current_prompt,
-                    generation_config,
-                    system_prompt=system_prompt,
+                # 流式模式：边生成边解析，结构明显异常时提前中止并重新请求（最后一次只报进度不中止）
+                stream_monitor_factory = (
+                    functools.partial(
+                        self._new_stream_monitor, code, progress_callback, abort_enabled=stream_restarts > 0
+                    )
+                    if stream_enabled else None
                 )
+                try:
+                    response_text, model_used, llm_usage = self._call_litellm(
+                        current_prompt,
+                        generation_config,
+                        system_prompt=system_prompt,
+                        cacheable_prefix=analysis_prompt.static_prefix,
+                        stream_monitor_factory=stream_monitor_factory,
+                    )
+                except StreamAbort as abort:
+                    stream_restarts -= 1
+                    wasted_tokens = estimate_tokens(abort.partial_text)
+                    # 中止时收不到 usage 块，提示词按估算计入（已实际计费）
+                    aborted_prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(current_prompt)
+                    logger.warning(
+                        f"[LLM流式] {name}({code}) 输出异常（{abort}），"
+                        f"生成约 {wasted_tokens} tokens 后中止，重新请求"
+                    )
+                    persist_llm_usage(
+                        {
+                            "prompt_tokens": aborted_prompt_tokens,
+                            "completion_tokens": wasted_tokens,
+                            "total_tokens": aborted_prompt_tokens + wasted_tokens,
+                        },
+                        abort.model or model_name,
+                        call_type="analysis_stream_aborted",
+                        stock_code=code,
+                    )
+                    self._notify_progress(
+                        progress_callback,
+                        {"type": "llm_stream_restart", "stock_code": code, "reason": abort.reason},
+                    )
+                    current_prompt = self._build_stream_restart_prompt(
+                        prompt, abort.reason, report_language=report_language
+                    )
+                    continue
                 elapsed = time.time() - start_time
+                if llm_usage.get("prompt_tokens"):
+                    logger.info(
+                        f"[LLM用量] prompt={llm_usage['prompt_tokens']} "
+                        f"(缓存命中 {llm_usage.get('cached_tokens', 0)}), "
+                        f"completion={llm_usage.get('completion_tokens', 0)}"
+                    )
 
                 # 记录响应信息
                 logger.info(
@@ -1254,6 +1472,9 @@ class GeminiAnalyzer:
                     break
 
             persist_llm_usage(llm_usage, model_used, call_type="analysis", stock_code=code)
+            # 占位补全的降级结果不缓存，用户重新分析时应再次请求 LLM
+            if response_cache is not None and result.success and not result.placeholder_filled:
+                response_cache.put(cache_key, result)
 
             logger.info(f"[LLM解析] {name}({code}) 分析完成: {result.trend_prediction}, 评分 {result.sentiment_score}")
 
@@ -1276,88 +1497,431 @@ class GeminiAnalyzer:
                 report_language=report_language,
             )
     
-    def _format_prompt(
-        self, 
-        context: Dict[str, Any], 
+    @staticmethod
+    def _resolve_stock_name(context: Dict[str, Any], code: str) -> str:
+        # 优先从上下文获取股票名称（由 main.py 传入）
+        name = context.get('stock_name')
+        if not name or name.startswith('股票'):
+            # 备选：从 realtime 中获取
+            if 'realtime' in context and context['realtime'].get('name'):
+                name = context['realtime']['name']
+            else:
+                # 最后从映射表获取
+                name = STOCK_NAME_MAP.get(code, f'股票{code}')
+        return name
+
+    def analyze_batch(
+        self,
+        items: List[Tuple[Dict[str, Any], Optional[str]]],
+        force_refresh: bool = False,
+    ) -> List[AnalysisResult]:
+        """
+        批量分析：把多只股票的紧凑上下文打包进一次请求（LLM_BATCH_SIZE）
+
+        模型按 JSON 数组逐只输出，每个元素经 schema 与完整性校验后还原为 AnalysisResult；
+        未通过校验的标的二分拆批重试，拆到单只时回退到 analyze() 单股流程。
+
+        Args:
+            items: [(增强上下文, 新闻内容)] 列表
+            force_refresh: 跳过本地结果缓存
+
+        Returns:
+            与 items 顺序一致的 AnalysisResult 列表
+        """
+        if len(items) <= 1 or not self.is_available():
+            return [
+                self.analyze(context, news_context=news_context, force_refresh=force_refresh)
+                for context, news_context in items
+            ]
+
+        config = self._get_runtime_config()
+        report_language = normalize_report_language(getattr(config, "report_language", "zh"))
+        results: List[Optional[AnalysisResult]] = [None] * len(items)
+        cache_entries: Dict[int, Tuple[Any, Optional[str]]] = {}
+        # 不同市场的系统提示词不同，按系统提示词分组后分别打包
+        groups: Dict[str, List[int]] = {}
+        for index, (context, news_context) in enumerate(items):
+            code = context.get('code', 'Unknown')
+            system_prompt = self._get_analysis_system_prompt(report_language, stock_code=code)
+            cache, cache_key = self._lookup_response_cache(config, context, news_context, system_prompt)
+            if cache is not None and not force_refresh:
+                cached = cache.get(cache_key)
+                if isinstance(cached, AnalysisResult):
+                    logger.info(f"[LLM缓存] {code} 命中本地结果缓存，跳过 LLM 调用")
+                    persist_llm_usage({}, cached.model_used or "unknown", call_type="analysis_cache_hit", stock_code=code)
+                    results[index] = cached
+                    continue
+            cache_entries[index] = (cache, cache_key)
+            groups.setdefault(system_prompt, []).append(index)
+
+        for system_prompt, indexes in groups.items():
+            self._analyze_batch_group(items, indexes, system_prompt, report_language, results, force_refresh)
+
+        for index, (cache, cache_key) in cache_entries.items():
+            result = results[index]
+            if cache is not None and result is not None and result.success and not result.placeholder_filled:
+                cache.put(cache_key, result)
+        return results
+
+    def _analyze_batch_group(
+        self,
+        items: List[Tuple[Dict[str, Any], Optional[str]]],
+        indexes: List[int],
+        system_prompt: str,
+        report_language: str,
+        results: List[Optional[AnalysisResult]],
+        force_refresh: bool,
+    ) -> None:
+        """
+        对一组标的发起批量请求；未通过校验的标的对半拆分后递归重试
+
+        请求本身抛异常（服务不可用等）时不再拆分：拆分只会把一次故障放大成
+        更多同样失败的请求，直接逐只走单股分析（其内部已有模型回退）。
+        """
+        if len(indexes) == 1:
+            context, news_context = items[indexes[0]]
+            results[indexes[0]] = self.analyze(context, news_context=news_context, force_refresh=force_refresh)
+            return
+        failed, request_failed = self._run_batch_request(items, indexes, system_prompt, report_language, results)
+        if not failed:
+            return
+        if request_failed:
+            logger.info(f"[LLM批量] 批量请求异常，{len(failed)} 只改为逐只分析")
+            for index in failed:
+                context, news_context = items[index]
+                results[index] = self.analyze(context, news_context=news_context, force_refresh=force_refresh)
+            return
+        logger.info(f"[LLM批量] {len(failed)}/{len(indexes)} 只未通过校验，拆批重试")
+        middle = (len(failed) + 1) // 2
+        for part in (failed[:middle], failed[middle:]):
+            if part:
+                self._analyze_batch_group(items, part, system_prompt, report_language, results, force_refresh)
+
+    def _run_batch_request(
+        self,
+        items: List[Tuple[Dict[str, Any], Optional[str]]],
+        indexes: List[int],
+        system_prompt: str,
+        report_language: str,
+        results: List[Optional[AnalysisResult]],
+    ) -> Tuple[List[int], bool]:
+        """发起一次批量请求并回填通过校验的结果，返回 (未通过的标的下标, 请求是否抛异常)"""
+        config = self._get_runtime_config()
+        request_delay = config.gemini_request_delay
+        if request_delay > 0:
+            time.sleep(request_delay)
+
+        entries = []
+        for index in indexes:
+            context, news_context = items[index]
+            code = context.get('code', 'Unknown')
+            entries.append((context, self._resolve_stock_name(context, code), news_context))
+        prompt, static_prefix = self._build_batch_prompt(entries, report_language)
+        codes = [context.get('code', 'Unknown') for context, _, _ in entries]
+        logger.info(
+            f"[LLM批量] 打包 {len(entries)} 只股票: {', '.join(codes)}，"
+            f"估算 prompt tokens={estimate_tokens(system_prompt) + estimate_tokens(prompt)}"
+        )
+
+        generation_config = {
+            "temperature": config.llm_temperature,
+            "max_output_tokens": int(getattr(config, "llm_batch_max_output_tokens", 16384)),
+        }
+        try:
+            response_text, model_used, llm_usage = self._call_litellm(
+                prompt,
+                generation_config,
+                system_prompt=system_prompt,
+                cacheable_prefix=static_prefix,
+            )
+        except Exception as exc:
+            logger.warning(f"[LLM批量] 批量请求失败（{len(entries)} 只）: {exc}")
+            return list(indexes), True
+        persist_llm_usage(llm_usage, model_used, call_type="analysis_batch")
+
+        elements = self._parse_batch_response(response_text)
+        by_code: Dict[str, Dict[str, Any]] = {}
+        for element in elements:
+            if isinstance(element, dict) and element.get("stock_code"):
+                by_code.setdefault(str(element["stock_code"]).strip().upper(), element)
+
+        failed: List[int] = []
+        for position, index in enumerate(indexes):
+            context, news_context = items[index]
+            element = by_code.get(str(context.get('code', '')).strip().upper())
+            if element is None and len(elements) == len(indexes):
+                # 模型漏写 stock_code 时按位置对应
+                candidate = elements[position]
+                if isinstance(candidate, dict) and not candidate.get("stock_code"):
+                    element = candidate
+            result = (
+                self._build_batch_item_result(element, context, news_context, model_used, report_language)
+                if element is not None else None
+            )
+            if result is None:
+                failed.append(index)
+            else:
+                results[index] = result
+        return failed, False
+
+    def _build_batch_prompt(
+        self,
+        entries: List[Tuple[Dict[str, Any], str, Optional[str]]],
+        report_language: str,
+    ) -> Tuple[str, str]:
+        """静态头部 + 逐只紧凑数据 + 数组输出要求，返回 (prompt, 可缓存前缀)"""
+        static_prefix = ""
+        blocks: List[str] = []
+        total = len(entries)
+        for position, (context, name, news_context) in enumerate(entries, 1):
+            analysis_prompt = self._build_analysis_prompt(context, name, news_context, report_language=report_language)
+            static_prefix = analysis_prompt.static_prefix
+            code = context.get('code', 'Unknown')
+            blocks.append(f"\n=== 标的 {position}/{total}：{name}（{code}） ===\n{analysis_prompt.data}")
+
+        codes = ", ".join(context.get('code', 'Unknown') for context, _, _ in entries)
+        if report_language == "en":
+            requirements = f"""
+---
+
+# Batch output requirements (highest priority)
+The data above covers {total} stocks: {codes}. Analyze each stock independently and do not mix data between them.
+- Output one JSON array with exactly {total} elements, in the same order as above.
+- Each element is a complete decision-dashboard JSON object in the format defined by the system prompt, plus a `stock_code` field holding that stock's code.
+- Output only the JSON array, with no other text.
+"""
+        else:
+            requirements = f"""
+---
+
+# 批量输出要求（最高优先级）
+以上共 {total} 只股票：{codes}。请逐只独立分析，不得混用不同股票的数据。
+- 输出一个 JSON 数组，恰好 {total} 个元素，顺序与上文一致；
+- 每个元素都是一个完整的决策仪表盘 JSON 对象（格式同系统提示词），并额外包含 `stock_code` 字段，值为对应股票代码；
+- 只输出 JSON 数组本身，不要输出任何其他文字。
+"""
+        return static_prefix + "".join(blocks) + requirements, static_prefix
+
+    @staticmethod
+    def _parse_batch_response(response_text: str) -> List[Any]:
+        """从响应中提取 JSON 数组（截断的尾部由 json_repair 补齐，残缺元素会在校验时被拒绝）"""
+        cleaned = (response_text or "").replace('```json', '').replace('```', '').strip()
+        start = cleaned.find('[')
+        if start < 0:
+            return []
+        # 不按最后一个 ']' 截取：截断的响应里它可能落在前一个完整元素内部（如 risk_alerts
+        # 列表），截取会丢掉该元素尾部的字段；数组后的说明文字由 json_repair 忽略
+        try:
+            parsed = repair_json(cleaned[start:], return_objects=True)
+        except Exception as exc:
+            logger.warning(f"[LLM批量] JSON 数组解析失败: {exc}")
+            return []
+        return parsed if isinstance(parsed, list) else []
+
+    def _build_batch_item_result(
+        self,
+        element: Dict[str, Any],
+        context: Dict[str, Any],
+        news_context: Optional[str],
+        model_used: str,
+        report_language: str,
+    ) -> Optional[AnalysisResult]:
+        """严格校验单个数组元素（schema + 必填字段），通过则还原为 AnalysisResult"""
+        code = context.get('code', 'Unknown')
+        if not isinstance(element, dict):
+            return None
+        try:
+            AnalysisReportSchema.model_validate(element)
+        except Exception as exc:
+            logger.info(f"[LLM批量] {code} 未通过 schema 校验: {str(exc)[:100]}")
+            return None
+        raw = json.dumps(element, ensure_ascii=False)
+        result = self._parse_response(raw, code, self._resolve_stock_name(context, code))
+        if not result.success:
+            return None
+        passed, missing_fields = self._check_content_integrity(result)
+        if not passed:
+            logger.info(f"[LLM批量] {code} 必填字段缺失 {missing_fields}")
+            return None
+        result.raw_response = raw
+        result.search_performed = bool(news_context)
+        result.market_snapshot = self._build_market_snapshot(context)
+        result.model_used = model_used
+        result.report_language = report_language
+        return result
+
+    def _lookup_response_cache(
+        self,
+        config: Config,
+        context: Dict[str, Any],
+        news_context: Optional[str],
+        system_prompt: str,
+    ) -> Tuple[Any, Optional[str]]:
+        """返回 (缓存实例, 缓存键)；未启用或出错时返回 (None, None)"""
+        try:
+            from src.services.llm_response_cache import get_llm_response_cache
+
+            cache = get_llm_response_cache(config)
+            if cache is None:
+                return None, None
+            models = [config.litellm_model] + list(config.litellm_fallback_models or [])
+            system_digest = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:16]
+            key = cache.make_key(
+                context,
+                news_context,
+                model=",".join(m for m in models if m),
+                prompt_version=f"{ANALYSIS_PROMPT_VERSION}:{system_digest}",
+            )
+            return cache, key
+        except Exception as exc:
+            logger.debug(f"[LLM缓存] 计算缓存键失败，跳过缓存: {exc}")
+            return None, None
+
+    def _build_static_prompt_prefix(self, report_language: str, use_legacy_default_prompt: bool) -> str:
+        """
+        用户提示词的静态头部：数据字段说明 + 分析任务要求 + 输出语言要求
+
+        与股票无关，同一次运行内逐字节一致，紧跟在系统提示词之后构成可缓存前缀。
+        """
+        no_data_text = get_no_data_text(report_language)
+        if use_legacy_default_prompt:
+            trend_legend = (
+                "- 趋势分析：MA5>MA10>MA20为多头；乖离率(MA5) 超过5%严禁追高，"
+                "买入理由/风险因素为系统分析理由"
+            )
+            focus = """1. ❓ 是否满足 MA5>MA10>MA20 多头排列？
+2. ❓ 当前乖离率是否在安全范围内（<5%）？—— 超过5%必须标注"严禁追高"
+3. ❓ 量能是否配合（缩量回调/放量突破）？
+4. ❓ 筹码结构是否健康？
+5. ❓ 消息面有无重大利空？（减持、处罚、业绩变脸等）"""
+        else:
+            trend_legend = (
+                "- 技术与结构分析：供激活技能判断参考，均线排列需结合激活技能判断结构强弱；"
+                "价格位置(MA5) 偏离超过5%需谨慎评估追高风险"
+            )
+            focus = """1. ❓ 当前结构是否满足激活技能的关键触发条件？
+2. ❓ 当前入场位置与风险回报是否合理？若偏离过大，请明确说明等待条件
+3. ❓ 量能、波动与筹码结构是否支持当前结论？
+4. ❓ 消息面有无重大利空或与技能结论冲突的信息？
+5. ❓ 若结论成立，具体触发条件、止损位、观察点分别是什么？"""
+
+        prefix = f"""# 决策仪表盘分析请求
+
+## 📋 数据格式说明
+文末【股票数据】按区块给出：首行为字段名、次行为数值，以 `|` 分隔；N/A 表示数据缺失。
+- 今日行情：价格单位为元，成交量/成交额已换算为万/亿
+- 均线系统（关键判断指标）：MA5 短期、MA10 中短期、MA20 中期趋势线；均线形态为多头/空头/缠绕
+- 实时行情：量比、换手率为关键活跃度指标，60日涨跌幅反映中期表现
+- 财报与分红（价值投资口径）：TTM 股息率 = 近12个月每股现金分红 / 当前价格 × 100%，仅现金分红、税前口径；字段为 N/A 或缺失时请明确写“数据缺失，无法判断”，禁止编造
+- 筹码分布（效率指标）：获利比例 70-90% 时警惕；现价应高于平均成本 5-15%；90%筹码集中度 <15% 为集中
+{trend_legend}
+- 舆情情报：请重点提取
+  1. 🚨 **风险警报**：减持、处罚、利空
+  2. 🎯 **利好催化**：业绩、合同、政策
+  3. 📊 **业绩预期**：年报预告、业绩快报
+  4. 🕒 **时间规则（强制）**：
+     - 输出到 `risk_alerts` / `positive_catalysts` / `latest_news` 的每一条都必须带具体日期（YYYY-MM-DD）
+     - 超出新闻窗口（见舆情情报区块）的新闻一律忽略
+     - 时间未知、无法确定发布日期的新闻一律忽略
+
+## ✅ 分析任务
+为【股票数据】中的标的生成【决策仪表盘】，严格按照 JSON 格式输出。
+
+### ⚠️ 重要：输出正确的股票名称格式
+正确的股票名称格式为“股票名称（股票代码）”，例如“贵州茅台（600519）”。
+如果数据中的股票名称为“股票+代码”形式或不正确，请在分析开头**明确输出该股票的正确中文全称**。
+
+### 重点关注（必须明确回答）：
+{focus}
+
+### 决策仪表盘要求：
+- **股票名称**：必须输出正确的中文全称（如"贵州茅台"而非"股票600519"）
+- **核心结论**：一句话说清该买/该卖/该等
+- **持仓分类建议**：空仓者怎么做 vs 持仓者怎么做
+- **具体狙击点位**：买入价、止损价、目标价（精确到分）
+- **检查清单**：每项用 ✅/⚠️/❌ 标记
+- **消息面时间合规**：`latest_news`、`risk_alerts`、`positive_catalysts` 不得包含超出新闻窗口或时间未知的信息
+"""
+        if report_language == "en":
+            prefix += """
+### Output language requirements (highest priority)
+- Keep every JSON key exactly as defined above; do not translate keys.
+- `decision_type` must remain `buy`, `hold`, or `sell`.
+- All human-readable JSON values must be in English.
+- This includes `stock_name`, `trend_prediction`, `operation_advice`, `confidence_level`, all nested dashboard text, checklist items, and every summary field.
+- Use the common English company name when you are confident. If not, keep the listed company name rather than inventing one.
+- When data is missing, explain it in English instead of Chinese.
+"""
+        else:
+            prefix += f"""
+### 输出语言要求（最高优先级）
+- 所有 JSON 键名必须保持不变，不要翻译键名。
+- `decision_type` 必须保持为 `buy`、`hold`、`sell`。
+- 所有面向用户的人类可读文本值必须使用中文。
+- 当数据缺失时，请使用中文直接说明“{no_data_text}，无法判断”。
+"""
+        return prefix + "\n---\n\n# 股票数据\n"
+
+    def _build_analysis_prompt(
+        self,
+        context: Dict[str, Any],
         name: str,
         news_context: Optional[str] = None,
         report_language: str = "zh",
-    ) -> str:
+    ) -> AnalysisPrompt:
         """
-        格式化分析提示词（决策仪表盘 v2.0）
-        
-        包含：技术指标、实时行情（量比/换手率）、筹码分布、趋势分析、新闻
-        
-        Args:
-            context: 技术面数据上下文（包含增强数据）
-            name: 股票名称（默认值，可能被上下文覆盖）
-            news_context: 预先搜索的新闻内容
+        组装分析提示词：静态头部（可缓存）+ 按区块紧凑编码的个股数据
+
+        个股数据以“字段行 + 数值行”的管道分隔表格表示，字段含义与判断标准
+        统一放在静态头部说明，不再随每只股票重复发送。
         """
         code = context.get('code', 'Unknown')
         report_language = normalize_report_language(report_language)
         _, _, use_legacy_default_prompt = self._get_skill_prompt_sections()
-        
+
         # 优先使用上下文中的股票名称（从 realtime_quote 获取）
         stock_name = context.get('stock_name', name)
         if not stock_name or stock_name == f'股票{code}':
             stock_name = STOCK_NAME_MAP.get(code, f'股票{code}')
-            
+
         today = context.get('today', {})
         unknown_text = get_unknown_text(report_language)
-        no_data_text = get_no_data_text(report_language)
-        
-        # ========== 构建决策仪表盘格式的输入 ==========
-        prompt = f"""# 决策仪表盘分析请求
-
-## 📊 股票基础信息
-| 项目 | 数据 |
-|------|------|
-| 股票代码 | **{code}** |
-| 股票名称 | **{stock_name}** |
-| 分析日期 | {context.get('date', unknown_text)} |
-
----
-
-## 📈 技术面数据
-
-### 今日行情
-| 指标 | 数值 |
-|------|------|
-| 收盘价 | {today.get('close', 'N/A')} 元 |
-| 开盘价 | {today.get('open', 'N/A')} 元 |
-| 最高价 | {today.get('high', 'N/A')} 元 |
-| 最低价 | {today.get('low', 'N/A')} 元 |
-| 涨跌幅 | {today.get('pct_chg', 'N/A')}% |
-| 成交量 | {self._format_volume(today.get('volume'))} |
-| 成交额 | {self._format_amount(today.get('amount'))} |
-
-### 均线系统（关键判断指标）
-| 均线 | 数值 | 说明 |
-|------|------|------|
-| MA5 | {today.get('ma5', 'N/A')} | 短期趋势线 |
-| MA10 | {today.get('ma10', 'N/A')} | 中短期趋势线 |
-| MA20 | {today.get('ma20', 'N/A')} | 中期趋势线 |
-| 均线形态 | {context.get('ma_status', unknown_text)} | 多头/空头/缠绕 |
-"""
-        
-        # 添加实时行情数据（量比、换手率等）
+        sections: List[Tuple[str, str]] = []
+
+        def add(stage: str, title: str, body: str) -> None:
+            sections.append((stage, f"\n## {title}\n{body}\n"))
+
+        add("quote", "📊 基础信息", _compact_table(
+            ["股票代码", "股票名称", "分析日期"],
+            [code, stock_name, context.get('date', unknown_text)],
+        ))
+        add("quote", "📈 今日行情", _compact_table(
+            ["收盘价", "开盘价", "最高价", "最低价", "涨跌幅%", "成交量", "成交额"],
+            [
+                today.get('close'), today.get('open'), today.get('high'), today.get('low'),
+                today.get('pct_chg'), self._format_volume(today.get('volume')),
+                self._format_amount(today.get('amount')),
+            ],
+        ))
+        add("indicators", "均线系统", _compact_table(
+            ["MA5", "MA10", "MA20", "均线形态"],
+            [today.get('ma5'), today.get('ma10'), today.get('ma20'), context.get('ma_status', unknown_text)],
+        ))
+
+        # 实时行情数据（量比、换手率等）
         if 'realtime' in context:
             rt = context['realtime']
-            prompt += f"""
-### 实时行情增强数据
-| 指标 | 数值 | 解读 |
-|------|------|------|
-| 当前价格 | {rt.get('price', 'N/A')} 元 | |
-| **量比** | **{rt.get('volume_ratio', 'N/A')}** | {rt.get('volume_ratio_desc', '')} |
-| **换手率** | **{rt.get('turnover_rate', 'N/A')}%** | |
-| 市盈率(动态) | {rt.get('pe_ratio', 'N/A')} | |
-| 市净率 | {rt.get('pb_ratio', 'N/A')} | |
-| 总市值 | {self._format_amount(rt.get('total_mv'))} | |
-| 流通市值 | {self._format_amount(rt.get('circ_mv'))} | |
-| 60日涨跌幅 | {rt.get('change_60d', 'N/A')}% | 中期表现 |
-"""
+            add("quote", "实时行情", _compact_table(
+                ["当前价格", "量比", "量比解读", "换手率%", "市盈率(动态)", "市净率", "总市值", "流通市值", "60日涨跌幅%"],
+                [
+                    rt.get('price'), rt.get('volume_ratio'), rt.get('volume_ratio_desc') or '',
+                    rt.get('turnover_rate'), rt.get('pe_ratio'), rt.get('pb_ratio'),
+                    self._format_amount(rt.get('total_mv')), self._format_amount(rt.get('circ_mv')),
+                    rt.get('change_60d'),
+                ],
+            ))
 
-        # 添加财报与分红（价值投资口径）
+        # 财报与分红（价值投资口径）
         fundamental_context = context.get("fundamental_context") if isinstance(context, dict) else None
         earnings_block = (
             fundamental_context.get("earnings", {})
@@ -1382,103 +1946,65 @@ class GeminiAnalyzer:
         if isinstance(financial_report, dict) or isinstance(dividend_metrics, dict):
             financial_report = financial_report if isinstance(financial_report, dict) else {}
             dividend_metrics = dividend_metrics if isinstance(dividend_metrics, dict) else {}
-            ttm_yield = dividend_metrics.get("ttm_dividend_yield_pct", "N/A")
-            ttm_cash = dividend_metrics.get("ttm_cash_dividend_per_share", "N/A")
-            ttm_count = dividend_metrics.get("ttm_event_count", "N/A")
-            report_date = financial_report.get("report_date", "N/A")
-            prompt += f"""
-### 财报与分红（价值投资口径）
-| 指标 | 数值 | 说明 |
-|------|------|------|
-| 最近报告期 | {report_date} | 来自结构化财报字段 |
-| 营业收入 | {financial_report.get('revenue', 'N/A')} | |
-| 归母净利润 | {financial_report.get('net_profit_parent', 'N/A')} | |
-| 经营现金流 | {financial_report.get('operating_cash_flow', 'N/A')} | |
-| ROE | {financial_report.get('roe', 'N/A')} | |
-| 近12个月每股现金分红 | {ttm_cash} | 仅现金分红、税前口径 |
-| TTM 股息率 | {ttm_yield} | 公式：近12个月每股现金分红 / 当前价格 × 100% |
-| TTM 分红事件数 | {ttm_count} | |
-
-> 若上述字段为 N/A 或缺失，请明确写“数据缺失，无法判断”，禁止编造。
-"""
+            add("fundamentals", "财报与分红（价值投资口径）", _compact_table(
+                ["最近报告期", "营业收入", "归母净利润", "经营现金流", "ROE",
+                 "近12个月每股现金分红", "TTM股息率", "TTM分红事件数"],
+                [
+                    financial_report.get("report_date"), financial_report.get('revenue'),
+                    financial_report.get('net_profit_parent'), financial_report.get('operating_cash_flow'),
+                    financial_report.get('roe'), dividend_metrics.get("ttm_cash_dividend_per_share"),
+                    dividend_metrics.get("ttm_dividend_yield_pct"), dividend_metrics.get("ttm_event_count"),
+                ],
+            ))
 
-        # 添加筹码分布数据
+        # 筹码分布数据
         if 'chip' in context:
             chip = context['chip']
-            profit_ratio = chip.get('profit_ratio', 0)
-            prompt += f"""
-### 筹码分布数据（效率指标）
-| 指标 | 数值 | 健康标准 |
-|------|------|----------|
-| **获利比例** | **{profit_ratio:.1%}** | 70-90%时警惕 |
-| 平均成本 | {chip.get('avg_cost', 'N/A')} 元 | 现价应高于5-15% |
-| 90%筹码集中度 | {chip.get('concentration_90', 0):.2%} | <15%为集中 |
-| 70%筹码集中度 | {chip.get('concentration_70', 0):.2%} | |
-| 筹码状态 | {chip.get('chip_status', unknown_text)} | |
-"""
-        
-        # 添加趋势分析结果（仅隐式内建 bull_trend 默认回退保留旧口径）
+            add("indicators", "筹码分布", _compact_table(
+                ["获利比例", "平均成本", "90%筹码集中度", "70%筹码集中度", "筹码状态"],
+                [
+                    f"{chip.get('profit_ratio', 0):.1%}", chip.get('avg_cost'),
+                    f"{chip.get('concentration_90', 0):.2%}", f"{chip.get('concentration_70', 0):.2%}",
+                    chip.get('chip_status', unknown_text),
+                ],
+            ))
+
+        # 趋势分析结果（仅隐式内建 bull_trend 默认回退保留旧口径）
         if 'trend_analysis' in context:
             trend = context['trend_analysis']
             if use_legacy_default_prompt:
+                title, bias_label, reasons_label = "趋势分析预判（基于交易理念）", "乖离率", "买入理由"
                 bias_warning = "🚨 超过5%，严禁追高！" if trend.get('bias_ma5', 0) > 5 else "✅ 安全范围"
-                prompt += f"""
-### 趋势分析预判（基于交易理念）
-| 指标 | 数值 | 判定 |
-|------|------|------|
-| 趋势状态 | {trend.get('trend_status', unknown_text)} | |
-| 均线排列 | {trend.get('ma_alignment', unknown_text)} | MA5>MA10>MA20为多头 |
-| 趋势强度 | {trend.get('trend_strength', 0)}/100 | |
-| **乖离率(MA5)** | **{trend.get('bias_ma5', 0):+.2f}%** | {bias_warning} |
-| 乖离率(MA10) | {trend.get('bias_ma10', 0):+.2f}% | |
-| 量能状态 | {trend.get('volume_status', unknown_text)} | {trend.get('volume_trend', '')} |
-| 系统信号 | {trend.get('buy_signal', unknown_text)} | |
-| 系统评分 | {trend.get('signal_score', 0)}/100 | |
-
-#### 系统分析理由
-**买入理由**：
-{chr(10).join('- ' + r for r in trend.get('signal_reasons', ['无'])) if trend.get('signal_reasons') else '- 无'}
-
-**风险因素**：
-{chr(10).join('- ' + r for r in trend.get('risk_factors', ['无'])) if trend.get('risk_factors') else '- 无'}
-"""
             else:
+                title, bias_label, reasons_label = "技术与结构分析（供激活技能判断参考）", "价格位置", "支持因素"
                 bias_warning = (
                     "🚨 偏离较大，需谨慎评估追高风险"
                     if trend.get('bias_ma5', 0) > 5
                     else "✅ 位置相对可控"
                 )
-                prompt += f"""
-### 技术与结构分析（供激活技能判断参考）
-| 指标 | 数值 | 说明 |
-|------|------|------|
-| 趋势状态 | {trend.get('trend_status', unknown_text)} | |
-| 均线排列 | {trend.get('ma_alignment', unknown_text)} | 结合激活技能判断结构强弱 |
-| 趋势强度 | {trend.get('trend_strength', 0)}/100 | |
-| **价格位置(MA5)** | **{trend.get('bias_ma5', 0):+.2f}%** | {bias_warning} |
-| 价格位置(MA10) | {trend.get('bias_ma10', 0):+.2f}% | |
-| 量能状态 | {trend.get('volume_status', unknown_text)} | {trend.get('volume_trend', '')} |
-| 系统信号 | {trend.get('buy_signal', unknown_text)} | |
-| 系统评分 | {trend.get('signal_score', 0)}/100 | |
-
-#### 系统分析理由
-**支持因素**：
-{chr(10).join('- ' + r for r in trend.get('signal_reasons', ['无'])) if trend.get('signal_reasons') else '- 无'}
-
-**风险因素**：
-{chr(10).join('- ' + r for r in trend.get('risk_factors', ['无'])) if trend.get('risk_factors') else '- 无'}
-"""
-        
-        # 添加昨日对比数据
+            table = _compact_table(
+                ["趋势状态", "均线排列", "趋势强度", f"{bias_label}(MA5)", "判定", f"{bias_label}(MA10)",
+                 "量能状态", "量能趋势", "系统信号", "系统评分"],
+                [
+                    trend.get('trend_status', unknown_text), trend.get('ma_alignment', unknown_text),
+                    f"{trend.get('trend_strength', 0)}/100", f"{trend.get('bias_ma5', 0):+.2f}%", bias_warning,
+                    f"{trend.get('bias_ma10', 0):+.2f}%", trend.get('volume_status', unknown_text),
+                    trend.get('volume_trend', ''), trend.get('buy_signal', unknown_text),
+                    f"{trend.get('signal_score', 0)}/100",
+                ],
+            )
+            reasons = "；".join(trend.get('signal_reasons') or []) or "无"
+            risks = "；".join(trend.get('risk_factors') or []) or "无"
+            add("indicators", title, f"{table}\n{reasons_label}：{reasons}\n风险因素：{risks}")
+
+        # 昨日对比数据
         if 'yesterday' in context:
-            volume_change = context.get('volume_change_ratio', 'N/A')
-            prompt += f"""
-### 量价变化
-- 成交量较昨日变化：{volume_change}倍
-- 价格较昨日变化：{context.get('price_change_ratio', 'N/A')}%
-"""
-        
-        # 添加新闻搜索结果（重点区域）
+            add("quote", "量价变化", _compact_table(
+                ["成交量较昨日(倍)", "价格较昨日%"],
+                [context.get('volume_change_ratio'), context.get('price_change_ratio')],
+            ))
+
+        # 新闻搜索结果（重点区域）
         news_window_days: Optional[int] = None
         context_window = context.get("news_window_days")
         try:
@@ -1495,117 +2021,57 @@ class GeminiAnalyzer:
                 news_max_age_days=getattr(prompt_config, "news_max_age_days", 3),
                 news_strategy_profile=getattr(prompt_config, "news_strategy_profile", "short"),
             )
-        prompt += """
----
-
-## 📰 舆情情报
-"""
         if news_context:
-            prompt += f"""
-以下是 **{stock_name}({code})** 近{news_window_days}日的新闻搜索结果，请重点提取：
-1. 🚨 **风险警报**：减持、处罚、利空
-2. 🎯 **利好催化**：业绩、合同、政策
-3. 📊 **业绩预期**：年报预告、业绩快报
-4. 🕒 **时间规则（强制）**：
-   - 输出到 `risk_alerts` / `positive_catalysts` / `latest_news` 的每一条都必须带具体日期（YYYY-MM-DD）
-   - 超出近{news_window_days}日窗口的新闻一律忽略
-   - 时间未知、无法确定发布日期的新闻一律忽略
-
+            add("news", "📰 舆情情报", f"""以下是 **{stock_name}({code})** 近{news_window_days}日的新闻搜索结果（超出近{news_window_days}日窗口的新闻一律忽略）：
 ```
 {news_context}
-```
-"""
+```""")
         else:
-            prompt += """
-未搜索到该股票近期的相关新闻。请主要依据技术面数据进行分析。
-"""
+            add("news", "📰 舆情情报", "未搜索到该股票近期的相关新闻。请主要依据技术面数据进行分析。")
 
-        # 注入缺失数据警告
+        # 缺失数据警告 / 指数 ETF 约束
+        notes: List[str] = []
         if context.get('data_missing'):
-            prompt += """
-⚠️ **数据缺失警告**
+            notes.append("""⚠️ **数据缺失警告**
 由于接口限制，当前无法获取完整的实时行情和技术指标数据。
 请 **忽略上述表格中的 N/A 数据**，重点依据 **【📰 舆情情报】** 中的新闻进行基本面和情绪面分析。
-在回答技术面问题（如均线、乖离率）时，请直接说明“数据缺失，无法判断”，**严禁编造数据**。
-"""
-
-        # 明确的输出要求
-        prompt += f"""
----
-
-## ✅ 分析任务
-
-请为 **{stock_name}({code})** 生成【决策仪表盘】，严格按照 JSON 格式输出。
-"""
+在回答技术面问题（如均线、乖离率）时，请直接说明“数据缺失，无法判断”，**严禁编造数据**。""")
         if context.get('is_index_etf'):
-            prompt += """
-> ⚠️ **指数/ETF 分析约束**：该标的为指数跟踪型 ETF 或市场指数。
+            notes.append("""> ⚠️ **指数/ETF 分析约束**：该标的为指数跟踪型 ETF 或市场指数。
 > - 风险分析仅关注：**指数走势、跟踪误差、市场流动性**
 > - 严禁将基金公司的诉讼、声誉、高管变动纳入风险警报
 > - 业绩预期基于**指数成分股整体表现**，而非基金公司财报
-> - `risk_alerts` 中不得出现基金管理人相关的公司经营风险
-
-"""
-        prompt += f"""
-### ⚠️ 重要：输出正确的股票名称格式
-正确的股票名称格式为“股票名称（股票代码）”，例如“贵州茅台（600519）”。
-如果上方显示的股票名称为"股票{code}"或不正确，请在分析开头**明确输出该股票的正确中文全称**。
-"""
-        if use_legacy_default_prompt:
-            prompt += f"""
-
-### 重点关注（必须明确回答）：
-1. ❓ 是否满足 MA5>MA10>MA20 多头排列？
-2. ❓ 当前乖离率是否在安全范围内（<5%）？—— 超过5%必须标注"严禁追高"
-3. ❓ 量能是否配合（缩量回调/放量突破）？
-4. ❓ 筹码结构是否健康？
-5. ❓ 消息面有无重大利空？（减持、处罚、业绩变脸等）
-"""
-        else:
-            prompt += f"""
-
-### 重点关注（必须明确回答）：
-1. ❓ 当前结构是否满足激活技能的关键触发条件？
-2. ❓ 当前入场位置与风险回报是否合理？若偏离过大，请明确说明等待条件
-3. ❓ 量能、波动与筹码结构是否支持当前结论？
-4. ❓ 消息面有无重大利空或与技能结论冲突的信息？
-5. ❓ 若结论成立，具体触发条件、止损位、观察点分别是什么？
-"""
-        prompt += f"""
+> - `risk_alerts` 中不得出现基金管理人相关的公司经营风险""")
+        notes.append(
+            f"请为 **{stock_name}({code})** 输出完整的 JSON 格式决策仪表盘；"
+            f"消息面只采用近{news_window_days}日且日期明确的信息。"
+        )
+        sections.append(("task", "\n---\n\n" + "\n\n".join(notes) + "\n"))
 
-### 决策仪表盘要求：
-- **股票名称**：必须输出正确的中文全称（如"贵州茅台"而非"股票600519"）
-- **核心结论**：一句话说清该买/该卖/该等
-- **持仓分类建议**：空仓者怎么做 vs 持仓者怎么做
-- **具体狙击点位**：买入价、止损价、目标价（精确到分）
-- **检查清单**：每项用 ✅/⚠️/❌ 标记
-- **消息面时间合规**：`latest_news`、`risk_alerts`、`positive_catalysts` 不得包含超出近{news_window_days}日或时间未知的信息
+        return AnalysisPrompt(
+            static_prefix=self._build_static_prompt_prefix(report_language, use_legacy_default_prompt),
+            sections=sections,
+        )
 
-请输出完整的 JSON 格式决策仪表盘。"""
+    def _format_prompt(
+        self,
+        context: Dict[str, Any],
+        name: str,
+        news_context: Optional[str] = None,
+        report_language: str = "zh",
+    ) -> str:
+        """
+        格式化分析提示词（决策仪表盘 v2.0）
 
-        if report_language == "en":
-            prompt += """
+        包含：技术指标、实时行情（量比/换手率）、筹码分布、趋势分析、新闻
 
-### Output language requirements (highest priority)
-- Keep every JSON key exactly as defined above; do not translate keys.
-- `decision_type` must remain `buy`, `hold`, or `sell`.
-- All human-readable JSON values must be in English.
-- This includes `stock_name`, `trend_prediction`, `operation_advice`, `confidence_level`, all nested dashboard text, checklist items, and every summary field.
-- Use the common English company name when you are confident. If not, keep the listed company name rather than inventing one.
-- When data is missing, explain it in English instead of Chinese.
-"""
-        else:
-            prompt += f"""
+        Args:
+            context: 技术面数据上下文（包含增强数据）
+            name: 股票名称（默认值，可能被上下文覆盖）
+            news_context: 预先搜索的新闻内容
+        """
+        return self._build_analysis_prompt(context, name, news_context, report_language=report_language).text
 
-### 输出语言要求（最高优先级）
-- 所有 JSON 键名必须保持不变，不要翻译键名。
-- `decision_type` 必须保持为 `buy`、`hold`、`sell`。
-- 所有面向用户的人类可读文本值必须使用中文。
-- 当数据缺失时，请使用中文直接说明“{no_data_text}，无法判断”。
-"""
-        
-        return prompt
-    
     def _format_volume(self, volume: Optional[float]) -> str:
         """格式化成交量显示"""
         if volume is None:
@@ -1755,6 +2221,58 @@ class GeminiAnalyzer:
             complement,
         ])
 
+    def _build_stream_restart_prompt(self, base_prompt: str, reason: str, report_language: str = "zh") -> str:
+        """Build re-prompt after a streamed response was aborted early."""
+        if normalize_report_language(report_language) == "en":
+            hints = {
+                "no_json": "it did not start with the JSON object",
+                "repetition": "it kept repeating the same content",
+                "bad_field": "sentiment_score was not an integer or dashboard was not an object",
+            }
+            return (
+                f"{base_prompt}\n\n### The previous output was aborted because {hints.get(reason, 'it was malformed')}. "
+                "Output exactly one complete JSON object following the format above, with no other text."
+            )
+        hints = {
+            "no_json": "没有以 JSON 对象开头",
+            "repetition": "出现了重复循环的内容",
+            "bad_field": "sentiment_score 不是整数或 dashboard 不是对象",
+        }
+        return (
+            f"{base_prompt}\n\n### 上一次输出因{hints.get(reason, '格式异常')}已被中止。"
+            "请严格按上述格式只输出一个完整的 JSON 对象，不要输出任何其他文字。"
+        )
+
+    def _new_stream_monitor(
+        self,
+        code: str,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]],
+        abort_enabled: bool = True,
+    ) -> DashboardStreamMonitor:
+        def _on_field(field_name: str, done: int, expected: int) -> None:
+            self._notify_progress(progress_callback, {
+                "type": "llm_stream",
+                "stock_code": code,
+                "field": field_name,
+                "fields_done": done,
+                "fields_expected": expected,
+            })
+
+        return DashboardStreamMonitor(
+            expected_fields=AnalysisReportSchema.model_fields,
+            on_field=_on_field,
+            abort_enabled=abort_enabled,
+        )
+
+    @staticmethod
+    def _notify_progress(callback: Optional[Callable[[Dict[str, Any]], None]], event: Dict[str, Any]) -> None:
+        if callback is None:
+            return
+        try:
+            callback(event)
+        except Exception as exc:
+            logger.debug(f"[LLM流式] 进度回调失败: {exc}")
+
     def _apply_placeholder_fill(self, result: AnalysisResult, missing_fields: List[str]) -> None:
         """Delegate to module-level apply_placeholder_fill."""
         apply_placeholder_fill(result, missing_fields)
@@ -444,6 +444,22 @@ class Config:
 
     # Unified temperature for all LLM calls (LLM_TEMPERATURE); legacy per-provider temps are fallback only
     llm_temperature: float = 0.7
+    # 分析提示词前缀缓存：Claude 系模型为系统提示词与静态头部加 cache_control 断点
+    llm_prompt_cache_enabled: bool = True
+    # 本地分析结果缓存：归一化输入未变时复用上次 AnalysisResult，跳过 LLM 调用（默认关闭）
+    llm_response_cache_enabled: bool = False
+    llm_response_cache_dir: str = "./data/llm_response_cache"
+    llm_response_cache_ttl_seconds: int = 600
+    llm_response_cache_max_entries: int = 500
+    llm_response_cache_max_mb: int = 50
+    # 数值分桶宽度（百分比），相对变化小于该值的行情视为相同输入
+    llm_response_cache_bucket_pct: float = 0.5
+    # 流式输出：边生成边解析报告 JSON，推送字段级进度；结构明显异常时提前中止并重新请求
+    llm_stream_enabled: bool = False
+    llm_stream_max_restarts: int = 1
+    # 批量分析：精简/简洁报告下每次 LLM 请求打包的股票数（1 = 关闭）
+    llm_batch_size: int = 1
+    llm_batch_max_output_tokens: int = 16384
 
     # --- Multi-channel LLM config (new) ---
     # LITELLM_CONFIG: path to a standard litellm_config.yaml file (most powerful)
@@ -563,6 +579,7 @@ class Config:
     custom_webhook_urls: List[str] = field(default_factory=list)
     custom_webhook_bearer_token: Optional[str] = None  # Bearer Token（用于需要认证的 Webhook）
     webhook_verify_ssl: bool = True  # Webhook HTTPS 证书校验，false 可支持自签名（有 MITM 风险）
+    notification_channel_timeout: int = 60  # 多渠道并发推送时单个渠道的超时秒数（0 = 不限）
 
     # Discord 通知配置
     discord_bot_token: Optional[str] = None  # Discord Bot Token
@@ -625,9 +642,34 @@ class Config:
     # === 数据库配置 ===
     database_path: str = "./data/stock_analysis.db"
 
+    # SQLite 性能配置（仅文件数据库生效，连接建立时设置）
+    sqlite_journal_mode: str = "WAL"  # WAL 允许读写并发；DELETE 为 SQLite 默认行为
+    sqlite_synchronous: str = "NORMAL"  # WAL 下 NORMAL 不会损坏数据库，断电时可能丢失最近的事务
+    sqlite_busy_timeout_ms: int = 5000  # 遇到写锁时的等待上限（毫秒）
+    sqlite_cache_size_mb: int = 64  # 每个连接的页缓存
+    sqlite_mmap_size_mb: int = 256  # 内存映射读取上限（0 = 关闭）
+    sqlite_read_pool_size: int = 8  # API 只读连接池大小（0 = 读写共用连接池）
+
     # 是否保存分析上下文快照（用于历史回溯）
     save_context_snapshot: bool = True
 
+    # LLM 用量记账：后台批量写库（预写文件防崩溃丢失），false 则每次调用同步写入
+    llm_usage_buffer_enabled: bool = True
+    llm_usage_batch_size: int = 50  # 缓冲达到该条数立即刷盘
+    llm_usage_flush_interval: float = 5.0  # 定时刷盘间隔（秒）
+
+    # 数据保留：定时归档并分批删除过期的时序数据（0 天 = 永久保留）
+    retention_enabled: bool = False
+    retention_interval_hours: int = 24  # 调度模式下的执行间隔
+    retention_news_days: int = 180  # news_intel（按 fetched_at）
+    retention_fundamental_days: int = 90  # fundamental_snapshot（按 created_at）
+    retention_analysis_days: int = 0  # analysis_history（连带回测结果）
+    retention_llm_usage_days: int = 90  # llm_usage 明细（小时汇总永久保留）
+    retention_conversation_days: int = 180  # 按会话最后活跃时间整会话删除
+    retention_batch_size: int = 500  # 每批删除行数（每批一个短事务）
+    retention_archive_dir: str = ""  # 按月归档目录，空 = 数据库同目录下的 archive/；设为 off 关闭归档
+    retention_vacuum_mode: str = "INCREMENTAL"  # INCREMENTAL | FULL | OFF
+
     # === 回测配置 ===
     backtest_enabled: bool = True
     backtest_eval_window_days: int = 10
@@ -641,6 +683,16 @@ class Config:
     
     # === 系统配置 ===
     max_workers: int = 3  # 低并发防封禁
+    # Web 任务队列优先级通道并发上限（0 = 自动：interactive=MAX_WORKERS，其余=MAX_WORKERS-1）
+    task_lane_interactive_max_concurrency: int = 0
+    task_lane_scheduled_max_concurrency: int = 0
+    task_lane_bulk_max_concurrency: int = 0
+    # 任务队列后端：memory（进程内）| database（analysis_tasks 表，租约 + 重试，支持多 worker 进程）
+    task_queue_backend: str = "memory"
+    task_queue_lease_seconds: int = 120  # 任务租约时长，worker 每 1/3 租约续约一次
+    task_queue_max_attempts: int = 3  # 单任务最大执行次数（含首次）
+    task_queue_embedded_worker: bool = True  # database 后端下 API 进程是否同时消费任务
+    schedule_use_task_queue: bool = False  # 定时任务的个股分析改为提交到任务队列 scheduled 通道
     debug: bool = False
     http_proxy: Optional[str] = None  # HTTP 代理 (例如: http://127.0.0.1:10809)
     https_proxy: Optional[str] = None # HTTPS 代理
@@ -690,6 +742,13 @@ class Config:
     fundamental_cache_ttl_seconds: int = 120
     # 基本面缓存最大条目数（避免长时间运行内存增长）
     fundamental_cache_max_entries: int = 256
+    # 全市场基本面表缓存（按接口 + 报告期缓存，落盘复用，避免逐股重复下载整表）
+    fundamental_table_cache_enabled: bool = True
+    fundamental_table_cache_dir: str = "./data/fundamental_cache"
+    # 日频全市场表（资金流、龙虎榜）的最长复用时间（秒）
+    fundamental_table_cache_daily_ttl_seconds: int = 1800
+    # 基本面阶段共享工作线程数（有界线程池，替代逐调用起线程）
+    fundamental_executor_max_workers: int = 8
 
     # === Portfolio PR2: import/risk/fx settings ===
     portfolio_risk_concentration_alert_pct: float = 35.0
@@ -1070,6 +1129,38 @@ class Config:
             litellm_model=litellm_model,
             litellm_fallback_models=litellm_fallback_models,
             llm_temperature=resolve_unified_llm_temperature(litellm_model),
+            llm_prompt_cache_enabled=parse_env_bool(os.getenv('LLM_PROMPT_CACHE_ENABLED'), True),
+            llm_response_cache_enabled=parse_env_bool(os.getenv('LLM_RESPONSE_CACHE_ENABLED'), False),
+            llm_response_cache_dir=os.getenv('LLM_RESPONSE_CACHE_DIR', './data/llm_response_cache'),
+            llm_response_cache_ttl_seconds=parse_env_int(
+                os.getenv('LLM_RESPONSE_CACHE_TTL_SECONDS'), 600,
+                field_name='LLM_RESPONSE_CACHE_TTL_SECONDS', minimum=1,
+            ),
+            llm_response_cache_max_entries=parse_env_int(
+                os.getenv('LLM_RESPONSE_CACHE_MAX_ENTRIES'), 500,
+                field_name='LLM_RESPONSE_CACHE_MAX_ENTRIES', minimum=1,
+            ),
+            llm_response_cache_max_mb=parse_env_int(
+                os.getenv('LLM_RESPONSE_CACHE_MAX_MB'), 50,
+                field_name='LLM_RESPONSE_CACHE_MAX_MB', minimum=1,
+            ),
+            llm_response_cache_bucket_pct=parse_env_float(
+                os.getenv('LLM_RESPONSE_CACHE_BUCKET_PCT'), 0.5,
+                field_name='LLM_RESPONSE_CACHE_BUCKET_PCT', minimum=0.0,
+            ),
+            llm_stream_enabled=parse_env_bool(os.getenv('LLM_STREAM_ENABLED'), False),
+            llm_stream_max_restarts=parse_env_int(
+                os.getenv('LLM_STREAM_MAX_RESTARTS'), 1,
+                field_name='LLM_STREAM_MAX_RESTARTS', minimum=0,
+            ),
+            llm_batch_size=parse_env_int(
+                os.getenv('LLM_BATCH_SIZE'), 1,
+                field_name='LLM_BATCH_SIZE', minimum=1,
+            ),
+            llm_batch_max_output_tokens=parse_env_int(
+                os.getenv('LLM_BATCH_MAX_OUTPUT_TOKENS'), 16384,
+                field_name='LLM_BATCH_MAX_OUTPUT_TOKENS', minimum=1024,
+            ),
             litellm_config_path=litellm_config_path,
             llm_models_source=llm_models_source,
             llm_channels=llm_channels,
@@ -1186,6 +1277,12 @@ class Config:
             custom_webhook_urls=[u.strip() for u in os.getenv('CUSTOM_WEBHOOK_URLS', '').split(',') if u.strip()],
             custom_webhook_bearer_token=os.getenv('CUSTOM_WEBHOOK_BEARER_TOKEN'),
             webhook_verify_ssl=os.getenv('WEBHOOK_VERIFY_SSL', 'true').lower() == 'true',
+            notification_channel_timeout=parse_env_int(
+                os.getenv('NOTIFICATION_CHANNEL_TIMEOUT'),
+                60,
+                field_name='NOTIFICATION_CHANNEL_TIMEOUT',
+                minimum=0,
+            ),
             discord_bot_token=os.getenv('DISCORD_BOT_TOKEN'),
             discord_main_channel_id=(
                 os.getenv('DISCORD_MAIN_CHANNEL_ID')
@@ -1226,7 +1323,79 @@ class Config:
             md2img_engine=cls._parse_md2img_engine(os.getenv('MD2IMG_ENGINE', 'wkhtmltoimage')),
             prefetch_realtime_quotes=os.getenv('PREFETCH_REALTIME_QUOTES', 'true').lower() == 'true',
             database_path=os.getenv('DATABASE_PATH', './data/stock_analysis.db'),
+            sqlite_journal_mode=cls._parse_sqlite_choice(
+                'SQLITE_JOURNAL_MODE', os.getenv('SQLITE_JOURNAL_MODE'), 'WAL',
+                ('WAL', 'DELETE', 'TRUNCATE', 'PERSIST'),
+            ),
+            sqlite_synchronous=cls._parse_sqlite_choice(
+                'SQLITE_SYNCHRONOUS', os.getenv('SQLITE_SYNCHRONOUS'), 'NORMAL',
+                ('OFF', 'NORMAL', 'FULL', 'EXTRA'),
+            ),
+            sqlite_busy_timeout_ms=parse_env_int(
+                os.getenv('SQLITE_BUSY_TIMEOUT_MS'),
+                5000,
+                field_name='SQLITE_BUSY_TIMEOUT_MS',
+                minimum=0,
+            ),
+            sqlite_cache_size_mb=parse_env_int(
+                os.getenv('SQLITE_CACHE_SIZE_MB'),
+                64,
+                field_name='SQLITE_CACHE_SIZE_MB',
+                minimum=0,
+            ),
+            sqlite_mmap_size_mb=parse_env_int(
+                os.getenv('SQLITE_MMAP_SIZE_MB'),
+                256,
+                field_name='SQLITE_MMAP_SIZE_MB',
+                minimum=0,
+            ),
+            sqlite_read_pool_size=parse_env_int(
+                os.getenv('SQLITE_READ_POOL_SIZE'),
+                8,
+                field_name='SQLITE_READ_POOL_SIZE',
+                minimum=0,
+            ),
             save_context_snapshot=os.getenv('SAVE_CONTEXT_SNAPSHOT', 'true').lower() == 'true',
+            llm_usage_buffer_enabled=parse_env_bool(os.getenv('LLM_USAGE_BUFFER_ENABLED'), True),
+            llm_usage_batch_size=parse_env_int(
+                os.getenv('LLM_USAGE_BATCH_SIZE'),
+                50,
+                field_name='LLM_USAGE_BATCH_SIZE',
+                minimum=1,
+            ),
+            llm_usage_flush_interval=parse_env_float(
+                os.getenv('LLM_USAGE_FLUSH_INTERVAL'),
+                5.0,
+                field_name='LLM_USAGE_FLUSH_INTERVAL',
+                minimum=0.1,
+            ),
+            retention_enabled=parse_env_bool(os.getenv('RETENTION_ENABLED'), False),
+            retention_interval_hours=parse_env_int(
+                os.getenv('RETENTION_INTERVAL_HOURS'), 24, field_name='RETENTION_INTERVAL_HOURS', minimum=1,
+            ),
+            retention_news_days=parse_env_int(
+                os.getenv('RETENTION_NEWS_DAYS'), 180, field_name='RETENTION_NEWS_DAYS', minimum=0,
+            ),
+            retention_fundamental_days=parse_env_int(
+                os.getenv('RETENTION_FUNDAMENTAL_DAYS'), 90, field_name='RETENTION_FUNDAMENTAL_DAYS', minimum=0,
+            ),
+            retention_analysis_days=parse_env_int(
+                os.getenv('RETENTION_ANALYSIS_DAYS'), 0, field_name='RETENTION_ANALYSIS_DAYS', minimum=0,
+            ),
+            retention_llm_usage_days=parse_env_int(
+                os.getenv('RETENTION_LLM_USAGE_DAYS'), 90, field_name='RETENTION_LLM_USAGE_DAYS', minimum=0,
+            ),
+            retention_conversation_days=parse_env_int(
+                os.getenv('RETENTION_CONVERSATION_DAYS'), 180, field_name='RETENTION_CONVERSATION_DAYS', minimum=0,
+            ),
+            retention_batch_size=parse_env_int(
+                os.getenv('RETENTION_BATCH_SIZE'), 500, field_name='RETENTION_BATCH_SIZE', minimum=1,
+            ),
+            retention_archive_dir=(os.getenv('RETENTION_ARCHIVE_DIR') or '').strip(),
+            retention_vacuum_mode=cls._parse_sqlite_choice(
+                'RETENTION_VACUUM_MODE', os.getenv('RETENTION_VACUUM_MODE'), 'INCREMENTAL',
+                ('INCREMENTAL', 'FULL', 'OFF'),
+            ),
             backtest_enabled=os.getenv('BACKTEST_ENABLED', 'true').lower() == 'true',
             backtest_eval_window_days=parse_env_int(os.getenv('BACKTEST_EVAL_WINDOW_DAYS'), 10, field_name='BACKTEST_EVAL_WINDOW_DAYS', minimum=1),
             backtest_min_age_days=parse_env_int(os.getenv('BACKTEST_MIN_AGE_DAYS'), 14, field_name='BACKTEST_MIN_AGE_DAYS', minimum=1),
@@ -1240,6 +1409,43 @@ class Config:
             log_dir=os.getenv('LOG_DIR', './logs'),
             log_level=os.getenv('LOG_LEVEL', 'INFO'),
             max_workers=parse_env_int(os.getenv('MAX_WORKERS'), 3, field_name='MAX_WORKERS', minimum=1),
+            task_lane_interactive_max_concurrency=parse_env_int(
+                os.getenv('TASK_LANE_INTERACTIVE_MAX_CONCURRENCY'),
+                0,
+                field_name='TASK_LANE_INTERACTIVE_MAX_CONCURRENCY',
+                minimum=0,
+            ),
+            task_lane_scheduled_max_concurrency=parse_env_int(
+                os.getenv('TASK_LANE_SCHEDULED_MAX_CONCURRENCY'),
+                0,
+                field_name='TASK_LANE_SCHEDULED_MAX_CONCURRENCY',
+                minimum=0,
+            ),
+            task_lane_bulk_max_concurrency=parse_env_int(
+                os.getenv('TASK_LANE_BULK_MAX_CONCURRENCY'),
+                0,
+                field_name='TASK_LANE_BULK_MAX_CONCURRENCY',
+                minimum=0,
+            ),
+            task_queue_backend=(
+                'database'
+                if (os.getenv('TASK_QUEUE_BACKEND') or 'memory').strip().lower() == 'database'
+                else 'memory'
+            ),
+            task_queue_lease_seconds=parse_env_int(
+                os.getenv('TASK_QUEUE_LEASE_SECONDS'),
+                120,
+                field_name='TASK_QUEUE_LEASE_SECONDS',
+                minimum=10,
+            ),
+            task_queue_max_attempts=parse_env_int(
+                os.getenv('TASK_QUEUE_MAX_ATTEMPTS'),
+                3,
+                field_name='TASK_QUEUE_MAX_ATTEMPTS',
+                minimum=1,
+            ),
+            task_queue_embedded_worker=parse_env_bool(os.getenv('TASK_QUEUE_EMBEDDED_WORKER'), True),
+            schedule_use_task_queue=parse_env_bool(os.getenv('SCHEDULE_USE_TASK_QUEUE'), False),
             debug=os.getenv('DEBUG', 'false').lower() == 'true',
             config_validate_mode=os.getenv('CONFIG_VALIDATE_MODE', 'warn').lower(),
             http_proxy=os.getenv('HTTP_PROXY'),
@@ -1321,6 +1527,20 @@ class Config:
                 field_name='FUNDAMENTAL_CACHE_MAX_ENTRIES',
                 minimum=1,
             ),
+            fundamental_table_cache_enabled=os.getenv('FUNDAMENTAL_TABLE_CACHE_ENABLED', 'true').lower() == 'true',
+            fundamental_table_cache_dir=os.getenv('FUNDAMENTAL_TABLE_CACHE_DIR', './data/fundamental_cache'),
+            fundamental_table_cache_daily_ttl_seconds=parse_env_int(
+                os.getenv('FUNDAMENTAL_TABLE_CACHE_DAILY_TTL_SECONDS'),
+                1800,
+                field_name='FUNDAMENTAL_TABLE_CACHE_DAILY_TTL_SECONDS',
+                minimum=0,
+            ),
+            fundamental_executor_max_workers=parse_env_int(
+                os.getenv('FUNDAMENTAL_EXECUTOR_MAX_WORKERS'),
+                8,
+                field_name='FUNDAMENTAL_EXECUTOR_MAX_WORKERS',
+                minimum=1,
+            ),
             portfolio_risk_concentration_alert_pct=parse_env_float(
                 os.getenv('PORTFOLIO_RISK_CONCENTRATION_ALERT_PCT'),
                 35.0,
@@ -1705,6 +1925,20 @@ class Config:
         )
         return 'cn'
 
+    @classmethod
+    def _parse_sqlite_choice(cls, name: str, value: Optional[str], default: str, choices: Tuple[str, ...]) -> str:
+        """Parse an SQLite pragma choice (case-insensitive), fallback to default for invalid values."""
+        v = (value or '').strip().upper()
+        if not v:
+            return default
+        if v in choices:
+            return v
+        import logging
+        logging.getLogger(__name__).warning(
+            f"{name} '{value}' invalid, fallback to '{default}' (valid: {' | '.join(choices)})"
+        )
+        return default
+
     @classmethod
     def _parse_md2img_engine(cls, value: str) -> str:
         """Parse MD2IMG_ENGINE, fallback to wkhtmltoimage for invalid values (Issue #455)."""
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+常驻分析引擎
+===================================
+
+Web / Bot 的单股分析请求原本每次都新建 ``StockAnalysisPipeline``，
+随之重建 DataFetcherManager、GeminiAnalyzer（litellm Router）、SearchService、
+NotificationService 与 SocialSentimentService，且丢失各组件内的缓存。
+
+``AnalysisEngine`` 在进程内持有这些组件，仅当配置实例变化（设置页保存后
+``Config.reset_instance()`` 重新加载）时重建；每次请求只创建轻量的流水线对象，
+query_id / 来源消息 / 报告类型等请求状态按调用传入。
+"""
+
+import logging
+import threading
+from typing import Optional
+
+from src.config import Config, get_config
+from src.core.pipeline import PipelineComponents, StockAnalysisPipeline, build_pipeline_components
+from bot.models import BotMessage
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisEngine:
+    """进程级共享的流水线组件持有者"""
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.components: PipelineComponents = build_pipeline_components(config)
+
+    def create_pipeline(
+        self,
+        max_workers: Optional[int] = None,
+        source_message: Optional[BotMessage] = None,
+        query_id: Optional[str] = None,
+        query_source: Optional[str] = None,
+        save_context_snapshot: Optional[bool] = None,
+    ) -> StockAnalysisPipeline:
+        """创建复用共享组件的流水线，仅携带本次请求的状态"""
+        return StockAnalysisPipeline(
+            config=self.config,
+            max_workers=max_workers,
+            source_message=source_message,
+            query_id=query_id,
+            query_source=query_source,
+            save_context_snapshot=save_context_snapshot,
+            components=self.components,
+        )
+
+
+_engine: Optional[AnalysisEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_analysis_engine(config: Optional[Config] = None) -> AnalysisEngine:
+    """
+    获取常驻分析引擎
+
+    以配置实例作为版本标识：配置被重新加载后首次调用会重建组件。
+    """
+    global _engine
+    config = config or get_config()
+    with _engine_lock:
+        if _engine is None or _engine.config is not config:
+            if _engine is not None:
+                logger.info("配置已变更，重建常驻分析引擎")
+            _engine = AnalysisEngine(config)
+        return _engine
+
+
+def reset_analysis_engine() -> None:
+    """丢弃常驻引擎（用于测试）"""
+    global _engine
+    with _engine_lock:
+        _engine = None
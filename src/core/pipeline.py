@@ -15,9 +15,10 @@ import logging
 import time
 import uuid
 from collections import defaultdict
+from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, timedelta
-from typing import List, Dict, Any, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 import pandas as pd
 
@@ -38,7 +39,12 @@ from src.search_service import SearchService
 from src.services.social_sentiment_service import SocialSentimentService
 from src.enums import ReportType
 from src.stock_analyzer import StockTrendAnalyzer, TrendAnalysisResult
-from src.core.trading_calendar import get_market_for_stock, is_market_open
+from src.core.trading_calendar import (
+    get_market_for_stock,
+    get_market_today,
+    get_trading_calendar,
+    is_market_open,
+)
 from data_provider.us_index_mapping import is_us_stock_code
 from bot.models import BotMessage
 
@@ -46,6 +52,85 @@ from bot.models import BotMessage
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class PipelineComponents:
+    """
+    流水线中与单次请求无关的重量级组件
+
+    构建一次即可在多个 ``StockAnalysisPipeline`` 之间共享（见
+    ``src.core.analysis_engine``），这些组件本身已支持被 run() 的线程池并发使用。
+    """
+    config: Config
+    db: Any
+    fetcher_manager: DataFetcherManager
+    trend_analyzer: StockTrendAnalyzer
+    analyzer: GeminiAnalyzer
+    notifier: NotificationService
+    search_service: SearchService
+    social_sentiment_service: SocialSentimentService
+
+
+@dataclass
+class PreparedAnalysis:
+    """单股分析准备阶段的产物，供单次调用或批量 LLM 调用后收尾使用"""
+    code: str
+    stock_name: str
+    query_id: str
+    enhanced_context: Dict[str, Any]
+    news_context: Optional[str]
+    realtime_quote: Any
+    chip_data: Optional[ChipDistribution]
+    trend_result: Optional[TrendAnalysisResult]
+
+
+def build_pipeline_components(config: Config) -> PipelineComponents:
+    """按配置构建流水线组件（数据源、LLM、搜索、通知、舆情）"""
+    search_service = SearchService(
+        bocha_keys=config.bocha_api_keys,
+        tavily_keys=config.tavily_api_keys,
+        brave_keys=config.brave_api_keys,
+        serpapi_keys=config.serpapi_keys,
+        minimax_keys=config.minimax_api_keys,
+        searxng_base_urls=config.searxng_base_urls,
+        searxng_public_instances_enabled=config.searxng_public_instances_enabled,
+        news_max_age_days=config.news_max_age_days,
+        news_strategy_profile=getattr(config, "news_strategy_profile", "short"),
+    )
+    components = PipelineComponents(
+        config=config,
+        db=get_db(),
+        fetcher_manager=DataFetcherManager(),
+        # 不再单独创建 akshare_fetcher，统一使用 fetcher_manager 获取增强数据
+        trend_analyzer=StockTrendAnalyzer(),  # 技术分析器
+        analyzer=GeminiAnalyzer(config=config),
+        notifier=NotificationService(),
+        search_service=search_service,
+        # 社交舆情服务（仅美股）
+        social_sentiment_service=SocialSentimentService(
+            api_key=config.social_sentiment_api_key,
+            api_url=config.social_sentiment_api_url,
+        ),
+    )
+
+    logger.info("已启用技术分析引擎（均线/趋势/量价指标）")
+    # 打印实时行情/筹码配置状态
+    if config.enable_realtime_quote:
+        logger.info(f"实时行情已启用 (优先级: {config.realtime_source_priority})")
+    else:
+        logger.info("实时行情已禁用，将使用历史收盘价")
+    if config.enable_chip_distribution:
+        logger.info("筹码分布分析已启用")
+    else:
+        logger.info("筹码分布分析已禁用")
+    if search_service.is_available:
+        logger.info("搜索服务已启用")
+    else:
+        logger.warning("搜索服务未启用（未配置搜索能力）")
+    if components.social_sentiment_service.is_available:
+        logger.info("Social sentiment service enabled (Reddit/X/Polymarket, US stocks only)")
+    return components
+
+
 class StockAnalysisPipeline:
     """
     股票分析主流程调度器
@@ -63,7 +148,8 @@ class StockAnalysisPipeline:
         source_message: Optional[BotMessage] = None,
         query_id: Optional[str] = None,
         query_source: Optional[str] = None,
-        save_context_snapshot: Optional[bool] = None
+        save_context_snapshot: Optional[bool] = None,
+        components: Optional[PipelineComponents] = None,
     ):
         """
         初始化调度器
@@ -71,7 +157,10 @@ class StockAnalysisPipeline:
         Args:
             config: 配置对象（可选，默认使用全局配置）
             max_workers: 最大并发线程数（可选，默认从配置读取）
+            components: 预构建的共享组件（可选，默认按 config 新建）
         """
+        if components is not None and config is None:
+            config = components.config
         self.config = config or get_config()
         self.max_workers = max_workers or self.config.max_workers
         self.source_message = source_message
@@ -82,49 +171,22 @@ class StockAnalysisPipeline:
         )
         
         # 初始化各模块
-        self.db = get_db()
-        self.fetcher_manager = DataFetcherManager()
-        # 不再单独创建 akshare_fetcher，统一使用 fetcher_manager 获取增强数据
-        self.trend_analyzer = StockTrendAnalyzer()  # 技术分析器
-        self.analyzer = GeminiAnalyzer(config=self.config)
-        self.notifier = NotificationService(source_message=source_message)
-        
-        # 初始化搜索服务
-        self.search_service = SearchService(
-            bocha_keys=self.config.bocha_api_keys,
-            tavily_keys=self.config.tavily_api_keys,
-            brave_keys=self.config.brave_api_keys,
-            serpapi_keys=self.config.serpapi_keys,
-            minimax_keys=self.config.minimax_api_keys,
-            searxng_base_urls=self.config.searxng_base_urls,
-            searxng_public_instances_enabled=self.config.searxng_public_instances_enabled,
-            news_max_age_days=self.config.news_max_age_days,
-            news_strategy_profile=getattr(self.config, "news_strategy_profile", "short"),
+        if components is None:
+            components = build_pipeline_components(self.config)
+        self.db = components.db
+        # run() 开始时批量加载的 code -> 最新已落库交易日，None 表示逐只查询
+        self._freshness_map: Optional[Dict[str, date]] = None
+        self.fetcher_manager = components.fetcher_manager
+        self.trend_analyzer = components.trend_analyzer
+        self.analyzer = components.analyzer
+        # 通知服务携带来源消息（机器人回复上下文），有来源时按请求单独创建
+        self.notifier = (
+            NotificationService(source_message=source_message) if source_message else components.notifier
         )
+        self.search_service = components.search_service
+        self.social_sentiment_service = components.social_sentiment_service
         
         logger.info(f"调度器初始化完成，最大并发数: {self.max_workers}")
-        logger.info("已启用技术分析引擎（均线/趋势/量价指标）")
-        # 打印实时行情/筹码配置状态
-        if self.config.enable_realtime_quote:
-            logger.info(f"实时行情已启用 (优先级: {self.config.realtime_source_priority})")
-        else:
-            logger.info("实时行情已禁用，将使用历史收盘价")
-        if self.config.enable_chip_distribution:
-            logger.info("筹码分布分析已启用")
-        else:
-            logger.info("筹码分布分析已禁用")
-        if self.search_service.is_available:
-            logger.info("搜索服务已启用")
-        else:
-            logger.warning("搜索服务未启用（未配置搜索能力）")
-
-        # 初始化社交舆情服务（仅美股）
-        self.social_sentiment_service = SocialSentimentService(
-            api_key=self.config.social_sentiment_api_key,
-            api_url=self.config.social_sentiment_api_url,
-        )
-        if self.social_sentiment_service.is_available:
-            logger.info("Social sentiment service enabled (Reddit/X/Polymarket, US stocks only)")
 
     def fetch_and_save_stock_data(
         self, 
@@ -151,15 +213,12 @@ class StockAnalysisPipeline:
             # 首先获取股票名称
             stock_name = self.fetcher_manager.get_stock_name(code)
 
-            today = date.today()
-            # 注意：这里用自然日 date.today() 做“断点续传”判断。
-            # 若在周末/节假日/非交易日运行，或机器时区不在中国，可能出现：
-            # - 数据库已有最新交易日数据但仍会重复拉取（has_today_data 返回 False）
-            # - 或在跨日/时区偏移时误判“今日已有数据”
-            # 该行为目前保留（按需求不改逻辑），但如需更严谨可改为“最新交易日/数据源最新日期”判断。
-            
-            # 断点续传检查：如果今日数据已存在，跳过
-            if not force_refresh and self.db.has_today_data(code, today):
+            # 断点续传以“市场本地时区下的最新交易日”为准：
+            # 周末/节假日运行时，已有上一交易日数据即视为最新，不再重复拉取。
+            today = self._latest_session_date(code)
+
+            # 断点续传检查：如果最新交易日数据已存在，跳过
+            if not force_refresh and self._has_fresh_data(code, today):
                 logger.info(f"{stock_name}({code}) 今日数据已存在，跳过获取（断点续传）")
                 return True, None
 
@@ -170,7 +229,7 @@ class StockAnalysisPipeline:
             if df is None or df.empty:
                 return False, "获取数据为空"
 
-            # 保存到数据库
+            # 保存到数据库（新鲜度索引在同一事务中更新）
             saved_count = self.db.save_daily_data(df, code, source_name)
             logger.info(f"{stock_name}({code}) 数据保存成功（来源: {source_name}，新增 {saved_count} 条）")
 
@@ -181,7 +240,39 @@ class StockAnalysisPipeline:
             logger.error(f"{stock_name}({code}) {error_msg}")
             return False, error_msg
     
-    def analyze_stock(self, code: str, report_type: ReportType, query_id: str) -> Optional[AnalysisResult]:
+    def _load_freshness_map(self, stock_codes: List[str]) -> Optional[Dict[str, date]]:
+        """一次查询加载 code -> 已落库最新交易日；失败时返回 None，回退逐只检查"""
+        try:
+            freshness = self.db.get_freshness_map(stock_codes)
+        except Exception as e:
+            logger.warning(f"加载行情新鲜度索引失败，回退逐只检查: {e}")
+            return None
+        return freshness if isinstance(freshness, dict) else None
+
+    def _has_fresh_data(self, code: str, session_date: date) -> bool:
+        """本地是否已有 ``session_date`` 及之后的日线（优先使用运行开始时加载的索引）"""
+        freshness = getattr(self, "_freshness_map", None)
+        if freshness is None:
+            return self.db.has_today_data(code, session_date)
+        last_date = freshness.get(code)
+        return last_date is not None and last_date >= session_date
+
+    @staticmethod
+    def _latest_session_date(code: str) -> date:
+        """Latest trading session (market-local) on or before today for ``code``."""
+        market = get_market_for_stock(normalize_stock_code(code))
+        if market is None:
+            return date.today()
+        return get_trading_calendar().latest_session(market, get_market_today(market))
+
+    def analyze_stock(
+        self,
+        code: str,
+        report_type: ReportType,
+        query_id: str,
+        force_refresh: bool = False,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Optional[AnalysisResult]:
         """
         分析单只股票（增强版：含量比、换手率、筹码分析、多维度情报）
         
@@ -197,10 +288,43 @@ class StockAnalysisPipeline:
             query_id: 查询链路关联 id
             code: 股票代码
             report_type: 报告类型
+            force_refresh: 跳过 LLM 结果缓存
+            progress_callback: LLM 流式输出的字段级进度回调（可选）
             
         Returns:
             AnalysisResult 或 None（如果分析失败）
         """
+        prepared = self._prepare_analysis(code, report_type, query_id)
+        if not isinstance(prepared, PreparedAnalysis):
+            # Agent 模式已直接产出结果，或准备阶段失败
+            return prepared
+
+        try:
+            # Step 7: 调用 AI 分析（传入增强的上下文和新闻）
+            result = self.analyzer.analyze(
+                prepared.enhanced_context,
+                news_context=prepared.news_context,
+                force_refresh=force_refresh,
+                progress_callback=progress_callback,
+            )
+        except Exception as e:
+            logger.error(f"{prepared.stock_name}({code}) 分析失败: {e}")
+            logger.exception(f"{prepared.stock_name}({code}) 详细错误信息:")
+            return None
+        return self._finalize_analysis(prepared, result, report_type)
+
+    def _prepare_analysis(
+        self,
+        code: str,
+        report_type: ReportType,
+        query_id: str,
+    ) -> Union[PreparedAnalysis, AnalysisResult, None]:
+        """
+        单股分析的准备阶段（Step 1-6）：行情、筹码、基本面、趋势、情报与增强上下文
+
+        Returns:
+            PreparedAnalysis；Agent 模式直接返回其 AnalysisResult；失败返回 None
+        """
         try:
             # 获取股票名称（优先从实时行情获取真实名称）
             stock_name = self.fetcher_manager.get_stock_name(code)
@@ -388,10 +512,34 @@ class StockAnalysisPipeline:
                 stock_name,  # 传入股票名称
                 fundamental_context,
             )
-            
-            # Step 7: 调用 AI 分析（传入增强的上下文和新闻）
-            result = self.analyzer.analyze(enhanced_context, news_context=news_context)
 
+            return PreparedAnalysis(
+                code=code,
+                stock_name=stock_name,
+                query_id=query_id,
+                enhanced_context=enhanced_context,
+                news_context=news_context,
+                realtime_quote=realtime_quote,
+                chip_data=chip_data,
+                trend_result=trend_result,
+            )
+
+        except Exception as e:
+            logger.error(f"{stock_name}({code}) 分析失败: {e}")
+            logger.exception(f"{stock_name}({code}) 详细错误信息:")
+            return None
+
+    def _finalize_analysis(
+        self,
+        prepared: PreparedAnalysis,
+        result: Optional[AnalysisResult],
+        report_type: ReportType,
+    ) -> Optional[AnalysisResult]:
+        """单股分析的收尾阶段（Step 7.5-8）：回填价格、筹码/价位兜底并保存历史"""
+        code, stock_name, query_id = prepared.code, prepared.stock_name, prepared.query_id
+        enhanced_context, news_context = prepared.enhanced_context, prepared.news_context
+        realtime_quote, chip_data, trend_result = prepared.realtime_quote, prepared.chip_data, prepared.trend_result
+        try:
             # Step 7.5: 填充分析时的价格信息到 result
             if result:
                 result.query_id = query_id
@@ -1076,6 +1224,46 @@ class StockAnalysisPipeline:
 
         return context
     
+    def _report_single_result(
+        self,
+        code: str,
+        result: Optional[AnalysisResult],
+        report_type: ReportType,
+        single_stock_notify: bool,
+    ) -> None:
+        """记录单股分析结论，单股推送模式下立即推送"""
+        if result:
+            if not result.success:
+                logger.warning(
+                    f"[{code}] 分析未成功: {result.error_message or '未知错误'}"
+                )
+            else:
+                logger.info(
+                    f"[{code}] 分析完成: {result.operation_advice}, "
+                    f"评分 {result.sentiment_score}"
+                )
+            
+            # 单股推送模式（#55）：每分析完一只股票立即推送
+            if single_stock_notify and self.notifier.is_available():
+                try:
+                    # 根据报告类型选择生成方法
+                    if report_type == ReportType.FULL:
+                        report_content = self.notifier.generate_dashboard_report([result])
+                        logger.info(f"[{code}] 使用完整报告格式")
+                    elif report_type == ReportType.BRIEF:
+                        report_content = self.notifier.generate_brief_report([result])
+                        logger.info(f"[{code}] 使用简洁报告格式")
+                    else:
+                        report_content = self.notifier.generate_single_stock_report(result)
+                        logger.info(f"[{code}] 使用精简报告格式")
+                    
+                    if self.notifier.send(report_content, email_stock_codes=[code]):
+                        logger.info(f"[{code}] 单股推送成功")
+                    else:
+                        logger.warning(f"[{code}] 单股推送失败")
+                except Exception as e:
+                    logger.error(f"[{code}] 单股推送异常: {e}")
+
     def process_single_stock(
         self,
         code: str,
@@ -1083,6 +1271,8 @@ class StockAnalysisPipeline:
         single_stock_notify: bool = False,
         report_type: ReportType = ReportType.SIMPLE,
         analysis_query_id: Optional[str] = None,
+        force_refresh: bool = False,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
     ) -> Optional[AnalysisResult]:
         """
         处理单只股票的完整流程
@@ -1101,6 +1291,8 @@ class StockAnalysisPipeline:
             skip_analysis: 是否跳过 AI 分析
             single_stock_notify: 是否启用单股推送模式（每分析完一只立即推送）
             report_type: 报告类型枚举（从配置读取，Issue #119）
+            force_refresh: 跳过 LLM 结果缓存，强制重新分析
+            progress_callback: LLM 流式输出的字段级进度回调（可选）
 
         Returns:
             AnalysisResult 或 None
@@ -1121,40 +1313,15 @@ class StockAnalysisPipeline:
                 return None
             
             effective_query_id = analysis_query_id or self.query_id or uuid.uuid4().hex
-            result = self.analyze_stock(code, report_type, query_id=effective_query_id)
-            
-            if result:
-                if not result.success:
-                    logger.warning(
-                        f"[{code}] 分析未成功: {result.error_message or '未知错误'}"
-                    )
-                else:
-                    logger.info(
-                        f"[{code}] 分析完成: {result.operation_advice}, "
-                        f"评分 {result.sentiment_score}"
-                    )
-                
-                # 单股推送模式（#55）：每分析完一只股票立即推送
-                if single_stock_notify and self.notifier.is_available():
-                    try:
-                        # 根据报告类型选择生成方法
-                        if report_type == ReportType.FULL:
-                            report_content = self.notifier.generate_dashboard_report([result])
-                            logger.info(f"[{code}] 使用完整报告格式")
-                        elif report_type == ReportType.BRIEF:
-                            report_content = self.notifier.generate_brief_report([result])
-                            logger.info(f"[{code}] 使用简洁报告格式")
-                        else:
-                            report_content = self.notifier.generate_single_stock_report(result)
-                            logger.info(f"[{code}] 使用精简报告格式")
-                        
-                        if self.notifier.send(report_content, email_stock_codes=[code]):
-                            logger.info(f"[{code}] 单股推送成功")
-                        else:
-                            logger.warning(f"[{code}] 单股推送失败")
-                    except Exception as e:
-                        logger.error(f"[{code}] 单股推送异常: {e}")
+            result = self.analyze_stock(
+                code,
+                report_type,
+                query_id=effective_query_id,
+                force_refresh=force_refresh,
+                progress_callback=progress_callback,
+            )
             
+            self._report_single_result(code, result, report_type, single_stock_notify)
             return result
             
         except Exception as e:
@@ -1162,6 +1329,28 @@ class StockAnalysisPipeline:
             logger.exception(f"[{code}] 处理过程发生未知异常: {e}")
             return None
     
+    def prefetch_shared_data(self, stock_codes: List[str], prefetch_names: bool = True) -> None:
+        """
+        批量预取多只股票共享的数据（实时行情、交易日历、股票名称）
+
+        run() 与任务队列的批量模式共用，同一批股票只预取一次。
+        """
+        # === 批量预取实时行情（优化：避免每只股票都触发全量拉取）===
+        # 只有股票数量 >= 5 时才进行预取，少量股票直接逐个查询更高效
+        if len(stock_codes) >= 5:
+            prefetch_count = self.fetcher_manager.prefetch_realtime_quotes(stock_codes)
+            if prefetch_count > 0:
+                logger.info(f"已启用批量预取架构：一次拉取全市场数据，{len(stock_codes)} 只股票共享缓存")
+
+        # 预构建交易日历（每个交易所只构建一次），避免并发线程各自触发首次构建
+        markets = {get_market_for_stock(normalize_stock_code(code)) for code in stock_codes}
+        get_trading_calendar().precompute(m for m in markets if m)
+
+        # Issue #455: 预取股票名称，避免并发分析时显示「股票xxxxx」
+        # dry_run 仅做数据拉取，不需要名称预取，避免额外网络开销
+        if prefetch_names:
+            self.fetcher_manager.prefetch_stock_names(stock_codes, use_bulk=False)
+
     def run(
         self,
         stock_codes: Optional[List[str]] = None,
@@ -1202,17 +1391,10 @@ class StockAnalysisPipeline:
         logger.info(f"股票列表: {', '.join(stock_codes)}")
         logger.info(f"并发数: {self.max_workers}, 模式: {'仅获取数据' if dry_run else '完整分析'}")
         
-        # === 批量预取实时行情（优化：避免每只股票都触发全量拉取）===
-        # 只有股票数量 >= 5 时才进行预取，少量股票直接逐个查询更高效
-        if len(stock_codes) >= 5:
-            prefetch_count = self.fetcher_manager.prefetch_realtime_quotes(stock_codes)
-            if prefetch_count > 0:
-                logger.info(f"已启用批量预取架构：一次拉取全市场数据，{len(stock_codes)} 只股票共享缓存")
+        self.prefetch_shared_data(stock_codes, prefetch_names=not dry_run)
 
-        # Issue #455: 预取股票名称，避免并发分析时显示「股票xxxxx」
-        # dry_run 仅做数据拉取，不需要名称预取，避免额外网络开销
-        if not dry_run:
-            self.fetcher_manager.prefetch_stock_names(stock_codes, use_bulk=False)
+        # 断点续传规划：一次查询加载全部股票的新鲜度，替代逐只 has_today_data
+        self._freshness_map = self._load_freshness_map(stock_codes)
 
         # 单股推送模式（#55）：从配置读取
         single_stock_notify = getattr(self.config, 'single_stock_notify', False)
@@ -1230,51 +1412,72 @@ class StockAnalysisPipeline:
         if single_stock_notify:
             logger.info(f"已启用单股推送模式：每分析完一只股票立即推送（报告类型: {report_type_str}）")
         
+        # 批量 LLM 分析（LLM_BATCH_SIZE > 1）：仅精简/简洁报告，多只股票共用一次请求
+        batch_size = int(getattr(self.config, 'llm_batch_size', 1) or 1)
+        use_batch = (
+            not dry_run
+            and batch_size > 1
+            and len(stock_codes) > 1
+            and report_type in (ReportType.SIMPLE, ReportType.BRIEF)
+        )
+
         results: List[AnalysisResult] = []
         
-        # 使用线程池并发处理
-        # 注意：max_workers 设置较低（默认3）以避免触发反爬
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # 提交任务
-            future_to_code = {
-                executor.submit(
-                    self.process_single_stock,
-                    code,
-                    skip_analysis=dry_run,
-                    single_stock_notify=single_stock_notify and send_notification,
-                    report_type=report_type,  # Issue #119: 传递报告类型
-                    analysis_query_id=uuid.uuid4().hex,
-                ): code
-                for code in stock_codes
-            }
+        if use_batch:
+            logger.info(f"已启用批量 LLM 分析：每次请求最多 {batch_size} 只股票")
+            results = self._run_batched(
+                stock_codes,
+                report_type,
+                batch_size,
+                single_stock_notify=single_stock_notify and send_notification,
+            )
+        else:
+            # 使用线程池并发处理
+            # 注意：max_workers 设置较低（默认3）以避免触发反爬
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                # 提交任务
+                future_to_code = {
+                    executor.submit(
+                        self.process_single_stock,
+                        code,
+                        skip_analysis=dry_run,
+                        single_stock_notify=single_stock_notify and send_notification,
+                        report_type=report_type,  # Issue #119: 传递报告类型
+                        analysis_query_id=uuid.uuid4().hex,
+                    ): code
+                    for code in stock_codes
+                }
             
-            # 收集结果
-            for idx, future in enumerate(as_completed(future_to_code)):
-                code = future_to_code[future]
-                try:
-                    result = future.result()
-                    if result:
-                        results.append(result)
-
-                    # Issue #128: 分析间隔 - 在个股分析和大盘分析之间添加延迟
-                    if idx < len(stock_codes) - 1 and analysis_delay > 0:
-                        # 注意：此 sleep 发生在“主线程收集 future 的循环”中，
-                        # 并不会阻止线程池中的任务同时发起网络请求。
-                        # 因此它对降低并发请求峰值的效果有限；真正的峰值主要由 max_workers 决定。
-                        # 该行为目前保留（按需求不改逻辑）。
-                        logger.debug(f"等待 {analysis_delay} 秒后继续下一只股票...")
-                        time.sleep(analysis_delay)
+                # 收集结果
+                for idx, future in enumerate(as_completed(future_to_code)):
+                    code = future_to_code[future]
+                    try:
+                        result = future.result()
+                        if result:
+                            results.append(result)
+
+                        # Issue #128: 分析间隔 - 在个股分析和大盘分析之间添加延迟
+                        if idx < len(stock_codes) - 1 and analysis_delay > 0:
+                            # 注意：此 sleep 发生在“主线程收集 future 的循环”中，
+                            # 并不会阻止线程池中的任务同时发起网络请求。
+                            # 因此它对降低并发请求峰值的效果有限；真正的峰值主要由 max_workers 决定。
+                            # 该行为目前保留（按需求不改逻辑）。
+                            logger.debug(f"等待 {analysis_delay} 秒后继续下一只股票...")
+                            time.sleep(analysis_delay)
 
-                except Exception as e:
-                    logger.error(f"[{code}] 任务执行失败: {e}")
+                    except Exception as e:
+                        logger.error(f"[{code}] 任务执行失败: {e}")
         
         # 统计
         elapsed_time = time.time() - start_time
         
         # dry-run 模式下，数据获取成功即视为成功
         if dry_run:
-            # 检查哪些股票的数据今天已存在
-            success_count = sum(1 for code in stock_codes if self.db.has_today_data(code))
+            # 检查哪些股票的最新交易日数据已存在（重新加载一次索引，包含本次写入）
+            self._freshness_map = self._load_freshness_map(stock_codes)
+            success_count = sum(
+                1 for code in stock_codes if self._has_fresh_data(code, self._latest_session_date(code))
+            )
             fail_count = len(stock_codes) - success_count
         else:
             success_count = len(results)
@@ -1302,6 +1505,97 @@ class StockAnalysisPipeline:
         
         return results
     
+    def _run_batched(
+        self,
+        stock_codes: List[str],
+        report_type: ReportType,
+        batch_size: int,
+        single_stock_notify: bool = False,
+    ) -> List[AnalysisResult]:
+        """
+        批量 LLM 分析流程
+
+        1. 线程池并发完成各股的数据获取与上下文准备（与单股流程 Step 1-6 相同）
+        2. 按市场排序后每 batch_size 只打包成一次 LLM 请求，多批并发
+        3. 逐只回填价格、保存历史，并按需单股推送
+        """
+        def _prepare(code: str):
+            logger.info(f"========== 开始处理 {code} ==========")
+            success, error = self.fetch_and_save_stock_data(code)
+            if not success:
+                logger.warning(f"[{code}] 数据获取失败: {error}")
+            return self._prepare_analysis(code, report_type, uuid.uuid4().hex)
+
+        results: List[AnalysisResult] = []
+        prepared_items: List[PreparedAnalysis] = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            future_to_code = {executor.submit(_prepare, code): code for code in stock_codes}
+            for future in as_completed(future_to_code):
+                code = future_to_code[future]
+                try:
+                    prepared = future.result()
+                except Exception as e:
+                    logger.exception(f"[{code}] 处理过程发生未知异常: {e}")
+                    continue
+                if isinstance(prepared, PreparedAnalysis):
+                    prepared_items.append(prepared)
+                elif prepared is not None:
+                    # Agent 模式已直接产出结果
+                    self._report_single_result(code, prepared, report_type, single_stock_notify)
+                    results.append(prepared)
+
+            # 同一市场共用系统提示词，排序后打包可减少拆批
+            order = {code: index for index, code in enumerate(stock_codes)}
+            prepared_items.sort(key=lambda item: (
+                str(get_market_for_stock(normalize_stock_code(item.code))),
+                order.get(item.code, 0),
+            ))
+            chunks = [prepared_items[i:i + batch_size] for i in range(0, len(prepared_items), batch_size)]
+            future_to_chunk = {
+                executor.submit(
+                    self.analyzer.analyze_batch,
+                    [(item.enhanced_context, item.news_context) for item in chunk],
+                ): chunk
+                for chunk in chunks
+            }
+            for future in as_completed(future_to_chunk):
+                chunk = future_to_chunk[future]
+                try:
+                    chunk_results = future.result()
+                except Exception as e:
+                    # 与单股流程一致：每只都得到失败结果，照常保存历史并推送
+                    logger.error(f"批量分析失败（{', '.join(item.code for item in chunk)}）: {e}")
+                    chunk_results = [self._failed_analysis_result(item, e) for item in chunk]
+                for item, result in zip(chunk, chunk_results):
+                    final = self._finalize_analysis(item, result, report_type)
+                    self._report_single_result(item.code, final, report_type, single_stock_notify)
+                    if final:
+                        results.append(final)
+        return results
+
+    def _failed_analysis_result(self, prepared: PreparedAnalysis, error: Exception) -> AnalysisResult:
+        """批量请求整体异常时为单只股票构造失败结果（字段与 analyzer 的失败结果一致）"""
+        report_language = normalize_report_language(getattr(self.config, "report_language", "zh"))
+        return AnalysisResult(
+            code=prepared.code,
+            name=prepared.stock_name,
+            sentiment_score=50,
+            trend_prediction='Sideways' if report_language == "en" else '震荡',
+            operation_advice='Hold' if report_language == "en" else '持有',
+            confidence_level='Low' if report_language == "en" else '低',
+            analysis_summary=(
+                f'Analysis failed: {str(error)[:100]}' if report_language == "en"
+                else f'分析过程出错: {str(error)[:100]}'
+            ),
+            risk_warning=(
+                'Analysis failed. Please retry later or review manually.' if report_language == "en"
+                else '分析失败，请稍后重试或手动分析'
+            ),
+            success=False,
+            error_message=str(error),
+            report_language=report_language,
+        )
+
     def _save_local_report(
         self,
         results: List[AnalysisResult],
@@ -1331,20 +1625,32 @@ class StockAnalysisPipeline:
             skip_push: 是否跳过推送（仅保存到本地，用于单股推送模式）
         """
         try:
-            logger.info("生成决策仪表盘日报...")
-            report = self._generate_aggregate_report(results, report_type)
-            
             # 跳过推送（单股推送模式 / 合并模式：报告已由 _save_local_report 保存）
             if skip_push:
                 return
-            
+
+            logger.info("生成决策仪表盘日报...")
             # 推送通知
             if self.notifier.is_available():
                 channels = self.notifier.get_available_channels()
-                context_success = self.notifier.send_to_context(report)
+                # 消息上下文渠道（飞书 Stream 会话）边生成边推送；生成的片段同时收集，
+                # 供其余渠道使用完整报告
+                sections: List[str] = []
+
+                def _collect_sections() -> Iterator[str]:
+                    for section in self._iter_aggregate_report_sections(results, report_type):
+                        sections.append(section)
+                        yield section
+
+                section_stream = _collect_sections()
+                context_success = self.notifier.send_to_context(section_stream)
+                for _ in section_stream:
+                    # 上下文渠道未消费（或中途失败）时补齐剩余片段
+                    pass
+                report = "\n".join(sections)
 
                 # Issue #455: Markdown 转图片（与 notification.send 逻辑一致）
-                from src.md2img import markdown_to_image
+                from src.md2img import markdown_to_image, markdown_to_images
 
                 channels_needing_image = {
                     ch for ch in channels
@@ -1364,11 +1670,28 @@ class StockAnalysisPipeline:
                         else "wkhtmltopdf (apt install wkhtmltopdf / brew install wkhtmltopdf)"
                     )
 
+                # 企业微信：只发精简版（平台限制）
+                dashboard_content = None
+                if NotificationChannel.WECHAT in channels:
+                    if report_type == ReportType.BRIEF:
+                        dashboard_content = self.notifier.generate_brief_report(results)
+                    else:
+                        dashboard_content = self.notifier.generate_wechat_dashboard(results)
+                    logger.info(f"企业微信仪表盘长度: {len(dashboard_content)} 字符")
+                    logger.debug(f"企业微信推送内容:\n{dashboard_content}")
+
+                # 完整报告与企业微信仪表盘一次并行渲染
                 image_bytes = None
-                if non_wechat_channels_needing_image:
-                    image_bytes = markdown_to_image(
-                        report, max_chars=self.notifier._markdown_to_image_max_chars
+                wechat_image_bytes = None
+                render_full = bool(non_wechat_channels_needing_image)
+                render_wechat = NotificationChannel.WECHAT in channels_needing_image and dashboard_content is not None
+                if render_full or render_wechat:
+                    rendered = markdown_to_images(
+                        [report if render_full else "", dashboard_content if render_wechat else ""],
+                        max_chars=self.notifier._markdown_to_image_max_chars,
                     )
+                    image_bytes, wechat_image_bytes = rendered
+                if render_full:
                     if image_bytes:
                         logger.info(
                             "Markdown 已转换为图片，将向 %s 发送图片",
@@ -1380,26 +1703,13 @@ class StockAnalysisPipeline:
                             _get_md2img_hint(),
                         )
 
-                # 企业微信：只发精简版（平台限制）
                 wechat_success = False
                 if NotificationChannel.WECHAT in channels:
-                    if report_type == ReportType.BRIEF:
-                        dashboard_content = self.notifier.generate_brief_report(results)
-                    else:
-                        dashboard_content = self.notifier.generate_wechat_dashboard(results)
-                    logger.info(f"企业微信仪表盘长度: {len(dashboard_content)} 字符")
-                    logger.debug(f"企业微信推送内容:\n{dashboard_content}")
-                    wechat_image_bytes = None
-                    if NotificationChannel.WECHAT in channels_needing_image:
-                        wechat_image_bytes = markdown_to_image(
-                            dashboard_content,
-                            max_chars=self.notifier._markdown_to_image_max_chars,
+                    if render_wechat and wechat_image_bytes is None:
+                        logger.warning(
+                            "企业微信 Markdown 转图片失败，将回退为文本发送。请检查 MARKDOWN_TO_IMAGE_CHANNELS 配置并安装 %s",
+                            _get_md2img_hint(),
                         )
-                        if wechat_image_bytes is None:
-                            logger.warning(
-                                "企业微信 Markdown 转图片失败，将回退为文本发送。请检查 MARKDOWN_TO_IMAGE_CHANNELS 配置并安装 %s",
-                                _get_md2img_hint(),
-                            )
                     use_image = self.notifier._should_use_image_for_channel(
                         NotificationChannel.WECHAT, wechat_image_bytes
                     )
@@ -1517,6 +1827,18 @@ class StockAnalysisPipeline:
             import traceback
             logger.error(f"发送通知失败: {e}\n{traceback.format_exc()}")
 
+    def _iter_aggregate_report_sections(
+        self,
+        results: List[AnalysisResult],
+        report_type: ReportType,
+    ) -> Iterator[str]:
+        """按顺序产出汇总报告片段（以换行连接即为 _generate_aggregate_report 的内容）"""
+        iterator = getattr(self.notifier, "iter_aggregate_report_sections", None)
+        if callable(iterator):
+            yield from iterator(results, report_type)
+        else:
+            yield self._generate_aggregate_report(results, report_type)
+
     def _generate_aggregate_report(
         self,
         results: List[AnalysisResult],
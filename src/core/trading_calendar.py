@@ -8,13 +8,19 @@
 1. 按市场（A股/港股/美股）判断当日是否为交易日
 2. 按市场时区取“今日”日期，避免服务器 UTC 导致日期错误
 3. 支持 per-stock 过滤：只分析当日开市市场的股票
+4. TradingCalendarService：每个交易所的交易日序列只构建一次（NumPy datetime64），
+   is_session / previous_session / next_session / sessions_between 均为 searchsorted 查询，
+   供 pipeline 断点续传、回测前向窗口、持仓回撤回填共用
 
-依赖：exchange-calendars（可选，不可用时 fail-open）
+依赖：exchange-calendars（可选，不可用时 fail-open，退化为工作日近似）
 """
 
 import logging
-from datetime import date, datetime
-from typing import Optional, Set
+from datetime import date, datetime, timedelta
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -63,6 +69,166 @@ def get_market_for_stock(code: str) -> Optional[str]:
     return None
 
 
+def _to_day(value: date) -> np.datetime64:
+    return np.datetime64(date(value.year, value.month, value.day), "D")
+
+
+def _from_day(value: np.datetime64) -> date:
+    return value.astype("datetime64[D]").astype(date)
+
+
+def _is_weekday(value: date) -> bool:
+    return value.weekday() < 5
+
+
+class TradingCalendarService:
+    """
+    Precomputed exchange session cache.
+
+    ``xcals.get_calendar`` is expensive, so each exchange's sessions are
+    materialized once into a sorted ``datetime64[D]`` array and every query
+    is a ``searchsorted`` lookup.  When exchange-calendars is unavailable, the
+    market is unknown, or a date falls outside the calendar range, answers
+    degrade to a Monday-Friday approximation (fail-open).
+    """
+
+    def __init__(self, market_exchange: Optional[Dict[str, str]] = None):
+        self._market_exchange = dict(market_exchange or MARKET_EXCHANGE)
+        self._sessions: Dict[str, Optional[np.ndarray]] = {}
+        self._lock = Lock()
+
+    def _build_sessions(self, market: str) -> Optional[np.ndarray]:
+        if not _XCALS_AVAILABLE:
+            return None
+        ex = self._market_exchange.get(market)
+        if not ex:
+            return None
+        try:
+            cal = xcals.get_calendar(ex)
+            return np.asarray(cal.sessions.values, dtype="datetime64[D]")
+        except Exception as e:
+            logger.warning("TradingCalendarService build %s fail-open: %s", market, e)
+            return None
+
+    def get_sessions(self, market: Optional[str]) -> Optional[np.ndarray]:
+        """Return the sorted session array for ``market`` (built on first use)."""
+        if not market:
+            return None
+        if market in self._sessions:
+            return self._sessions[market]
+        with self._lock:
+            if market not in self._sessions:
+                self._sessions[market] = self._build_sessions(market)
+            return self._sessions[market]
+
+    def precompute(self, markets: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Build session arrays ahead of time; returns session counts per market."""
+        counts: Dict[str, int] = {}
+        for market in markets or self._market_exchange.keys():
+            sessions = self.get_sessions(market)
+            counts[market] = int(len(sessions)) if sessions is not None else 0
+        return counts
+
+    def _in_range(self, sessions: Optional[np.ndarray], day: np.datetime64) -> bool:
+        return sessions is not None and len(sessions) > 0 and sessions[0] <= day <= sessions[-1]
+
+    def _lookup(self, market: Optional[str], check_date: date) -> Optional[bool]:
+        """Exact answer from the session array, or None when it cannot tell."""
+        sessions = self.get_sessions(market)
+        day = _to_day(check_date)
+        if not self._in_range(sessions, day):
+            return None
+        idx = int(np.searchsorted(sessions, day))
+        return bool(idx < len(sessions) and sessions[idx] == day)
+
+    def is_session(self, market: Optional[str], check_date: date) -> bool:
+        """True on a trading day; fail-open (True) when the calendar cannot tell."""
+        known = self._lookup(market, check_date)
+        return True if known is None else known
+
+    def latest_session(self, market: Optional[str], check_date: date) -> date:
+        """Return the last session on or before ``check_date``."""
+        known = self._lookup(market, check_date)
+        if known is None:
+            known = _is_weekday(check_date)
+        return check_date if known else self.previous_session(market, check_date)
+
+    def previous_session(self, market: Optional[str], check_date: date) -> date:
+        """Return the last session strictly before ``check_date``."""
+        sessions = self.get_sessions(market)
+        day = _to_day(check_date)
+        if self._in_range(sessions, day) and day > sessions[0]:
+            idx = int(np.searchsorted(sessions, day, side="left"))
+            return _from_day(sessions[idx - 1])
+        current = check_date - timedelta(days=1)
+        while not _is_weekday(current):
+            current -= timedelta(days=1)
+        return current
+
+    def next_session(self, market: Optional[str], check_date: date) -> date:
+        """Return the first session strictly after ``check_date``."""
+        sessions = self.get_sessions(market)
+        day = _to_day(check_date)
+        if self._in_range(sessions, day) and day < sessions[-1]:
+            idx = int(np.searchsorted(sessions, day, side="right"))
+            return _from_day(sessions[idx])
+        current = check_date + timedelta(days=1)
+        while not _is_weekday(current):
+            current += timedelta(days=1)
+        return current
+
+    def sessions_between(self, market: Optional[str], start: date, end: date) -> List[date]:
+        """Return sessions in ``[start, end]`` (inclusive)."""
+        if end < start:
+            return []
+        sessions = self.get_sessions(market)
+        lo, hi = _to_day(start), _to_day(end)
+        if self._in_range(sessions, lo) and self._in_range(sessions, hi):
+            left = int(np.searchsorted(sessions, lo, side="left"))
+            right = int(np.searchsorted(sessions, hi, side="right"))
+            return [_from_day(v) for v in sessions[left:right]]
+        days = np.arange(lo, hi + np.timedelta64(1, "D"), dtype="datetime64[D]")
+        return [_from_day(v) for v in days[np.is_busday(days)]]
+
+    def nth_session_after(self, market: Optional[str], check_date: date, n: int) -> date:
+        """Return the ``n``-th session strictly after ``check_date`` (n >= 1)."""
+        sessions = self.get_sessions(market)
+        day = _to_day(check_date)
+        n = max(1, int(n))
+        if self._in_range(sessions, day):
+            idx = int(np.searchsorted(sessions, day, side="right")) + n - 1
+            if idx < len(sessions):
+                return _from_day(sessions[idx])
+        return _from_day(np.busday_offset(day, n, roll="backward"))
+
+
+_calendar_service: Optional[TradingCalendarService] = None
+_calendar_service_lock = Lock()
+
+
+def get_trading_calendar() -> TradingCalendarService:
+    """Return the process-wide trading calendar service."""
+    global _calendar_service
+    if _calendar_service is None:
+        with _calendar_service_lock:
+            if _calendar_service is None:
+                _calendar_service = TradingCalendarService()
+    return _calendar_service
+
+
+def get_market_today(market: Optional[str]) -> date:
+    """Return today's date in the market's local timezone (server date if unknown)."""
+    tz_name = MARKET_TIMEZONE.get(market or "")
+    if not tz_name:
+        return date.today()
+    try:
+        from zoneinfo import ZoneInfo
+
+        return datetime.now(ZoneInfo(tz_name)).date()
+    except Exception:
+        return date.today()
+
+
 def is_market_open(market: str, check_date: date) -> bool:
     """
     Check if the given market is open on the given date.
@@ -78,16 +244,12 @@ def is_market_open(market: str, check_date: date) -> bool:
     """
     if not _XCALS_AVAILABLE:
         return True
-    ex = MARKET_EXCHANGE.get(market)
-    if not ex:
+    if not MARKET_EXCHANGE.get(market):
         return True
-    try:
-        cal = xcals.get_calendar(ex)
-        session = datetime(check_date.year, check_date.month, check_date.day)
-        return cal.is_session(session)
-    except Exception as e:
-        logger.warning("trading_calendar.is_market_open fail-open: %s", e)
+    calendar = get_trading_calendar()
+    if calendar.get_sessions(market) is None:
         return True
+    return calendar.is_session(market, check_date)
 
 
 def get_open_markets_today() -> Set[str]:
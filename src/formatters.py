@@ -8,7 +8,7 @@
 """
 
 import re
-from typing import List
+from typing import Iterable, Iterator, List
 
 import markdown2
 
@@ -276,10 +276,25 @@ def _chunk_by_max_bytes(content: str, max_bytes: int) -> List[str]:
     if effective_max_bytes <= 0:
         effective_max_bytes = max_bytes
         suffix = ""
-        
+
+    # 只编码一次，按字节偏移推进（与 slice_at_max_bytes 的边界处理一致），避免反复编码剩余内容
+    data = content.encode("utf-8")
+    content_end = len(content.rstrip().encode("utf-8"))  # 之后只剩空白则视为最后一段
+    pos = 0
     while True:
-        chunk, content = slice_at_max_bytes(content, effective_max_bytes)
-        if content.strip() != "":
+        if len(data) - pos <= effective_max_bytes:
+            sections.append(data[pos:].decode("utf-8"))
+            break
+        cut = pos + effective_max_bytes
+        while cut > pos and (data[cut - 1] & 0xC0) == 0x80:
+            cut -= 1
+        if cut > pos and data[cut - 1] >= 0xC0:
+            cut -= 1
+        if cut == pos:
+            cut = pos + effective_max_bytes
+        chunk = data[pos:cut].decode("utf-8", errors="ignore")
+        pos = cut
+        if pos < content_end:
             sections.append(chunk + suffix)
         else:
             # 最后一段了，直接添加并离开循环
@@ -288,6 +303,44 @@ def _chunk_by_max_bytes(content: str, max_bytes: int) -> List[str]:
     return sections
 
 
+def iter_chunks_by_max_bytes(
+    sections: Iterable[str], max_bytes: int, separator: str = "\n"
+) -> Iterator[str]:
+    """
+    增量分块：逐段消费 sections，块满即产出
+
+    每段只编码一次并累计字节数，调用方可以边生成报告边推送，而不必等待全文。
+    单段超限时按字节强制截断（同 _chunk_by_max_bytes）。
+
+    Args:
+        sections: 报告片段（可为惰性生成器）
+        max_bytes: 单块最大字节数
+        separator: 片段之间的连接符
+
+    Yields:
+        不超过 max_bytes 的消息块
+    """
+    if max_bytes < MIN_MAX_BYTES:
+        raise ValueError(f"max_bytes={max_bytes} < {MIN_MAX_BYTES}, 可能陷入无限递归。")
+    separator_bytes = _bytes(separator)
+    current: List[str] = []
+    current_bytes = 0
+    for section in sections:
+        section_bytes = _bytes(section)
+        added = section_bytes + (separator_bytes if current else 0)
+        if current and current_bytes + added > max_bytes:
+            yield separator.join(current)
+            current, current_bytes, added = [], 0, section_bytes
+        if section_bytes > max_bytes:
+            for piece in _chunk_by_max_bytes(section, max_bytes):
+                yield piece
+            continue
+        current.append(section)
+        current_bytes += added
+    if current:
+        yield separator.join(current)
+
+
 def chunk_content_by_max_bytes(content: str, max_bytes: int, add_page_marker: bool = False) -> List[str]:
     """
     按字节数智能分割消息内容
@@ -7,27 +7,41 @@ Markdown 转图片工具模块
 将 Markdown 转为 PNG 图片（用于不支持 Markdown 的通知渠道）。
 支持 wkhtmltoimage (imgkit) 与 markdown-to-file (m2f)，后者对 emoji 支持更好 (Issue #455)。
 
+渲染经由进程内常驻的 _RenderService：按内容哈希缓存 PNG、合并相同内容的并发
+请求，并只解析一次渲染器路径；多份文档可通过 markdown_to_images 一次并行渲染。
+
 Security note: imgkit passes HTML to wkhtmltoimage via stdin, not argv, so
 command injection from content is not applicable. Output is rasterized to PNG
 (no script execution). Input is from system-generated reports, not raw user
 input. Risk is considered low for the current use case.
 """
 
+import hashlib
 import logging
 import os
 import shutil
 import subprocess
 import tempfile
-from typing import Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
 
 from src.formatters import markdown_to_html_document
 
 logger = logging.getLogger(__name__)
 
+# 渲染结果缓存上限（条目数 / 总字节数）
+_RENDER_CACHE_MAX_ENTRIES = 32
+_RENDER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# markdown_to_images 的最大并行渲染进程数
+_RENDER_MAX_PARALLEL = 4
+
 
 def _markdown_to_image_m2f(markdown_text: str) -> Optional[bytes]:
     """Convert Markdown to PNG via markdown-to-file (m2f) CLI. Better emoji support (Issue #455)."""
-    if shutil.which("m2f") is None:
+    m2f_path = _render_service.m2f_path()
+    if m2f_path is None:
         logger.warning(
             "m2f (markdown-to-file) not found in PATH. "
             "Install with: npm i -g markdown-to-file. Fallback to text."
@@ -42,7 +56,7 @@ def _markdown_to_image_m2f(markdown_text: str) -> Optional[bytes]:
             f.write(markdown_text)
 
         result = subprocess.run(
-            ["m2f", md_path, "png", f"outputDirectory={temp_dir}"],
+            [m2f_path, md_path, "png", f"outputDirectory={temp_dir}"],
             capture_output=True,
             timeout=60,
             check=False,
@@ -87,7 +101,7 @@ def _markdown_to_image_wkhtml(markdown_text: str) -> Optional[bytes]:
             "encoding": "UTF-8",
             "quiet": "",
         }
-        out = imgkit.from_string(html, False, options=options)
+        out = imgkit.from_string(html, False, options=options, config=_render_service.imgkit_config(imgkit))
         if out and isinstance(out, bytes) and len(out) > 0:
             return out
         logger.warning("imgkit.from_string returned empty or invalid result")
@@ -111,7 +125,8 @@ def markdown_to_image(markdown_text: str, max_chars: int = 15000) -> Optional[by
     markdown-to-file (better emoji support, Issue #455).
 
     When conversion fails or dependencies unavailable, returns None so caller
-    can fall back to text sending.
+    can fall back to text sending. Successful renders are cached by content
+    hash, so re-sending the same report does not spawn the renderer again.
 
     Args:
         markdown_text: Raw Markdown content.
@@ -129,13 +144,117 @@ def markdown_to_image(markdown_text: str, max_chars: int = 15000) -> Optional[by
         )
         return None
 
+    return _render_service.render(markdown_text, _configured_engine())
+
+
+def markdown_to_images(markdown_texts: List[str], max_chars: int = 15000) -> List[Optional[bytes]]:
+    """
+    Convert several Markdown documents in one pass.
+
+    Identical documents are rendered once; distinct ones are rendered in
+    parallel. Results keep the input order (None for empty/skipped/failed items).
+    """
+    unique = [text for text in dict.fromkeys(markdown_texts) if text]
+    if len(unique) <= 1:
+        rendered = {text: markdown_to_image(text, max_chars=max_chars) for text in unique}
+    else:
+        with ThreadPoolExecutor(
+            max_workers=min(len(unique), _RENDER_MAX_PARALLEL), thread_name_prefix="md2img"
+        ) as pool:
+            images = pool.map(lambda text: markdown_to_image(text, max_chars=max_chars), unique)
+            rendered = dict(zip(unique, images))
+    return [rendered.get(text) if text else None for text in markdown_texts]
+
+
+def _configured_engine() -> str:
     try:
         from src.config import get_config
 
-        engine = getattr(get_config(), "md2img_engine", "wkhtmltoimage")
+        return getattr(get_config(), "md2img_engine", "wkhtmltoimage")
     except Exception:
-        engine = "wkhtmltoimage"
+        return "wkhtmltoimage"
+
+
+class _RenderService:
+    """
+    进程内常驻渲染服务
+
+    - 按 (引擎, Markdown) 的 SHA-256 缓存 PNG（LRU，限制条目数与总字节数）
+    - 相同内容的并发请求只渲染一次，其余请求等待同一结果
+    - m2f 路径 / imgkit 配置只解析一次（imgkit 默认每次渲染都会 spawn `which` 查找二进制）
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cache_bytes = 0
+        self._inflight: Dict[str, Future] = {}
+        self._m2f_path: Optional[str] = None
+        self._imgkit_config = None
+        self.hits = 0
+        self.misses = 0
+
+    def m2f_path(self) -> Optional[str]:
+        if self._m2f_path is None:
+            # 未找到时不缓存，安装后无需重启即可生效
+            self._m2f_path = shutil.which("m2f")
+        return self._m2f_path
+
+    def imgkit_config(self, imgkit_module):
+        if self._imgkit_config is None:
+            config = imgkit_module.config()
+            config.get_wkhtmltoimage()  # 未安装时抛出 OSError，由调用方按原逻辑处理
+            self._imgkit_config = config
+        return self._imgkit_config
+
+    def render(self, markdown_text: str, engine: str) -> Optional[bytes]:
+        key = hashlib.sha256(f"{engine}\0{markdown_text}".encode("utf-8")).hexdigest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = Future()
+                self._inflight[key] = pending
+                owner = True
+                self.misses += 1
+            else:
+                owner = False
+        if not owner:
+            return pending.result()
+
+        image = None
+        try:
+            if engine == "markdown-to-file":
+                image = _markdown_to_image_m2f(markdown_text)
+            else:
+                image = _markdown_to_image_wkhtml(markdown_text)
+        finally:
+            with self._lock:
+                if image:
+                    self._store_locked(key, image)
+                self._inflight.pop(key, None)
+            pending.set_result(image)
+        return image
+
+    def _store_locked(self, key: str, image: bytes) -> None:
+        if len(image) > _RENDER_CACHE_MAX_BYTES:
+            return
+        self._cache[key] = image
+        self._cache_bytes += len(image)
+        while len(self._cache) > _RENDER_CACHE_MAX_ENTRIES or self._cache_bytes > _RENDER_CACHE_MAX_BYTES:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._cache_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
 
-    if engine == "markdown-to-file":
-        return _markdown_to_image_m2f(markdown_text)
-    return _markdown_to_image_wkhtml(markdown_text)
+_render_service = _RenderService()
@@ -15,8 +15,11 @@ A股自选股智能分析系统 - 通知层
    - Pushover（手机/桌面推送）
 """
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple, Union
 from enum import Enum
 
 from src.config import get_config
@@ -33,6 +36,7 @@ from src.report_language import (
 )
 from bot.models import BotMessage
 from src.utils.data_processing import normalize_model_used
+from src.formatters import iter_chunks_by_max_bytes
 from src.notification_sender import (
     AstrbotSender,
     CustomWebhookSender,
@@ -145,6 +149,11 @@ class NotificationService(
 
         # 仅分析结果摘要（Issue #262）：true 时只推送汇总，不含个股详情
         self._report_summary_only = getattr(config, 'report_summary_only', False)
+
+        # 单渠道发送超时（秒，0 = 不限）；各渠道耗时按调用线程记录，并发 send() 互不覆盖
+        channel_timeout = getattr(config, 'notification_channel_timeout', 60)
+        self._channel_timeout = channel_timeout if isinstance(channel_timeout, (int, float)) else 60
+        self._send_local = threading.local()
         self._history_compare_cache: Dict[Tuple[int, Tuple[Tuple[str, str], ...]], Dict[str, List[Dict[str, Any]]]] = {}
 
         # 初始化各渠道
@@ -233,6 +242,9 @@ class NotificationService(
             logger.debug("History comparison skipped: %s", e)
             history_by_code = {}
 
+        if len(self._history_compare_cache) >= 64:
+            # 长生命周期实例（共享分析引擎）按运行累积键，超限时整体丢弃
+            self._history_compare_cache.clear()
         self._history_compare_cache[cache_key] = history_by_code
         return {"history_by_code": history_by_code}
 
@@ -248,6 +260,19 @@ class NotificationService(
             return self.generate_brief_report(results, report_date=report_date)
         return self.generate_dashboard_report(results, report_date=report_date)
 
+    def iter_aggregate_report_sections(
+        self,
+        results: List[AnalysisResult],
+        report_type: Any,
+        report_date: Optional[str] = None,
+    ) -> Iterator[str]:
+        """Lazily yield generate_aggregate_report content section by section (joined with newlines)."""
+        normalized_type = self._normalize_report_type(report_type)
+        if normalized_type == ReportType.BRIEF:
+            yield self.generate_brief_report(results, report_date=report_date)
+            return
+        yield from self.iter_dashboard_report_sections(results, report_date=report_date)
+
     def _collect_models_used(self, results: List[AnalysisResult]) -> List[str]:
         models: List[str] = []
         for result in results:
@@ -364,16 +389,17 @@ class NotificationService(
             return None
         return {"chat_id": chat_id}
 
-    def send_to_context(self, content: str) -> bool:
+    def send_to_context(self, content: Union[str, Iterable[str]]) -> bool:
         """
         向基于消息上下文的渠道发送消息（例如钉钉 Stream 会话）
         
         Args:
-            content: Markdown 格式内容
+            content: Markdown 格式内容，或按顺序产出的报告片段
+                （如 iter_aggregate_report_sections；飞书会话边生成边分块推送）
         """
         return self._send_via_source_context(content)
     
-    def _send_via_source_context(self, content: str) -> bool:
+    def _send_via_source_context(self, content: Union[str, Iterable[str]]) -> bool:
         """
         使用消息上下文（如钉钉/飞书会话）发送一份报告
         
@@ -383,6 +409,9 @@ class NotificationService(
         
         # 尝试钉钉会话
         session_webhook = self._extract_dingtalk_session_webhook()
+        if session_webhook and not isinstance(content, str):
+            # 钉钉会话按完整文本分块
+            content = "\n".join(content)
         if session_webhook:
             try:
                 if self._send_dingtalk_chunked(session_webhook, content, max_bytes=20000):
@@ -407,13 +436,13 @@ class NotificationService(
 
         return success
 
-    def _send_feishu_stream_reply(self, chat_id: str, content: str) -> bool:
+    def _send_feishu_stream_reply(self, chat_id: str, content: Union[str, Iterable[str]]) -> bool:
         """
         通过飞书 Stream 模式发送消息到指定会话
         
         Args:
             chat_id: 飞书会话 ID
-            content: 消息内容
+            content: 消息内容，或按顺序产出的报告片段（增量分块推送）
             
         Returns:
             是否发送成功
@@ -439,9 +468,7 @@ class NotificationService(
             
             # 飞书文本消息有长度限制，需要分批发送
             max_bytes = getattr(config, 'feishu_max_bytes', 20000)
-            content_bytes = len(content.encode('utf-8'))
-            
-            if content_bytes > max_bytes:
+            if not isinstance(content, str) or len(content.encode('utf-8')) > max_bytes:
                 return self._send_feishu_stream_chunked(reply_client, chat_id, content, max_bytes)
             
             return reply_client.send_to_chat(chat_id, content)
@@ -457,70 +484,52 @@ class NotificationService(
         self, 
         reply_client, 
         chat_id: str, 
-        content: str, 
+        content: Union[str, Iterable[str]], 
         max_bytes: int
     ) -> bool:
         """
         分批发送长消息到飞书（Stream 模式）
+
+        增量分块，块满即推送：传入片段迭代器（如 iter_dashboard_report_sections）
+        时，首条消息无需等待整份报告生成完毕。
         
         Args:
             reply_client: FeishuReplyClient 实例
             chat_id: 飞书会话 ID
-            content: 完整消息内容
+            content: 完整消息内容，或按顺序产出的报告片段
             max_bytes: 单条消息最大字节数
             
         Returns:
             是否全部发送成功
         """
         import time
-        
-        def get_bytes(s: str) -> int:
-            return len(s.encode('utf-8'))
-        
-        # 按段落或分隔线分割
-        if "\n---\n" in content:
-            sections = content.split("\n---\n")
-            separator = "\n---\n"
-        elif "\n### " in content:
-            parts = content.split("\n### ")
-            sections = [parts[0]] + [f"### {p}" for p in parts[1:]]
-            separator = "\n"
-        else:
-            # 按行分割
-            sections = content.split("\n")
-            separator = "\n"
-        
-        chunks = []
-        current_chunk = []
-        current_bytes = 0
-        separator_bytes = get_bytes(separator)
-        
-        for section in sections:
-            section_bytes = get_bytes(section) + separator_bytes
-            
-            if current_bytes + section_bytes > max_bytes:
-                if current_chunk:
-                    chunks.append(separator.join(current_chunk))
-                current_chunk = [section]
-                current_bytes = section_bytes
+
+        separator = "\n"
+        if isinstance(content, str):
+            # 按段落或分隔线分割
+            if "\n---\n" in content:
+                sections = content.split("\n---\n")
+                separator = "\n---\n"
+            elif "\n### " in content:
+                parts = content.split("\n### ")
+                sections = [parts[0]] + [f"### {p}" for p in parts[1:]]
             else:
-                current_chunk.append(section)
-                current_bytes += section_bytes
-        
-        if current_chunk:
-            chunks.append(separator.join(current_chunk))
-        
-        # 发送每个分块
+                # 按行分割
+                sections = content.split("\n")
+        else:
+            sections = content
+
         success = True
-        for i, chunk in enumerate(chunks):
-            if i > 0:
+        sent = 0
+        for chunk in iter_chunks_by_max_bytes(sections, max_bytes, separator):
+            if sent > 0:
                 time.sleep(0.5)  # 避免请求过快
-            
+            sent += 1
             if not reply_client.send_to_chat(chat_id, chunk):
                 success = False
-                logger.error(f"飞书 Stream 分块 {i+1}/{len(chunks)} 发送失败")
-        
-        return success
+                logger.error(f"飞书 Stream 分块 {sent} 发送失败")
+
+        return success and sent > 0
         
     def generate_daily_report(
         self,
@@ -783,6 +792,19 @@ class NotificationService(
         Returns:
             Markdown 格式的决策仪表盘日报
         """
+        return "\n".join(self.iter_dashboard_report_sections(results, report_date=report_date))
+
+    def iter_dashboard_report_sections(
+        self,
+        results: List[AnalysisResult],
+        report_date: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        惰性生成决策仪表盘日报：依次产出头部摘要、每只股票的详情与页脚
+
+        各片段以换行连接即为 generate_dashboard_report 的完整内容，
+        可配合 iter_chunks_by_max_bytes 边生成边分块推送。
+        """
         config = get_config()
         report_language = self._get_report_language(results)
         labels = get_report_labels(report_language)
@@ -805,7 +827,8 @@ class NotificationService(
                 },
             )
             if out:
-                return out
+                yield out
+                return
 
         if report_date is None:
             report_date = datetime.now().strftime('%Y-%m-%d')
@@ -850,6 +873,9 @@ class NotificationService(
         # 逐个股票的决策仪表盘（Issue #262: summary_only 时跳过详情）
         if not self._report_summary_only:
             for result in sorted_results:
+                if report_lines:
+                    yield "\n".join(report_lines)
+                    report_lines = []
                 signal_text, signal_emoji, signal_tag = self._get_signal_level(result)
                 dashboard = result.dashboard if hasattr(result, 'dashboard') and result.dashboard else {}
                 
@@ -1059,12 +1085,12 @@ class NotificationService(
                 ])
         
         # 底部（去除免责声明）
-        report_lines.extend([
+        if report_lines:
+            yield "\n".join(report_lines)
+        yield "\n".join([
             "",
             f"*{labels['generated_at_label']}：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*",
         ])
-        
-        return "\n".join(report_lines)
     
     def generate_wechat_dashboard(self, results: List[AnalysisResult]) -> str:
         """
@@ -1553,6 +1579,114 @@ class NotificationService(
             return False
         return True
 
+    def _send_to_channel(
+        self,
+        channel: NotificationChannel,
+        content: str,
+        image_bytes: Optional[bytes],
+        email_stock_codes: Optional[List[str]],
+        email_send_to_all: bool,
+    ) -> bool:
+        """向单个渠道发送（渠道内的分批消息在同一线程内按顺序发送）"""
+        use_image = self._should_use_image_for_channel(channel, image_bytes)
+        if channel == NotificationChannel.WECHAT:
+            if use_image:
+                return self._send_wechat_image(image_bytes)
+            return self.send_to_wechat(content)
+        if channel == NotificationChannel.FEISHU:
+            return self.send_to_feishu(content)
+        if channel == NotificationChannel.TELEGRAM:
+            if use_image:
+                return self._send_telegram_photo(image_bytes)
+            return self.send_to_telegram(content)
+        if channel == NotificationChannel.EMAIL:
+            receivers = None
+            if email_send_to_all and self._stock_email_groups:
+                receivers = self.get_all_email_receivers()
+            elif email_stock_codes and self._stock_email_groups:
+                receivers = self.get_receivers_for_stocks(email_stock_codes)
+            if use_image:
+                return self._send_email_with_inline_image(
+                    image_bytes, receivers=receivers
+                )
+            return self.send_to_email(content, receivers=receivers)
+        if channel == NotificationChannel.PUSHOVER:
+            return self.send_to_pushover(content)
+        if channel == NotificationChannel.PUSHPLUS:
+            return self.send_to_pushplus(content)
+        if channel == NotificationChannel.SERVERCHAN3:
+            return self.send_to_serverchan3(content)
+        if channel == NotificationChannel.CUSTOM:
+            if use_image:
+                return self._send_custom_webhook_image(
+                    image_bytes, fallback_content=content
+                )
+            return self.send_to_custom(content)
+        if channel == NotificationChannel.DISCORD:
+            return self.send_to_discord(content)
+        if channel == NotificationChannel.SLACK:
+            if use_image:
+                return self._send_slack_image(
+                    image_bytes, fallback_content=content
+                )
+            return self.send_to_slack(content)
+        if channel == NotificationChannel.ASTRBOT:
+            return self.send_to_astrbot(content)
+        logger.warning(f"不支持的通知渠道: {channel}")
+        return False
+
+    def _timed_channel_send(self, channel: NotificationChannel, *args: Any) -> Tuple[bool, int]:
+        started = time.perf_counter()
+        try:
+            result = bool(self._send_to_channel(channel, *args))
+        except Exception as e:
+            logger.error(f"{ChannelDetector.get_channel_name(channel)} 发送失败: {e}")
+            result = False
+        return result, int((time.perf_counter() - started) * 1000)
+
+    def _dispatch_channels(
+        self,
+        content: str,
+        image_bytes: Optional[bytes],
+        email_stock_codes: Optional[List[str]],
+        email_send_to_all: bool,
+    ) -> Dict[NotificationChannel, Tuple[bool, int]]:
+        """
+        并发向各渠道发送，返回 {渠道: (是否成功, 耗时 ms)}
+
+        每个渠道（仅配置一个渠道时也一样）独占一个线程；超过
+        NOTIFICATION_CHANNEL_TIMEOUT 仍未返回的渠道计为失败（后台线程继续完成，
+        不阻塞本次推送）。
+        """
+        channels = list(self._available_channels)
+        args = (content, image_bytes, email_stock_codes, email_send_to_all)
+        timeout = self._channel_timeout or None
+        executor = ThreadPoolExecutor(max_workers=len(channels), thread_name_prefix="notify")
+        try:
+            futures = {
+                channel: executor.submit(self._timed_channel_send, channel, *args)
+                for channel in channels
+            }
+            wait(futures.values(), timeout=timeout)
+            outcomes: Dict[NotificationChannel, Tuple[bool, int]] = {}
+            for channel, future in futures.items():
+                if future.done():
+                    outcomes[channel] = future.result()
+                else:
+                    logger.error(
+                        f"{ChannelDetector.get_channel_name(channel)} 发送超时（>{self._channel_timeout}s），计为失败"
+                    )
+                    outcomes[channel] = (False, int(self._channel_timeout * 1000))
+            return outcomes
+        finally:
+            executor.shutdown(wait=False)
+
+    @property
+    def last_channel_latencies(self) -> Dict[str, int]:
+        """当前线程最近一次 send() 的各渠道耗时（ms）"""
+        local = getattr(self, "_send_local", None)
+        return dict(getattr(local, "channel_latencies", {}))
+
     def send(
         self,
         content: str,
@@ -1562,7 +1696,7 @@ class NotificationService(
         """
         统一发送接口 - 向所有已配置的渠道发送
 
-        遍历所有已配置的渠道，逐一发送消息
+        各渠道并发发送（渠道内分批消息保持顺序），单渠道超时计为失败
 
         Fallback rules (Markdown-to-image, Issue #289):
         - When image_bytes is None (conversion failed / imgkit not installed /
@@ -1620,73 +1754,21 @@ class NotificationService(
         channel_names = self.get_channel_names()
         logger.info(f"正在向 {len(self._available_channels)} 个渠道发送通知：{channel_names}")
 
-        success_count = 0
-        fail_count = 0
-
-        for channel in self._available_channels:
-            channel_name = ChannelDetector.get_channel_name(channel)
-            use_image = self._should_use_image_for_channel(channel, image_bytes)
-            try:
-                if channel == NotificationChannel.WECHAT:
-                    if use_image:
-                        result = self._send_wechat_image(image_bytes)
-                    else:
-                        result = self.send_to_wechat(content)
-                elif channel == NotificationChannel.FEISHU:
-                    result = self.send_to_feishu(content)
-                elif channel == NotificationChannel.TELEGRAM:
-                    if use_image:
-                        result = self._send_telegram_photo(image_bytes)
-                    else:
-                        result = self.send_to_telegram(content)
-                elif channel == NotificationChannel.EMAIL:
-                    receivers = None
-                    if email_send_to_all and self._stock_email_groups:
-                        receivers = self.get_all_email_receivers()
-                    elif email_stock_codes and self._stock_email_groups:
-                        receivers = self.get_receivers_for_stocks(email_stock_codes)
-                    if use_image:
-                        result = self._send_email_with_inline_image(
-                            image_bytes, receivers=receivers
-                        )
-                    else:
-                        result = self.send_to_email(content, receivers=receivers)
-                elif channel == NotificationChannel.PUSHOVER:
-                    result = self.send_to_pushover(content)
-                elif channel == NotificationChannel.PUSHPLUS:
-                    result = self.send_to_pushplus(content)
-                elif channel == NotificationChannel.SERVERCHAN3:
-                    result = self.send_to_serverchan3(content)
-                elif channel == NotificationChannel.CUSTOM:
-                    if use_image:
-                        result = self._send_custom_webhook_image(
-                            image_bytes, fallback_content=content
-                        )
-                    else:
-                        result = self.send_to_custom(content)
-                elif channel == NotificationChannel.DISCORD:
-                    result = self.send_to_discord(content)
-                elif channel == NotificationChannel.SLACK:
-                    if use_image:
-                        result = self._send_slack_image(
-                            image_bytes, fallback_content=content
-                        )
-                    else:
-                        result = self.send_to_slack(content)
-                elif channel == NotificationChannel.ASTRBOT:
-                    result = self.send_to_astrbot(content)
-                else:
-                    logger.warning(f"不支持的通知渠道: {channel}")
-                    result = False
-
-                if result:
-                    success_count += 1
-                else:
-                    fail_count += 1
-
-            except Exception as e:
-                logger.error(f"{channel_name} 发送失败: {e}")
-                fail_count += 1
+        outcomes = self._dispatch_channels(
+            content, image_bytes, email_stock_codes, email_send_to_all
+        )
+        success_count = sum(1 for ok, _ in outcomes.values() if ok)
+        fail_count = len(outcomes) - success_count
+        latencies = {
+            ChannelDetector.get_channel_name(ch): elapsed_ms for ch, (_, elapsed_ms) in outcomes.items()
+        }
+        if getattr(self, "_send_local", None) is not None:
+            self._send_local.channel_latencies = latencies
+        if len(outcomes) > 1:
+            logger.info(
+                "各渠道耗时: %s",
+                ", ".join(f"{name} {ms}ms" for name, ms in latencies.items()),
+            )
 
         logger.info(f"通知发送完成：成功 {success_count} 个，失败 {fail_count} 个")
         return success_count > 0 or context_success
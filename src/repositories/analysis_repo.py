@@ -123,7 +123,9 @@ class AnalysisRepository:
             记录数量
         """
         try:
-            records = self.db.get_analysis_history(code=code, days=days, limit=1000)
+            records = self.db.get_analysis_history(
+                code=code, days=days, limit=1000, include_blobs=False
+            )
             return len(records)
         except Exception as e:
             logger.error(f"统计分析记录失败: {e}")
@@ -12,6 +12,7 @@ from datetime import date, datetime, timedelta
 from typing import List, Optional, Tuple
 
 from sqlalchemy import and_, delete, desc, func, select
+from sqlalchemy.orm import undefer
 
 from src.storage import BacktestResult, BacktestSummary, DatabaseManager, AnalysisHistory
 
@@ -42,7 +43,12 @@ class BacktestRepository:
             if code:
                 conditions.append(AnalysisHistory.code == code)
 
-            query = select(AnalysisHistory).where(and_(*conditions))
+            # 回测只需 context_snapshot 中的分析日期，其余大字段保持延迟加载
+            query = (
+                select(AnalysisHistory)
+                .where(and_(*conditions))
+                .options(undefer(AnalysisHistory.context_snapshot))
+            )
 
             if not force:
                 existing_ids = select(BacktestResult.analysis_history_id).where(
@@ -0,0 +1,526 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+分析任务持久化队列访问层
+===================================
+
+职责：
+1. 在 analysis_tasks 表中入队（跨进程去重）
+2. worker 以条件更新（CAS）认领任务并持有租约，心跳续租
+3. 租约过期回收、失败重试（指数退避）与终态写入
+4. 为 API / SSE 提供任务状态查询与增量变更读取
+
+所有方法返回普通 dict，避免 Session 关闭后访问 ORM 对象。
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+
+from src.storage import AnalysisTask, DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_PROCESSING = "processing"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+ACTIVE_STATUSES = (STATUS_PENDING, STATUS_PROCESSING)
+
+# Retry backoff after a failed attempt: 5s, 10s, 20s ... capped at 5 minutes.
+_RETRY_BASE_SECONDS = 5
+_RETRY_MAX_SECONDS = 300
+_FAIR_SHARE_WINDOW_SECONDS = 3600  # 公平轮转只看最近一小时的服务记录
+
+
+class AnalysisTaskRepository:
+    """
+    持久化分析任务队列
+
+    入队与认领都只依赖单行条件更新，适用于 SQLite（多进程同机）与
+    PostgreSQL / MySQL（多机）。
+    """
+
+    def __init__(self, db_manager: Optional[DatabaseManager] = None, max_attempts: int = 3):
+        """
+        Args:
+            db_manager: 数据库管理器（可选，默认使用单例）
+            max_attempts: 每个任务的最大执行次数（含首次）
+        """
+        self.db = db_manager or DatabaseManager.get_instance()
+        self.max_attempts = max(1, int(max_attempts))
+        self._next_reap_at: Optional[datetime] = None
+
+    @staticmethod
+    def _to_dict(row: AnalysisTask) -> Dict[str, Any]:
+        result = None
+        if row.result_json:
+            try:
+                result = json.loads(row.result_json)
+            except (TypeError, ValueError):
+                result = None
+        return {
+            "task_id": row.task_id,
+            "stock_code": row.stock_code,
+            "stock_name": row.stock_name,
+            "status": row.status,
+            "lane": row.lane,
+            "requester": row.requester,
+            "report_type": row.report_type,
+            "force_refresh": bool(row.force_refresh),
+            "notify": bool(row.notify),
+            "original_query": row.original_query,
+            "selection_source": row.selection_source,
+            "progress": row.progress or 0,
+            "message": row.message,
+            "result": result,
+            "error": row.error,
+            "attempts": row.attempts or 0,
+            "max_attempts": row.max_attempts,
+            "available_at": row.available_at,
+            "lease_owner": row.lease_owner,
+            "lease_expires_at": row.lease_expires_at,
+            "created_at": row.created_at,
+            "started_at": row.started_at,
+            "completed_at": row.completed_at,
+            "updated_at": row.updated_at,
+        }
+
+    # ========== 入队 ==========
+
+    def find_active(self, dedupe_key: str) -> Optional[str]:
+        """返回进行中任务的 task_id（无则 None）"""
+        with self.db.get_session() as session:
+            return session.execute(
+                select(AnalysisTask.task_id).where(AnalysisTask.active_dedupe_key == dedupe_key)
+            ).scalar_one_or_none()
+
+    def enqueue(self, tasks: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str]]]:
+        """
+        批量入队
+
+        Args:
+            tasks: 每项包含 task_id / stock_code / dedupe_key 及任务参数
+
+        Returns:
+            (已入队任务列表, [(stock_code, existing_task_id)] 重复列表)
+
+        同一 dedupe_key 已有进行中任务（含其他进程刚写入的）时记为重复。
+        """
+        accepted: List[Dict[str, Any]] = []
+        duplicates: List[Tuple[str, str]] = []
+        now = datetime.now()
+        for item in tasks:
+            row = AnalysisTask(
+                task_id=item["task_id"],
+                stock_code=item["stock_code"],
+                stock_name=item.get("stock_name"),
+                active_dedupe_key=item["dedupe_key"],
+                status=STATUS_PENDING,
+                lane=item.get("lane") or "interactive",
+                requester=item.get("requester") or "",
+                report_type=item.get("report_type") or "detailed",
+                force_refresh=bool(item.get("force_refresh", False)),
+                notify=bool(item.get("notify", True)),
+                original_query=item.get("original_query"),
+                selection_source=item.get("selection_source"),
+                message="任务已加入队列",
+                max_attempts=self.max_attempts,
+                available_at=now,
+                created_at=now,
+                updated_at=now,
+            )
+            with self.db.get_session() as session:
+                session.add(row)
+                try:
+                    session.commit()
+                except IntegrityError:
+                    session.rollback()
+                    existing = self.find_active(item["dedupe_key"])
+                    if existing is None:
+                        raise
+                    duplicates.append((item["stock_code"], existing))
+                    continue
+                accepted.append(self._to_dict(row))
+        return accepted, duplicates
+
+    def delete(self, task_ids: Iterable[str]) -> None:
+        """删除任务（用于批量入队失败回滚）"""
+        ids = list(task_ids)
+        if not ids:
+            return
+        with self.db.session_scope() as session:
+            for row in session.execute(select(AnalysisTask).where(AnalysisTask.task_id.in_(ids))).scalars():
+                session.delete(row)
+
+    # ========== 认领与租约 ==========
+
+    def reap_expired(self, now: Optional[datetime] = None) -> int:
+        """回收租约过期的任务：仍有重试次数的回到 pending，否则标记失败"""
+        now = now or datetime.now()
+        expired = and_(
+            AnalysisTask.status == STATUS_PROCESSING,
+            AnalysisTask.lease_expires_at < now,
+        )
+        # 先用只读查询确认存在过期租约，避免空转时每次都占用 SQLite 写锁
+        with self.db.get_session() as session:
+            if session.execute(select(AnalysisTask.task_id).where(expired).limit(1)).first() is None:
+                return 0
+        with self.db.session_scope() as session:
+            retried = session.execute(
+                update(AnalysisTask)
+                .where(and_(expired, AnalysisTask.attempts < AnalysisTask.max_attempts))
+                .values(
+                    status=STATUS_PENDING,
+                    lease_owner=None,
+                    lease_expires_at=None,
+                    available_at=None,
+                    message="worker 租约过期，等待重试",
+                    updated_at=now,
+                )
+            ).rowcount
+            failed = session.execute(
+                update(AnalysisTask)
+                .where(and_(expired, AnalysisTask.attempts >= AnalysisTask.max_attempts))
+                .values(
+                    status=STATUS_FAILED,
+                    active_dedupe_key=None,
+                    lease_owner=None,
+                    lease_expires_at=None,
+                    error="worker 租约过期且重试次数已用尽",
+                    message="分析失败: 租约过期",
+                    completed_at=now,
+                    updated_at=now,
+                )
+            ).rowcount
+        if retried or failed:
+            logger.warning(f"[TaskRepo] 回收过期租约: 重试 {retried} 个, 失败 {failed} 个")
+        return (retried or 0) + (failed or 0)
+
+    def _lane_running_counts(self, session) -> Dict[str, int]:
+        rows = session.execute(
+            select(AnalysisTask.lane, func.count())
+            .where(AnalysisTask.status == STATUS_PROCESSING)
+            .group_by(AnalysisTask.lane)
+        ).all()
+        return {lane: count for lane, count in rows}
+
+    def claim(
+        self,
+        worker_id: str,
+        lease_seconds: int,
+        lanes: Tuple[str, ...],
+        lane_limits: Optional[Dict[str, int]] = None,
+        candidates: int = 5,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        认领一个任务
+
+        顺序：通道优先级（``lanes`` 顺序）→ 同通道内按提交方轮转（每个提交方的
+        第 1 个排队任务优先于任何提交方的第 2 个）→ 创建时间。``lane_limits``
+        为跨进程的通道并发上限。认领通过 ``WHERE status='pending' AND attempts=?``
+        的条件更新完成，多个 worker 并发认领同一行时只有一个成功；通道上限以
+        子查询计数写在同一条 UPDATE 中，SQLite 单写者下计数与认领原子完成，
+        两个 worker 同时看到 ``running == cap - 1`` 时只有一个能认领。
+        """
+        now = datetime.now()
+        if self._next_reap_at is None or now >= self._next_reap_at:
+            # 回收按租约一半的间隔进行，不随每次轮询执行
+            self._next_reap_at = now + timedelta(seconds=max(1.0, lease_seconds / 2))
+            self.reap_expired(now)
+        lane_rank = case({lane: idx for idx, lane in enumerate(lanes)}, value=AnalysisTask.lane, else_=len(lanes))
+        with self.db.get_session() as session:
+            running = self._lane_running_counts(session)
+            open_lanes = [
+                lane for lane in lanes
+                if not lane_limits or running.get(lane, 0) < lane_limits.get(lane, 1 << 30)
+            ]
+            if not open_lanes:
+                return None
+            ranked = (
+                select(
+                    AnalysisTask.task_id,
+                    AnalysisTask.attempts,
+                    AnalysisTask.created_at,
+                    AnalysisTask.lane,
+                    AnalysisTask.requester,
+                    lane_rank.label("lane_rank"),
+                    func.row_number().over(
+                        partition_by=(AnalysisTask.lane, AnalysisTask.requester),
+                        order_by=AnalysisTask.created_at,
+                    ).label("requester_pos"),
+                )
+                .where(
+                    and_(
+                        AnalysisTask.status == STATUS_PENDING,
+                        AnalysisTask.lane.in_(open_lanes),
+                        or_(AnalysisTask.available_at.is_(None), AnalysisTask.available_at <= now),
+                    )
+                )
+                .subquery()
+            )
+            # 提交方的运行中任务计入排位，最近被服务过的提交方让后，实现跨 worker 的轮转
+            served = (
+                select(
+                    AnalysisTask.lane,
+                    AnalysisTask.requester,
+                    func.sum(case((AnalysisTask.status == STATUS_PROCESSING, 1), else_=0)).label("running"),
+                    func.max(AnalysisTask.started_at).label("last_started"),
+                )
+                .where(AnalysisTask.started_at >= now - timedelta(seconds=_FAIR_SHARE_WINDOW_SECONDS))
+                .group_by(AnalysisTask.lane, AnalysisTask.requester)
+                .subquery()
+            )
+            rows = session.execute(
+                select(ranked.c.task_id, ranked.c.attempts, ranked.c.lane)
+                .outerjoin(
+                    served,
+                    and_(served.c.lane == ranked.c.lane, served.c.requester == ranked.c.requester),
+                )
+                .order_by(
+                    ranked.c.lane_rank,
+                    ranked.c.requester_pos + func.coalesce(served.c.running, 0),
+                    served.c.last_started.is_not(None),
+                    served.c.last_started,
+                    ranked.c.created_at,
+                )
+                .limit(candidates)
+            ).all()
+
+            for task_id, attempts, lane in rows:
+                conditions = [
+                    AnalysisTask.task_id == task_id,
+                    AnalysisTask.status == STATUS_PENDING,
+                    AnalysisTask.attempts == attempts,
+                ]
+                if lane_limits and lane in lane_limits:
+                    other = aliased(AnalysisTask)
+                    lane_running = (
+                        select(func.count())
+                        .select_from(other)
+                        .where(and_(other.lane == lane, other.status == STATUS_PROCESSING))
+                        .scalar_subquery()
+                    )
+                    conditions.append(lane_running < lane_limits[lane])
+                claimed = session.execute(
+                    update(AnalysisTask)
+                    .where(and_(*conditions))
+                    .values(
+                        status=STATUS_PROCESSING,
+                        attempts=attempts + 1,
+                        lease_owner=worker_id,
+                        lease_expires_at=now + timedelta(seconds=lease_seconds),
+                        heartbeat_at=now,
+                        started_at=func.coalesce(AnalysisTask.started_at, now),
+                        progress=10,
+                        message="正在分析中...",
+                        updated_at=now,
+                    )
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                session.commit()
+                if claimed == 1:
+                    row = session.get(AnalysisTask, task_id, populate_existing=True)
+                    return self._to_dict(row) if row is not None else None
+        return None
+
+    def heartbeat(self, task_id: str, worker_id: str, lease_seconds: int) -> bool:
+        """续租；返回 False 表示租约已丢失（被回收或被其他 worker 认领）"""
+        now = datetime.now()
+        with self.db.session_scope() as session:
+            renewed = session.execute(
+                update(AnalysisTask)
+                .where(
+                    and_(
+                        AnalysisTask.task_id == task_id,
+                        AnalysisTask.lease_owner == worker_id,
+                        AnalysisTask.status == STATUS_PROCESSING,
+                    )
+                )
+                .values(
+                    lease_expires_at=now + timedelta(seconds=lease_seconds),
+                    heartbeat_at=now,
+                )
+            ).rowcount
+        return renewed == 1
+
+    def update_progress(self, task_id: str, worker_id: str, progress: int, message: str) -> bool:
+        """写入执行中任务的进度（供 SSE 转发）；租约已丢失时返回 False"""
+        with self.db.session_scope() as session:
+            updated = session.execute(
+                update(AnalysisTask)
+                .where(
+                    and_(
+                        AnalysisTask.task_id == task_id,
+                        AnalysisTask.lease_owner == worker_id,
+                        AnalysisTask.status == STATUS_PROCESSING,
+                    )
+                )
+                .values(progress=progress, message=message, updated_at=datetime.now())
+            ).rowcount
+        return updated == 1
+
+    def complete(self, task_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        """写入成功结果；租约已丢失时返回 False"""
+        now = datetime.now()
+        with self.db.session_scope() as session:
+            done = session.execute(
+                update(AnalysisTask)
+                .where(and_(AnalysisTask.task_id == task_id, AnalysisTask.lease_owner == worker_id))
+                .values(
+                    status=STATUS_COMPLETED,
+                    active_dedupe_key=None,
+                    stock_name=result.get("stock_name") or AnalysisTask.stock_name,
+                    result_json=json.dumps(result, ensure_ascii=False, default=str),
+                    progress=100,
+                    message="分析完成",
+                    error=None,
+                    lease_owner=None,
+                    lease_expires_at=None,
+                    completed_at=now,
+                    updated_at=now,
+                )
+            ).rowcount
+        return done == 1
+
+    def fail(self, task_id: str, worker_id: str, error: str, retryable: bool = True) -> Optional[str]:
+        """
+        记录一次失败
+
+        Returns:
+            任务的新状态（pending 表示已安排重试，failed 表示终态），租约已丢失时为 None
+        """
+        now = datetime.now()
+        with self.db.session_scope() as session:
+            row = session.execute(
+                select(AnalysisTask).where(
+                    and_(AnalysisTask.task_id == task_id, AnalysisTask.lease_owner == worker_id)
+                )
+            ).scalar_one_or_none()
+            if row is None:
+                return None
+            row.lease_owner = None
+            row.lease_expires_at = None
+            row.error = (error or "")[:200]
+            row.updated_at = now
+            if retryable and row.attempts < row.max_attempts:
+                delay = min(_RETRY_MAX_SECONDS, _RETRY_BASE_SECONDS * (2 ** max(0, row.attempts - 1)))
+                row.status = STATUS_PENDING
+                row.available_at = now + timedelta(seconds=delay)
+                row.progress = 0
+                row.message = f"分析失败，{delay} 秒后重试（第 {row.attempts}/{row.max_attempts} 次）"
+            else:
+                row.status = STATUS_FAILED
+                row.active_dedupe_key = None
+                row.completed_at = now
+                row.message = f"分析失败: {(error or '')[:50]}"
+            return row.status
+
+    # ========== 查询 ==========
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self.db.get_session() as session:
+            row = session.get(AnalysisTask, task_id)
+            return self._to_dict(row) if row is not None else None
+
+    def list_active(self) -> List[Dict[str, Any]]:
+        with self.db.get_session() as session:
+            rows = session.execute(
+                select(AnalysisTask)
+                .where(AnalysisTask.status.in_(ACTIVE_STATUSES))
+                .order_by(AnalysisTask.created_at)
+            ).scalars().all()
+            return [self._to_dict(r) for r in rows]
+
+    def list_recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self.db.get_session() as session:
+            rows = session.execute(
+                select(AnalysisTask).order_by(AnalysisTask.created_at.desc()).limit(limit)
+            ).scalars().all()
+            return [self._to_dict(r) for r in rows]
+
+    def changed_since(self, since: datetime, limit: int = 500) -> List[Dict[str, Any]]:
+        """按 updated_at 增量读取变更（供 SSE 转发）"""
+        with self.db.get_session() as session:
+            rows = session.execute(
+                select(AnalysisTask)
+                .where(AnalysisTask.updated_at >= since)
+                .order_by(AnalysisTask.updated_at)
+                .limit(limit)
+            ).scalars().all()
+            return [self._to_dict(r) for r in rows]
+
+    def status_counts(self) -> Dict[str, int]:
+        with self.db.get_session() as session:
+            rows = session.execute(
+                select(AnalysisTask.status, func.count()).group_by(AnalysisTask.status)
+            ).all()
+        return {status: count for status, count in rows}
+
+    def lane_stats(self, lanes: Tuple[str, ...], recent: int = 500) -> Dict[str, Dict[str, Any]]:
+        """各通道排队/运行数，以及最近 ``recent`` 个已开始任务的等待/运行耗时"""
+        stats: Dict[str, Dict[str, Any]] = {}
+        with self.db.get_session() as session:
+            active = session.execute(
+                select(
+                    AnalysisTask.lane,
+                    AnalysisTask.status,
+                    func.count(),
+                    func.count(func.distinct(AnalysisTask.requester)),
+                )
+                .where(AnalysisTask.status.in_(ACTIVE_STATUSES))
+                .group_by(AnalysisTask.lane, AnalysisTask.status)
+            ).all()
+            timings = session.execute(
+                select(
+                    AnalysisTask.lane,
+                    AnalysisTask.created_at,
+                    AnalysisTask.started_at,
+                    AnalysisTask.completed_at,
+                )
+                .where(AnalysisTask.started_at.is_not(None))
+                .order_by(AnalysisTask.started_at.desc())
+                .limit(recent)
+            ).all()
+
+        for lane in lanes:
+            stats[lane] = {
+                "queued": 0, "running": 0, "requesters_waiting": 0, "started": 0, "finished": 0,
+                "avg_wait_ms": 0, "max_wait_ms": 0, "avg_run_ms": 0, "max_run_ms": 0,
+            }
+        for lane, status, count, requesters in active:
+            entry = stats.get(lane)
+            if entry is None:
+                continue
+            if status == STATUS_PENDING:
+                entry["queued"] = count
+                entry["requesters_waiting"] = requesters
+            else:
+                entry["running"] = count
+
+        waits: Dict[str, List[int]] = {}
+        runs: Dict[str, List[int]] = {}
+        for lane, created_at, started_at, completed_at in timings:
+            if lane not in stats:
+                continue
+            if created_at and started_at:
+                waits.setdefault(lane, []).append(int((started_at - created_at).total_seconds() * 1000))
+            if started_at and completed_at:
+                runs.setdefault(lane, []).append(int((completed_at - started_at).total_seconds() * 1000))
+        for lane, entry in stats.items():
+            lane_waits = waits.get(lane, [])
+            lane_runs = runs.get(lane, [])
+            entry["started"] = len(lane_waits)
+            entry["finished"] = len(lane_runs)
+            if lane_waits:
+                entry["avg_wait_ms"] = int(sum(lane_waits) / len(lane_waits))
+                entry["max_wait_ms"] = max(lane_waits)
+            if lane_runs:
+                entry["avg_run_ms"] = int(sum(lane_runs) / len(lane_runs))
+                entry["max_run_ms"] = max(lane_runs)
+        return stats
@@ -22,7 +22,6 @@ from email.utils import parsedate_to_datetime
 from typing import List, Dict, Any, Optional, Tuple
 from itertools import cycle
 import requests
-from newspaper import Article, Config
 from tenacity import (
     retry,
     stop_after_attempt,
@@ -79,6 +78,9 @@ def fetch_url_content(url: str, timeout: int = 5) -> str:
     获取 URL 网页正文内容 (使用 newspaper3k)
     """
     try:
+        # newspaper3k 导入较慢，仅在真正抓取正文时加载
+        from newspaper import Article, Config
+
         # 配置 newspaper3k
         config = Config()
         config.browser_user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
@@ -12,7 +12,7 @@
 
 import logging
 import uuid
-from typing import Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any, List
 
 from src.repositories.analysis_repo import AnalysisRepository
 from src.report_language import (
@@ -43,7 +43,8 @@ class AnalysisService:
         report_type: str = "detailed",
         force_refresh: bool = False,
         query_id: Optional[str] = None,
-        send_notification: bool = True
+        send_notification: bool = True,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
     ) -> Optional[Dict[str, Any]]:
         """
         执行股票分析
@@ -54,6 +55,7 @@ class AnalysisService:
             force_refresh: 是否强制刷新
             query_id: 查询 ID（可选）
             send_notification: 是否发送通知（API 触发默认发送）
+            progress_callback: LLM 流式输出的字段级进度回调（LLM_STREAM_ENABLED）
             
         Returns:
             分析结果字典，包含:
@@ -64,7 +66,7 @@ class AnalysisService:
         try:
             # 导入分析相关模块
             from src.config import get_config
-            from src.core.pipeline import StockAnalysisPipeline
+            from src.core.analysis_engine import get_analysis_engine
             from src.enums import ReportType
             
             # 生成 query_id
@@ -74,9 +76,8 @@ class AnalysisService:
             # 获取配置
             config = get_config()
             
-            # 创建分析流水线
-            pipeline = StockAnalysisPipeline(
-                config=config,
+            # 复用常驻分析引擎的组件，仅为本次请求创建轻量流水线
+            pipeline = get_analysis_engine(config).create_pipeline(
                 query_id=query_id,
                 query_source="api"
             )
@@ -89,7 +90,9 @@ class AnalysisService:
                 code=stock_code,
                 skip_analysis=False,
                 single_stock_notify=send_notification,
-                report_type=rt
+                report_type=rt,
+                force_refresh=force_refresh,
+                progress_callback=progress_callback,
             )
             
             if result is None:
@@ -103,6 +106,18 @@ class AnalysisService:
             logger.error(f"分析股票 {stock_code} 失败: {e}", exc_info=True)
             return None
     
+    def prefetch_batch(self, stock_codes: List[str]) -> None:
+        """
+        为一批即将逐只分析的股票预取共享数据
+
+        预取结果保存在常驻分析引擎的组件缓存中，随后各股票的
+        ``analyze_stock`` 调用直接命中，与 ``StockAnalysisPipeline.run`` 的批量优化一致。
+        """
+        from src.core.analysis_engine import get_analysis_engine
+
+        pipeline = get_analysis_engine().create_pipeline(query_source="api")
+        pipeline.prefetch_shared_data(stock_codes)
+
     def _build_analysis_response(
         self, 
         result: Any, 
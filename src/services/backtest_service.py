@@ -12,6 +12,7 @@ from sqlalchemy import and_, select
 
 from src.config import get_config
 from src.core.backtest_engine import OVERALL_SENTINEL_CODE, BacktestEngine, EvaluationConfig
+from src.core.trading_calendar import get_market_for_stock, get_market_today, get_trading_calendar
 from src.repositories.backtest_repo import BacktestRepository
 from src.repositories.stock_repo import StockRepository
 from src.storage import BacktestResult, BacktestSummary, DatabaseManager
@@ -117,7 +118,12 @@ class BacktestService:
                     eval_window_days=int(eval_window_days),
                 )
 
-                if len(forward_bars) < int(eval_window_days):
+                if len(forward_bars) < int(eval_window_days) and self._forward_window_elapsed(
+                    code=analysis.code,
+                    analysis_date=start_daily.date,
+                    eval_window_days=int(eval_window_days),
+                ):
+                    # Only hit the network when the forward sessions can exist already.
                     self._try_fill_daily_data(code=analysis.code, analysis_date=start_daily.date, eval_window_days=eval_window_days)
                     forward_bars = self.stock_repo.get_forward_bars(
                         code=analysis.code,
@@ -271,12 +277,29 @@ class BacktestService:
         logger.warning(f"无法确定分析日期，跳过记录: {analysis.code}#{getattr(analysis, 'id', '?')}")
         return None
 
+    @staticmethod
+    def _forward_window_end(*, code: str, analysis_date: date, eval_window_days: int) -> date:
+        """Date of the last session in the forward evaluation window."""
+        market = get_market_for_stock(code)
+        return get_trading_calendar().nth_session_after(market, analysis_date, max(1, eval_window_days))
+
+    @classmethod
+    def _forward_window_elapsed(cls, *, code: str, analysis_date: date, eval_window_days: int) -> bool:
+        """True when all forward sessions of the window are on or before today."""
+        window_end = cls._forward_window_end(code=code, analysis_date=analysis_date, eval_window_days=eval_window_days)
+        return window_end <= get_market_today(get_market_for_stock(code))
+
     def _try_fill_daily_data(self, *, code: str, analysis_date: date, eval_window_days: int) -> None:
         try:
             from data_provider.base import DataFetcherManager
 
-            # fetch a window that covers start + forward bars
-            end_date = analysis_date + timedelta(days=max(eval_window_days * 2, 30))
+            # fetch a window that covers start + forward sessions (trading-calendar aware)
+            window_end = self._forward_window_end(
+                code=code,
+                analysis_date=analysis_date,
+                eval_window_days=eval_window_days,
+            )
+            end_date = min(window_end + timedelta(days=1), get_market_today(get_market_for_stock(code)))
             manager = DataFetcherManager()
             df, source = manager.get_daily_data(
                 stock_code=code,
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+SSE 事件广播器
+===================================
+
+职责：
+1. 工作线程发布的事件先进入待发批次，每批只做一次跨线程调度（call_soon_threadsafe）
+2. 每个订阅者持有有界缓冲区：同一任务的中间状态事件被后续事件覆盖（合并）
+3. 慢订阅者缓冲区满时丢弃最旧的可合并事件，并在下次读取时收到 lagged 通知
+"""
+
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 可被同一任务后续事件覆盖的中间状态事件；created/completed/failed 不会被合并掉
+COALESCABLE_EVENT_TYPES = frozenset({"task_started", "task_retrying", "task_progress"})
+
+# 单个订阅者最多缓冲的事件数
+DEFAULT_SUBSCRIBER_BUFFER = 256
+
+
+class EventSubscription:
+    """
+    单个 SSE 连接的有界事件缓冲区
+
+    写入（``_push``）只在事件循环线程中发生，因此无需加锁。
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_SUBSCRIBER_BUFFER):
+        self.maxsize = max(1, int(maxsize))
+        self._buffer: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._coalescable: Dict[str, int] = {}  # task_id -> 缓冲区中该任务可合并事件的序号
+        self._seq = 0
+        self._ready = asyncio.Event()
+        self._lag_pending = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.high_watermark = 0
+
+    @staticmethod
+    def _task_id(event: Dict[str, Any]) -> Optional[str]:
+        data = event.get("data")
+        return data.get("task_id") if isinstance(data, dict) else None
+
+    def _forget(self, key: int, event: Dict[str, Any]) -> None:
+        task_id = self._task_id(event)
+        if task_id is not None and self._coalescable.get(task_id) == key:
+            del self._coalescable[task_id]
+
+    def _push(self, event: Dict[str, Any]) -> None:
+        task_id = self._task_id(event)
+        if task_id is not None:
+            superseded = self._coalescable.pop(task_id, None)
+            if superseded is not None and self._buffer.pop(superseded, None) is not None:
+                self.coalesced += 1
+
+        if len(self._buffer) >= self.maxsize:
+            victim = next(
+                (key for key, queued in self._buffer.items() if queued["type"] in COALESCABLE_EVENT_TYPES),
+                next(iter(self._buffer)),
+            )
+            self._forget(victim, self._buffer.pop(victim))
+            self.dropped += 1
+            self._lag_pending += 1
+
+        self._seq += 1
+        self._buffer[self._seq] = event
+        if task_id is not None and event["type"] in COALESCABLE_EVENT_TYPES:
+            self._coalescable[task_id] = self._seq
+        self.high_watermark = max(self.high_watermark, len(self._buffer))
+        self._ready.set()
+
+    def qsize(self) -> int:
+        return len(self._buffer)
+
+    async def get(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        取下一个事件
+
+        Raises:
+            asyncio.TimeoutError: ``timeout`` 秒内没有事件
+        """
+        while not self._buffer and not self._lag_pending:
+            self._ready.clear()
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        if self._lag_pending:
+            dropped, self._lag_pending = self._lag_pending, 0
+            return {"type": "lagged", "data": {"dropped": dropped}}
+        key, event = self._buffer.popitem(last=False)
+        self._forget(key, event)
+        self.delivered += 1
+        return event
+
+
+class EventBroadcaster:
+    """线程安全的事件发布端，按批次把事件投递给所有订阅者"""
+
+    def __init__(self, buffer_size: int = DEFAULT_SUBSCRIBER_BUFFER):
+        self.buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._subscribers: List[EventSubscription] = []
+        self._pending: List[Dict[str, Any]] = []
+        self._flush_scheduled = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published = 0
+        self.batches = 0
+        # 已离开订阅者的累计合并/丢弃数
+        self._closed_coalesced = 0
+        self._closed_dropped = 0
+
+    def subscribe(self) -> EventSubscription:
+        """新建订阅（应在事件循环线程的 async 上下文中调用）"""
+        subscription = EventSubscription(self.buffer_size)
+        with self._lock:
+            self._subscribers.append(subscription)
+            try:
+                self._loop = asyncio.get_running_loop()
+            except RuntimeError:
+                try:
+                    self._loop = asyncio.get_event_loop()
+                except RuntimeError:
+                    pass
+            logger.debug(f"[EventBroadcaster] 新订阅者加入，当前订阅者数: {len(self._subscribers)}")
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+                self._closed_coalesced += subscription.coalesced
+                self._closed_dropped += subscription.dropped
+                if subscription.dropped:
+                    logger.info(
+                        f"[EventBroadcaster] 订阅者离开，累计丢弃 {subscription.dropped} 个事件"
+                        f"（缓冲峰值 {subscription.high_watermark}）"
+                    )
+                logger.debug(f"[EventBroadcaster] 订阅者离开，当前订阅者数: {len(self._subscribers)}")
+
+    def has_subscribers(self) -> bool:
+        with self._lock:
+            return bool(self._subscribers)
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> None:
+        """发布事件（任意线程）；同一批次内只调度一次事件循环回调"""
+        with self._lock:
+            if not self._subscribers:
+                return
+            loop = self._loop
+            if loop is None:
+                logger.warning("[EventBroadcaster] 无法广播事件：主事件循环未设置")
+                return
+            self._pending.append({"type": event_type, "data": data})
+            self.published += 1
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        try:
+            loop.call_soon_threadsafe(self._flush)
+        except RuntimeError as e:
+            # 事件循环已关闭
+            with self._lock:
+                self._pending.clear()
+                self._flush_scheduled = False
+            logger.debug(f"[EventBroadcaster] 广播事件跳过（循环已关闭）: {e}")
+
+    def _flush(self) -> None:
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._flush_scheduled = False
+            subscribers = list(self._subscribers)
+            self.batches += 1
+        for subscription in subscribers:
+            for event in batch:
+                subscription._push(event)
+
+    def stats(self) -> Dict[str, int]:
+        """广播统计：发布数、批次数、合并/丢弃数与最大积压"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+            published, batches = self.published, self.batches
+            closed_coalesced, closed_dropped = self._closed_coalesced, self._closed_dropped
+        return {
+            "subscribers": len(subscribers),
+            "published": published,
+            "batches": batches,
+            "coalesced": closed_coalesced + sum(s.coalesced for s in subscribers),
+            "dropped": closed_dropped + sum(s.dropped for s in subscribers),
+            "max_backlog": max((s.qsize() for s in subscribers), default=0),
+        }
@@ -47,19 +47,8 @@ def get_signal_changes(
     Returns:
         List of signal dicts (created_at, sentiment_score, operation_advice, trend_prediction)
     """
-    db = DatabaseManager.get_instance()
-    records = db.get_analysis_history(
-        code=code,
-        days=90,
-        limit=limit,
-        exclude_query_id=exclude_query_id,
-    )
-    out = []
-    for r in records:
-        sig = _record_to_signal(r)
-        if sig:
-            out.append(sig)
-    return out
+    exclude = {code: exclude_query_id} if exclude_query_id else None
+    return get_signal_changes_batch([code], limit=limit, exclude_query_ids=exclude).get(code, [])
 
 
 def get_signal_changes_batch(
@@ -70,6 +59,9 @@ def get_signal_changes_batch(
     """
     Get recent signal changes for multiple stocks.
 
+    All codes are served by one windowed query that only selects the signal
+    columns (see ``DatabaseManager.get_recent_signals_batch``).
+
     Args:
         codes: Stock codes
         limit: Max records per stock
@@ -78,19 +70,17 @@ def get_signal_changes_batch(
     Returns:
         Dict mapping code -> list of signal dicts
     """
-    exclude_query_ids = exclude_query_ids or {}
     db = DatabaseManager.get_instance()
+    rows_by_code = db.get_recent_signals_batch(
+        codes,
+        limit=limit,
+        days=90,
+        exclude_query_ids=exclude_query_ids,
+    )
     result: Dict[str, List[Dict[str, Any]]] = {c: [] for c in codes}
-    for code in codes:
-        exclude = exclude_query_ids.get(code)
-        records = db.get_analysis_history(
-            code=code,
-            days=90,
-            limit=limit,
-            exclude_query_id=exclude,
-        )
-        for r in records:
+    for code, rows in rows_by_code.items():
+        for r in rows:
             sig = _record_to_signal(r)
             if sig:
-                result[code].append(sig)
+                result.setdefault(code, []).append(sig)
     return result
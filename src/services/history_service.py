@@ -374,7 +374,7 @@ class HistoryService:
         - URL-level dedup keeps one canonical news row across repeated analyses.
         - Legacy records may have different historical query_id strategies.
         """
-        records = self.db.get_analysis_history(query_id=query_id, limit=1)
+        records = self.db.get_analysis_history(query_id=query_id, limit=1, include_blobs=False)
         if not records:
             return []
 
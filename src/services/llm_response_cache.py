@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+LLM 分析结果本地缓存
+===================================
+
+同一只股票在几分钟内被 Bot / Web 重复分析、且输入基本未变时，直接复用上一次的
+AnalysisResult，不再发起 LLM 调用。
+
+缓存键 = 归一化后的增强上下文 + 新闻摘要 + 模型 + 提示词版本（含系统提示词摘要）：
+- 诊断性字段（数据源、耗时、抓取时间等）不参与计算
+- 浮点数按对数刻度分桶（默认 0.5%），盘中行情的小幅跳动仍命中同一个桶；
+  成交量、成交额等盘中累计字段使用 10 倍宽的桶
+- 新闻内容按去除首尾空白后的 SHA-256 摘要参与计算
+
+缓存为磁盘文件（每条一个 pickle），按 TTL 过期，并按条数与总字节数淘汰最旧记录。
+任何磁盘错误都视为未命中（fail-open）。
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 不影响分析结论的诊断字段
+_VOLATILE_KEYS = frozenset({
+    "source", "source_chain", "query_id", "timestamp",
+    "update_time", "updated_at", "fetched_at",
+})
+# 盘中单调累计的字段，使用更宽的桶
+_CUMULATIVE_KEYS = frozenset({"volume", "amount", "turnover_rate", "volume_change_ratio"})
+_CUMULATIVE_BUCKET_FACTOR = 10
+
+
+def _bucket(value: float, bucket_pct: float) -> Any:
+    """对数刻度分桶：相对变化小于 bucket_pct% 的数值落在同一个桶"""
+    if not math.isfinite(value):
+        return str(value)
+    if value == 0 or bucket_pct <= 0:
+        return value
+    step = math.log1p(bucket_pct / 100.0)
+    return ("-" if value < 0 else "+", round(math.log(abs(value)) / step))
+
+
+def normalize_context(value: Any, bucket_pct: float = 0.5) -> Any:
+    """把增强上下文归一化为可稳定序列化的结构（用于计算缓存键）"""
+    if isinstance(value, dict):
+        normalized = {}
+        for key in sorted(value, key=str):
+            name = str(key)
+            if name in _VOLATILE_KEYS or name.endswith("_ms"):
+                continue
+            pct = bucket_pct * _CUMULATIVE_BUCKET_FACTOR if name in _CUMULATIVE_KEYS else bucket_pct
+            normalized[name] = normalize_context(value[key], pct)
+        return normalized
+    if isinstance(value, (list, tuple)):
+        return [normalize_context(item, bucket_pct) for item in value]
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return _bucket(float(value), bucket_pct)
+    return str(value)
+
+
+def news_digest(news_context: Optional[str]) -> str:
+    return hashlib.sha256((news_context or "").strip().encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    磁盘 + TTL + 容量上限的分析结果缓存
+
+    Args:
+        cache_dir: 缓存目录
+        ttl_seconds: 有效期（秒）
+        max_entries: 最多保留条数
+        max_bytes: 最多占用字节数
+        bucket_pct: 数值分桶宽度（百分比）
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        ttl_seconds: int = 600,
+        max_entries: int = 500,
+        max_bytes: int = 50 * 1024 * 1024,
+        bucket_pct: float = 0.5,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.ttl_seconds = max(1, int(ttl_seconds))
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.bucket_pct = max(0.0, float(bucket_pct))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def make_key(
+        self,
+        context: Dict[str, Any],
+        news_context: Optional[str],
+        model: str,
+        prompt_version: str,
+    ) -> str:
+        payload = {
+            "context": normalize_context(context, self.bucket_pct),
+            "news": news_digest(news_context),
+            "model": model,
+            "prompt_version": prompt_version,
+        }
+        raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pkl"
+
+    def get(self, key: str) -> Optional[Any]:
+        """返回未过期的缓存结果（每次反序列化出新对象，调用方可随意修改）"""
+        path = self._path(key)
+        try:
+            stat = path.stat()
+        except OSError:
+            self.stats["misses"] += 1
+            return None
+        if self._clock() - stat.st_mtime > self.ttl_seconds:
+            self._remove(path)
+            self.stats["misses"] += 1
+            return None
+        try:
+            with open(path, "rb") as fh:
+                value = pickle.load(fh)
+        except Exception as exc:
+            logger.debug(f"[LLM缓存] 读取失败 {path.name}: {exc}")
+            self._remove(path)
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "wb") as fh:
+                pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as exc:
+            logger.debug(f"[LLM缓存] 写入失败 {path.name}: {exc}")
+            self._remove(tmp_path)
+            return
+        self.stats["stores"] += 1
+        self._evict()
+
+    def _evict(self) -> None:
+        """删除过期条目，再按修改时间从旧到新淘汰，直到满足条数与字节上限"""
+        with self._lock:
+            try:
+                entries = []
+                for entry in os.scandir(self.cache_dir):
+                    if entry.name.endswith(".pkl"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+            except OSError:
+                return
+            entries.sort()
+            now = self._clock()
+            total = sum(size for _, size, _ in entries)
+            count = len(entries)
+            for mtime, size, path in entries:
+                expired = now - mtime > self.ttl_seconds
+                if not expired and count <= self.max_entries and total <= self.max_bytes:
+                    break
+                self._remove(Path(path))
+                total -= size
+                count -= 1
+                self.stats["evictions"] += 1
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+_shared_cache: Optional[LLMResponseCache] = None
+_shared_settings: Optional[tuple] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_llm_response_cache(config=None) -> Optional[LLMResponseCache]:
+    """进程级缓存实例；未启用（LLM_RESPONSE_CACHE_ENABLED=false）时返回 None"""
+    global _shared_cache, _shared_settings
+    if config is None:
+        from src.config import get_config
+
+        config = get_config()
+    if not getattr(config, "llm_response_cache_enabled", False):
+        return None
+    settings = (
+        getattr(config, "llm_response_cache_dir", "./data/llm_response_cache"),
+        int(getattr(config, "llm_response_cache_ttl_seconds", 600)),
+        int(getattr(config, "llm_response_cache_max_entries", 500)),
+        int(getattr(config, "llm_response_cache_max_mb", 50)) * 1024 * 1024,
+        float(getattr(config, "llm_response_cache_bucket_pct", 0.5)),
+    )
+    with _shared_cache_lock:
+        if _shared_cache is None or _shared_settings != settings:
+            _shared_cache = LLMResponseCache(*settings)
+            _shared_settings = settings
+        return _shared_cache
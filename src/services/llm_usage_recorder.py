@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+LLM 用量后台记账器
+===================================
+
+职责：
+1. 请求线程只把用量记录追加到内存缓冲区和预写文件（WAL），不触碰数据库
+2. 后台线程在达到批量阈值或定时间隔时，将缓冲区在一个事务内批量写入
+3. 进程退出时最终刷盘；进程崩溃后，下次启动从预写文件重放未落库的记录
+
+预写文件按进程隔离：每个进程（API 与独立 worker 各自）写
+``<前缀>.<pid-随机串>.log``，并在进程存活期间对 ``<前缀>.<pid-随机串>.lock``
+持有 flock。刷盘前把当前文件改名为本进程的分段文件，写库成功后删除。
+启动时只接管锁已释放（属主进程已退出）的其他进程文件：先改名到本进程名下再重放，
+改名是原子的，多个进程同时启动也不会重复接管。
+写库与删除分段之间崩溃会导致重放重复（至少一次语义），窗口极小。
+"""
+
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows：无法判断其他进程是否存活，只重放本进程与旧版文件
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+UsageRow = Dict[str, Any]
+
+
+class LLMUsageRecorder:
+    """
+    批量、异步的 LLM 用量记账器
+
+    Args:
+        sink: 批量写入回调，接收一批记录并在单个事务内落库；抛异常视为失败
+        wal_path: 预写文件路径前缀，实际文件按进程加后缀；None 表示仅内存缓冲（如内存数据库）
+        batch_size: 缓冲区达到该条数时立即唤醒后台线程刷盘
+        flush_interval: 后台线程的定时刷盘间隔（秒）
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[List[UsageRow]], None],
+        wal_path: Optional[Path] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        self._sink = sink
+        self._wal_path = Path(wal_path) if wal_path else None
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._owner_lock: Optional[IO] = None
+        self._owner_lock_path: Optional[Path] = None
+        self._segment_seq = itertools.count()
+        self._batch_size = max(1, int(batch_size))
+        self._flush_interval = max(0.05, float(flush_interval))
+
+        self._lock = threading.Lock()          # 保护缓冲区与预写文件句柄
+        self._flush_lock = threading.Lock()    # 串行化刷盘
+        self._buffer: List[UsageRow] = []
+        self._wal_file = None
+        self._pending_segments: List[Path] = []  # 已轮转、待写库成功后删除的分段
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        self.recorded = 0
+        self.flushed = 0
+        self.flush_batches = 0
+        self.failed_flushes = 0
+        self.replayed = 0
+
+        self._replay_wal()
+
+    # ------------------------------------------------------------------
+    # 预写文件
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _encode(row: UsageRow) -> str:
+        payload = dict(row)
+        called_at = payload.get("called_at")
+        if isinstance(called_at, datetime):
+            payload["called_at"] = called_at.isoformat()
+        return json.dumps(payload, ensure_ascii=False)
+
+    @staticmethod
+    def _decode(line: str) -> Optional[UsageRow]:
+        try:
+            row = json.loads(line)
+        except ValueError:
+            # 崩溃时写了一半的末行
+            return None
+        if not isinstance(row, dict):
+            return None
+        called_at = row.get("called_at")
+        if isinstance(called_at, str):
+            try:
+                row["called_at"] = datetime.fromisoformat(called_at)
+            except ValueError:
+                row["called_at"] = None
+        return row
+
+    def _owned_path(self, suffix: str, owner: Optional[str] = None) -> Path:
+        return self._wal_path.with_name(f"{self._wal_path.name}.{owner or self._owner}.{suffix}")
+
+    @property
+    def _active_path(self) -> Path:
+        return self._owned_path("log")
+
+    def _segment_path(self) -> Path:
+        return self._owned_path(f"{time.time_ns():020d}-{next(self._segment_seq):06d}.seg")
+
+    @staticmethod
+    def _try_lock(path: Path) -> Optional[IO]:
+        """非阻塞地对 path 加排他锁，成功返回持锁句柄；被占用或不支持 flock 时返回 None"""
+        if fcntl is None:
+            return None
+        try:
+            handle = open(path, "a")
+        except OSError:
+            return None
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return None
+        return handle
+
+    def _acquire_owner_lock(self) -> None:
+        """先对临时文件加锁再改名为锁文件，保证锁文件可见时已被持有"""
+        if fcntl is None:
+            return
+        staging = self._owned_path("lock.tmp")
+        handle = self._try_lock(staging)
+        if handle is None:
+            raise OSError(f"无法锁定 {staging.name}")
+        self._owner_lock_path = self._owned_path("lock")
+        os.replace(staging, self._owner_lock_path)
+        self._owner_lock = handle
+
+    def _release_owner_lock(self) -> None:
+        if self._owner_lock is None:
+            return
+        try:
+            self._owner_lock_path.unlink()
+        except OSError:
+            pass
+        self._owner_lock.close()
+        self._owner_lock = None
+
+    def _adopt(self, path: Path) -> None:
+        try:
+            path.rename(self._segment_path())
+        except FileNotFoundError:
+            # 已被同时启动的其他进程接管
+            pass
+
+    def _adopt_orphans(self) -> None:
+        """把已退出进程（以及旧版固定文件名）的预写文件改名到本进程名下"""
+        prefix = self._wal_path.name
+        owners = set()
+        for path in self._wal_path.parent.glob(f"{prefix}*"):
+            if path.name == prefix:
+                self._adopt(path)
+                continue
+            if not path.name.startswith(prefix + "."):
+                continue
+            owner, _, kind = path.name[len(prefix) + 1:].partition(".")
+            if not kind:
+                if owner.isdigit():
+                    self._adopt(path)
+            elif owner != self._owner and (kind in ("log", "lock") or kind.endswith(".seg")):
+                owners.add(owner)
+
+        for owner in sorted(owners):
+            lock_path = self._owned_path("lock", owner)
+            handle = self._try_lock(lock_path)
+            if handle is None:
+                # 属主进程仍在运行（或平台不支持 flock）
+                continue
+            try:
+                for kind in ("*.seg", "log"):
+                    for path in sorted(self._wal_path.parent.glob(f"{prefix}.{owner}.{kind}")):
+                        self._adopt(path)
+                try:
+                    lock_path.unlink()
+                except FileNotFoundError:
+                    pass
+            finally:
+                handle.close()
+
+    def _replay_wal(self) -> None:
+        """启动时接管已退出进程未落库的记录，作为本进程的待删除分段挂起"""
+        if self._wal_path is None:
+            return
+        try:
+            self._wal_path.parent.mkdir(parents=True, exist_ok=True)
+            self._acquire_owner_lock()
+            self._adopt_orphans()
+            segments = sorted(
+                self._wal_path.parent.glob(f"{self._wal_path.name}.{self._owner}.*.seg"),
+                key=lambda p: p.name,
+            )
+        except OSError as exc:
+            logger.warning(f"[LLM usage] 读取预写文件失败，仅使用内存缓冲: {exc}")
+            self._release_owner_lock()
+            self._wal_path = None
+            return
+
+        for segment in segments:
+            try:
+                lines = segment.read_text(encoding="utf-8").splitlines()
+            except OSError as exc:
+                logger.warning(f"[LLM usage] 无法读取预写分段 {segment.name}: {exc}")
+                continue
+            rows = [row for row in map(self._decode, lines) if row]
+            self._buffer.extend(rows)
+            self._pending_segments.append(segment)
+            self.replayed += len(rows)
+        if self.replayed:
+            logger.info(f"[LLM usage] 从预写文件恢复 {self.replayed} 条未落库记录")
+
+    def _append_wal_locked(self, row: UsageRow) -> None:
+        if self._wal_path is None:
+            return
+        try:
+            if self._wal_file is None:
+                self._wal_file = open(self._active_path, "a", encoding="utf-8")
+            self._wal_file.write(self._encode(row) + "\n")
+            self._wal_file.flush()
+        except OSError as exc:
+            logger.warning(f"[LLM usage] 写预写文件失败，后续仅使用内存缓冲: {exc}")
+            self._close_wal_locked()
+            self._wal_path = None
+
+    def _close_wal_locked(self) -> None:
+        if self._wal_file is not None:
+            try:
+                self._wal_file.close()
+            except OSError:
+                pass
+            self._wal_file = None
+
+    def _rotate_locked(self) -> List[Path]:
+        """关闭当前预写文件并改名为分段，返回本批对应的全部分段"""
+        segments, self._pending_segments = self._pending_segments, []
+        self._close_wal_locked()
+        if self._wal_path is not None and self._active_path.exists():
+            segment = self._segment_path()
+            try:
+                self._active_path.rename(segment)
+                segments.append(segment)
+            except OSError as exc:
+                logger.warning(f"[LLM usage] 预写文件轮转失败: {exc}")
+        return segments
+
+    # ------------------------------------------------------------------
+    # 记录 / 刷盘
+    # ------------------------------------------------------------------
+
+    def record(self, row: UsageRow) -> None:
+        """追加一条用量记录（请求线程调用，不访问数据库）"""
+        row = dict(row)
+        row.setdefault("called_at", datetime.now())
+        with self._lock:
+            if self._closed:
+                closed = True
+            else:
+                closed = False
+                self._buffer.append(row)
+                self._append_wal_locked(row)
+                self.recorded += 1
+                pending = len(self._buffer)
+        if closed:
+            # 已关闭（退出阶段）时直接同步写入，避免丢失
+            self._sink([row])
+            return
+        self._ensure_thread()
+        if pending >= self._batch_size:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """把缓冲区在一个事务内写库，返回写入条数；失败时记录回到缓冲区"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._buffer:
+                    return 0
+                batch, self._buffer = self._buffer, []
+                segments = self._rotate_locked()
+            try:
+                self._sink(batch)
+            except Exception as exc:
+                self.failed_flushes += 1
+                logger.warning(f"[LLM usage] 批量写入 {len(batch)} 条记录失败，稍后重试: {exc}")
+                with self._lock:
+                    self._buffer[:0] = batch
+                    self._pending_segments[:0] = segments
+                return 0
+            for segment in segments:
+                try:
+                    segment.unlink()
+                except FileNotFoundError:
+                    pass
+                except OSError as exc:
+                    logger.warning(f"[LLM usage] 删除已落库的预写分段失败: {exc}")
+            self.flushed += len(batch)
+            self.flush_batches += 1
+            return len(batch)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "flush_batches": self.flush_batches,
+            "failed_flushes": self.failed_flushes,
+            "replayed": self.replayed,
+            "pending": self.pending(),
+        }
+
+    # ------------------------------------------------------------------
+    # 后台线程
+    # ------------------------------------------------------------------
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None or self._closed:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="llm-usage-recorder", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self._flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as exc:  # 兜底，后台线程不能退出
+                logger.warning(f"[LLM usage] 后台刷盘异常: {exc}")
+
+    def close(self, timeout: float = 5.0) -> None:
+        """停止后台线程并做最终刷盘；未能落库的记录保留在预写文件中"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._stop.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        self.flush()
+        with self._lock:
+            self._close_wal_locked()
+            # 未能落库的分段留在磁盘上，锁释放后由下一个启动的进程接管
+            self._release_owner_lock()
+
+
+def default_wal_path(database: Optional[str]) -> Optional[Path]:
+    """SQLite 文件库的预写文件前缀放在数据库同目录；内存库返回 None"""
+    if not database or database == ":memory:" or database.startswith("file::memory:"):
+        return None
+    return Path(os.path.abspath(database)).with_name("llm_usage.wal")
@@ -5,17 +5,18 @@ Name-to-Code Resolution Engine
 ===================================
 
 Resolve stock name to code: local mapping + pinyin + AkShare fallback + fuzzy matching.
+Lookups go through a precomputed StockNameIndex (see stock_name_index.py).
 """
 
 from __future__ import annotations
 
-import difflib
 import logging
+import threading
 import time
-from typing import Dict, Optional, Set, Tuple
+from typing import Dict, Optional, Set
 
-from src.data.stock_mapping import STOCK_NAME_MAP
 from src.services.stock_code_utils import is_code_like, normalize_code
+from src.services.stock_name_index import StockNameIndex, get_local_name_index
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +24,10 @@ logger = logging.getLogger(__name__)
 _akshare_cache: Optional[tuple[float, Dict[str, str]]] = None
 _AKSHARE_CACHE_TTL = 1800  # 30 MIN
 
+# Fuzzy index over local + AkShare names: (local_index, akshare_map, index)
+_fuzzy_index_cache: Optional[tuple] = None
+_fuzzy_index_lock = threading.Lock()
+
 
 def _contains_cjk(text: str) -> bool:
     """Return True when text contains CJK characters."""
@@ -57,37 +62,6 @@ def _build_reverse_map_no_duplicates(
     return {name: next(iter(codes)) for name, codes in name_to_codes.items() if len(codes) == 1}
 
 
-def _build_local_name_indexes(code_to_name: Dict[str, str]) -> Tuple[Dict[str, str], Set[str]]:
-    """
-    Build cached local lookup structures:
-    - unique name -> code
-    - ambiguous names that should fail fast
-    """
-    name_to_codes: Dict[str, Set[str]] = {}
-    for code, name in code_to_name.items():
-        if not name or not code:
-            continue
-        normalized_name = name.strip()
-        if not normalized_name:
-            continue
-        name_to_codes.setdefault(normalized_name, set()).add(code)
-
-    unique_names = {
-        name: next(iter(codes))
-        for name, codes in name_to_codes.items()
-        if len(codes) == 1
-    }
-    ambiguous_names = {
-        name
-        for name, codes in name_to_codes.items()
-        if len(codes) > 1
-    }
-    return unique_names, ambiguous_names
-
-
-_LOCAL_REVERSE_MAP, _LOCAL_AMBIGUOUS_NAMES = _build_local_name_indexes(STOCK_NAME_MAP)
-
-
 def _get_akshare_name_to_code() -> Optional[Dict[str, str]]:
     """Fetch A-share name->code from AkShare, with cache."""
     global _akshare_cache
@@ -122,6 +96,24 @@ def _get_akshare_name_to_code() -> Optional[Dict[str, str]]:
         return None
 
 
+def _get_fuzzy_index(local_index: StockNameIndex, akshare_map: Optional[Dict[str, str]]) -> StockNameIndex:
+    """Index over local + AkShare names, rebuilt only when either source changes."""
+    global _fuzzy_index_cache
+    cached = _fuzzy_index_cache
+    if cached is not None and cached[0] is local_index and cached[1] is akshare_map:
+        return cached[2]
+    with _fuzzy_index_lock:
+        cached = _fuzzy_index_cache
+        if cached is not None and cached[0] is local_index and cached[1] is akshare_map:
+            return cached[2]
+        all_name_to_code = dict(local_index.name_to_code)
+        if akshare_map:
+            all_name_to_code.update(akshare_map)
+        index = StockNameIndex((code, name) for name, code in all_name_to_code.items())
+        _fuzzy_index_cache = (local_index, akshare_map, index)
+        return index
+
+
 def _is_single_char_typo(input_name: str, candidate_name: str) -> bool:
     """Return True when two names only differ by one character position."""
     if not input_name or not candidate_name:
@@ -140,12 +132,13 @@ def resolve_name_to_code(name: str) -> Optional[str]:
     Resolve stock name to code.
 
     Strategy (in order):
-    1. If input looks like a code (5-6 digits or 1-5 letters), return it normalized.
-    2. Local STOCK_NAME_MAP reverse (exclude ambiguous names).
-    3. Pinyin match against local names.
-    4. AkShare online fallback (A-shares).
-    5. Fuzzy match (difflib).
-    6. Return None.
+    1. Lower-case letters with a unique pinyin-initials hit (e.g. "gzmt").
+    2. If input looks like a code (5-6 digits or 1-5 letters), return it normalized.
+    3. Local STOCK_NAME_MAP reverse (exclude ambiguous names).
+    4. Pinyin / pinyin-initials match against local names.
+    5. AkShare online fallback (A-shares).
+    6. Fuzzy match (difflib over an index-pruned shortlist).
+    7. Return None.
 
     Args:
         name: Stock name or code string.
@@ -159,29 +152,37 @@ def resolve_name_to_code(name: str) -> Optional[str]:
     if not s:
         return None
 
-    # 1. Input looks like code
+    local_index = get_local_name_index()
+
+    # 1. Short lower-case letters are usually typed initials, not a ticker;
+    #    upper-case input (e.g. "GZMT") keeps the ticker reading below.
+    if 3 <= len(s) <= 5 and s.isascii() and s.isalpha() and s.islower():
+        try:
+            code = local_index.lookup_initials(s)
+            if code:
+                return code
+        except Exception as e:
+            logger.debug(f"[NameResolver] Initials match failed: {e}")
+
+    # 2. Input looks like code
     if _is_code_like(s):
         return _normalize_code(s)
 
-    # 2. Local reverse map (no duplicates)
-    local_reverse = _LOCAL_REVERSE_MAP
-    if s in local_reverse:
-        return local_reverse[s]
-    if s in _LOCAL_AMBIGUOUS_NAMES:
+    # 3. Local reverse map (no duplicates)
+    code = local_index.lookup(s)
+    if code:
+        return code
+    if local_index.is_ambiguous(s):
         logger.debug(f"[NameResolver] 命中本地歧义名称，快速返回 None: {s}")
         return None
 
-    # 3. Pinyin match (exact)
+    # 4. Pinyin match (exact full pinyin, then unique initials such as "gzmt")
     try:
-        from pypinyin import lazy_pinyin
-
-        input_pinyin = "".join(lazy_pinyin(s)).lower()
-        for local_name, code in local_reverse.items():
-            local_pinyin = "".join(lazy_pinyin(local_name)).lower()
-            if input_pinyin == local_pinyin:
-                return code
-    except ImportError:
-        pass
+        code = local_index.lookup_pinyin(s)
+        if code is None and len(s) >= 3 and s.isascii() and s.isalpha():
+            code = local_index.lookup_initials(s)
+        if code:
+            return code
     except Exception as e:
         logger.debug(f"[NameResolver] Pinyin match failed: {e}")
 
@@ -191,33 +192,30 @@ def resolve_name_to_code(name: str) -> Optional[str]:
         logger.debug(f"[NameResolver] Skip CJK-only fallbacks for non-CJK input: {s}")
         return None
 
-    # 4. AkShare fallback
+    # 5. AkShare fallback
     akshare_map = _get_akshare_name_to_code()
     if akshare_map and s in akshare_map:
         logger.debug(f"[NameResolver] 命中 AkShare 映射: {s} -> {akshare_map[s]}")
         return akshare_map[s]
 
-    # 5. Fuzzy match (local + akshare, local takes precedence)
-    all_name_to_code = dict(local_reverse)
-    if akshare_map:
-        all_name_to_code.update(akshare_map)
+    # 6. Fuzzy match (local + akshare), scored only against indexed shortlists
     # Skip fuzzy matching for very short inputs (<=2 chars) to avoid false positives,
     # e.g. '中国' matching arbitrary company names in a pool of 5000+ stocks.
     # Use a higher cutoff (0.8) to reduce mis-hits on longer inputs as well.
     if len(s) > 2:
-        names = list(all_name_to_code.keys())
-        matches = difflib.get_close_matches(s, names, n=1, cutoff=0.8)
+        fuzzy_index = _get_fuzzy_index(local_index, akshare_map)
+        matches = fuzzy_index.close_matches(s, cutoff=0.8)
         if matches:
             logger.debug(f"[NameResolver] 命中模糊匹配: input={s}, matched={matches[0]}")
-            return all_name_to_code[matches[0]]
+            return fuzzy_index.name_to_code[matches[0]]
 
         # Conservative fallback for one-character typo in medium/long names.
         # This keeps the strict default threshold while fixing obvious misspellings
         # such as "贵州茅苔" -> "贵州茅台".
-        typo_matches = difflib.get_close_matches(s, names, n=1, cutoff=0.7)
+        typo_matches = fuzzy_index.close_matches(s, cutoff=0.7)
         if typo_matches and _is_single_char_typo(s, typo_matches[0]):
             logger.debug(f"[NameResolver] 命中单字误写兜底: input={s}, matched={typo_matches[0]}")
-            return all_name_to_code[typo_matches[0]]
+            return fuzzy_index.name_to_code[typo_matches[0]]
 
     logger.debug(f"[NameResolver] 解析失败: {s}")
     return None
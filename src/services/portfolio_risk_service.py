@@ -7,6 +7,7 @@ from datetime import date, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
 from src.config import Config, get_config
+from src.core.trading_calendar import get_trading_calendar
 from src.repositories.portfolio_repo import PortfolioRepository
 from src.services.portfolio_service import PortfolioService
 
@@ -112,9 +113,10 @@ class PortfolioRiskService:
             lookback_days=lookback_days,
         )
         if account_id is not None:
+            account = self.repo.get_account(account_id, include_inactive=True)
+            markets = {str(getattr(account, "market", "") or "cn")}
             existing_dates = {row.snapshot_date for row in existing_rows if int(row.account_id) == int(account_id)}
-            current_date = start_date
-            while current_date <= as_of_date:
+            for current_date in self._backfill_dates(start_date, as_of_date, markets):
                 if current_date not in existing_dates:
                     self.portfolio_service.get_portfolio_snapshot(
                         account_id=account_id,
@@ -122,15 +124,15 @@ class PortfolioRiskService:
                         cost_method=cost_method,
                     )
                     existing_dates.add(current_date)
-                current_date += timedelta(days=1)
             return
 
-        account_ids = [int(account.id) for account in self.repo.list_accounts(include_inactive=False)]
+        accounts = self.repo.list_accounts(include_inactive=False)
+        account_ids = [int(account.id) for account in accounts]
         if not account_ids:
             return
+        markets = {str(getattr(account, "market", "") or "cn") for account in accounts}
         existing_pairs = {(int(row.account_id), row.snapshot_date) for row in existing_rows}
-        current_date = start_date
-        while current_date <= as_of_date:
+        for current_date in self._backfill_dates(start_date, as_of_date, markets):
             if not all((aid, current_date) in existing_pairs for aid in account_ids):
                 self.portfolio_service.get_portfolio_snapshot(
                     account_id=None,
@@ -139,7 +141,19 @@ class PortfolioRiskService:
                 )
                 for aid in account_ids:
                     existing_pairs.add((aid, current_date))
-            current_date += timedelta(days=1)
+
+    @staticmethod
+    def _backfill_dates(start_date: date, as_of_date: date, markets: set) -> List[date]:
+        """
+        Dates that need a drawdown snapshot: trading sessions of any involved
+        market plus both window boundaries (closes only move on sessions, so
+        replaying weekends/holidays adds cost without new points).
+        """
+        calendar = get_trading_calendar()
+        dates = {start_date, as_of_date}
+        for market in markets:
+            dates.update(calendar.sessions_between(market, start_date, as_of_date))
+        return sorted(dates)
 
     def _resolve_backfill_start_date(
         self,
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+时序数据保留与归档
+===================================
+
+职责：
+1. 按表配置保留天数，过期记录先按月追加到归档文件，再分批删除
+2. 每批一个短事务（先读后删），写锁只在删除与提交期间持有
+3. 删除完成后增量回收空闲页、刷新统计，并报告回收的空间
+
+归档格式为按月分文件的 gzip JSON Lines：<archive_dir>/<table>/<YYYY-MM>.jsonl.gz，
+每批追加一个 gzip 成员（可直接 zcat / pandas.read_json(lines=True) 读取）。
+归档写入并 fsync 之后才删除；两步之间崩溃会在下次运行时重复归档同一批（至少一次语义）。
+"""
+
+import gzip
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, select
+
+from src.config import get_config
+from src.storage import (
+    AnalysisHistory,
+    BacktestResult,
+    ConversationMessage,
+    ConversationSession,
+    DatabaseManager,
+    FundamentalSnapshot,
+    LLMUsage,
+    NewsIntel,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TableRetentionResult:
+    """单张表的清理结果"""
+    table: str
+    days: int
+    cutoff: Optional[datetime] = None
+    archived: int = 0
+    deleted: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class RetentionReport:
+    """一次保留任务的汇总"""
+    tables: List[TableRetentionResult] = field(default_factory=list)
+    compressed_rows: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def deleted(self) -> int:
+        return sum(item.deleted for item in self.tables)
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        return max(0, self.bytes_before - self.bytes_after)
+
+    def summary(self) -> str:
+        parts = [
+            f"{item.table}={item.deleted}" + (f"(失败: {item.error})" if item.error else "")
+            for item in self.tables
+        ]
+        return (
+            f"删除 {self.deleted} 行 [{', '.join(parts) or '无启用的策略'}]，"
+            f"压缩旧记录 {self.compressed_rows} 行，"
+            f"数据库 {self.bytes_before / 1048576:.1f}MB → {self.bytes_after / 1048576:.1f}MB"
+            f"（回收 {self.reclaimed_bytes / 1048576:.1f}MB），耗时 {self.elapsed_seconds:.1f}s"
+        )
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return str(value)
+
+
+class RetentionService:
+    """
+    时序表保留策略执行器
+
+    Args:
+        db: 数据库管理器（默认单例）
+        config: 配置（默认全局配置）
+        now: 当前时间（测试用）
+    """
+
+    def __init__(
+        self,
+        db: Optional[DatabaseManager] = None,
+        config=None,
+        now: Optional[datetime] = None,
+    ):
+        self.db = db or DatabaseManager.get_instance()
+        self.config = config or get_config()
+        self._now = now
+        self.batch_size = max(1, int(getattr(self.config, "retention_batch_size", 500)))
+        self.archive_dir = self._resolve_archive_dir()
+
+    def _resolve_archive_dir(self) -> Optional[Path]:
+        raw = (getattr(self.config, "retention_archive_dir", "") or "").strip()
+        if raw.lower() in ("off", "false", "none"):
+            return None
+        if raw:
+            return Path(raw)
+        database_path = getattr(self.config, "database_path", "./data/stock_analysis.db")
+        return Path(database_path).absolute().parent / "archive"
+
+    # ------------------------------------------------------------------
+    # 入口
+    # ------------------------------------------------------------------
+
+    def run(self) -> RetentionReport:
+        """执行全部保留策略；单表失败不影响其他表"""
+        started = time.monotonic()
+        report = RetentionReport()
+        report.bytes_before = self._database_bytes()
+
+        policies = [
+            ("news_intel", "retention_news_days", 180, self._purge_news),
+            ("fundamental_snapshot", "retention_fundamental_days", 90, self._purge_fundamentals),
+            ("analysis_history", "retention_analysis_days", 0, self._purge_analysis_history),
+            ("llm_usage", "retention_llm_usage_days", 90, self._purge_llm_usage),
+            ("conversation_messages", "retention_conversation_days", 180, self._purge_conversations),
+        ]
+        now = self._now or datetime.now()
+        for table, attr, default, purge in policies:
+            days = int(getattr(self.config, attr, default) or 0)
+            if days <= 0:
+                continue
+            result = TableRetentionResult(table=table, days=days, cutoff=now - timedelta(days=days))
+            try:
+                purge(result)
+            except Exception as exc:
+                result.error = str(exc)
+                logger.exception(f"[Retention] 清理 {table} 失败: {exc}")
+            report.tables.append(result)
+
+        try:
+            report.compressed_rows = self.db.compress_legacy_analysis_blobs(batch_size=self.batch_size)
+        except Exception as exc:
+            logger.warning(f"[Retention] 压缩旧分析记录失败: {exc}")
+
+        vacuum_mode = getattr(self.config, "retention_vacuum_mode", "INCREMENTAL")
+        try:
+            self.db.compact_database(vacuum_mode)
+        except Exception as exc:
+            logger.warning(f"[Retention] 空间回收失败（{vacuum_mode}）: {exc}")
+
+        report.bytes_after = self._database_bytes()
+        report.elapsed_seconds = time.monotonic() - started
+        logger.info(f"[Retention] {report.summary()}")
+        return report
+
+    def _database_bytes(self) -> int:
+        try:
+            return self.db.get_database_size()["total_bytes"]
+        except Exception as exc:
+            logger.debug(f"[Retention] 读取数据库大小失败: {exc}")
+            return 0
+
+    # ------------------------------------------------------------------
+    # 各表策略
+    # ------------------------------------------------------------------
+
+    def _purge_news(self, result: TableRetentionResult) -> None:
+        self._purge_by_time(result, NewsIntel, NewsIntel.fetched_at)
+
+    def _purge_fundamentals(self, result: TableRetentionResult) -> None:
+        self._purge_by_time(result, FundamentalSnapshot, FundamentalSnapshot.created_at)
+
+    def _purge_analysis_history(self, result: TableRetentionResult) -> None:
+        def _delete_backtests(session, ids: List[int]) -> None:
+            # 回测结果外键引用分析记录，随之归档并删除
+            rows = session.execute(
+                select(*BacktestResult.__table__.columns)
+                .where(BacktestResult.analysis_history_id.in_(ids))
+            ).mappings().all()
+            self._archive(BacktestResult.__tablename__, rows, "evaluated_at")
+            session.execute(delete(BacktestResult).where(BacktestResult.analysis_history_id.in_(ids)))
+
+        self._purge_by_time(result, AnalysisHistory, AnalysisHistory.created_at, before_delete=_delete_backtests)
+
+    def _purge_llm_usage(self, result: TableRetentionResult) -> None:
+        # 先把缓冲与未折叠的明细并入小时汇总，删除只限水位以下，用量统计不受影响
+        self.db.flush_llm_usage()
+        self.db.refresh_llm_usage_rollups()
+        watermark = self.db.get_llm_usage_rollup_watermark()
+        self._purge_by_time(result, LLMUsage, LLMUsage.called_at, LLMUsage.id <= watermark)
+
+    def _purge_conversations(self, result: TableRetentionResult) -> None:
+        """按会话最后活跃时间整会话删除，避免留下缺头少尾的对话"""
+        self.db._backfill_conversation_sessions()
+        # 批大小按会话计；按每会话约 20 条消息折算，单批行数与其他表相当
+        sessions_per_batch = max(1, self.batch_size // 20)
+        last_session = ""
+        while True:
+            with self.db.session_scope() as session:
+                session_ids = session.execute(
+                    select(ConversationSession.session_id)
+                    .where(
+                        ConversationSession.session_id > last_session,
+                        ConversationSession.last_active < result.cutoff,
+                    )
+                    .order_by(ConversationSession.session_id)
+                    .limit(sessions_per_batch)
+                ).scalars().all()
+                if not session_ids:
+                    return
+                rows = session.execute(
+                    select(*ConversationMessage.__table__.columns)
+                    .where(ConversationMessage.session_id.in_(session_ids))
+                    .order_by(ConversationMessage.id)
+                ).mappings().all()
+                result.archived += self._archive(ConversationMessage.__tablename__, rows, "created_at")
+                deleted = session.execute(
+                    delete(ConversationMessage).where(ConversationMessage.session_id.in_(session_ids))
+                )
+                session.execute(
+                    delete(ConversationSession).where(ConversationSession.session_id.in_(session_ids))
+                )
+            result.deleted += deleted.rowcount or 0
+            last_session = session_ids[-1]
+
+    def _purge_by_time(
+        self,
+        result: TableRetentionResult,
+        model,
+        time_column,
+        *extra_filters,
+        before_delete: Optional[Callable[[Any, List[int]], None]] = None,
+    ) -> None:
+        """按 id 游标分批：读取 → 归档 → 删除，每批一个事务"""
+        table = model.__tablename__
+        last_id = 0
+        while True:
+            with self.db.session_scope() as session:
+                rows = session.execute(
+                    select(*model.__table__.columns)
+                    .where(model.id > last_id, time_column < result.cutoff, *extra_filters)
+                    .order_by(model.id)
+                    .limit(self.batch_size)
+                ).mappings().all()
+                if not rows:
+                    return
+                ids = [row["id"] for row in rows]
+                result.archived += self._archive(table, rows, time_column.key)
+                if before_delete is not None:
+                    before_delete(session, ids)
+                session.execute(delete(model).where(model.id.in_(ids)))
+            result.deleted += len(ids)
+            last_id = ids[-1]
+
+    # ------------------------------------------------------------------
+    # 归档
+    # ------------------------------------------------------------------
+
+    def _archive(self, table: str, rows, time_key: str) -> int:
+        """按记录所属月份追加到归档文件；写入失败抛异常，本批不会被删除"""
+        if self.archive_dir is None or not rows:
+            return 0
+        by_month: Dict[str, List[str]] = {}
+        for row in rows:
+            stamp = row.get(time_key)
+            month = stamp.strftime("%Y-%m") if isinstance(stamp, (datetime, date)) else "unknown"
+            by_month.setdefault(month, []).append(
+                json.dumps(dict(row), ensure_ascii=False, default=_json_default)
+            )
+        target_dir = self.archive_dir / table
+        target_dir.mkdir(parents=True, exist_ok=True)
+        for month, lines in by_month.items():
+            path = target_dir / f"{month}.jsonl.gz"
+            with open(path, "ab") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+                    gz.write(("\n".join(lines) + "\n").encode("utf-8"))
+                raw.flush()
+                os.fsync(raw.fileno())
+        return len(rows)
+
+
+def run_retention(db: Optional[DatabaseManager] = None, config=None) -> RetentionReport:
+    """调度器后台任务入口"""
+    return RetentionService(db=db, config=config).run()
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+Stock Name Index
+===================================
+
+Precomputed lookup structures for stock name resolution, built once per name pool:
+- exact name -> code (ambiguous names tracked separately)
+- full pinyin / pinyin initials -> code (built lazily on first pinyin lookup)
+- character bigram postings for substring (partial) matches
+- character postings used to shortlist fuzzy-match candidates before difflib
+"""
+
+from __future__ import annotations
+
+import difflib
+import logging
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_name_for_pinyin(name: str) -> str:
+    """Strip full-width forms and *ST/N prefixes so they do not pollute pinyin keys."""
+    normalized = unicodedata.normalize('NFKC', name).strip()
+    normalized = re.sub(r'^(?:\*?ST|N)+', '', normalized, flags=re.IGNORECASE)
+    return normalized.strip() or unicodedata.normalize('NFKC', name).strip()
+
+
+def pinyin_fields(name: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Return (full pinyin, initials) of a normalized stock name.
+
+    Returns (None, None) when pypinyin is unavailable.
+    """
+    try:
+        from pypinyin import lazy_pinyin
+    except ImportError:
+        return None, None
+    syllables = lazy_pinyin(normalize_name_for_pinyin(name))
+    return ''.join(syllables), ''.join(p[0] for p in syllables if p)
+
+
+def _bigrams(text: str) -> Set[str]:
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class StockNameIndex:
+    """
+    Immutable index over (code, name) pairs.
+
+    Partial lookups intersect bigram postings instead of scanning every name, and
+    fuzzy lookups only hand difflib the names that share enough characters with the
+    query to possibly reach the cutoff (ratio <= 2 * shared_chars / total_len).
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]]):
+        self.entries: List[Tuple[str, str]] = []
+        name_to_codes: Dict[str, List[str]] = {}
+        for code, name in entries:
+            if not code or not name:
+                continue
+            name = str(name).strip()
+            if not name:
+                continue
+            self.entries.append((code, name))
+            codes = name_to_codes.setdefault(name, [])
+            if code not in codes:
+                codes.append(code)
+
+        self.name_to_code: Dict[str, str] = {
+            name: codes[0] for name, codes in name_to_codes.items() if len(codes) == 1
+        }
+        self.ambiguous_names: Set[str] = {
+            name for name, codes in name_to_codes.items() if len(codes) > 1
+        }
+
+        # Substring postings over every entry (ambiguous names included)
+        self._char_entries: Dict[str, Set[int]] = {}
+        self._bigram_entries: Dict[str, Set[int]] = {}
+        for idx, (_, name) in enumerate(self.entries):
+            for ch in set(name):
+                self._char_entries.setdefault(ch, set()).add(idx)
+            for gram in _bigrams(name):
+                self._bigram_entries.setdefault(gram, set()).add(idx)
+
+        # Fuzzy candidates are drawn from unique names only
+        self._fuzzy_names: List[str] = list(self.name_to_code)
+        self._fuzzy_char_counts: Dict[str, List[Tuple[int, int]]] = {}
+        for idx, name in enumerate(self._fuzzy_names):
+            for ch, count in Counter(name).items():
+                self._fuzzy_char_counts.setdefault(ch, []).append((idx, count))
+
+        self._pinyin_lock = threading.Lock()
+        self._pinyin_to_code: Optional[Dict[str, str]] = None
+        self._initials_to_codes: Optional[Dict[str, List[str]]] = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    # ------------------------------------------------------------------
+    # Exact / pinyin
+    # ------------------------------------------------------------------
+
+    def lookup(self, name: str) -> Optional[str]:
+        """Exact name -> code; None for unknown or ambiguous names."""
+        return self.name_to_code.get(name)
+
+    def is_ambiguous(self, name: str) -> bool:
+        return name in self.ambiguous_names
+
+    def _ensure_pinyin(self) -> bool:
+        if self._pinyin_to_code is not None:
+            return True
+        with self._pinyin_lock:
+            if self._pinyin_to_code is not None:
+                return True
+            try:
+                from pypinyin import lazy_pinyin
+            except ImportError:
+                return False
+            pinyin_to_code: Dict[str, str] = {}
+            initials_to_codes: Dict[str, List[str]] = {}
+            # Raw-name pinyin first so earlier behaviour wins on collisions,
+            # then prefix-stripped variants (e.g. "*ST国华" -> "guohua").
+            for name, code in self.name_to_code.items():
+                pinyin_to_code.setdefault(''.join(lazy_pinyin(name)).lower(), code)
+            for name, code in self.name_to_code.items():
+                full, initials = pinyin_fields(name)
+                if full:
+                    pinyin_to_code.setdefault(full.lower(), code)
+                if initials:
+                    codes = initials_to_codes.setdefault(initials.lower(), [])
+                    if code not in codes:
+                        codes.append(code)
+            self._initials_to_codes = initials_to_codes
+            self._pinyin_to_code = pinyin_to_code
+            logger.debug(f"[StockNameIndex] 拼音索引已构建: {len(pinyin_to_code)} 条")
+        return True
+
+    def lookup_pinyin(self, text: str) -> Optional[str]:
+        """Full-pinyin match; accepts either Chinese characters or a pinyin string."""
+        if not self._ensure_pinyin():
+            return None
+        from pypinyin import lazy_pinyin
+
+        return self._pinyin_to_code.get(''.join(lazy_pinyin(text)).lower())
+
+    def lookup_initials(self, text: str) -> Optional[str]:
+        """Pinyin-initials match (e.g. "gzmt"); None unless exactly one code matches."""
+        if not self._ensure_pinyin():
+            return None
+        codes = self._initials_to_codes.get(text.lower())
+        if codes and len(codes) == 1:
+            return codes[0]
+        return None
+
+    # ------------------------------------------------------------------
+    # Partial / fuzzy
+    # ------------------------------------------------------------------
+
+    def partial_codes(self, fragment: str) -> List[str]:
+        """Codes whose name contains ``fragment``, deduplicated in index order."""
+        if not fragment:
+            return []
+        if len(fragment) == 1:
+            candidates = self._char_entries.get(fragment, set())
+        else:
+            postings = []
+            for gram in _bigrams(fragment):
+                entries = self._bigram_entries.get(gram)
+                if not entries:
+                    return []
+                postings.append(entries)
+            postings.sort(key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+        codes = [
+            self.entries[idx][0] for idx in sorted(candidates)
+            if fragment in self.entries[idx][1]
+        ]
+        return list(dict.fromkeys(codes))
+
+    def close_matches(self, query: str, cutoff: float, n: int = 1) -> List[str]:
+        """
+        Same result as ``difflib.get_close_matches`` over all unique names, but
+        only scoring names whose shared-character upper bound reaches ``cutoff``.
+        """
+        if not query:
+            return []
+        shared: Dict[int, int] = {}
+        for ch, query_count in Counter(query).items():
+            for idx, count in self._fuzzy_char_counts.get(ch, ()):
+                shared[idx] = shared.get(idx, 0) + min(query_count, count)
+        query_len = len(query)
+        shortlist = [
+            self._fuzzy_names[idx]
+            for idx, overlap in shared.items()
+            if 2.0 * overlap / (query_len + len(self._fuzzy_names[idx])) >= cutoff
+        ]
+        return difflib.get_close_matches(query, shortlist, n=n, cutoff=cutoff)
+
+
+_local_index: Optional[StockNameIndex] = None
+_local_index_size = -1
+_local_index_lock = threading.Lock()
+
+
+def get_local_name_index() -> StockNameIndex:
+    """
+    Index over the built-in STOCK_NAME_MAP.
+
+    Built once and reused; rebuilt only when names were appended to the map at
+    runtime (e.g. names learned from data sources during analysis).
+    """
+    global _local_index, _local_index_size
+    from src.data.stock_mapping import STOCK_NAME_MAP
+
+    size = len(STOCK_NAME_MAP)
+    index = _local_index
+    if index is not None and _local_index_size == size:
+        return index
+    with _local_index_lock:
+        if _local_index is None or _local_index_size != len(STOCK_NAME_MAP):
+            _local_index = StockNameIndex(list(STOCK_NAME_MAP.items()))
+            _local_index_size = len(STOCK_NAME_MAP)
+        return _local_index
@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+股票搜索（自动补全）索引
+===================================
+
+职责：
+1. 加载前端同款预生成索引（stocks.index.json），缺失时退回 STOCK_NAME_MAP
+2. 列式存储：精确匹配走字典，前缀匹配在排序键数组上二分，包含匹配只遍历
+   查询中最稀有二元组的倒排表再逐条校验
+3. 行按热度降序排列，同一得分档内先找到的就是排序靠前的，凑够 limit 即停
+
+打分规则与前端 apps/dsa-web/src/utils/searchStocks.ts 保持一致。
+
+``write_sharded_index`` 同时为 WebUI 导出列式分片格式（stocks.index/manifest.json +
+按市场、代码区间切分的分片），前端并行按需加载，不再一次性下载整份 JSON。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+# 按优先级查找预生成索引：构建产物 static/ 优先，其次前端源码 public/
+INDEX_FILE_CANDIDATES = (
+    _PROJECT_ROOT / "static" / "stocks.index.json",
+    _PROJECT_ROOT / "apps" / "dsa-web" / "public" / "stocks.index.json",
+)
+
+# 与前端 INDEX_FIELD 顺序一致的元组格式
+_TUPLE_FIELDS = (
+    "canonicalCode", "displayCode", "nameZh", "pinyinFull", "pinyinAbbr",
+    "aliases", "market", "assetType", "active", "popularity",
+)
+
+# (字段, 得分)；与 searchStocks.ts calculateMatchScore 相同
+_EXACT_TIERS = (("canonical", 100), ("display", 99), ("name", 98), ("alias", 97), ("abbr", 96))
+_PREFIX_TIERS = (("display", 80), ("name", 79), ("abbr", 78), ("alias", 77))
+_CONTAINS_TIERS = (("display", 60), ("name", 59), ("full", 58), ("alias", 57))
+
+# 前端列式分片格式版本与单分片最大行数
+SHARD_FORMAT_VERSION = 2
+SHARD_MAX_ROWS = 4096
+
+_SEP = "\x00"
+_MAX_CHAR = "\U0010ffff"
+
+
+def normalize_query(text: str) -> str:
+    """NFKC + 去空白 + 小写，与前端 normalizeQuery 一致"""
+    return "".join(unicodedata.normalize("NFKC", text or "").lower().split())
+
+
+class _StringColumn:
+    """
+    单字段列：精确匹配字典、排序键数组（前缀，二分）、二元组倒排（包含），
+    单字符查询退回 ``\\x00`` 分隔字符串表上的 C 层 find
+    """
+
+    def __init__(self, pairs: Iterable[Tuple[int, str]]):
+        self.keys: List[str] = []
+        self.rows: List[int] = []
+        self.exact: Dict[str, List[int]] = {}
+        grams: Dict[str, List[int]] = {}
+        for row, key in pairs:
+            if not key:
+                continue
+            idx = len(self.keys)
+            self.keys.append(key)
+            self.rows.append(row)
+            rows = self.exact.setdefault(key, [])
+            if not rows or rows[-1] != row:
+                rows.append(row)
+            for gram in {key[i:i + 2] for i in range(len(key) - 1)}:
+                grams.setdefault(gram, []).append(idx)
+        self.grams: Dict[str, array] = {gram: array("i", idxs) for gram, idxs in grams.items()}
+
+        self.starts = array("i")
+        offset = 1
+        for key in self.keys:
+            self.starts.append(offset)
+            offset += len(key) + 1
+        self.blob = _SEP + _SEP.join(self.keys) + _SEP
+
+        order = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        self.sorted_keys = [self.keys[i] for i in order]
+        self.sorted_rows = [self.rows[i] for i in order]
+
+    def prefix(self, needle: str) -> List[int]:
+        """前缀命中的行，按行序返回"""
+        lo = bisect_left(self.sorted_keys, needle)
+        hi = bisect_left(self.sorted_keys, needle + _MAX_CHAR, lo)
+        return sorted(self.sorted_rows[lo:hi])
+
+    def contains(self, needle: str) -> Iterable[int]:
+        """按行序产出包含 needle 的行（同一行可能重复产出）"""
+        if len(needle) == 1:
+            yield from self._scan(needle)
+            return
+        postings = []
+        for i in range(len(needle) - 1):
+            posting = self.grams.get(needle[i:i + 2])
+            if posting is None:
+                return
+            postings.append(posting)
+        keys, rows = self.keys, self.rows
+        # 只遍历最稀有二元组的倒排表，逐条校验
+        for idx in min(postings, key=len):
+            if needle in keys[idx]:
+                yield rows[idx]
+
+    def _scan(self, needle: str) -> Iterable[int]:
+        blob, starts, rows = self.blob, self.starts, self.rows
+        pos = blob.find(needle)
+        while pos != -1:
+            idx = bisect_right(starts, pos) - 1
+            yield rows[idx]
+            # 跳到下一个 key，避免同一 key 内重复命中
+            pos = blob.find(needle, starts[idx + 1] - 1) if idx + 1 < len(starts) else -1
+
+
+class StockSearchIndex:
+    """只读内存索引；``search`` 返回按得分、热度排好序的候选"""
+
+    def __init__(self, items: Sequence[Dict[str, Any]]):
+        ordered = sorted(
+            enumerate(items),
+            key=lambda pair: (-(pair[1].get("popularity") or 0), pair[0]),
+        )
+        self.items: List[Dict[str, Any]] = [item for _, item in ordered]
+        self._active = [bool(item.get("active", True)) for item in self.items]
+
+        keys = {
+            field: [normalize_query(item.get(field) or "") for item in self.items]
+            for field in ("canonicalCode", "displayCode", "nameZh", "pinyinAbbr", "pinyinFull")
+        }
+        names = keys["nameZh"]
+
+        def column(field: str, skip_same_as_name: bool = False) -> _StringColumn:
+            # 拼音与名称相同（如美股英文名）时，名称档总是得分更高，不必重复收录
+            return _StringColumn(
+                (row, key) for row, key in enumerate(keys[field])
+                if not (skip_same_as_name and key == names[row])
+            )
+
+        self._columns: Dict[str, _StringColumn] = {
+            "canonical": column("canonicalCode"),
+            "display": column("displayCode"),
+            "name": column("nameZh"),
+            "abbr": column("pinyinAbbr", skip_same_as_name=True),
+            "full": column("pinyinFull", skip_same_as_name=True),
+            "alias": _StringColumn(
+                (row, normalize_query(alias))
+                for row, item in enumerate(self.items)
+                for alias in (item.get("aliases") or [])
+            ),
+        }
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def search(self, query: str, limit: int = 10, active_only: bool = True) -> List[Dict[str, Any]]:
+        q = normalize_query(query)
+        if not q or limit <= 0:
+            return []
+
+        results: List[Dict[str, Any]] = []
+        seen = set()
+
+        def take(rows: Iterable[int], score: int) -> bool:
+            for row in rows:
+                if row in seen or (active_only and not self._active[row]):
+                    continue
+                seen.add(row)
+                results.append(self._suggestion(row, q, score))
+                if len(results) >= limit:
+                    return True
+            return False
+
+        for field, score in _EXACT_TIERS:
+            if take(self._columns[field].exact.get(q, ()), score):
+                return results
+        for field, score in _PREFIX_TIERS:
+            if take(self._columns[field].prefix(q), score):
+                return results
+        for field, score in _CONTAINS_TIERS:
+            if take(self._columns[field].contains(q), score):
+                return results
+        return results
+
+    def _suggestion(self, row: int, q: str, score: int) -> Dict[str, Any]:
+        item = self.items[row]
+
+        def has(*fields: str) -> bool:
+            return any(q in normalize_query(item.get(f) or "") for f in fields)
+
+        if has("canonicalCode", "displayCode"):
+            match_field = "code"
+        elif has("nameZh"):
+            match_field = "name"
+        elif has("pinyinFull", "pinyinAbbr"):
+            match_field = "pinyin"
+        elif any(q in normalize_query(a) for a in item.get("aliases") or []):
+            match_field = "alias"
+        else:
+            match_field = "name"
+
+        if score >= 96:
+            match_type = "exact"
+        elif score >= 77:
+            match_type = "prefix"
+        else:
+            match_type = "contains"
+
+        return {
+            "canonical_code": item.get("canonicalCode"),
+            "display_code": item.get("displayCode"),
+            "name": item.get("nameZh"),
+            "pinyin_full": item.get("pinyinFull"),
+            "pinyin_abbr": item.get("pinyinAbbr"),
+            "market": item.get("market"),
+            "asset_type": item.get("assetType"),
+            "match_type": match_type,
+            "match_field": match_field,
+            "score": score,
+        }
+
+
+def _rows_to_items(rows: Iterable[Any]) -> List[Dict[str, Any]]:
+    items = []
+    for row in rows:
+        if isinstance(row, list):
+            items.append(dict(zip(_TUPLE_FIELDS, row)))
+        elif isinstance(row, dict):
+            items.append(row)
+    return items
+
+
+def _items_from_local_map() -> List[Dict[str, Any]]:
+    """预生成索引缺失时，用 STOCK_NAME_MAP 构造最小索引"""
+    from src.services.stock_name_index import get_local_name_index, pinyin_fields
+
+    items = []
+    for code, name in get_local_name_index().entries:
+        full, abbr = pinyin_fields(name)
+        if code.isdigit() and len(code) == 5:
+            market = "HK"
+        elif code.isdigit():
+            market = "CN"
+        else:
+            market = "US"
+        items.append({
+            "canonicalCode": code, "displayCode": code, "nameZh": name,
+            "pinyinFull": full, "pinyinAbbr": abbr, "aliases": [],
+            "market": market, "assetType": "stock", "active": True, "popularity": 100,
+        })
+    return items
+
+
+def load_stock_search_index(paths: Sequence[Path] = INDEX_FILE_CANDIDATES) -> StockSearchIndex:
+    for path in paths:
+        if not path.is_file():
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                items = _rows_to_items(json.load(f))
+        except Exception as e:
+            logger.warning(f"[StockSearch] 读取索引失败 {path}: {e}")
+            continue
+        if items:
+            logger.info(f"[StockSearch] 已加载索引 {path.name}: {len(items)} 条")
+            return StockSearchIndex(items)
+    logger.info("[StockSearch] 未找到预生成索引，使用内置 STOCK_NAME_MAP")
+    return StockSearchIndex(_items_from_local_map())
+
+
+def _compact_column(values: List[Any]) -> Any:
+    """整列取值相同时存为标量，否则存数组"""
+    return values[0] if values and all(v == values[0] for v in values) else values
+
+
+def _encode_shard(items: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    列式编码一个分片：
+    - canonicalCode：与 displayCode 相同记 null，仅多后缀记 ".SZ"
+    - pinyinFull/pinyinAbbr：与 nameZh 相同记 0
+    - aliases：稀疏对象 {行号: [...]}
+    - market/assetType/active/popularity：整列相同时存标量
+    """
+    canonical, pinyin_full, pinyin_abbr = [], [], []
+    for item in items:
+        display, code = item.get("displayCode"), item.get("canonicalCode")
+        if code == display:
+            canonical.append(None)
+        elif code and display and code.startswith(display + "."):
+            canonical.append(code[len(display):])
+        else:
+            canonical.append(code)
+        name = item.get("nameZh")
+        pinyin_full.append(0 if item.get("pinyinFull") == name else item.get("pinyinFull"))
+        pinyin_abbr.append(0 if item.get("pinyinAbbr") == name else item.get("pinyinAbbr"))
+    return {
+        "count": len(items),
+        "displayCode": [item.get("displayCode") for item in items],
+        "canonicalCode": canonical,
+        "nameZh": [item.get("nameZh") for item in items],
+        "pinyinFull": pinyin_full,
+        "pinyinAbbr": pinyin_abbr,
+        "aliases": {str(i): item["aliases"] for i, item in enumerate(items) if item.get("aliases")},
+        "market": _compact_column([item.get("market") for item in items]),
+        "assetType": _compact_column([item.get("assetType") for item in items]),
+        "active": _compact_column([bool(item.get("active", True)) for item in items]),
+        "popularity": _compact_column([item.get("popularity") or 0 for item in items]),
+    }
+
+
+def build_sharded_index(rows: Iterable[Any], shard_rows: int = SHARD_MAX_ROWS) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """
+    将元组/对象格式的索引切成列式分片。
+
+    分片按市场分组、组内按原顺序切成连续代码区间，manifest 记录每片的市场与首尾代码，
+    A 股/港股分片排在前面以便前端优先加载。
+
+    Returns:
+        (manifest, {文件名: 分片内容})
+    """
+    items = _rows_to_items(rows)
+    by_market: Dict[str, List[Dict[str, Any]]] = {}
+    for item in items:
+        by_market.setdefault(str(item.get("market") or "OTHER"), []).append(item)
+
+    priority = {"CN": 0, "HK": 1, "BSE": 2}
+    manifest: Dict[str, Any] = {"version": SHARD_FORMAT_VERSION, "count": len(items), "shards": []}
+    shards: Dict[str, Dict[str, Any]] = {}
+    for market in sorted(by_market, key=lambda m: (priority.get(m, len(priority)), m)):
+        group = by_market[market]
+        for part, start in enumerate(range(0, len(group), shard_rows)):
+            chunk = group[start:start + shard_rows]
+            file_name = f"{market.lower()}-{part}.json"
+            shards[file_name] = _encode_shard(chunk)
+            manifest["shards"].append({
+                "file": file_name,
+                "market": market,
+                "count": len(chunk),
+                "first": chunk[0].get("displayCode"),
+                "last": chunk[-1].get("displayCode"),
+            })
+    return manifest, shards
+
+
+def write_sharded_index(rows: Iterable[Any], out_dir: Path, shard_rows: int = SHARD_MAX_ROWS) -> Dict[str, Any]:
+    """写出 manifest.json 与各分片，清理旧分片；返回 manifest"""
+    manifest, shards = build_sharded_index(rows, shard_rows)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for stale in out_dir.glob("*.json"):
+        if stale.name != "manifest.json" and stale.name not in shards:
+            stale.unlink()
+    for file_name, shard in shards.items():
+        with open(out_dir / file_name, "w", encoding="utf-8") as f:
+            json.dump(shard, f, ensure_ascii=False, separators=(",", ":"))
+    # manifest 最后写，避免前端读到指向未写完分片的清单
+    with open(out_dir / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+    return manifest
+
+
+_search_index: Optional[StockSearchIndex] = None
+_search_index_lock = threading.Lock()
+
+
+def get_stock_search_index() -> StockSearchIndex:
+    """进程内单例，首次调用时构建"""
+    global _search_index
+    if _search_index is None:
+        with _search_index_lock:
+            if _search_index is None:
+                _search_index = load_stock_search_index()
+    return _search_index
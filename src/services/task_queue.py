@@ -13,20 +13,19 @@ A股自选股智能分析系统 - 异步任务队列
 
 from __future__ import annotations
 
-import asyncio
 import logging
 import threading
+import time
 import uuid
+from collections import OrderedDict, deque
 from concurrent.futures import ThreadPoolExecutor, Future
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Optional, Dict, List, Any, TYPE_CHECKING, Tuple, Literal
-
-if TYPE_CHECKING:
-    from asyncio import Queue as AsyncQueue
+from typing import Callable, Optional, Dict, List, Any, Tuple, Literal
 
 from data_provider.base import canonical_stock_code, normalize_stock_code
+from src.services.event_broadcaster import EventBroadcaster, EventSubscription
 from src.utils.analysis_metadata import SELECTION_SOURCES
 
 logger = logging.getLogger(__name__)
@@ -42,6 +41,13 @@ def _dedupe_stock_code_key(stock_code: str) -> str:
     return canonical_stock_code(normalize_stock_code(stock_code))
 
 
+# Priority lanes, highest priority first.
+LANE_INTERACTIVE = "interactive"
+LANE_SCHEDULED = "scheduled"
+LANE_BULK = "bulk"
+TASK_LANES: Tuple[str, ...] = (LANE_INTERACTIVE, LANE_SCHEDULED, LANE_BULK)
+
+
 class TaskStatus(str, Enum):
     """Task status enumeration"""
     PENDING = "pending"        # Waiting for execution
@@ -71,6 +77,7 @@ class TaskInfo:
     completed_at: Optional[datetime] = None
     original_query: Optional[str] = None
     selection_source: Optional[str] = None
+    lane: str = LANE_INTERACTIVE
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert task info into an API-friendly dictionary."""
@@ -88,6 +95,7 @@ class TaskInfo:
             "error": self.error,
             "original_query": self.original_query,
             "selection_source": self.selection_source,
+            "lane": self.lane,
         }
     
     def copy(self) -> 'TaskInfo':
@@ -107,9 +115,152 @@ class TaskInfo:
             completed_at=self.completed_at,
             original_query=self.original_query,
             selection_source=self.selection_source,
+            lane=self.lane,
         )
 
 
+@dataclass
+class _QueuedTask:
+    """Execution parameters of an accepted task waiting in its lane."""
+    task_id: str
+    stock_code: str
+    report_type: str
+    force_refresh: bool
+    notify: bool
+    lane: str
+    requester: str
+    batch_group: Optional["_BatchGroup"] = None
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class _Lane:
+    """
+    One priority lane: per-requester FIFOs served round-robin (fair share)
+    under a concurrency cap, plus wait/run time aggregates.
+    """
+
+    def __init__(self, name: str, max_concurrency: int):
+        self.name = name
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.running = 0
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self.metrics: Dict[str, float] = {
+            "started": 0,
+            "finished": 0,
+            "wait_ms_total": 0,
+            "wait_ms_max": 0,
+            "run_ms_total": 0,
+            "run_ms_max": 0,
+        }
+
+    @property
+    def depth(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def push(self, item: _QueuedTask) -> None:
+        self._queues.setdefault(item.requester, deque()).append(item)
+
+    def remove(self, task_id: str) -> bool:
+        for requester, q in list(self._queues.items()):
+            for item in q:
+                if item.task_id == task_id:
+                    q.remove(item)
+                    if not q:
+                        del self._queues[requester]
+                    return True
+        return False
+
+    def pop_next(self) -> Optional[_QueuedTask]:
+        """Take the next task from the requester served least recently."""
+        if self.running >= self.max_concurrency:
+            return None
+        for requester in list(self._queues):
+            q = self._queues[requester]
+            item = q.popleft()
+            # Rotate the requester to the back so others get the next slot.
+            del self._queues[requester]
+            if q:
+                self._queues[requester] = q
+            return item
+        return None
+
+    def record_start(self, item: _QueuedTask, now: float) -> None:
+        wait_ms = int((now - item.enqueued_at) * 1000)
+        self.running += 1
+        self.metrics["started"] += 1
+        self.metrics["wait_ms_total"] += wait_ms
+        self.metrics["wait_ms_max"] = max(self.metrics["wait_ms_max"], wait_ms)
+
+    def record_finish(self, run_ms: int) -> None:
+        self.running = max(0, self.running - 1)
+        self.metrics["finished"] += 1
+        self.metrics["run_ms_total"] += run_ms
+        self.metrics["run_ms_max"] = max(self.metrics["run_ms_max"], run_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        started = self.metrics["started"]
+        finished = self.metrics["finished"]
+        return {
+            "queued": self.depth,
+            "running": self.running,
+            "max_concurrency": self.max_concurrency,
+            "requesters_waiting": len(self._queues),
+            "started": int(started),
+            "finished": int(finished),
+            "avg_wait_ms": int(self.metrics["wait_ms_total"] / started) if started else 0,
+            "max_wait_ms": int(self.metrics["wait_ms_max"]),
+            "avg_run_ms": int(self.metrics["run_ms_total"] / finished) if finished else 0,
+            "max_run_ms": int(self.metrics["run_ms_max"]),
+        }
+
+
+def default_lane_limits(max_workers: int) -> Dict[str, int]:
+    """
+    Default per-lane caps: interactive may use every worker, scheduled and
+    bulk leave one worker free so single-stock requests are never starved.
+    """
+    reserved = max(1, max_workers - 1)
+    return {LANE_INTERACTIVE: max_workers, LANE_SCHEDULED: reserved, LANE_BULK: reserved}
+
+
+def stream_progress(current: int, event: Dict[str, Any]) -> Tuple[int, str]:
+    """把 LLM 流式进度事件映射为任务进度（10-90）与提示文案"""
+    if event.get("type") == "llm_stream_restart":
+        return 10, "输出格式异常，正在重新生成..."
+    expected = max(1, int(event.get("fields_expected") or 1))
+    done = min(int(event.get("fields_done") or 0), expected)
+    return max(current, 10 + 80 * done // expected), f"正在生成报告（{done}/{expected}）"
+
+
+class _BatchGroup:
+    """
+    一次批量提交中被接受的任务组
+
+    组内任务仍各自独立执行（保留逐任务 SSE 事件与去重语义），但共享一次
+    批量预取（实时行情 / 交易日历 / 股票名称）：首个开始执行的任务负责预取，
+    其余任务等待其完成后直接命中缓存。
+    """
+
+    def __init__(self, stock_codes: List[str]):
+        self.stock_codes = list(stock_codes)
+        self._lock = threading.Lock()
+        self._prefetched = False
+
+    def ensure_prefetched(self, prefetch: Callable[[List[str]], None]) -> bool:
+        """执行（或等待）组内唯一一次预取；返回本次调用是否实际执行了预取。"""
+        with self._lock:
+            if self._prefetched:
+                return False
+            try:
+                prefetch(self.stock_codes)
+            except Exception as e:
+                # 预取失败不影响分析，各任务回退到逐只拉取
+                logger.warning(f"[TaskQueue] 批量预取失败，回退逐只获取: {e}")
+            self._prefetched = True
+            return True
+
+
 class DuplicateTaskError(Exception):
     """
     重复提交异常
@@ -133,6 +284,8 @@ class AnalysisTaskQueue:
     2. 线程池执行分析任务
     3. SSE 事件广播机制
     4. 任务完成后自动持久化
+    5. 优先级通道（interactive > scheduled > bulk）：各通道独立并发上限，
+       通道内按提交方轮转公平调度；抢占的是排队顺序而非运行中的任务
     """
     
     _instance: Optional['AnalysisTaskQueue'] = None
@@ -145,7 +298,7 @@ class AnalysisTaskQueue:
                     cls._instance = super().__new__(cls)
         return cls._instance
     
-    def __init__(self, max_workers: int = 3):
+    def __init__(self, max_workers: int = 3, lane_limits: Optional[Dict[str, int]] = None):
         # 防止重复初始化
         if hasattr(self, '_initialized') and self._initialized:
             return
@@ -156,14 +309,21 @@ class AnalysisTaskQueue:
         # 核心数据结构
         self._tasks: Dict[str, TaskInfo] = {}           # task_id -> TaskInfo
         self._analyzing_stocks: Dict[str, str] = {}     # dedupe_key -> task_id
-        self._futures: Dict[str, Future] = {}           # task_id -> Future
-        
-        # SSE 订阅者列表（asyncio.Queue 实例）
-        self._subscribers: List['AsyncQueue'] = []
-        self._subscribers_lock = threading.Lock()
+        self._futures: Dict[str, Future] = {}           # task_id -> Future（任务完成时结算）
+
+        # 优先级通道：executor 的每次提交都是一次“调度票据”，
+        # 票据运行时才从通道中挑选当前优先级最高且未超并发上限的任务
+        limits = {**default_lane_limits(max_workers), **(lane_limits or {})}
+        self._lanes: Dict[str, _Lane] = {name: _Lane(name, limits[name]) for name in TASK_LANES}
+
+        # 持久化后端（TASK_QUEUE_BACKEND=database）：None 表示进程内内存队列
+        self._store: Optional[Any] = None
+        self._durable_worker: Optional[Any] = None
+        self._relay_thread: Optional[threading.Thread] = None
+        self._relay_seen: Dict[str, Tuple[str, int]] = {}
         
-        # 主事件循环引用（用于跨线程广播）
-        self._main_loop: Optional[asyncio.AbstractEventLoop] = None
+        # SSE 事件广播（有界缓冲 + 合并，按批次跨线程投递）
+        self._events = EventBroadcaster()
         
         # 线程安全锁
         self._data_lock = threading.RLock()
@@ -236,6 +396,7 @@ class AnalysisTaskQueue:
                 return "deferred_busy"
 
             self._max_workers = target
+            self._apply_lane_limits_locked()
             executor_to_shutdown = self._executor
             self._executor = None
 
@@ -246,6 +407,167 @@ class AnalysisTaskQueue:
             logger.info("[TaskQueue] 最大并发已更新: %s -> %s", previous, target)
         return "applied"
     
+    def _apply_lane_limits_locked(self) -> None:
+        limits = {**default_lane_limits(self._max_workers), **getattr(self, "_lane_overrides", {})}
+        for name, lane in self._lanes.items():
+            lane.max_concurrency = max(1, int(limits[name]))
+
+    def configure_lanes(self, lane_limits: Optional[Dict[str, int]]) -> None:
+        """
+        Override per-lane concurrency caps (values <= 0 keep the default).
+
+        Caps only gate which queued task a free worker picks next, so they can
+        be changed while tasks are running.
+        """
+        overrides = {
+            name: int(value)
+            for name, value in (lane_limits or {}).items()
+            if name in self._lanes and value is not None and int(value) > 0
+        }
+        with self._data_lock:
+            self._lane_overrides = overrides
+            self._apply_lane_limits_locked()
+
+    # ========== 持久化后端 ==========
+
+    @property
+    def is_durable(self) -> bool:
+        return self._store is not None
+
+    def enable_durable_backend(self, store: Any, worker: Optional[Any] = None) -> None:
+        """
+        切换到数据库持久化队列
+
+        Args:
+            store: ``AnalysisTaskRepository``；任务状态读写都走共享数据库
+            worker: 可选的内嵌 ``DurableTaskWorker``（本进程也消费任务）
+        """
+        with self._data_lock:
+            self._store = store
+            if worker is not None and self._durable_worker is None:
+                worker.on_change = self._on_durable_change
+                self._durable_worker = worker
+                worker.start()
+        logger.info("[TaskQueue] 已启用数据库持久化队列%s", "（内嵌 worker）" if worker is not None else "")
+
+    @staticmethod
+    def _task_info_from_record(record: Dict[str, Any]) -> TaskInfo:
+        return TaskInfo(
+            task_id=record["task_id"],
+            stock_code=record["stock_code"],
+            stock_name=record.get("stock_name"),
+            status=TaskStatus(record["status"]),
+            progress=record.get("progress") or 0,
+            message=record.get("message"),
+            result=record.get("result"),
+            error=record.get("error"),
+            report_type=record.get("report_type") or "detailed",
+            created_at=record.get("created_at") or datetime.now(),
+            started_at=record.get("started_at"),
+            completed_at=record.get("completed_at"),
+            original_query=record.get("original_query"),
+            selection_source=record.get("selection_source"),
+            lane=record.get("lane") or LANE_INTERACTIVE,
+        )
+
+    @staticmethod
+    def _durable_event_type(record: Dict[str, Any]) -> str:
+        status = record["status"]
+        if status == TaskStatus.PENDING.value:
+            return "task_retrying" if record.get("attempts") else "task_created"
+        if status == TaskStatus.PROCESSING.value:
+            return "task_started"
+        if status == TaskStatus.COMPLETED.value:
+            return "task_completed"
+        return "task_failed"
+
+    def _on_durable_change(self, record: Dict[str, Any]) -> None:
+        """广播持久化任务的状态变化（同一状态只广播一次；执行中的进度变化以 task_progress 推送）"""
+        key = (record["status"], int(record.get("attempts") or 0), int(record.get("progress") or 0))
+        with self._data_lock:
+            previous = self._relay_seen.get(record["task_id"])
+            if previous == key:
+                return
+            self._relay_seen[record["task_id"]] = key
+            if len(self._relay_seen) > 2000:
+                # 只保留进行中任务的去重状态
+                active = (TaskStatus.PENDING.value, TaskStatus.PROCESSING.value)
+                self._relay_seen = {k: v for k, v in self._relay_seen.items() if v[0] in active}
+        if previous is not None and previous[:2] == key[:2]:
+            event_type = "task_progress"
+        else:
+            event_type = self._durable_event_type(record)
+        self._broadcast_event(event_type, self._task_info_from_record(record).to_dict())
+
+    def _ensure_durable_relay(self) -> None:
+        """启动共享存储 → SSE 的轮询转发线程（其他进程 worker 的状态变化也能推送）"""
+        if self._store is None or (self._relay_thread is not None and self._relay_thread.is_alive()):
+            return
+        self._relay_thread = threading.Thread(target=self._durable_relay_loop, daemon=True, name="task-sse-relay")
+        self._relay_thread.start()
+
+    def _durable_relay_loop(self, poll_interval: float = 1.0) -> None:
+        cursor = datetime.now()
+        while self._store is not None:
+            time.sleep(poll_interval)
+            if not self._events.has_subscribers():
+                cursor = datetime.now()
+                continue
+            try:
+                changes = self._store.changed_since(cursor)
+            except Exception as e:
+                logger.debug(f"[TaskQueue] 读取任务变更失败: {e}")
+                continue
+            for record in changes:
+                self._on_durable_change(record)
+                if record.get("updated_at") and record["updated_at"] > cursor:
+                    cursor = record["updated_at"]
+
+    def _submit_durable(
+        self,
+        canonical_codes: List[str],
+        stock_name: Optional[str],
+        original_query: Optional[str],
+        selection_source: Optional[str],
+        report_type: str,
+        force_refresh: bool,
+        notify: bool,
+        lane: Optional[str],
+        requester: str,
+    ) -> Tuple[List[TaskInfo], List[DuplicateTaskError]]:
+        """持久化后端的入队：去重由数据库唯一约束跨进程保证"""
+        distinct_keys = {_dedupe_stock_code_key(code) for code in canonical_codes}
+        task_lane = lane or (LANE_BULK if len(distinct_keys) > 1 else LANE_INTERACTIVE)
+        items = [
+            {
+                "task_id": uuid.uuid4().hex,
+                "stock_code": code,
+                "dedupe_key": _dedupe_stock_code_key(code),
+                "stock_name": stock_name,
+                "original_query": original_query,
+                "selection_source": selection_source,
+                "report_type": report_type,
+                "force_refresh": force_refresh,
+                "notify": notify,
+                "lane": task_lane,
+                "requester": requester,
+            }
+            for code in canonical_codes
+        ]
+        try:
+            records, duplicate_pairs = self._store.enqueue(items)
+        except Exception:
+            # Roll back the current batch to avoid partial submission.
+            self._store.delete(item["task_id"] for item in items)
+            raise
+
+        accepted = [self._task_info_from_record(record) for record in records]
+        for record in records:
+            logger.info(f"[TaskQueue] 任务已入库: {record['stock_code']} -> {record['task_id']} (lane={task_lane})")
+            self._on_durable_change(record)
+        duplicates = [DuplicateTaskError(code, existing) for code, existing in duplicate_pairs]
+        return accepted, duplicates
+
     # ========== 任务提交与查询 ==========
     
     def is_analyzing(self, stock_code: str) -> bool:
@@ -259,6 +581,8 @@ class AnalysisTaskQueue:
             True 表示正在分析中
         """
         dedupe_key = _dedupe_stock_code_key(stock_code)
+        if self._store is not None:
+            return self._store.find_active(dedupe_key) is not None
         with self._data_lock:
             return dedupe_key in self._analyzing_stocks
     
@@ -273,6 +597,8 @@ class AnalysisTaskQueue:
             任务 ID，如果没有则返回 None
         """
         dedupe_key = _dedupe_stock_code_key(stock_code)
+        if self._store is not None:
+            return self._store.find_active(dedupe_key)
         with self._data_lock:
             return self._analyzing_stocks.get(dedupe_key)
 
@@ -343,14 +669,23 @@ class AnalysisTaskQueue:
         report_type: str = "detailed",
         force_refresh: bool = False,
         notify: bool = True,
+        lane: Optional[str] = None,
+        requester: Optional[str] = None,
     ) -> Tuple[List[TaskInfo], List[DuplicateTaskError]]:
         """
         Submit analysis tasks in batch.
 
         - Duplicate stocks are skipped and recorded in duplicates.
         - If executor submission fails, the current batch is rolled back.
+        - Multi-stock batches share one bulk prefetch (see ``_BatchGroup``).
+        - ``lane`` defaults to ``interactive`` for a single stock and ``bulk``
+          otherwise; ``requester`` (default: this submission) is the unit of
+          fair share inside the lane.
         """
         self.validate_selection_source(selection_source)
+        if lane is not None and lane not in TASK_LANES:
+            raise ValueError(f"Invalid lane: {lane}. Must be one of {TASK_LANES}")
+        requester = requester or uuid.uuid4().hex
 
         accepted: List[TaskInfo] = []
         duplicates: List[DuplicateTaskError] = []
@@ -361,7 +696,31 @@ class AnalysisTaskQueue:
             if normalized
         ]
 
+        if self._store is not None:
+            return self._submit_durable(
+                canonical_codes,
+                stock_name=stock_name,
+                original_query=original_query,
+                selection_source=selection_source,
+                report_type=report_type,
+                force_refresh=force_refresh,
+                notify=notify,
+                lane=lane,
+                requester=requester,
+            )
+
         with self._data_lock:
+            # Work out which codes will be accepted so the batch group knows its members.
+            seen_keys = set(self._analyzing_stocks)
+            group_codes: List[str] = []
+            for stock_code in canonical_codes:
+                dedupe_key = _dedupe_stock_code_key(stock_code)
+                if dedupe_key not in seen_keys:
+                    seen_keys.add(dedupe_key)
+                    group_codes.append(stock_code)
+            batch_group = _BatchGroup(group_codes) if len(group_codes) > 1 else None
+            task_lane = lane or (LANE_BULK if len(group_codes) > 1 else LANE_INTERACTIVE)
+
             for stock_code in canonical_codes:
                 dedupe_key = _dedupe_stock_code_key(stock_code)
                 if dedupe_key in self._analyzing_stocks:
@@ -379,28 +738,35 @@ class AnalysisTaskQueue:
                     report_type=report_type,
                     original_query=original_query,
                     selection_source=selection_source,
+                    lane=task_lane,
+                )
+                queued = _QueuedTask(
+                    task_id=task_id,
+                    stock_code=stock_code,
+                    report_type=report_type,
+                    force_refresh=force_refresh,
+                    notify=notify,
+                    lane=task_lane,
+                    requester=requester,
+                    batch_group=batch_group,
                 )
                 self._tasks[task_id] = task_info
                 self._analyzing_stocks[dedupe_key] = task_id
+                self._lanes[task_lane].push(queued)
+                self._futures[task_id] = queued.future
 
                 try:
-                    future = self.executor.submit(
-                        self._execute_task,
-                        task_id,
-                        stock_code,
-                        report_type,
-                        force_refresh,
-                        notify,
-                    )
+                    # One dispatch ticket per task; the ticket picks whichever
+                    # queued task has the highest priority when a worker frees up.
+                    self.executor.submit(self._dispatch_next)
                 except Exception:
                     # Roll back the current batch to avoid partial submission.
                     self._rollback_submitted_tasks_locked(created_task_ids + [task_id])
                     raise
 
-                self._futures[task_id] = future
                 accepted.append(task_info)
                 created_task_ids.append(task_id)
-                logger.info(f"[TaskQueue] 任务已提交: {stock_code} -> {task_id}")
+                logger.info(f"[TaskQueue] 任务已提交: {stock_code} -> {task_id} (lane={task_lane})")
 
             # Keep task_created ordered before worker-emitted task_started/task_completed.
             # Broadcasting here also preserves batch rollback semantics because we only
@@ -419,6 +785,7 @@ class AnalysisTaskQueue:
 
             task = self._tasks.pop(task_id, None)
             if task:
+                self._lanes[task.lane].remove(task_id)
                 dedupe_key = _dedupe_stock_code_key(task.stock_code)
                 if self._analyzing_stocks.get(dedupe_key) == task_id:
                     del self._analyzing_stocks[dedupe_key]
@@ -433,6 +800,9 @@ class AnalysisTaskQueue:
         Returns:
             TaskInfo 或 None
         """
+        if self._store is not None:
+            record = self._store.get(task_id)
+            return self._task_info_from_record(record) if record else None
         with self._data_lock:
             task = self._tasks.get(task_id)
             return task.copy() if task else None
@@ -444,6 +814,8 @@ class AnalysisTaskQueue:
         Returns:
             任务列表（副本）
         """
+        if self._store is not None:
+            return [self._task_info_from_record(r) for r in self._store.list_active()]
         with self._data_lock:
             return [
                 task.copy() for task in self._tasks.values()
@@ -460,6 +832,8 @@ class AnalysisTaskQueue:
         Returns:
             任务列表（副本）
         """
+        if self._store is not None:
+            return [self._task_info_from_record(r) for r in self._store.list_recent(limit)]
         with self._data_lock:
             tasks = sorted(
                 self._tasks.values(),
@@ -468,15 +842,18 @@ class AnalysisTaskQueue:
             )
             return [t.copy() for t in tasks[:limit]]
     
-    def get_task_stats(self) -> Dict[str, int]:
+    def get_task_stats(self) -> Dict[str, Any]:
         """
         获取任务统计信息
         
         Returns:
-            统计信息字典
+            统计信息字典；``lanes`` 为各优先级通道的排队深度、运行数、
+            并发上限以及等待/运行耗时
         """
+        if self._store is not None:
+            return self._get_durable_task_stats()
         with self._data_lock:
-            stats = {
+            stats: Dict[str, Any] = {
                 "total": len(self._tasks),
                 "pending": 0,
                 "processing": 0,
@@ -485,9 +862,74 @@ class AnalysisTaskQueue:
             }
             for task in self._tasks.values():
                 stats[task.status.value] = stats.get(task.status.value, 0) + 1
-            return stats
+            stats["lanes"] = {name: lane.stats() for name, lane in self._lanes.items()}
+        stats["events"] = self._events.stats()
+        return stats
     
+    def _get_durable_task_stats(self) -> Dict[str, Any]:
+        counts = self._store.status_counts()
+        stats: Dict[str, Any] = {"total": sum(counts.values())}
+        for status in TaskStatus:
+            stats[status.value] = counts.get(status.value, 0)
+        lanes = self._store.lane_stats(TASK_LANES)
+        for name, lane in self._lanes.items():
+            lanes[name]["max_concurrency"] = lane.max_concurrency
+        stats["lanes"] = lanes
+        stats["events"] = self._events.stats()
+        return stats
+
     # ========== 任务执行 ==========
+
+    def _pick_next_locked(self) -> Optional[_QueuedTask]:
+        for name in TASK_LANES:
+            item = self._lanes[name].pop_next()
+            if item is not None:
+                return item
+        return None
+
+    def _submit_dispatch_ticket(self) -> None:
+        try:
+            self.executor.submit(self._dispatch_next)
+        except RuntimeError as e:
+            # 线程池已关闭（shutdown / sync_max_workers 切换中）
+            logger.debug(f"[TaskQueue] 调度票据提交跳过: {e}")
+
+    def _dispatch_next(self) -> None:
+        """
+        调度票据：执行当前最高优先级且所在通道未满的排队任务
+
+        找不到可执行任务时直接返回——此时排队任务所在通道必有运行中的任务，
+        它结束时会补发票据。
+        """
+        with self._data_lock:
+            item = self._pick_next_locked()
+            if item is None:
+                return
+            lane = self._lanes[item.lane]
+            lane.record_start(item, time.monotonic())
+
+        started = time.monotonic()
+        try:
+            if item.future.set_running_or_notify_cancel():
+                try:
+                    result = self._execute_task(
+                        item.task_id,
+                        item.stock_code,
+                        item.report_type,
+                        item.force_refresh,
+                        item.notify,
+                        batch_group=item.batch_group,
+                    )
+                except BaseException as exc:  # noqa: BLE001 - surfaced through the task future
+                    item.future.set_exception(exc)
+                else:
+                    item.future.set_result(result)
+        finally:
+            with self._data_lock:
+                lane.record_finish(int((time.monotonic() - started) * 1000))
+                has_queued = any(queued_lane.depth for queued_lane in self._lanes.values())
+            if has_queued:
+                self._submit_dispatch_ticket()
     
     def _execute_task(
         self,
@@ -496,6 +938,7 @@ class AnalysisTaskQueue:
         report_type: str,
         force_refresh: bool,
         notify: bool = True,
+        batch_group: Optional[_BatchGroup] = None,
     ) -> Optional[Dict[str, Any]]:
         """
         执行分析任务（在线程池中运行）
@@ -505,6 +948,7 @@ class AnalysisTaskQueue:
             stock_code: 股票代码
             report_type: 报告类型
             force_refresh: 是否强制刷新
+            batch_group: 同批提交的任务组（共享批量预取）
             
         Returns:
             分析结果字典
@@ -525,14 +969,19 @@ class AnalysisTaskQueue:
             # 导入分析服务（延迟导入避免循环依赖）
             from src.services.analysis_service import AnalysisService
             
-            # 执行分析
             service = AnalysisService()
+            if batch_group is not None:
+                # 同批任务共享一次批量预取（首个任务执行，其余等待后命中缓存）
+                batch_group.ensure_prefetched(service.prefetch_batch)
+
+            # 执行分析
             result = service.analyze_stock(
                 stock_code=stock_code,
                 report_type=report_type,
                 force_refresh=force_refresh,
                 query_id=task_id,
                 send_notification=notify,
+                progress_callback=lambda event: self._on_analysis_progress(task_id, event),
             )
             
             if result:
@@ -587,6 +1036,16 @@ class AnalysisTaskQueue:
             
             return None
     
+    def _on_analysis_progress(self, task_id: str, event: Dict[str, Any]) -> None:
+        """把 LLM 流式进度映射为任务进度（10-90），以 task_progress 事件推送"""
+        with self._data_lock:
+            task = self._tasks.get(task_id)
+            if not task or task.status != TaskStatus.PROCESSING:
+                return
+            task.progress, task.message = stream_progress(task.progress, event)
+            data = task.to_dict()
+        self._broadcast_event("task_progress", data)
+
     def _cleanup_old_tasks(self) -> int:
         """
         清理过期的已完成任务
@@ -623,76 +1082,42 @@ class AnalysisTaskQueue:
     
     # ========== SSE 事件广播 ==========
     
-    def subscribe(self, queue: 'AsyncQueue') -> None:
+    def subscribe(self) -> EventSubscription:
         """
         订阅任务事件
-        
-        Args:
-            queue: asyncio.Queue 实例，用于接收事件
+
+        Returns:
+            EventSubscription：``await subscription.get(timeout)`` 读取事件
         """
-        with self._subscribers_lock:
-            self._subscribers.append(queue)
-            # 捕获当前事件循环（应在主线程的 async 上下文中调用）
-            try:
-                self._main_loop = asyncio.get_running_loop()
-            except RuntimeError:
-                # 如果不在 async 上下文中，尝试获取事件循环
-                try:
-                    self._main_loop = asyncio.get_event_loop()
-                except RuntimeError:
-                    pass
-            logger.debug(f"[TaskQueue] 新订阅者加入，当前订阅者数: {len(self._subscribers)}")
-    
-    def unsubscribe(self, queue: 'AsyncQueue') -> None:
+        self._ensure_durable_relay()
+        return self._events.subscribe()
+
+    def unsubscribe(self, subscription: EventSubscription) -> None:
         """
         取消订阅任务事件
-        
+
         Args:
-            queue: 要取消订阅的 asyncio.Queue 实例
+            subscription: ``subscribe()`` 返回的订阅
         """
-        with self._subscribers_lock:
-            if queue in self._subscribers:
-                self._subscribers.remove(queue)
-                logger.debug(f"[TaskQueue] 订阅者离开，当前订阅者数: {len(self._subscribers)}")
-    
+        self._events.unsubscribe(subscription)
+
     def _broadcast_event(self, event_type: str, data: Dict[str, Any]) -> None:
         """
         广播事件到所有订阅者
-        
-        使用 call_soon_threadsafe 确保跨线程安全
-        
+
         Args:
             event_type: 事件类型
             data: 事件数据
         """
-        event = {"type": event_type, "data": data}
-        
-        with self._subscribers_lock:
-            subscribers = self._subscribers.copy()
-            loop = self._main_loop
-        
-        if not subscribers:
-            return
-        
-        if loop is None:
-            logger.warning("[TaskQueue] 无法广播事件：主事件循环未设置")
-            return
-        
-        for queue in subscribers:
-            try:
-                # 使用 call_soon_threadsafe 将事件放入 asyncio 队列
-                # 这是从工作线程向主事件循环发送消息的安全方式
-                loop.call_soon_threadsafe(queue.put_nowait, event)
-            except RuntimeError as e:
-                # 事件循环已关闭
-                logger.debug(f"[TaskQueue] 广播事件跳过（循环已关闭）: {e}")
-            except Exception as e:
-                logger.warning(f"[TaskQueue] 广播事件失败: {e}")
-    
+        self._events.publish(event_type, data)
+
     # ========== 清理方法 ==========
     
     def shutdown(self) -> None:
         """关闭任务队列"""
+        if self._durable_worker is not None:
+            self._durable_worker.stop(timeout=5)
+            self._durable_worker = None
         if self._executor:
             self._executor.shutdown(wait=True)
             self._executor = None
@@ -715,6 +1140,20 @@ def get_task_queue() -> AnalysisTaskQueue:
         config = get_config()
         target_workers = max(1, int(getattr(config, "max_workers", queue.max_workers)))
         queue.sync_max_workers(target_workers, log=False)
+        queue.configure_lanes({
+            LANE_INTERACTIVE: getattr(config, "task_lane_interactive_max_concurrency", 0),
+            LANE_SCHEDULED: getattr(config, "task_lane_scheduled_max_concurrency", 0),
+            LANE_BULK: getattr(config, "task_lane_bulk_max_concurrency", 0),
+        })
+        if getattr(config, "task_queue_backend", "memory") == "database" and not queue.is_durable:
+            from src.repositories.task_repo import AnalysisTaskRepository
+            from src.services.task_worker import build_worker_from_config
+
+            worker = build_worker_from_config(config) if getattr(config, "task_queue_embedded_worker", True) else None
+            store = worker.repo if worker is not None else AnalysisTaskRepository(
+                max_attempts=getattr(config, "task_queue_max_attempts", 3)
+            )
+            queue.enable_durable_backend(store, worker=worker)
     except Exception as exc:
         logger.debug("[TaskQueue] 读取 MAX_WORKERS 失败，使用当前并发设置: %s", exc)
 
@@ -161,20 +161,20 @@ class TaskService:
                 "start_time": datetime.now().isoformat(),
                 "result": None,
                 "error": None,
-                "report_type": report_type.value
+                "report_type": report_type.value,
+                "progress": None,
             }
 
         try:
             # 延迟导入避免循环依赖
             from src.config import get_config
-            from main import StockAnalysisPipeline
+            from src.core.analysis_engine import get_analysis_engine
 
             logger.info(f"[TaskService] 开始分析股票: {code}")
 
-            # 创建分析管道
+            # 创建分析管道（复用常驻分析引擎的组件）
             config = get_config()
-            pipeline = StockAnalysisPipeline(
-                config=config,
+            pipeline = get_analysis_engine(config).create_pipeline(
                 max_workers=1,
                 source_message=source_message,
                 query_id=task_id,
@@ -187,7 +187,8 @@ class TaskService:
                 code=code,
                 skip_analysis=False,
                 single_stock_notify=True,
-                report_type=report_type
+                report_type=report_type,
+                progress_callback=lambda event: self._on_progress(task_id, event),
             )
 
             if result:
@@ -233,6 +234,16 @@ class TaskService:
 
             return {"success": False, "task_id": task_id, "error": error_msg}
 
+    def _on_progress(self, task_id: str, event: Dict[str, Any]) -> None:
+        """记录 LLM 流式进度，供 get_task_status 查询"""
+        with self._tasks_lock:
+            task = self._tasks.get(task_id)
+            if task is not None:
+                task["progress"] = {
+                    key: event.get(key) for key in ("type", "field", "fields_done", "fields_expected", "reason")
+                    if event.get(key) is not None
+                }
+
 
 # ============================================================
 # 便捷函数
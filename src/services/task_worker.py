@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+持久化任务队列 worker
+===================================
+
+职责：
+1. 从 analysis_tasks 表认领任务（租约 + 心跳）
+2. 执行单股分析并写回结果；失败按重试策略回到队列
+3. 既可嵌入 API 进程运行，也可作为独立进程横向扩展：
+
+    python -m src.services.task_worker --concurrency 3
+
+多个 worker 进程（同机多核或多机共享数据库）同时认领时，由数据库条件更新
+保证每个任务只被一个 worker 执行。
+"""
+
+import argparse
+import logging
+import os
+import socket
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from src.repositories.task_repo import AnalysisTaskRepository
+
+logger = logging.getLogger(__name__)
+
+
+def execute_analysis_task(
+    task: Dict[str, Any],
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """默认执行器：通过 AnalysisService 分析单只股票"""
+    from src.services.analysis_service import AnalysisService
+
+    result = AnalysisService().analyze_stock(
+        stock_code=task["stock_code"],
+        report_type=task["report_type"],
+        force_refresh=task["force_refresh"],
+        query_id=task["task_id"],
+        send_notification=task["notify"],
+        progress_callback=progress_callback,
+    )
+    if not result:
+        raise RuntimeError("分析返回空结果")
+    return result
+
+
+class DurableTaskWorker:
+    """
+    数据库队列消费者
+
+    每个执行线程循环「认领 → 心跳续租 → 执行 → 写回」；心跳间隔为租约的 1/3，
+    进程崩溃后租约自然过期，任务由其他 worker 重新认领。
+    """
+
+    def __init__(
+        self,
+        repo: AnalysisTaskRepository,
+        lanes: tuple,
+        concurrency: int = 3,
+        lease_seconds: int = 120,
+        poll_interval: float = 1.0,
+        lane_limits: Optional[Dict[str, int]] = None,
+        execute: Callable[..., Dict[str, Any]] = execute_analysis_task,
+        on_change: Optional[Callable[[Dict[str, Any]], None]] = None,
+        worker_id: Optional[str] = None,
+    ):
+        self.repo = repo
+        self.lanes = tuple(lanes)
+        self.concurrency = max(1, int(concurrency))
+        self.lease_seconds = max(10, int(lease_seconds))
+        self.poll_interval = max(0.05, float(poll_interval))
+        self.lane_limits = lane_limits
+        self.execute = execute
+        self.on_change = on_change
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def _notify(self, task_id: str) -> None:
+        if self.on_change is None:
+            return
+        task = self.repo.get(task_id)
+        if task is not None:
+            try:
+                self.on_change(task)
+            except Exception as e:
+                logger.debug(f"[TaskWorker] 状态回调失败: {e}")
+
+    def run_once(self) -> bool:
+        """认领并执行一个任务；队列为空时返回 False"""
+        task = self.repo.claim(self.worker_id, self.lease_seconds, self.lanes, self.lane_limits)
+        if task is None:
+            return False
+        task_id = task["task_id"]
+        logger.info(f"[TaskWorker] {self.worker_id} 认领任务 {task_id} ({task['stock_code']}, 第 {task['attempts']} 次)")
+        self._notify(task_id)
+
+        lease_lost = threading.Event()
+        finished = threading.Event()
+
+        def heartbeat() -> None:
+            while not finished.wait(self.lease_seconds / 3):
+                if not self.repo.heartbeat(task_id, self.worker_id, self.lease_seconds):
+                    lease_lost.set()
+                    logger.warning(f"[TaskWorker] 任务 {task_id} 租约已丢失，结果将被丢弃")
+                    return
+
+        progress = {"value": task.get("progress") or 0}
+
+        def on_progress(event: Dict[str, Any]) -> None:
+            from src.services.task_queue import stream_progress
+
+            value, message = stream_progress(progress["value"], event)
+            if value == progress["value"] and event.get("type") != "llm_stream_restart":
+                return
+            progress["value"] = value
+            try:
+                self.repo.update_progress(task_id, self.worker_id, value, message)
+            except Exception as e:
+                logger.debug(f"[TaskWorker] 写入任务进度失败: {e}")
+
+        beat = threading.Thread(target=heartbeat, daemon=True, name=f"task-heartbeat-{task_id[:8]}")
+        beat.start()
+        try:
+            result = self.execute(task, progress_callback=on_progress)
+        except Exception as e:
+            finished.set()
+            status = self.repo.fail(task_id, self.worker_id, str(e))
+            logger.error(f"[TaskWorker] 任务 {task_id} 失败（{status or '租约已丢失'}）: {e}")
+        else:
+            finished.set()
+            if not self.repo.complete(task_id, self.worker_id, result):
+                logger.warning(f"[TaskWorker] 任务 {task_id} 完成时租约已丢失")
+        finally:
+            finished.set()
+            beat.join(timeout=1)
+        self._notify(task_id)
+        return True
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                worked = self.run_once()
+            except Exception as e:
+                logger.error(f"[TaskWorker] 认领/执行任务异常: {e}")
+                worked = False
+            if not worked:
+                self._stop.wait(self.poll_interval)
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for idx in range(self.concurrency):
+            thread = threading.Thread(target=self._loop, daemon=True, name=f"task-worker-{idx}")
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"[TaskWorker] {self.worker_id} 已启动，并发 {self.concurrency}")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+
+def build_worker_from_config(config: Any, **kwargs: Any) -> DurableTaskWorker:
+    """按配置构建 worker（独立进程与 API 内嵌共用）"""
+    from src.services.task_queue import TASK_LANES, default_lane_limits
+
+    max_workers = max(1, int(getattr(config, "max_workers", 3)))
+    lane_limits = default_lane_limits(max_workers)
+    for lane in TASK_LANES:
+        override = int(getattr(config, f"task_lane_{lane}_max_concurrency", 0) or 0)
+        if override > 0:
+            lane_limits[lane] = override
+    repo = AnalysisTaskRepository(max_attempts=getattr(config, "task_queue_max_attempts", 3))
+    return DurableTaskWorker(
+        repo,
+        lanes=TASK_LANES,
+        concurrency=kwargs.pop("concurrency", None) or max_workers,
+        lease_seconds=getattr(config, "task_queue_lease_seconds", 120),
+        lane_limits=lane_limits,
+        **kwargs,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="持久化分析任务队列 worker（TASK_QUEUE_BACKEND=database）")
+    parser.add_argument("--concurrency", type=int, default=None, help="并发执行数（默认 MAX_WORKERS）")
+    args = parser.parse_args()
+
+    from src.config import get_config
+    from src.logging_config import setup_logging
+
+    config = get_config()
+    setup_logging(log_prefix="task_worker", log_dir=config.log_dir)
+    worker = build_worker_from_config(config, concurrency=args.concurrency)
+    worker.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        logger.info("[TaskWorker] 收到中断，正在停止...")
+        worker.stop(timeout=5)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+启动耗时分析（--profile-startup）
+===================================
+
+在独立子进程中以 ``python -X importtime`` 依次导入各入口模块，汇总：
+- 每个入口模块的累计导入耗时
+- 按顶层包聚合的自身耗时（定位拖慢启动的第三方库）
+- 自身耗时最高的模块
+
+子进程隔离保证测量的是冷启动，不受当前进程已加载模块的影响。
+"""
+
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+DEFAULT_TARGETS = (
+    "main",
+    "src.core.pipeline",
+    "api.app",
+)
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class ImportRecord:
+    """``-X importtime`` 输出中的一行（耗时单位：微秒）"""
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> List[ImportRecord]:
+    """解析 ``-X importtime`` 的 stderr 输出，忽略无关行"""
+    records: List[ImportRecord] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|", 2)
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0].strip())
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            # 表头行: "self [us] | cumulative | imported package"
+            continue
+        raw_name = parts[2].rstrip()
+        name = raw_name.lstrip()
+        depth = (len(raw_name) - len(name) - 1) // 2
+        records.append(ImportRecord(name, self_us, cumulative_us, max(depth, 0)))
+    return records
+
+
+def measure_imports(target: str, python: Optional[str] = None) -> List[ImportRecord]:
+    """在干净的子进程中导入 ``target`` 并返回导入记录"""
+    proc = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=str(_PROJECT_ROOT),
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or ["unknown error"]
+        raise RuntimeError(f"导入 {target} 失败: {tail[0]}")
+    return parse_importtime(proc.stderr)
+
+
+def summarize(records: Sequence[ImportRecord], target: str, top: int = 15) -> Dict[str, object]:
+    """汇总单个入口的导入记录"""
+    total_us = next((r.cumulative_us for r in records if r.module == target and r.depth == 0), 0)
+    by_package: Dict[str, int] = {}
+    for record in records:
+        package = record.module.split(".", 1)[0]
+        by_package[package] = by_package.get(package, 0) + record.self_us
+    packages = sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+    slowest = sorted(records, key=lambda r: r.self_us, reverse=True)[:top]
+    return {
+        "target": target,
+        "total_ms": total_us / 1000.0,
+        "module_count": len(records),
+        "packages": [(name, us / 1000.0) for name, us in packages],
+        "slowest": [(r.module, r.self_us / 1000.0) for r in slowest],
+    }
+
+
+def format_report(summaries: Sequence[Dict[str, object]]) -> str:
+    lines = ["=" * 60, "启动耗时分析 (python -X importtime)", "=" * 60]
+    for summary in summaries:
+        lines.append(
+            f"\n[{summary['target']}] 累计 {summary['total_ms']:.1f} ms，"
+            f"共导入 {summary['module_count']} 个模块"
+        )
+        lines.append("  按顶层包（自身耗时）:")
+        for name, ms in summary["packages"]:
+            lines.append(f"    {ms:9.1f} ms  {name}")
+        lines.append("  最慢模块（自身耗时）:")
+        for name, ms in summary["slowest"]:
+            lines.append(f"    {ms:9.1f} ms  {name}")
+    return "\n".join(lines)
+
+
+def run_startup_profile(targets: Sequence[str] = DEFAULT_TARGETS, top: int = 15) -> int:
+    """逐个测量入口模块并打印报告，返回退出码"""
+    summaries = []
+    exit_code = 0
+    for target in targets:
+        try:
+            summaries.append(summarize(measure_imports(target), target, top=top))
+        except RuntimeError as exc:
+            print(exc, file=sys.stderr)
+            exit_code = 1
+    print(format_report(summaries))
+    return exit_code
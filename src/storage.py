@@ -17,12 +17,15 @@ import hashlib
 import json
 import logging
 import re
+import threading
+import zlib
 from datetime import datetime, date, timedelta
 from typing import Optional, List, Dict, Any, TYPE_CHECKING, Tuple
 
 import pandas as pd
 from sqlalchemy import (
     create_engine,
+    event,
     Column,
     String,
     Float,
@@ -40,13 +43,19 @@ from sqlalchemy import (
     delete,
     desc,
     func,
+    update,
+    cast,
+    LargeBinary,
 )
 from sqlalchemy.orm import (
     declarative_base,
+    deferred,
+    undefer_group,
     sessionmaker,
     Session,
 )
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.types import TypeDecorator
 
 from src.config import get_config
 
@@ -59,6 +68,35 @@ if TYPE_CHECKING:
     from src.search_service import SearchResponse
 
 
+# === 大字段压缩 ===
+# 压缩值以魔数开头并以 BLOB 存储；旧的明文 TEXT 值原样读取，无需迁移
+_COMPRESSED_PREFIX = b"\x00zlib:"
+COMPRESS_MIN_BYTES = 1024
+ANALYSIS_BLOB_GROUP = "analysis_blobs"
+
+
+class CompressedText(TypeDecorator):
+    """超过 COMPRESS_MIN_BYTES 的文本以 zlib 压缩后写入；读取时透明解压"""
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str):
+            data = value.encode("utf-8")
+            if len(data) >= COMPRESS_MIN_BYTES:
+                return _COMPRESSED_PREFIX + zlib.compress(data, 6)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, (bytes, memoryview)):
+            data = bytes(value)
+            if data.startswith(_COMPRESSED_PREFIX):
+                data = zlib.decompress(data[len(_COMPRESSED_PREFIX):])
+            return data.decode("utf-8", errors="replace")
+        return value
+
+
 # === 数据模型定义 ===
 
 class StockDaily(Base):
@@ -132,6 +170,24 @@ class StockDaily(Base):
         }
 
 
+class StockFreshness(Base):
+    """
+    行情新鲜度索引：每只股票一行，记录已落库的最新交易日
+
+    与 stock_daily 写入在同一事务中维护，供批量运行开始时一次性加载，
+    避免逐只股票查询 stock_daily 判断断点续传。
+    """
+    __tablename__ = 'stock_freshness'
+
+    code = Column(String(10), primary_key=True)
+    last_date = Column(Date, nullable=False)
+    data_source = Column(String(50))
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    def __repr__(self):
+        return f"<StockFreshness(code={self.code}, last_date={self.last_date})>"
+
+
 class NewsIntel(Base):
     """
     新闻情报数据模型
@@ -229,10 +285,10 @@ class AnalysisHistory(Base):
     trend_prediction = Column(String(50))
     analysis_summary = Column(Text)
 
-    # 详细数据
-    raw_result = Column(Text)
-    news_content = Column(Text)
-    context_snapshot = Column(Text)
+    # 详细数据（大字段：压缩存储、延迟加载，仅详情/Markdown 等路径按需读取）
+    raw_result = deferred(Column(CompressedText), group=ANALYSIS_BLOB_GROUP)
+    news_content = deferred(Column(CompressedText), group=ANALYSIS_BLOB_GROUP)
+    context_snapshot = deferred(Column(CompressedText), group=ANALYSIS_BLOB_GROUP)
 
     # 狙击点位（用于回测）
     ideal_buy = Column(Float)
@@ -604,6 +660,21 @@ class ConversationMessage(Base):
     created_at = Column(DateTime, default=datetime.now, index=True)
 
 
+class ConversationSession(Base):
+    """
+    Agent 会话头：每个会话一行，与 conversation_messages 写入在同一事务中维护
+
+    会话列表直接按 last_active 分页读取本表，不再逐会话聚合消息。
+    """
+    __tablename__ = 'conversation_sessions'
+
+    session_id = Column(String(100), primary_key=True)
+    title = Column(String(60))  # 第一条 user 消息（截断），无 user 消息时为空
+    message_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.now)
+    last_active = Column(DateTime, default=datetime.now, index=True)
+
+
 class LLMUsage(Base):
     """One row per litellm.completion() call — token-usage audit log."""
 
@@ -620,6 +691,118 @@ class LLMUsage(Base):
     called_at = Column(DateTime, default=datetime.now, index=True)
 
 
+class LLMUsageHourly(Base):
+    """
+    LLM 用量小时汇总（按 小时 × call_type × model 预聚合）
+
+    由 llm_usage 按自增 id 水位增量折叠而来，用量统计只需读取汇总行。
+    """
+
+    __tablename__ = 'llm_usage_hourly'
+
+    bucket = Column(DateTime, primary_key=True)  # 整点小时（本地时间）
+    call_type = Column(String(32), primary_key=True)
+    model = Column(String(128), primary_key=True)
+    calls = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    total_tokens = Column(Integer, nullable=False, default=0)
+
+
+class LLMUsageRollupState(Base):
+    """llm_usage 已折叠进小时汇总的最大 id（水位）"""
+
+    __tablename__ = 'llm_usage_rollup_state'
+
+    name = Column(String(32), primary_key=True)
+    last_usage_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class AnalysisTask(Base):
+    """
+    持久化分析任务队列（TASK_QUEUE_BACKEND=database 时使用）
+
+    API 进程写入 pending 任务，worker 进程通过条件更新（CAS）认领并持有租约，
+    定期心跳续租；租约过期的任务可被其他 worker 重新认领并计入重试次数。
+    """
+    __tablename__ = 'analysis_tasks'
+
+    task_id = Column(String(64), primary_key=True)
+    stock_code = Column(String(16), nullable=False)
+    stock_name = Column(String(64))
+    # 进行中任务的去重键；任务结束后置空，唯一约束只作用于进行中的任务
+    active_dedupe_key = Column(String(32), unique=True)
+    status = Column(String(16), nullable=False, default='pending', index=True)
+    lane = Column(String(16), nullable=False, default='interactive')
+    requester = Column(String(64), nullable=False, default='')
+    report_type = Column(String(16), nullable=False, default='detailed')
+    force_refresh = Column(Boolean, nullable=False, default=False)
+    notify = Column(Boolean, nullable=False, default=True)
+    original_query = Column(Text)
+    selection_source = Column(String(32))
+    progress = Column(Integer, nullable=False, default=0)
+    message = Column(String(255))
+    result_json = Column(Text)
+    error = Column(String(255))
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    available_at = Column(DateTime, default=datetime.now)
+    lease_owner = Column(String(128))
+    lease_expires_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.now, index=True)
+    started_at = Column(DateTime)
+    completed_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, index=True)
+
+    __table_args__ = (
+        Index('ix_analysis_tasks_claim', 'status', 'lane', 'available_at'),
+    )
+
+
+def _is_sqlite_file_url(url) -> bool:
+    """仅 SQLite 文件库需要（也支持）WAL 等调优；内存库每个连接各自独立"""
+    if url.get_backend_name() != 'sqlite':
+        return False
+    database = url.database or ''
+    return bool(database) and database != ':memory:' and not database.startswith('file::memory:')
+
+
+def _sqlite_pragmas(config, read_only: bool) -> List[str]:
+    """按配置生成连接级 PRAGMA 列表"""
+    pragmas = []
+    if not read_only:
+        # journal_mode 持久化在数据库文件中，由写连接设置即可
+        pragmas.append(f"PRAGMA journal_mode={getattr(config, 'sqlite_journal_mode', 'WAL')}")
+    pragmas.extend([
+        f"PRAGMA synchronous={getattr(config, 'sqlite_synchronous', 'NORMAL')}",
+        f"PRAGMA busy_timeout={int(getattr(config, 'sqlite_busy_timeout_ms', 5000))}",
+        f"PRAGMA cache_size={-1024 * int(getattr(config, 'sqlite_cache_size_mb', 64))}",
+        f"PRAGMA mmap_size={1024 * 1024 * int(getattr(config, 'sqlite_mmap_size_mb', 256))}",
+        "PRAGMA temp_store=MEMORY",
+    ])
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
+
+
+def _install_sqlite_pragmas(engine, pragmas: List[str]) -> None:
+    """在每个新建的 DBAPI 连接上执行 PRAGMA；失败只记录警告，不影响连接可用性"""
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                try:
+                    cursor.execute(pragma)
+                except Exception as exc:
+                    logger.warning(f"SQLite 设置失败 [{pragma}]: {exc}")
+        finally:
+            cursor.close()
+
+
 class DatabaseManager:
     """
     数据库管理器 - 单例模式
@@ -632,6 +815,7 @@ class DatabaseManager:
     
     _instance: Optional['DatabaseManager'] = None
     _initialized: bool = False
+    _usage_recorder_lock = threading.Lock()
     
     def __new__(cls, *args, **kwargs):
         """单例模式实现"""
@@ -650,8 +834,8 @@ class DatabaseManager:
         if getattr(self, '_initialized', False):
             return
         
+        config = get_config()
         if db_url is None:
-            config = get_config()
             db_url = config.get_db_url()
         
         # 创建数据库引擎
@@ -660,6 +844,23 @@ class DatabaseManager:
             echo=False,  # 设为 True 可查看 SQL 语句
             pool_pre_ping=True,  # 连接健康检查
         )
+
+        # SQLite 文件库：连接建立时设置 WAL / synchronous / busy_timeout 等
+        tuned = _is_sqlite_file_url(self._engine.url)
+        if tuned:
+            _install_sqlite_pragmas(self._engine, _sqlite_pragmas(config, read_only=False))
+
+        # API 读请求使用独立的只读连接池，避免与写入方争抢写连接
+        self._read_engine = self._engine
+        read_pool_size = getattr(config, 'sqlite_read_pool_size', 0)
+        if tuned and read_pool_size > 0:
+            self._read_engine = create_engine(
+                db_url,
+                echo=False,
+                pool_size=read_pool_size,
+                max_overflow=read_pool_size,
+            )
+            _install_sqlite_pragmas(self._read_engine, _sqlite_pragmas(config, read_only=True))
         
         # 创建 Session 工厂
         self._SessionLocal = sessionmaker(
@@ -667,6 +868,11 @@ class DatabaseManager:
             autocommit=False,
             autoflush=False,
         )
+        self._ReadSessionLocal = sessionmaker(
+            bind=self._read_engine,
+            autocommit=False,
+            autoflush=False,
+        )
         
         # 创建所有表
         Base.metadata.create_all(self._engine)
@@ -676,6 +882,8 @@ class DatabaseManager:
 
         # 注册退出钩子，确保程序退出时关闭数据库连接
         atexit.register(DatabaseManager._cleanup_engine, self._engine)
+        if self._read_engine is not self._engine:
+            atexit.register(DatabaseManager._cleanup_engine, self._read_engine)
     
     @classmethod
     def get_instance(cls) -> 'DatabaseManager':
@@ -688,6 +896,10 @@ class DatabaseManager:
     def reset_instance(cls) -> None:
         """重置单例（用于测试）"""
         if cls._instance is not None:
+            cls._instance._close_usage_recorder()
+            read_engine = getattr(cls._instance, '_read_engine', None)
+            if read_engine is not None and read_engine is not getattr(cls._instance, '_engine', None):
+                read_engine.dispose()
             if hasattr(cls._instance, '_engine') and cls._instance._engine is not None:
                 cls._instance._engine.dispose()
             cls._instance._initialized = False
@@ -743,6 +955,19 @@ class DatabaseManager:
             raise
         finally:
             session.close()
+
+    def get_read_session(self) -> Session:
+        """
+        获取只读 Session（SQLite 文件库走独立的 query_only 连接池）
+
+        用于 API 列表/详情等纯读取路径；写入必须使用 get_session / session_scope。
+        """
+        if not getattr(self, '_initialized', False) or not hasattr(self, '_ReadSessionLocal'):
+            raise RuntimeError(
+                "DatabaseManager 未正确初始化。"
+                "请确保通过 DatabaseManager.get_instance() 获取实例。"
+            )
+        return self._ReadSessionLocal()
     
     def has_today_data(self, code: str, target_date: Optional[date] = None) -> bool:
         """
@@ -774,6 +999,66 @@ class DatabaseManager:
             ).scalar_one_or_none()
             
             return result is not None
+
+    @staticmethod
+    def _touch_freshness(session: Session, code: str, last_date: date, data_source: Optional[str]) -> None:
+        """在当前事务内推进 code 的新鲜度记录（只前进不后退）"""
+        entry = session.get(StockFreshness, code)
+        if entry is None:
+            session.add(StockFreshness(code=code, last_date=last_date, data_source=data_source))
+        elif entry.last_date is None or last_date >= entry.last_date:
+            entry.last_date = last_date
+            entry.data_source = data_source
+            entry.updated_at = datetime.now()
+
+    def get_freshness_map(self, codes: Optional[List[str]] = None) -> Dict[str, date]:
+        """
+        一次性加载 code -> 已落库最新交易日
+
+        索引缺失的股票（如升级前写入的历史数据）会从 stock_daily 聚合回填，
+        之后的运行即可只查索引表。
+
+        Args:
+            codes: 仅加载这些股票（默认全部）
+
+        Returns:
+            {code: last_date}，无数据的股票不出现在结果中
+        """
+        wanted = None if codes is None else list(dict.fromkeys(codes))
+        freshness: Dict[str, date] = {}
+        with self.get_session() as session:
+            stmt = select(StockFreshness.code, StockFreshness.last_date)
+            if wanted is not None:
+                if not wanted:
+                    return freshness
+                stmt = stmt.where(StockFreshness.code.in_(wanted))
+            for code, last_date in session.execute(stmt).all():
+                freshness[code] = last_date
+
+            if wanted is None:
+                # 索引为空时视为首次使用，整体从 stock_daily 回填
+                missing = None if not freshness else []
+            else:
+                missing = [code for code in wanted if code not in freshness]
+            if missing == []:
+                return freshness
+
+            backfill = select(StockDaily.code, func.max(StockDaily.date)).group_by(StockDaily.code)
+            if missing is not None:
+                backfill = backfill.where(StockDaily.code.in_(missing))
+            rows = session.execute(backfill).all()
+            for code, last_date in rows:
+                if last_date is None:
+                    continue
+                freshness[code] = last_date
+                session.add(StockFreshness(code=code, last_date=last_date))
+            if rows:
+                try:
+                    session.commit()
+                except IntegrityError:
+                    # 并发写入已补齐索引，结果以本次聚合为准即可
+                    session.rollback()
+        return freshness
     
     def get_latest_data(
         self, 
@@ -1112,6 +1397,7 @@ class DatabaseManager:
         days: int = 30,
         limit: int = 50,
         exclude_query_id: Optional[str] = None,
+        include_blobs: bool = True,
     ) -> List[AnalysisHistory]:
         """
         Query analysis history records.
@@ -1120,10 +1406,12 @@ class DatabaseManager:
         - If query_id is provided, perform exact lookup and ignore days window.
         - If query_id is not provided, apply days-based time filtering.
         - exclude_query_id: exclude records with this query_id (for history comparison).
+        - include_blobs=False skips raw_result / news_content / context_snapshot;
+          those attributes must then not be accessed on the returned records.
         """
         cutoff_date = datetime.now() - timedelta(days=days)
 
-        with self.get_session() as session:
+        with self.get_read_session() as session:
             conditions = []
 
             if query_id:
@@ -1138,14 +1426,77 @@ class DatabaseManager:
             if exclude_query_id and not query_id:
                 conditions.append(AnalysisHistory.query_id != exclude_query_id)
 
-            results = session.execute(
+            stmt = (
                 select(AnalysisHistory)
                 .where(and_(*conditions))
                 .order_by(desc(AnalysisHistory.created_at))
                 .limit(limit)
-            ).scalars().all()
+            )
+            if include_blobs:
+                stmt = stmt.options(undefer_group(ANALYSIS_BLOB_GROUP))
+            results = session.execute(stmt).scalars().all()
 
             return list(results)
+
+    def get_recent_signals_batch(
+        self,
+        codes: List[str],
+        limit: int = 5,
+        days: int = 90,
+        exclude_query_ids: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, List[Any]]:
+        """
+        Latest ``limit`` signal rows per code for a whole batch in one query.
+
+        Uses ``ROW_NUMBER() OVER (PARTITION BY code ORDER BY created_at DESC)``
+        and projects only the signal columns, so the large text columns
+        (raw_result / news_content / context_snapshot) are never loaded.
+        ``exclude_query_ids`` maps code -> query_id to skip for that code.
+
+        Returns:
+            Dict mapping every requested code to its rows (newest first); each
+            row exposes code, query_id, created_at, sentiment_score,
+            operation_advice and trend_prediction attributes.
+        """
+        codes = list(dict.fromkeys(c for c in codes if c))
+        result: Dict[str, List[Any]] = {code: [] for code in codes}
+        if not codes or limit <= 0:
+            return result
+
+        conditions = [
+            AnalysisHistory.code.in_(codes),
+            AnalysisHistory.created_at >= datetime.now() - timedelta(days=days),
+        ]
+        for code, query_id in (exclude_query_ids or {}).items():
+            if query_id and code in result:
+                # Same semantics as get_analysis_history(exclude_query_id=...)
+                conditions.append(or_(AnalysisHistory.code != code, AnalysisHistory.query_id != query_id))
+
+        ranked = (
+            select(
+                AnalysisHistory.code,
+                AnalysisHistory.query_id,
+                AnalysisHistory.created_at,
+                AnalysisHistory.sentiment_score,
+                AnalysisHistory.operation_advice,
+                AnalysisHistory.trend_prediction,
+                func.row_number().over(
+                    partition_by=AnalysisHistory.code,
+                    order_by=(desc(AnalysisHistory.created_at), desc(AnalysisHistory.id)),
+                ).label("rn"),
+            )
+            .where(and_(*conditions))
+            .subquery()
+        )
+        stmt = (
+            select(ranked)
+            .where(ranked.c.rn <= limit)
+            .order_by(ranked.c.code, ranked.c.rn)
+        )
+        with self.get_read_session() as session:
+            for row in session.execute(stmt).all():
+                result[row.code].append(row)
+        return result
     
     def get_analysis_history_paginated(
         self,
@@ -1170,7 +1521,7 @@ class DatabaseManager:
         """
         from sqlalchemy import func
         
-        with self.get_session() as session:
+        with self.get_read_session() as session:
             conditions = []
             
             if code:
@@ -1214,12 +1565,70 @@ class DatabaseManager:
         Returns:
             AnalysisHistory 对象，不存在返回 None
         """
-        with self.get_session() as session:
+        with self.get_read_session() as session:
             result = session.execute(
-                select(AnalysisHistory).where(AnalysisHistory.id == record_id)
+                select(AnalysisHistory)
+                .where(AnalysisHistory.id == record_id)
+                .options(undefer_group(ANALYSIS_BLOB_GROUP))
             ).scalars().first()
             return result
 
+    def compress_legacy_analysis_blobs(self, batch_size: int = 200, max_rows: Optional[int] = None) -> int:
+        """
+        将升级前以明文存储的 raw_result / news_content / context_snapshot 重写为压缩格式
+
+        按 id 游标分批处理，每批一个事务；磁盘空间需 VACUUM 后才会归还。
+
+        Returns:
+            重写的记录数
+        """
+        blob_columns = (
+            AnalysisHistory.raw_result,
+            AnalysisHistory.news_content,
+            AnalysisHistory.context_snapshot,
+        )
+        # 转为 BLOB 后 length() 按字节计，与压缩阈值口径一致
+        plain = or_(*[
+            and_(
+                func.typeof(column) == 'text',
+                func.length(cast(column, LargeBinary)) >= COMPRESS_MIN_BYTES,
+            )
+            for column in blob_columns
+        ])
+        rewritten = 0
+        last_id = 0
+        while max_rows is None or rewritten < max_rows:
+            limit = batch_size if max_rows is None else min(batch_size, max_rows - rewritten)
+            with self.session_scope() as session:
+                rows = session.execute(
+                    select(
+                        AnalysisHistory.id,
+                        AnalysisHistory.raw_result,
+                        AnalysisHistory.news_content,
+                        AnalysisHistory.context_snapshot,
+                    )
+                    .where(AnalysisHistory.id > last_id, plain)
+                    .order_by(AnalysisHistory.id)
+                    .limit(limit)
+                ).all()
+                for row in rows:
+                    session.execute(
+                        update(AnalysisHistory)
+                        .where(AnalysisHistory.id == row.id)
+                        .values(
+                            raw_result=row.raw_result,
+                            news_content=row.news_content,
+                            context_snapshot=row.context_snapshot,
+                        )
+                    )
+            if not rows:
+                break
+            rewritten += len(rows)
+            last_id = rows[-1].id
+        if rewritten:
+            logger.info(f"已压缩 {rewritten} 条历史分析记录的大字段")
+        return rewritten
+
     def delete_analysis_history_records(self, record_ids: List[int]) -> int:
         """
         删除指定的分析历史记录。
@@ -1261,6 +1670,7 @@ class DatabaseManager:
             result = session.execute(
                 select(AnalysisHistory)
                 .where(AnalysisHistory.query_id == query_id)
+                .options(undefer_group(ANALYSIS_BLOB_GROUP))
                 .order_by(desc(AnalysisHistory.created_at))
                 .limit(1)
             ).scalars().first()
@@ -1324,6 +1734,7 @@ class DatabaseManager:
             return 0
         
         saved_count = 0
+        latest_date: Optional[date] = None
         
         with self.get_session() as session:
             try:
@@ -1336,6 +1747,8 @@ class DatabaseManager:
                         row_date = row_date.date()
                     elif isinstance(row_date, pd.Timestamp):
                         row_date = row_date.date()
+                    if isinstance(row_date, date) and (latest_date is None or row_date > latest_date):
+                        latest_date = row_date
                     
                     # 检查是否已存在
                     existing = session.execute(
@@ -1383,6 +1796,8 @@ class DatabaseManager:
                         session.add(record)
                         saved_count += 1
                 
+                if latest_date is not None:
+                    self._touch_freshness(session, code, latest_date, data_source)
                 session.commit()
                 logger.info(f"保存 {code} 数据成功，新增 {saved_count} 条")
                 
@@ -1696,17 +2111,128 @@ class DatabaseManager:
         digest = hashlib.md5(raw_key.encode("utf-8")).hexdigest()
         return f"no-url:{code}:{digest}"
 
+    _SESSION_TITLE_MAX_LEN = 60
+
     def save_conversation_message(self, session_id: str, role: str, content: str) -> None:
         """
-        保存 Agent 对话消息
+        保存 Agent 对话消息，并在同一事务中更新会话头
         """
-        with self.session_scope() as session:
-            msg = ConversationMessage(
+        for attempt in range(2):
+            try:
+                with self.session_scope() as session:
+                    now = datetime.now()
+                    session.add(ConversationMessage(
+                        session_id=session_id,
+                        role=role,
+                        content=content,
+                        created_at=now,
+                    ))
+                    self._touch_conversation_session(session, session_id, role, content, now)
+                return
+            except IntegrityError:
+                # 并发创建同一会话头：重试时会看到已存在的行
+                if attempt:
+                    raise
+
+    def _touch_conversation_session(
+        self,
+        session: Session,
+        session_id: str,
+        role: str,
+        content: str,
+        now: datetime,
+    ) -> None:
+        """在当前事务内推进会话头；缺失时（如升级前的会话）先从已有消息补齐"""
+        header = session.get(ConversationSession, session_id)
+        if header is None:
+            # 新消息尚未 flush（autoflush 关闭），这里只统计已有消息
+            existing = session.execute(
+                select(
+                    func.count(ConversationMessage.id),
+                    func.min(ConversationMessage.created_at),
+                ).where(ConversationMessage.session_id == session_id)
+            ).one()
+            header = ConversationSession(
                 session_id=session_id,
-                role=role,
-                content=content
+                title=self._first_user_title(session, session_id) if existing[0] else None,
+                message_count=existing[0] or 0,
+                created_at=existing[1] or now,
+                last_active=now,
+            )
+            session.add(header)
+        header.message_count = (header.message_count or 0) + 1
+        header.last_active = now
+        if header.title is None and role == "user":
+            header.title = (content or "")[:self._SESSION_TITLE_MAX_LEN]
+
+    def _first_user_title(self, session: Session, session_id: str) -> Optional[str]:
+        content = session.execute(
+            select(ConversationMessage.content)
+            .where(
+                ConversationMessage.session_id == session_id,
+                ConversationMessage.role == "user",
             )
-            session.add(msg)
+            .order_by(ConversationMessage.created_at, ConversationMessage.id)
+            .limit(1)
+        ).scalar()
+        return content[:self._SESSION_TITLE_MAX_LEN] if content is not None else None
+
+    def _backfill_conversation_sessions(self) -> None:
+        """
+        为升级前写入、此后再无新消息的会话补建会话头（每个进程只执行一次）
+
+        会话列表、消息数和最后活跃时间一次聚合；标题按每个会话最早 user 消息的 id 批量取回。
+        """
+        if getattr(self, '_conversation_sessions_backfilled', False):
+            return
+        with self.session_scope() as session:
+            known = select(ConversationSession.session_id)
+            rows = session.execute(
+                select(
+                    ConversationMessage.session_id,
+                    func.count(ConversationMessage.id),
+                    func.min(ConversationMessage.created_at),
+                    func.max(ConversationMessage.created_at),
+                )
+                .where(ConversationMessage.session_id.not_in(known))
+                .group_by(ConversationMessage.session_id)
+            ).all()
+            if rows:
+                missing = [row[0] for row in rows]
+                titles: Dict[str, str] = {}
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    first_ids = (
+                        select(func.min(ConversationMessage.id))
+                        .where(
+                            ConversationMessage.session_id.in_(chunk),
+                            ConversationMessage.role == "user",
+                        )
+                        .group_by(ConversationMessage.session_id)
+                    )
+                    for sid, content in session.execute(
+                        select(ConversationMessage.session_id, ConversationMessage.content)
+                        .where(ConversationMessage.id.in_(first_ids))
+                    ).all():
+                        titles[sid] = (content or "")[:self._SESSION_TITLE_MAX_LEN]
+                session.add_all([
+                    ConversationSession(
+                        session_id=sid,
+                        title=titles.get(sid),
+                        message_count=count,
+                        created_at=created_at,
+                        last_active=last_active,
+                    )
+                    for sid, count, created_at, last_active in rows
+                ])
+                try:
+                    session.commit()
+                    logger.info(f"已为 {len(rows)} 个历史会话补建会话头")
+                except IntegrityError:
+                    # 并发保存已创建部分会话头，下个进程/下次启动再补
+                    session.rollback()
+                    return
+        self._conversation_sessions_backfilled = True
 
     def get_conversation_history(self, session_id: str, limit: int = 20) -> List[Dict[str, Any]]:
         """
@@ -1736,9 +2262,10 @@ class DatabaseManager:
         limit: int = 50,
         session_prefix: Optional[str] = None,
         extra_session_ids: Optional[List[str]] = None,
+        offset: int = 0,
     ) -> List[Dict[str, Any]]:
         """
-        获取聊天会话列表（从 conversation_messages 聚合）
+        获取聊天会话列表（单次查询 conversation_sessions，按 last_active 索引分页）
 
         Args:
             limit: Maximum number of sessions to return.
@@ -1747,73 +2274,56 @@ class DatabaseManager:
                 ``"telegram_12345"``).
             extra_session_ids: Optional exact session ids to include in
                 addition to the scoped prefix.
+            offset: Number of sessions to skip (pagination).
 
         Returns:
             按最近活跃时间倒序的会话列表，每条包含 session_id, title, message_count, last_active
         """
-        from sqlalchemy import func
-
-        with self.session_scope() as session:
-            normalized_prefix = None
-            if session_prefix:
-                normalized_prefix = session_prefix if session_prefix.endswith(":") else f"{session_prefix}:"
-            exact_ids = [sid for sid in (extra_session_ids or []) if sid]
+        self._backfill_conversation_sessions()
+
+        normalized_prefix = None
+        if session_prefix:
+            normalized_prefix = session_prefix if session_prefix.endswith(":") else f"{session_prefix}:"
+        exact_ids = [sid for sid in (extra_session_ids or []) if sid]
+
+        stmt = select(ConversationSession)
+        conditions = []
+        if normalized_prefix:
+            # 以区间代替 LIKE：可走主键索引，且前缀中的 "_" 不会被当作通配符
+            upper = normalized_prefix[:-1] + chr(ord(normalized_prefix[-1]) + 1)
+            conditions.append(and_(
+                ConversationSession.session_id >= normalized_prefix,
+                ConversationSession.session_id < upper,
+            ))
+        if exact_ids:
+            conditions.append(ConversationSession.session_id.in_(exact_ids))
+        if conditions:
+            stmt = stmt.where(or_(*conditions))
+        stmt = (
+            stmt
+            .order_by(desc(ConversationSession.last_active), ConversationSession.session_id)
+            .offset(max(0, int(offset or 0)))
+            .limit(limit)
+        )
 
-            # 聚合每个 session 的消息数和最后活跃时间
-            base = (
-                select(
-                    ConversationMessage.session_id,
-                    func.count(ConversationMessage.id).label("message_count"),
-                    func.min(ConversationMessage.created_at).label("created_at"),
-                    func.max(ConversationMessage.created_at).label("last_active"),
-                )
-            )
-            conditions = []
-            if normalized_prefix:
-                conditions.append(ConversationMessage.session_id.startswith(normalized_prefix))
-            if exact_ids:
-                conditions.append(ConversationMessage.session_id.in_(exact_ids))
-            if conditions:
-                base = base.where(or_(*conditions))
-            stmt = (
-                base
-                .group_by(ConversationMessage.session_id)
-                .order_by(desc(func.max(ConversationMessage.created_at)))
-                .limit(limit)
-            )
-            rows = session.execute(stmt).all()
-
-            results = []
-            for row in rows:
-                sid = row.session_id
-                # 取该会话第一条 user 消息作为标题
-                first_user_msg = session.execute(
-                    select(ConversationMessage.content)
-                    .where(
-                        and_(
-                            ConversationMessage.session_id == sid,
-                            ConversationMessage.role == "user",
-                        )
-                    )
-                    .order_by(ConversationMessage.created_at)
-                    .limit(1)
-                ).scalar()
-                title = (first_user_msg or "新对话")[:60]
-
-                results.append({
-                    "session_id": sid,
-                    "title": title,
-                    "message_count": row.message_count,
-                    "created_at": row.created_at.isoformat() if row.created_at else None,
-                    "last_active": row.last_active.isoformat() if row.last_active else None,
-                })
-            return results
+        with self.get_read_session() as session:
+            headers = session.execute(stmt).scalars().all()
+            return [
+                {
+                    "session_id": header.session_id,
+                    "title": header.title or "新对话",
+                    "message_count": header.message_count,
+                    "created_at": header.created_at.isoformat() if header.created_at else None,
+                    "last_active": header.last_active.isoformat() if header.last_active else None,
+                }
+                for header in headers
+            ]
 
     def get_conversation_messages(self, session_id: str, limit: int = 100) -> List[Dict[str, Any]]:
         """
         获取单个会话的完整消息列表（用于前端恢复历史）
         """
-        with self.session_scope() as session:
+        with self.get_read_session() as session:
             stmt = (
                 select(ConversationMessage)
                 .where(ConversationMessage.session_id == session_id)
@@ -1844,6 +2354,11 @@ class DatabaseManager:
                     ConversationMessage.session_id == session_id
                 )
             )
+            session.execute(
+                delete(ConversationSession).where(
+                    ConversationSession.session_id == session_id
+                )
+            )
             return result.rowcount
 
     # ------------------------------------------------------------------
@@ -1871,6 +2386,155 @@ class DatabaseManager:
         with self.session_scope() as session:
             session.add(row)
 
+    def record_llm_usage_batch(self, rows: List[Dict[str, Any]]) -> None:
+        """Insert a batch of LLM call records in one transaction, then fold rollups."""
+        if not rows:
+            return
+        with self.session_scope() as session:
+            session.add_all([
+                LLMUsage(
+                    call_type=row.get("call_type") or "unknown",
+                    model=row.get("model") or "unknown",
+                    stock_code=row.get("stock_code"),
+                    prompt_tokens=int(row.get("prompt_tokens") or 0),
+                    completion_tokens=int(row.get("completion_tokens") or 0),
+                    total_tokens=int(row.get("total_tokens") or 0),
+                    called_at=row.get("called_at") or datetime.now(),
+                )
+                for row in rows
+            ])
+        try:
+            self.refresh_llm_usage_rollups()
+        except Exception as exc:
+            # 汇总可在下次统计时补齐，不影响原始记录
+            logger.debug(f"[LLM usage] 小时汇总折叠失败: {exc}")
+
+    def get_llm_usage_recorder(self):
+        """
+        Return the background usage recorder, or None when buffering is disabled.
+
+        Created lazily on first use; the write-ahead file sits next to the SQLite
+        file. In-memory databases are per-connection, so they always write inline.
+        """
+        recorder = getattr(self, '_usage_recorder', None)
+        if recorder is not None:
+            return recorder
+        config = get_config()
+        if not getattr(config, 'llm_usage_buffer_enabled', True):
+            return None
+        from src.services.llm_usage_recorder import LLMUsageRecorder, default_wal_path
+
+        wal_path = default_wal_path(self._engine.url.database)
+        if wal_path is None:
+            return None
+
+        with DatabaseManager._usage_recorder_lock:
+            recorder = getattr(self, '_usage_recorder', None)
+            if recorder is None:
+                recorder = LLMUsageRecorder(
+                    sink=self.record_llm_usage_batch,
+                    wal_path=wal_path,
+                    batch_size=getattr(config, 'llm_usage_batch_size', 50),
+                    flush_interval=getattr(config, 'llm_usage_flush_interval', 5.0),
+                )
+                self._usage_recorder = recorder
+                atexit.register(recorder.close)
+        return recorder
+
+    def flush_llm_usage(self) -> int:
+        """Write any buffered usage records now; returns the number written."""
+        recorder = getattr(self, '_usage_recorder', None)
+        return recorder.flush() if recorder is not None else 0
+
+    def _close_usage_recorder(self) -> None:
+        recorder = getattr(self, '_usage_recorder', None)
+        if recorder is not None:
+            self._usage_recorder = None
+            recorder.close()
+
+    _ROLLUP_STATE_NAME = "hourly"
+    # 分析缓存命中记录（0 token，未实际调用模型），统计时单独计数
+    _CACHE_HIT_CALL_TYPE = "analysis_cache_hit"
+    _ROLLUP_CHUNK = 5000
+
+    def refresh_llm_usage_rollups(self) -> int:
+        """
+        Fold llm_usage rows above the watermark into llm_usage_hourly.
+
+        Each chunk commits its rollup increments together with a compare-and-set on
+        the watermark, so concurrent folders never double count. Returns rows folded.
+        """
+        folded = 0
+        while True:
+            with self.session_scope() as session:
+                state = session.get(LLMUsageRollupState, self._ROLLUP_STATE_NAME)
+                start_id = state.last_usage_id if state is not None else 0
+                rows = session.execute(
+                    select(
+                        LLMUsage.id,
+                        LLMUsage.called_at,
+                        LLMUsage.call_type,
+                        LLMUsage.model,
+                        LLMUsage.prompt_tokens,
+                        LLMUsage.completion_tokens,
+                        LLMUsage.total_tokens,
+                    )
+                    .where(LLMUsage.id > start_id)
+                    .order_by(LLMUsage.id)
+                    .limit(self._ROLLUP_CHUNK)
+                ).all()
+                if not rows:
+                    return folded
+
+                groups: Dict[Tuple[datetime, str, str], List[int]] = {}
+                for _, called_at, call_type, model, prompt, completion, total in rows:
+                    if called_at is None:
+                        continue
+                    key = (called_at.replace(minute=0, second=0, microsecond=0), call_type, model)
+                    acc = groups.setdefault(key, [0, 0, 0, 0])
+                    acc[0] += 1
+                    acc[1] += prompt or 0
+                    acc[2] += completion or 0
+                    acc[3] += total or 0
+                for key, (calls, prompt, completion, total) in groups.items():
+                    entry = session.get(LLMUsageHourly, key)
+                    if entry is None:
+                        session.add(LLMUsageHourly(
+                            bucket=key[0], call_type=key[1], model=key[2],
+                            calls=calls, prompt_tokens=prompt,
+                            completion_tokens=completion, total_tokens=total,
+                        ))
+                    else:
+                        entry.calls += calls
+                        entry.prompt_tokens += prompt
+                        entry.completion_tokens += completion
+                        entry.total_tokens += total
+
+                end_id = rows[-1][0]
+                if state is None:
+                    session.add(LLMUsageRollupState(name=self._ROLLUP_STATE_NAME, last_usage_id=end_id))
+                else:
+                    advanced = session.execute(
+                        update(LLMUsageRollupState)
+                        .where(
+                            LLMUsageRollupState.name == self._ROLLUP_STATE_NAME,
+                            LLMUsageRollupState.last_usage_id == start_id,
+                        )
+                        .values(last_usage_id=end_id, updated_at=datetime.now())
+                    )
+                    if advanced.rowcount != 1:
+                        # 其他进程已折叠同一批记录
+                        session.rollback()
+                        return folded
+                try:
+                    session.flush()
+                except IntegrityError:
+                    session.rollback()
+                    return folded
+            folded += len(rows)
+            if len(rows) < self._ROLLUP_CHUNK:
+                return folded
+
     def get_llm_usage_summary(
         self,
         from_dt: datetime,
@@ -1878,62 +2542,162 @@ class DatabaseManager:
     ) -> Dict[str, Any]:
         """Return aggregated token usage between from_dt and to_dt.
 
+        Whole hours are read from llm_usage_hourly; only the partial hours at the
+        range edges and rows not yet folded are aggregated from llm_usage.
+
         Returns a dict with keys:
           total_calls, total_tokens,
+          cache_hits:   analysis cache hits (not LLM calls, excluded elsewhere),
           by_call_type: list of {call_type, calls, total_tokens},
           by_model:     list of {model, calls, total_tokens}
         """
-        with self.session_scope() as session:
-            base_filter = and_(
-                LLMUsage.called_at >= from_dt,
-                LLMUsage.called_at <= to_dt,
-            )
+        try:
+            # 先落库本进程缓冲区中的记录，统计才包含刚发生的调用
+            self.flush_llm_usage()
+        except Exception as exc:
+            logger.debug(f"[LLM usage] 统计前刷盘失败，缓冲中的记录暂不计入: {exc}")
+        try:
+            self.refresh_llm_usage_rollups()
+        except Exception as exc:
+            logger.debug(f"[LLM usage] 小时汇总折叠失败，未折叠部分按原始记录统计: {exc}")
 
-            # Overall totals
-            totals = session.execute(
-                select(
-                    func.count(LLMUsage.id).label("calls"),
-                    func.coalesce(func.sum(LLMUsage.total_tokens), 0).label("tokens"),
-                ).where(base_filter)
-            ).one()
+        first_hour = from_dt.replace(minute=0, second=0, microsecond=0)
+        if first_hour < from_dt:
+            first_hour += timedelta(hours=1)
+        end_hour = to_dt.replace(minute=0, second=0, microsecond=0)
 
-            # Breakdown by call_type
-            by_type_rows = session.execute(
-                select(
-                    LLMUsage.call_type,
-                    func.count(LLMUsage.id).label("calls"),
-                    func.coalesce(func.sum(LLMUsage.total_tokens), 0).label("tokens"),
-                )
-                .where(base_filter)
-                .group_by(LLMUsage.call_type)
-                .order_by(desc(func.sum(LLMUsage.total_tokens)))
-            ).all()
+        groups: Dict[Tuple[str, str], List[int]] = {}
 
-            # Breakdown by model
-            by_model_rows = session.execute(
+        def _accumulate(result_rows) -> None:
+            for call_type, model, calls, tokens in result_rows:
+                acc = groups.setdefault((call_type, model), [0, 0])
+                acc[0] += calls or 0
+                acc[1] += tokens or 0
+
+        def _raw(*conditions):
+            return (
                 select(
+                    LLMUsage.call_type,
                     LLMUsage.model,
-                    func.count(LLMUsage.id).label("calls"),
-                    func.coalesce(func.sum(LLMUsage.total_tokens), 0).label("tokens"),
+                    func.count(LLMUsage.id),
+                    func.coalesce(func.sum(LLMUsage.total_tokens), 0),
                 )
-                .where(base_filter)
-                .group_by(LLMUsage.model)
-                .order_by(desc(func.sum(LLMUsage.total_tokens)))
-            ).all()
+                .where(and_(*conditions))
+                .group_by(LLMUsage.call_type, LLMUsage.model)
+            )
+
+        with self.get_read_session() as session:
+            if first_hour < end_hour:
+                state = session.get(LLMUsageRollupState, self._ROLLUP_STATE_NAME)
+                watermark = state.last_usage_id if state is not None else 0
+                _accumulate(session.execute(
+                    select(
+                        LLMUsageHourly.call_type,
+                        LLMUsageHourly.model,
+                        func.sum(LLMUsageHourly.calls),
+                        func.sum(LLMUsageHourly.total_tokens),
+                    )
+                    .where(
+                        LLMUsageHourly.bucket >= first_hour,
+                        LLMUsageHourly.bucket < end_hour,
+                    )
+                    .group_by(LLMUsageHourly.call_type, LLMUsageHourly.model)
+                ).all())
+                _accumulate(session.execute(_raw(
+                    LLMUsage.id > watermark,
+                    LLMUsage.called_at >= first_hour,
+                    LLMUsage.called_at < end_hour,
+                )).all())
+                _accumulate(session.execute(_raw(
+                    LLMUsage.called_at >= from_dt, LLMUsage.called_at < first_hour,
+                )).all())
+                _accumulate(session.execute(_raw(
+                    LLMUsage.called_at >= end_hour, LLMUsage.called_at <= to_dt,
+                )).all())
+            else:
+                _accumulate(session.execute(_raw(
+                    LLMUsage.called_at >= from_dt, LLMUsage.called_at <= to_dt,
+                )).all())
+
+        cache_hits = 0
+        for key in [key for key in groups if key[0] == self._CACHE_HIT_CALL_TYPE]:
+            cache_hits += groups.pop(key)[0]
+
+        def _breakdown(index: int, field: str) -> List[Dict[str, Any]]:
+            merged: Dict[str, List[int]] = {}
+            for key, (calls, tokens) in groups.items():
+                acc = merged.setdefault(key[index], [0, 0])
+                acc[0] += calls
+                acc[1] += tokens
+            ordered = sorted(merged.items(), key=lambda item: item[1][1], reverse=True)
+            return [
+                {field: name, "calls": calls, "total_tokens": tokens}
+                for name, (calls, tokens) in ordered
+            ]
 
         return {
-            "total_calls": totals.calls,
-            "total_tokens": totals.tokens,
-            "by_call_type": [
-                {"call_type": r.call_type, "calls": r.calls, "total_tokens": r.tokens}
-                for r in by_type_rows
-            ],
-            "by_model": [
-                {"model": r.model, "calls": r.calls, "total_tokens": r.tokens}
-                for r in by_model_rows
-            ],
+            "total_calls": sum(calls for calls, _ in groups.values()),
+            "total_tokens": sum(tokens for _, tokens in groups.values()),
+            "cache_hits": cache_hits,
+            "by_call_type": _breakdown(0, "call_type"),
+            "by_model": _breakdown(1, "model"),
         }
 
+    def get_llm_usage_rollup_watermark(self) -> int:
+        """已折叠进小时汇总的最大 llm_usage.id（保留策略只能删除水位以下的明细）"""
+        with self.get_session() as session:
+            state = session.get(LLMUsageRollupState, self._ROLLUP_STATE_NAME)
+            return state.last_usage_id if state is not None else 0
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def get_database_size(self) -> Dict[str, int]:
+        """SQLite 页统计：total_bytes 为逻辑大小，free_bytes 为空闲页（可回收）"""
+        with self._engine.connect() as conn:
+            page_size = conn.exec_driver_sql("PRAGMA page_size").scalar() or 0
+            page_count = conn.exec_driver_sql("PRAGMA page_count").scalar() or 0
+            freelist = conn.exec_driver_sql("PRAGMA freelist_count").scalar() or 0
+        return {
+            "page_size": page_size,
+            "total_bytes": page_size * page_count,
+            "free_bytes": page_size * freelist,
+        }
+
+    def compact_database(self, vacuum_mode: str = "INCREMENTAL", pages_per_step: int = 2000) -> None:
+        """
+        回收空闲页并刷新查询计划统计
+
+        - INCREMENTAL：分步 incremental_vacuum，每步一个短事务；库尚未启用
+          auto_vacuum=INCREMENTAL 时先做一次完整 VACUUM 完成转换
+        - FULL：完整 VACUUM（重写整个库，期间阻塞写入）
+        - OFF：只刷新统计
+
+        统计刷新使用 PRAGMA optimize，只 ANALYZE 变化较大的表。
+        """
+        mode = (vacuum_mode or "OFF").upper()
+        with self._engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            if mode in ("INCREMENTAL", "FULL"):
+                auto_vacuum = conn.exec_driver_sql("PRAGMA auto_vacuum").scalar()
+                if mode == "FULL" or auto_vacuum != 2:
+                    if mode == "INCREMENTAL":
+                        logger.info("数据库尚未启用增量 VACUUM，执行一次完整 VACUUM 完成转换")
+                        conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+                    conn.exec_driver_sql("VACUUM")
+                else:
+                    free_pages = conn.exec_driver_sql("PRAGMA freelist_count").scalar() or 0
+                    while free_pages:
+                        conn.exec_driver_sql(f"PRAGMA incremental_vacuum({int(pages_per_step)})")
+                        remaining = conn.exec_driver_sql("PRAGMA freelist_count").scalar() or 0
+                        if remaining >= free_pages:
+                            break
+                        free_pages = remaining
+                if conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal":
+                    conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.exec_driver_sql("PRAGMA analysis_limit=1000")
+            conn.exec_driver_sql("PRAGMA optimize")
+
 
 # 便捷函数
 def get_db() -> DatabaseManager:
@@ -1947,21 +2711,30 @@ def persist_llm_usage(
     call_type: str,
     stock_code: Optional[str] = None,
 ) -> None:
-    """Fire-and-forget: write one LLM call record to llm_usage. Never raises."""
+    """
+    Fire-and-forget: queue one LLM call record for llm_usage. Never raises.
+
+    Records go through the background recorder (batched, one transaction per
+    flush); with LLM_USAGE_BUFFER_ENABLED=false they are written synchronously.
+    """
     try:
         db = DatabaseManager.get_instance()
-        db.record_llm_usage(
-            call_type=call_type,
-            model=model,
-            prompt_tokens=usage.get("prompt_tokens", 0) or 0,
-            completion_tokens=usage.get("completion_tokens", 0) or 0,
-            total_tokens=usage.get("total_tokens", 0) or 0,
-            stock_code=stock_code,
-        )
+        row = {
+            "call_type": call_type,
+            "model": model or "unknown",
+            "stock_code": stock_code,
+            "prompt_tokens": usage.get("prompt_tokens", 0) or 0,
+            "completion_tokens": usage.get("completion_tokens", 0) or 0,
+            "total_tokens": usage.get("total_tokens", 0) or 0,
+        }
+        recorder = db.get_llm_usage_recorder()
+        if recorder is not None:
+            recorder.record(row)
+        else:
+            db.record_llm_usage(**row)
     except Exception as exc:
         logging.getLogger(__name__).warning("[LLM usage] failed to persist usage record: %s", exc)
 
-
 if __name__ == "__main__":
     # 测试代码
     logging.basicConfig(level=logging.DEBUG)
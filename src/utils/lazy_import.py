@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Deferred imports for heavy optional libraries (litellm, newspaper, ...).
+
+``litellm = lazy_module("litellm")`` keeps a module-level, patchable name while
+postponing the actual import until the first attribute access.
+"""
+
+import importlib
+import sys
+from types import ModuleType
+from typing import Any
+
+
+class LazyModule:
+    """Proxy that imports the target module on first attribute access."""
+
+    __slots__ = ("_lazy_name",)
+
+    def __init__(self, name: str):
+        object.__setattr__(self, "_lazy_name", name)
+
+    def _load(self) -> ModuleType:
+        name = object.__getattribute__(self, "_lazy_name")
+        # Always resolve through sys.modules so test stubs / reloads are honoured.
+        return sys.modules.get(name) or importlib.import_module(name)
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self._load(), item)
+
+    def __setattr__(self, item: str, value: Any) -> None:
+        setattr(self._load(), item, value)
+
+    def __delattr__(self, item: str) -> None:
+        delattr(self._load(), item)
+
+    def __repr__(self) -> str:
+        name = object.__getattribute__(self, "_lazy_name")
+        state = "loaded" if name in sys.modules else "not loaded"
+        return f"<lazy module {name!r} ({state})>"
+
+
+def lazy_module(name: str) -> LazyModule:
+    return LazyModule(name)
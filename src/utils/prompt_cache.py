@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Prompt-prefix caching helpers.
+
+Provider-side prompt caching only hits when the leading part of a request is
+byte-identical between calls:
+
+- OpenAI / DeepSeek / Gemini 2.5 cache long identical prefixes automatically;
+  keeping the static part first is all that is needed.
+- Anthropic (incl. Bedrock / Vertex Claude) caches only up to explicit
+  ``cache_control`` breakpoints, which litellm forwards from content blocks.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Cheap token estimate: ~1 token per CJK character, ~4 characters per token otherwise."""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def supports_cache_control(model: str) -> bool:
+    """Whether *model* needs explicit ``cache_control`` breakpoints (Claude family)."""
+    lowered = (model or "").lower()
+    return lowered.startswith("anthropic/") or "claude" in lowered
+
+
+def build_messages(
+    system_prompt: str,
+    prompt: str,
+    *,
+    cacheable_prefix: Optional[str] = None,
+    cache_control: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Build ``[system, user]`` messages.
+
+    With *cache_control*, the system prompt and the static head of the user
+    prompt (*cacheable_prefix*, when *prompt* starts with it) become text blocks
+    carrying a breakpoint; the per-request tail stays uncached.
+    """
+    if not cache_control:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt},
+        ]
+
+    user_blocks: List[Dict[str, Any]] = []
+    if cacheable_prefix and prompt.startswith(cacheable_prefix) and len(prompt) > len(cacheable_prefix):
+        user_blocks.append({"type": "text", "text": cacheable_prefix, "cache_control": CACHE_CONTROL})
+        user_blocks.append({"type": "text", "text": prompt[len(cacheable_prefix):]})
+    else:
+        user_blocks.append({"type": "text", "text": prompt})
+    return [
+        {
+            "role": "system",
+            "content": [{"type": "text", "text": system_prompt, "cache_control": CACHE_CONTROL}],
+        },
+        {"role": "user", "content": user_blocks},
+    ]
+
+
+def cached_prompt_tokens(usage: Any) -> int:
+    """Prompt tokens served from the provider cache, as normalised by litellm (0 if unknown)."""
+    if usage is None:
+        return 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) if details is not None else None
+    if cached is None:
+        cached = getattr(usage, "cache_read_input_tokens", None)
+    try:
+        return int(cached or 0)
+    except (TypeError, ValueError):
+        return 0
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental monitor for streamed dashboard JSON.
+
+The analysis report is a single JSON object. While tokens arrive, the monitor
+tracks object depth with a tiny string-aware scanner and, at every top-level
+value boundary, parses the partial text with ``json_repair`` to learn which
+fields are complete. That gives:
+
+- progress events per completed top-level field;
+- early aborts when the output is clearly unusable (prose instead of JSON,
+  a degenerate repetition loop, a wrongly typed core field);
+- a ``closed`` flag once the object ends, so trailing commentary need not be
+  consumed.
+"""
+
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from json_repair import repair_json
+
+
+class StreamAbort(Exception):
+    """Raised by :meth:`DashboardStreamMonitor.feed` when the stream should be abandoned."""
+
+    def __init__(self, reason: str, partial_text: str, detail: str = ""):
+        super().__init__(f"{reason}: {detail}" if detail else reason)
+        self.reason = reason
+        self.partial_text = partial_text
+        self.detail = detail
+        # 由调用方填入实际产生该输出的模型
+        self.model: Optional[str] = None
+
+
+def _is_score(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    try:
+        int(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+# 已完成字段的结构校验：返回 False 时中止（后续解析必然失败或必然触发完整性重试）
+_FIELD_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "sentiment_score": _is_score,
+    "dashboard": lambda value: isinstance(value, dict),
+}
+
+
+class DashboardStreamMonitor:
+    """
+    Feed streamed deltas, get field progress and early-abort decisions.
+
+    Args:
+        expected_fields: Top-level fields used to compute progress.
+        on_field: Called as ``on_field(name, done, expected)`` for each newly completed field.
+        abort_enabled: When False only progress is reported (used for the last attempt).
+        prose_limit: Non-whitespace characters allowed before the first ``{``.
+        repeat_probe / repeat_window / repeat_limit: The stream is treated as a
+            repetition loop when its last ``repeat_probe`` characters occur
+            ``repeat_limit`` times within the last ``repeat_window`` characters.
+        check_every: Characters between repetition checks.
+    """
+
+    def __init__(
+        self,
+        *,
+        expected_fields: Iterable[str] = (),
+        on_field: Optional[Callable[[str, int, int], None]] = None,
+        abort_enabled: bool = True,
+        prose_limit: int = 600,
+        repeat_probe: int = 80,
+        repeat_window: int = 4000,
+        repeat_limit: int = 4,
+        check_every: int = 256,
+    ):
+        self.expected_fields = list(expected_fields)
+        self.on_field = on_field
+        self.abort_enabled = abort_enabled
+        self.prose_limit = prose_limit
+        self.repeat_probe = repeat_probe
+        self.repeat_window = repeat_window
+        self.repeat_limit = repeat_limit
+        self.check_every = check_every
+
+        self.fields: Dict[str, Any] = {}
+        self.closed = False
+        self._chunks: list = []
+        self._length = 0
+        self._start: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._next_repeat_check = check_every
+
+    @property
+    def text(self) -> str:
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def feed(self, delta: str) -> None:
+        """Consume one delta; raises :class:`StreamAbort` when the stream should stop."""
+        if not delta or self.closed:
+            return
+        offset = self._length
+        self._chunks.append(delta)
+        self._length += len(delta)
+
+        for index, char in enumerate(delta):
+            if self._start is None:
+                if char == "{":
+                    self._start = offset + index
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.closed = True
+                    self._collect_fields(offset + index + 1)
+                    return
+            elif char == "," and self._depth == 1:
+                self._collect_fields(offset + index)
+
+        if not self.abort_enabled:
+            return
+        if self._start is None and len("".join(self.text.split())) > self.prose_limit:
+            raise StreamAbort("no_json", self.text, f"{self.prose_limit} 字符内未出现 JSON")
+        if self._length >= self._next_repeat_check:
+            self._next_repeat_check = self._length + self.check_every
+            self._check_repetition()
+
+    def _collect_fields(self, end: int) -> None:
+        """Parse ``text[start:end]`` and report newly completed top-level fields."""
+        try:
+            parsed = repair_json(self.text[self._start:end], return_objects=True)
+        except Exception:
+            return
+        if not isinstance(parsed, dict):
+            return
+        for name, value in parsed.items():
+            if name in self.fields:
+                continue
+            self.fields[name] = value
+            check = _FIELD_CHECKS.get(name)
+            if self.abort_enabled and check is not None and not check(value):
+                raise StreamAbort("bad_field", self.text, f"{name}={str(value)[:40]!r}")
+            if self.on_field is not None:
+                self.on_field(name, len(self.fields), max(len(self.expected_fields), len(self.fields)))
+
+    def _check_repetition(self) -> None:
+        text = self.text
+        probe = text[-self.repeat_probe:]
+        if len(probe) < self.repeat_probe or len(set(probe)) < 8:
+            return
+        window = text[-self.repeat_window:]
+        if window.count(probe) >= self.repeat_limit:
+            raise StreamAbort("repetition", text, probe[:40])
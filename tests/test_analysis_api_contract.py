@@ -18,12 +18,14 @@ try:
     from api.app import create_app
     from api.v1.endpoints.analysis import (
         trigger_analysis,
+        get_task_queue_stats,
         _build_analysis_report,
         _load_sync_fundamental_sources,
     )
 except Exception:  # pragma: no cover - optional dependency environments
     create_app = None
     trigger_analysis = None
+    get_task_queue_stats = None
     _build_analysis_report = None
     _load_sync_fundamental_sources = None
 
@@ -38,9 +40,11 @@ class AnalysisApiContractTestCase(unittest.TestCase):
         service = object.__new__(AnalysisService)
         pipeline_instance = MagicMock()
         pipeline_instance.process_single_stock.return_value = object()
+        engine = MagicMock()
+        engine.create_pipeline.return_value = pipeline_instance
 
         with patch("src.config.get_config", return_value=SimpleNamespace()), \
-             patch("src.core.pipeline.StockAnalysisPipeline", return_value=pipeline_instance), \
+             patch("src.core.analysis_engine.get_analysis_engine", return_value=engine), \
              patch.object(AnalysisService, "_build_analysis_response", return_value={"stock_code": "600519"}):
             result = AnalysisService.analyze_stock(service, "600519", report_type="full", query_id="q1")
 
@@ -70,8 +74,11 @@ class AnalysisApiContractTestCase(unittest.TestCase):
             get_sniper_points=lambda: {},
         )
 
+        engine = MagicMock()
+        engine.create_pipeline.return_value = pipeline_instance
+
         with patch("src.config.get_config", return_value=SimpleNamespace()), \
-             patch("src.core.pipeline.StockAnalysisPipeline", return_value=pipeline_instance):
+             patch("src.core.analysis_engine.get_analysis_engine", return_value=engine):
             result = service.analyze_stock("600519", report_type="full", query_id="q1", send_notification=False)
 
         self.assertEqual(result["report"]["meta"]["report_type"], "full")
@@ -801,6 +808,127 @@ class BatchTaskQueueContractTestCase(unittest.TestCase):
         self.assertEqual(duplicates, [])
         self.assertEqual(lock_states, [True, True])
 
+    def test_batch_submit_shares_one_prefetch_and_emits_per_task_events(self) -> None:
+        queue = AnalysisTaskQueue(max_workers=2)
+        events = []
+        queue._broadcast_event = lambda event_type, data: events.append((event_type, data["stock_code"]))
+        prefetch_calls = []
+
+        def fake_analyze(self, stock_code, **kwargs):
+            return {"stock_code": stock_code, "stock_name": stock_code}
+
+        with patch.object(AnalysisService, "__init__", return_value=None), \
+             patch.object(AnalysisService, "prefetch_batch", autospec=True,
+                          side_effect=lambda self, codes: prefetch_calls.append(list(codes))), \
+             patch.object(AnalysisService, "analyze_stock", autospec=True, side_effect=fake_analyze):
+            accepted, duplicates = queue.submit_tasks_batch(
+                ["600519", "000858", "600519.SH"], report_type="detailed"
+            )
+            for task in accepted:
+                queue._futures[task.task_id].result(timeout=5)
+
+        self.assertEqual([task.stock_code for task in accepted], ["600519", "000858"])
+        self.assertEqual([dup.stock_code for dup in duplicates], ["600519.SH"])
+        self.assertEqual(prefetch_calls, [["600519", "000858"]])
+        for code in ("600519", "000858"):
+            self.assertIn(("task_started", code), events)
+            self.assertIn(("task_completed", code), events)
+        self.assertEqual(queue._analyzing_stocks, {})
+
+
+    @staticmethod
+    def _manual_queue(max_workers=1):
+        """Queue whose dispatch tickets are collected and run by the test."""
+        queue = AnalysisTaskQueue(max_workers=max_workers)
+        tickets = []
+        queue._executor = type("ExecutorStub", (), {"submit": lambda self, fn, *a, **k: tickets.append(fn)})()
+        executed = []
+        queue._execute_task = lambda task_id, code, *args, **kwargs: executed.append(code)
+        return queue, tickets, executed
+
+    @staticmethod
+    def _drain(tickets):
+        while tickets:
+            tickets.pop(0)()
+
+    def test_interactive_lane_jumps_ahead_of_queued_bulk_batch(self) -> None:
+        queue, tickets, executed = self._manual_queue()
+
+        bulk, _ = queue.submit_tasks_batch(["600519", "000858", "000001"], report_type="detailed")
+        single, _ = queue.submit_tasks_batch(["300750"], report_type="detailed")
+        self._drain(tickets)
+
+        self.assertEqual({t.lane for t in bulk}, {"bulk"})
+        self.assertEqual(single[0].lane, "interactive")
+        self.assertEqual(executed, ["300750", "600519", "000858", "000001"])
+
+    def test_bulk_lane_shares_slots_between_requesters(self) -> None:
+        queue, tickets, executed = self._manual_queue()
+
+        queue.submit_tasks_batch(["600519", "000858", "000001"], report_type="detailed", requester="a")
+        queue.submit_tasks_batch(["300750", "002594"], report_type="detailed", requester="b")
+        self._drain(tickets)
+
+        self.assertEqual(executed, ["600519", "300750", "000858", "002594", "000001"])
+
+    def test_api_submissions_share_slots_per_client(self) -> None:
+        if trigger_analysis is None:
+            self.skipTest("fastapi is not installed in this test environment")
+        queue, tickets, executed = self._manual_queue()
+
+        def submit(host, codes):
+            http_request = SimpleNamespace(headers={}, client=SimpleNamespace(host=host))
+            request = SimpleNamespace(
+                stock_code=None, stock_codes=codes, stock_name=None, original_query=None,
+                selection_source=None, report_type="detailed", force_refresh=False,
+                async_mode=True, notify=False, lane=None,
+            )
+            return trigger_analysis(request=request, config=SimpleNamespace(), http_request=http_request)
+
+        with patch("api.v1.endpoints.analysis.get_task_queue", return_value=queue):
+            submit("10.0.0.1", ["600519", "000858"])
+            submit("10.0.0.1", ["000001", "601318"])
+            submit("10.0.0.2", ["300750", "002594"])
+        self._drain(tickets)
+
+        # 同一客户端的两次提交共用一个公平份额，与另一客户端交替执行
+        self.assertEqual(executed, ["600519", "300750", "000858", "002594", "000001", "601318"])
+
+    def test_lane_cap_defers_queued_tasks_without_blocking_other_lanes(self) -> None:
+        queue, tickets, executed = self._manual_queue(max_workers=3)
+        queue.configure_lanes({"bulk": 1})
+        queue._lanes["bulk"].running = 1  # one bulk task already running
+
+        queue.submit_tasks_batch(["600519", "000858"], report_type="detailed")
+        queue.submit_tasks_batch(["300750"], report_type="detailed", lane="scheduled")
+        self._drain(tickets)
+
+        self.assertEqual(executed, ["300750"])
+        stats = queue.get_task_stats()["lanes"]
+        self.assertEqual(stats["bulk"]["queued"], 2)
+        self.assertEqual(stats["bulk"]["max_concurrency"], 1)
+        self.assertEqual(stats["scheduled"]["finished"], 1)
+        self.assertEqual(stats["interactive"]["max_concurrency"], 3)
+
+    def test_task_stats_endpoint_exposes_lane_metrics(self) -> None:
+        if get_task_queue_stats is None:
+            self.skipTest("fastapi is not installed in this test environment")
+        queue, tickets, _ = self._manual_queue()
+        queue.submit_tasks_batch(["600519", "000858"], report_type="detailed")
+
+        with patch("api.v1.endpoints.analysis.get_task_queue", return_value=queue):
+            response = get_task_queue_stats()
+
+        self.assertEqual(response.pending, 2)
+        self.assertEqual(response.lanes["bulk"].queued, 2)
+        self.assertEqual(set(response.lanes), {"interactive", "scheduled", "bulk"})
+
+    def test_batch_submit_rejects_unknown_lane(self) -> None:
+        queue, _, _ = self._manual_queue()
+
+        with self.assertRaisesRegex(ValueError, "Invalid lane"):
+            queue.submit_tasks_batch(["600519"], lane="urgent")
+
 
 class ImageStockExtractorContractTestCase(unittest.TestCase):
     def test_litellm_completion_patch_target_remains_available(self) -> None:
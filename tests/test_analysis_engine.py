@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Tests for the process-wide AnalysisEngine that reuses pipeline components."""
+
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tests.litellm_stub import ensure_litellm_stub
+
+ensure_litellm_stub()
+
+from src.core import analysis_engine
+from src.core.pipeline import PipelineComponents
+
+
+def _fake_components(config):
+    return PipelineComponents(
+        config=config,
+        db=MagicMock(),
+        fetcher_manager=MagicMock(),
+        trend_analyzer=MagicMock(),
+        analyzer=MagicMock(),
+        notifier=MagicMock(),
+        search_service=MagicMock(),
+        social_sentiment_service=MagicMock(),
+    )
+
+
+class AnalysisEngineTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        analysis_engine.reset_analysis_engine()
+
+    def tearDown(self) -> None:
+        analysis_engine.reset_analysis_engine()
+
+    @staticmethod
+    def _config():
+        return SimpleNamespace(max_workers=3, save_context_snapshot=True)
+
+    def test_components_are_built_once_and_shared_across_requests(self) -> None:
+        config = self._config()
+        with patch.object(analysis_engine, "build_pipeline_components", side_effect=_fake_components) as build:
+            first = analysis_engine.get_analysis_engine(config).create_pipeline(query_id="q1", query_source="api")
+            second = analysis_engine.get_analysis_engine(config).create_pipeline(
+                query_id="q2", max_workers=1, save_context_snapshot=False
+            )
+
+        build.assert_called_once_with(config)
+        self.assertIs(first.analyzer, second.analyzer)
+        self.assertIs(first.fetcher_manager, second.fetcher_manager)
+        self.assertIs(first.search_service, second.search_service)
+        self.assertEqual((first.query_id, first.query_source, first.max_workers), ("q1", "api", 3))
+        self.assertEqual((second.query_id, second.max_workers, second.save_context_snapshot), ("q2", 1, False))
+
+    def test_engine_is_rebuilt_when_config_is_reloaded(self) -> None:
+        with patch.object(analysis_engine, "build_pipeline_components", side_effect=_fake_components) as build:
+            old = analysis_engine.get_analysis_engine(self._config())
+            new = analysis_engine.get_analysis_engine(self._config())
+
+        self.assertIsNot(old, new)
+        self.assertEqual(build.call_count, 2)
+
+    def test_source_message_gets_its_own_notifier(self) -> None:
+        config = self._config()
+        with patch.object(analysis_engine, "build_pipeline_components", side_effect=_fake_components), \
+             patch("src.core.pipeline.NotificationService") as notifier_cls:
+            engine = analysis_engine.get_analysis_engine(config)
+            shared = engine.create_pipeline(query_id="q1")
+            bot = engine.create_pipeline(source_message=MagicMock(), query_id="q2")
+
+        self.assertIs(shared.notifier, engine.components.notifier)
+        self.assertIs(bot.notifier, notifier_cls.return_value)
+        self.assertEqual(bot.query_source, "bot")
+
+
+if __name__ == "__main__":
+    unittest.main()
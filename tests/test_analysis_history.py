@@ -14,6 +14,7 @@ import os
 import sys
 import tempfile
 import unittest
+from datetime import datetime, timedelta
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
@@ -35,6 +36,7 @@ except ModuleNotFoundError:
 from src.config import Config
 from src.storage import DatabaseManager, AnalysisHistory, BacktestResult
 from src.analyzer import AnalysisResult
+from src.services.history_comparison_service import get_signal_changes_batch
 from src.services.history_service import HistoryService
 import src.auth as auth
 
@@ -616,6 +618,75 @@ class AnalysisHistoryTestCase(unittest.TestCase):
                 0,
             )
 
+    def test_large_blobs_are_compressed_deferred_and_legacy_rows_rewritten(self) -> None:
+        """大字段压缩存储、列表查询不加载，升级前的明文记录可被重写为压缩格式。"""
+        from sqlalchemy import text
+
+        long_news = "新闻正文" * 2000
+        self.db.save_analysis_history(
+            result=self._build_result(),
+            query_id="query_blob_001",
+            report_type="simple",
+            news_content=long_news,
+            context_snapshot={"enhanced_context": {"rows": list(range(500))}},
+            save_snapshot=True,
+        )
+        with self.db.get_session() as session:
+            session.execute(text(
+                "INSERT INTO analysis_history (query_id, code, name, news_content, created_at) "
+                "VALUES ('legacy_001', '600519', '贵州茅台', :news, :created_at)"
+            ), {"news": long_news, "created_at": datetime.now()})
+            session.commit()
+            storage_types = dict(session.execute(text(
+                "SELECT query_id, typeof(news_content) FROM analysis_history"
+            )).all())
+        self.assertEqual(storage_types, {"query_blob_001": "blob", "legacy_001": "text"})
+
+        records, total = self.db.get_analysis_history_paginated(code="600519")
+        self.assertEqual(total, 2)
+        self.assertTrue(all("news_content" not in record.__dict__ for record in records))
+
+        detail = HistoryService(self.db).resolve_and_get_detail("legacy_001")
+        self.assertEqual(detail["news_content"], long_news)
+
+        self.assertEqual(self.db.compress_legacy_analysis_blobs(batch_size=1), 1)
+        self.assertEqual(self.db.compress_legacy_analysis_blobs(), 0)
+        with self.db.get_session() as session:
+            self.assertEqual(
+                session.execute(text("SELECT DISTINCT typeof(news_content) FROM analysis_history")).scalars().all(),
+                ["blob"],
+            )
+        for record in self.db.get_analysis_history(code="600519", days=1):
+            self.assertEqual(record.news_content, long_news)
+
+    def test_signal_changes_batch_limits_per_code_and_excludes_current_run(self) -> None:
+        """批量信号查询：每只股票取最近 N 条，并排除本次运行记录。"""
+        base = datetime.now() - timedelta(days=1)
+        with self.db.session_scope() as session:
+            for idx in range(4):
+                for code in ("600519", "000001"):
+                    session.add(AnalysisHistory(
+                        query_id=f"{code}_{idx}",
+                        code=code,
+                        name=code,
+                        report_type="simple",
+                        sentiment_score=idx,
+                        operation_advice="持有",
+                        trend_prediction="震荡",
+                        raw_result="{}",
+                        created_at=base + timedelta(minutes=idx),
+                    ))
+
+        result = get_signal_changes_batch(
+            ["600519", "000001", "300750"],
+            limit=2,
+            exclude_query_ids={"600519": "600519_3"},
+        )
+
+        self.assertEqual([s["query_id"] for s in result["600519"]], ["600519_2", "600519_1"])
+        self.assertEqual([s["sentiment_score"] for s in result["000001"]], [3, 2])
+        self.assertEqual(result["300750"], [])
+
     @patch("src.auth.is_auth_enabled", return_value=False)
     def test_delete_history_api_deletes_selected_records(self, mock_auth) -> None:
         """DELETE /api/v1/history should remove only the requested records."""
@@ -12,6 +12,7 @@ except ModuleNotFoundError:
     sys.modules["litellm"] = MagicMock()
 
 from src.analyzer import GeminiAnalyzer
+from src.utils.prompt_cache import build_messages, cached_prompt_tokens, supports_cache_control
 
 
 class AnalyzerNewsPromptTestCase(unittest.TestCase):
@@ -143,6 +144,57 @@ class AnalyzerNewsPromptTestCase(unittest.TestCase):
         self.assertNotIn("超过5%必须标注\"严禁追高\"", prompt)
         self.assertNotIn("MA5>MA10>MA20为多头", prompt)
 
+    def test_static_prefix_is_identical_across_stocks(self) -> None:
+        with patch.object(GeminiAnalyzer, "_init_litellm", return_value=None):
+            analyzer = GeminiAnalyzer(
+                skill_instructions="### 技能 1: 缠论",
+                default_skill_policy="",
+                use_legacy_default_prompt=False,
+            )
+
+        first = analyzer._build_analysis_prompt(
+            {"code": "600519", "stock_name": "贵州茅台", "today": {"close": 1500.5}, "news_window_days": 3},
+            "贵州茅台",
+            news_context="news-a",
+        )
+        second = analyzer._build_analysis_prompt(
+            {"code": "000001", "stock_name": "平安银行", "today": {}, "chip": {"profit_ratio": 0.5},
+             "news_window_days": 3},
+            "平安银行",
+            news_context=None,
+        )
+
+        self.assertEqual(first.static_prefix, second.static_prefix)
+        self.assertNotIn("平安银行", second.static_prefix)
+        self.assertTrue(first.text.startswith(first.static_prefix))
+        self.assertIn("收盘价|开盘价|最高价|最低价|涨跌幅%|成交量|成交额\n1500.5|N/A|N/A", first.data)
+        stages = second.stage_tokens("system prompt")
+        self.assertEqual(
+            stages["total"],
+            sum(count for stage, count in stages.items() if stage != "total"),
+        )
+        self.assertIn("indicators", stages)
+
+    def test_cache_control_breakpoints_only_for_claude_models(self) -> None:
+        self.assertTrue(supports_cache_control("anthropic/claude-sonnet-4"))
+        self.assertTrue(supports_cache_control("bedrock/us.anthropic.claude-3-7-sonnet"))
+        self.assertFalse(supports_cache_control("deepseek/deepseek-chat"))
+
+        plain = build_messages("SYS", "STATIC-DATA", cacheable_prefix="STATIC-")
+        self.assertEqual(plain[1], {"role": "user", "content": "STATIC-DATA"})
+
+        cached = build_messages("SYS", "STATIC-DATA", cacheable_prefix="STATIC-", cache_control=True)
+        self.assertEqual(cached[0]["content"][0]["cache_control"], {"type": "ephemeral"})
+        self.assertEqual(
+            [block.get("cache_control") for block in cached[1]["content"]],
+            [{"type": "ephemeral"}, None],
+        )
+        self.assertEqual("".join(block["text"] for block in cached[1]["content"]), "STATIC-DATA")
+
+        usage = SimpleNamespace(prompt_tokens_details=SimpleNamespace(cached_tokens=1200))
+        self.assertEqual(cached_prompt_tokens(usage), 1200)
+        self.assertEqual(cached_prompt_tokens(SimpleNamespace(cache_read_input_tokens=None)), 0)
+
 
 if __name__ == "__main__":
     unittest.main()
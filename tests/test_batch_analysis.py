@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""Tests for multi-stock batched LLM analysis."""
+
+import json
+import os
+import re
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tests.litellm_stub import ensure_litellm_stub
+
+ensure_litellm_stub()
+
+from src.analyzer import AnalysisResult, GeminiAnalyzer
+from src.config import Config
+from src.core.pipeline import PreparedAnalysis, StockAnalysisPipeline
+from src.enums import ReportType
+
+CODES = ["600519", "000001", "300750", "601318"]
+
+
+def _report(code: str, **overrides) -> dict:
+    report = {
+        "stock_code": code,
+        "stock_name": f"名称{code}",
+        "sentiment_score": 66,
+        "operation_advice": "持有",
+        "decision_type": "hold",
+        "analysis_summary": "结构完好",
+        "dashboard": {
+            "core_conclusion": {"one_sentence": "持有观察"},
+            "intelligence": {"risk_alerts": []},
+            "battle_plan": {"sniper_points": {"stop_loss": 10.5}},
+        },
+    }
+    report.update(overrides)
+    return report
+
+
+class AnalyzeBatchTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        with patch.object(GeminiAnalyzer, "_init_litellm", return_value=None):
+            self.analyzer = GeminiAnalyzer()
+        self.config = Config(stock_list=[], litellm_model="openai/test", gemini_request_delay=0)
+        self.items = [({"code": code, "stock_name": f"名称{code}", "today": {}}, None) for code in CODES]
+        self.requests = []
+
+    def _fake_llm(self, prompt, generation_config, **kwargs):
+        codes = re.findall(r"=== 标的 \d+/\d+：.*?（(\d+)）", prompt)
+        if not codes:
+            data = prompt.split("# 股票数据", 1)[1]
+            codes = [code for code in CODES if code in data][:1]
+            self.requests.append(codes)
+            return json.dumps(_report(codes[0]), ensure_ascii=False), "openai/test", {}
+        self.requests.append(codes)
+        if len(codes) == len(CODES):
+            # 一只评分类型错误、一只漏输出
+            elements = [_report("600519"), _report("000001", sentiment_score="偏强"), _report("300750")]
+        else:
+            elements = [_report(code) for code in codes]
+        return json.dumps(elements, ensure_ascii=False), "openai/test", {"total_tokens": 10}
+
+    def test_invalid_items_are_split_and_retried(self) -> None:
+        with patch.object(self.analyzer, "_get_runtime_config", return_value=self.config), \
+                patch.object(self.analyzer, "is_available", return_value=True), \
+                patch.object(self.analyzer, "_call_litellm", side_effect=self._fake_llm), \
+                patch("src.analyzer.persist_llm_usage") as persist_usage:
+            results = self.analyzer.analyze_batch(self.items)
+
+        self.assertEqual([result.code for result in results], CODES)
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(self.requests, [CODES, ["000001"], ["601318"]])
+        self.assertEqual(results[0].name, "名称600519")
+        self.assertEqual(json.loads(results[2].raw_response)["stock_code"], "300750")
+        call_types = [item.kwargs["call_type"] for item in persist_usage.call_args_list]
+        self.assertEqual(call_types, ["analysis_batch", "analysis", "analysis"])
+
+    def test_truncated_response_keeps_last_complete_element(self) -> None:
+        complete = json.dumps(_report("600519", analysis_summary="尾部字段"), ensure_ascii=False)
+        elements = GeminiAnalyzer._parse_batch_response(f'[{complete}, {{"stock_code": "000001", "sentim')
+
+        self.assertEqual(elements[0], _report("600519", analysis_summary="尾部字段"))
+        self.assertEqual(elements[1]["stock_code"], "000001")
+
+    def test_request_error_falls_back_to_single_analysis_without_splitting(self) -> None:
+        def fake_llm(prompt, generation_config, **kwargs):
+            if "=== 标的" in prompt:
+                self.requests.append("batch")
+                raise RuntimeError("provider down")
+            return self._fake_llm(prompt, generation_config, **kwargs)
+
+        with patch.object(self.analyzer, "_get_runtime_config", return_value=self.config), \
+                patch.object(self.analyzer, "is_available", return_value=True), \
+                patch.object(self.analyzer, "_call_litellm", side_effect=fake_llm), \
+                patch("src.analyzer.persist_llm_usage"):
+            results = self.analyzer.analyze_batch(self.items)
+
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(self.requests, ["batch"] + [[code] for code in CODES])
+
+    def test_batch_prompt_shares_static_prefix_and_lists_every_stock(self) -> None:
+        entries = [(context, context["stock_name"], None) for context, _ in self.items[:2]]
+        with patch.object(self.analyzer, "_get_runtime_config", return_value=self.config):
+            prompt, static_prefix = self.analyzer._build_batch_prompt(entries, "zh")
+            single = self.analyzer._build_analysis_prompt(self.items[0][0], "名称600519", None, "zh")
+
+        self.assertTrue(prompt.startswith(static_prefix))
+        self.assertEqual(static_prefix, single.static_prefix)
+        self.assertEqual(prompt.count(static_prefix), 1)
+        self.assertIn("=== 标的 2/2：名称000001（000001） ===", prompt)
+        self.assertIn("恰好 2 个元素", prompt)
+
+
+class PipelineBatchModeTestCase(unittest.TestCase):
+    def test_run_packs_prepared_stocks_into_batches(self) -> None:
+        pipeline = StockAnalysisPipeline.__new__(StockAnalysisPipeline)
+        pipeline.max_workers = 2
+        pipeline.fetcher_manager = MagicMock()
+        pipeline.db = MagicMock()
+        pipeline.config = SimpleNamespace(
+            stock_list=CODES[:3],
+            refresh_stock_list=lambda: None,
+            single_stock_notify=False,
+            report_type="simple",
+            analysis_delay=0,
+            llm_batch_size=2,
+        )
+        pipeline.process_single_stock = MagicMock()
+        pipeline.fetch_and_save_stock_data = MagicMock(return_value=(True, None))
+        pipeline._prepare_analysis = lambda code, report_type, query_id: PreparedAnalysis(
+            code=code, stock_name=code, query_id=query_id, enhanced_context={"code": code},
+            news_context=None, realtime_quote=None, chip_data=None, trend_result=None,
+        )
+        pipeline._finalize_analysis = lambda prepared, result, report_type: result
+        pipeline._save_local_report = MagicMock()
+        pipeline.analyzer = MagicMock()
+        pipeline.analyzer.analyze_batch.side_effect = lambda items: [
+            AnalysisResult(
+                code=context["code"], name=context["code"], sentiment_score=60,
+                trend_prediction="震荡", operation_advice="持有",
+            )
+            for context, _ in items
+        ]
+
+        results = pipeline.run(stock_codes=CODES[:3], send_notification=False)
+
+        pipeline.process_single_stock.assert_not_called()
+        batch_sizes = sorted(len(call.args[0]) for call in pipeline.analyzer.analyze_batch.call_args_list)
+        self.assertEqual(batch_sizes, [1, 2])
+        self.assertEqual(sorted(result.code for result in results), sorted(CODES[:3]))
+
+    def test_failed_chunk_still_finalizes_every_stock(self) -> None:
+        pipeline = StockAnalysisPipeline.__new__(StockAnalysisPipeline)
+        pipeline.max_workers = 2
+        pipeline.config = SimpleNamespace(report_language="zh")
+        pipeline.fetch_and_save_stock_data = MagicMock(return_value=(True, None))
+        pipeline._prepare_analysis = lambda code, report_type, query_id: PreparedAnalysis(
+            code=code, stock_name=code, query_id=query_id, enhanced_context={"code": code},
+            news_context=None, realtime_quote=None, chip_data=None, trend_result=None,
+        )
+        finalized = []
+        pipeline._finalize_analysis = lambda prepared, result, report_type: finalized.append(result) or result
+        pipeline._report_single_result = MagicMock()
+        pipeline.analyzer = MagicMock()
+        pipeline.analyzer.analyze_batch.side_effect = RuntimeError("provider down")
+
+        results = pipeline._run_batched(CODES[:2], ReportType.SIMPLE, batch_size=2)
+
+        self.assertEqual(sorted(result.code for result in results), sorted(CODES[:2]))
+        self.assertTrue(all(not result.success for result in finalized))
+        self.assertEqual(len(finalized), 2)
+        self.assertEqual(pipeline._report_single_result.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""Tests for the database-backed durable analysis task queue."""
+
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tests.litellm_stub import ensure_litellm_stub
+
+ensure_litellm_stub()
+
+from src.config import Config
+from src.repositories.task_repo import AnalysisTaskRepository
+from src.services.task_queue import TASK_LANES, AnalysisTaskQueue, TaskStatus
+from src.services.task_worker import DurableTaskWorker
+from src.storage import AnalysisTask, DatabaseManager
+
+
+def _item(task_id, code, lane="interactive", requester=""):
+    return {"task_id": task_id, "stock_code": code, "dedupe_key": code, "lane": lane, "requester": requester}
+
+
+class DurableTaskQueueTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(self._temp_dir.name, "test_tasks.db")
+        Config._instance = None
+        DatabaseManager.reset_instance()
+        self.db = DatabaseManager.get_instance()
+        self.repo = AnalysisTaskRepository(self.db, max_attempts=2)
+
+    def tearDown(self) -> None:
+        DatabaseManager.reset_instance()
+        self._temp_dir.cleanup()
+
+    def test_enqueue_dedupes_active_stock_across_batches(self) -> None:
+        accepted, duplicates = self.repo.enqueue([_item("t1", "600519"), _item("t2", "000001")])
+        self.assertEqual([r["task_id"] for r in accepted], ["t1", "t2"])
+        self.assertEqual(duplicates, [])
+
+        accepted, duplicates = self.repo.enqueue([_item("t3", "600519")])
+        self.assertEqual(accepted, [])
+        self.assertEqual(duplicates, [("600519", "t1")])
+
+    def test_claim_is_exclusive_and_respects_lane_and_requester_order(self) -> None:
+        self.repo.enqueue([
+            _item("bulk-a1", "000001", lane="bulk", requester="a"),
+            _item("bulk-a2", "000002", lane="bulk", requester="a"),
+            _item("bulk-b1", "000003", lane="bulk", requester="b"),
+            _item("inter", "600519"),
+        ])
+        first = self.repo.claim("w1", 60, TASK_LANES)
+        self.assertEqual(first["task_id"], "inter")
+        # A row already claimed must not be handed out again.
+        self.assertIsNone(self.repo.claim("w2", 60, ("interactive",)))
+
+        order = []
+        while True:
+            task = self.repo.claim("w1", 60, TASK_LANES)
+            if task is None:
+                break
+            order.append(task["task_id"])
+        self.assertEqual(order, ["bulk-a1", "bulk-b1", "bulk-a2"])
+
+    def test_lane_cap_holds_when_two_workers_both_see_cap_minus_one(self) -> None:
+        self.repo.enqueue([
+            _item("b1", "000001", lane="bulk", requester="a"),
+            _item("b2", "000002", lane="bulk", requester="b"),
+            _item("b3", "000003", lane="bulk", requester="c"),
+        ])
+        limits = {"bulk": 2}
+        self.assertIsNotNone(self.repo.claim("w0", 60, ("bulk",), limits))
+
+        # Both workers read running == cap - 1 before either claims.
+        stale = {"bulk": 1}
+        with patch.object(self.repo, "_lane_running_counts", return_value=stale):
+            first = self.repo.claim("w1", 60, ("bulk",), limits)
+            second = self.repo.claim("w2", 60, ("bulk",), limits)
+
+        self.assertIsNotNone(first)
+        self.assertIsNone(second)
+        with self.db.get_session() as session:
+            running = session.query(AnalysisTask).filter(AnalysisTask.status == "processing").count()
+        self.assertEqual(running, 2)
+
+    def test_expired_lease_is_reaped_then_failed_after_max_attempts(self) -> None:
+        self.repo.enqueue([_item("t1", "600519")])
+        self.assertIsNotNone(self.repo.claim("w1", 60, TASK_LANES))
+        self.assertTrue(self.repo.heartbeat("t1", "w1", 60))
+
+        later = datetime.now() + timedelta(seconds=120)
+        self.assertEqual(self.repo.reap_expired(later), 1)
+        self.assertFalse(self.repo.heartbeat("t1", "w1", 60))
+        self.assertEqual(self.repo.get("t1")["status"], "pending")
+
+        self.assertEqual(self.repo.claim("w2", 60, TASK_LANES)["attempts"], 2)
+        self.repo.reap_expired(later + timedelta(seconds=120))
+        task = self.repo.get("t1")
+        self.assertEqual(task["status"], "failed")
+        # Terminal tasks release the dedupe key so the stock can be resubmitted.
+        accepted, _ = self.repo.enqueue([_item("t2", "600519")])
+        self.assertEqual(len(accepted), 1)
+
+    def test_worker_retries_with_backoff_then_completes(self) -> None:
+        self.repo.enqueue([_item("t1", "600519")])
+        calls = []
+
+        progress = []
+
+        def execute(task, progress_callback=None):
+            calls.append(task["attempts"])
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+            progress_callback({"type": "llm_stream", "field": "dashboard", "fields_done": 4, "fields_expected": 8})
+            progress.append(self.repo.get("t1")["progress"])
+            return {"stock_name": "贵州茅台", "report": {"ok": True}}
+
+        changes = []
+        worker = DurableTaskWorker(self.repo, TASK_LANES, execute=execute, on_change=changes.append)
+        self.assertTrue(worker.run_once())
+        task = self.repo.get("t1")
+        self.assertEqual(task["status"], "pending")
+        self.assertGreater(task["available_at"], datetime.now())
+        self.assertFalse(worker.run_once())
+
+        with self.db.session_scope() as session:
+            session.get(AnalysisTask, "t1").available_at = datetime.now() - timedelta(seconds=1)
+        self.assertTrue(worker.run_once())
+        task = self.repo.get("t1")
+        self.assertEqual(task["status"], "completed")
+        self.assertEqual(task["stock_name"], "贵州茅台")
+        self.assertEqual(task["result"]["report"], {"ok": True})
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(progress, [50])
+        self.assertEqual([c["status"] for c in changes], ["processing", "pending", "processing", "completed"])
+
+    def _fresh_task_queue(self, **kwargs) -> AnalysisTaskQueue:
+        """Build a private queue singleton and restore the process-wide one afterwards."""
+        original = AnalysisTaskQueue._instance
+        AnalysisTaskQueue._instance = None
+
+        def restore() -> None:
+            queue = AnalysisTaskQueue._instance
+            if queue is not None and queue is not original:
+                queue._store = None  # stops the SSE relay loop
+                executor = getattr(queue, "_executor", None)
+                if executor is not None:
+                    executor.shutdown(wait=False, cancel_futures=True)
+            AnalysisTaskQueue._instance = original
+
+        self.addCleanup(restore)
+        return AnalysisTaskQueue(**kwargs)
+
+    def test_claim_reaps_expired_leases_on_a_timer_not_every_poll(self) -> None:
+        with patch.object(self.repo, "reap_expired", return_value=0) as reap:
+            for _ in range(3):
+                self.assertIsNone(self.repo.claim("w1", 60, TASK_LANES))
+        self.assertEqual(reap.call_count, 1)
+
+        self.repo._next_reap_at = datetime.now() - timedelta(seconds=1)
+        with patch.object(self.repo, "reap_expired", return_value=0) as reap:
+            self.repo.claim("w1", 60, TASK_LANES)
+        self.assertEqual(reap.call_count, 1)
+
+    def test_task_queue_delegates_to_durable_store(self) -> None:
+        queue = self._fresh_task_queue(max_workers=2)
+        queue.enable_durable_backend(self.repo)
+        events = []
+        with patch.object(queue, "_broadcast_event", side_effect=lambda t, d: events.append((t, d["stock_code"]))):
+            accepted, duplicates = queue.submit_tasks_batch(["600519", "000001"])
+            again, dup = queue.submit_tasks_batch(["600519"])
+
+        self.assertEqual(len(accepted), 2)
+        self.assertEqual({t.lane for t in accepted}, {"bulk"})
+        self.assertEqual(again, [])
+        self.assertEqual(dup[0].existing_task_id, accepted[0].task_id)
+        self.assertEqual(events, [("task_created", "600519"), ("task_created", "000001")])
+
+        self.assertTrue(queue.is_analyzing("600519"))
+        self.assertEqual(queue.get_task(accepted[0].task_id).status, TaskStatus.PENDING)
+        self.assertEqual(len(queue.list_pending_tasks()), 2)
+        stats = queue.get_task_stats()
+        self.assertEqual(stats["pending"], 2)
+        self.assertEqual(stats["lanes"]["bulk"]["queued"], 2)
+        self.assertEqual(stats["lanes"]["bulk"]["max_concurrency"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""Tests for the bounded, coalescing SSE event broadcaster."""
+
+import asyncio
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.services.event_broadcaster import EventBroadcaster
+
+
+def _drain(subscription):
+    events = []
+    while subscription.qsize():
+        events.append(subscription._buffer.popitem(last=False)[1])
+    return [(e["type"], e["data"].get("task_id")) for e in events]
+
+
+class EventBroadcasterTestCase(unittest.TestCase):
+    def test_batch_is_delivered_with_one_loop_hop_and_coalesced(self) -> None:
+        broadcaster = EventBroadcaster()
+
+        async def scenario():
+            subscription = broadcaster.subscribe()
+
+            def publish_burst():
+                broadcaster.publish("task_started", {"task_id": "a"})
+                broadcaster.publish("task_retrying", {"task_id": "a"})
+                broadcaster.publish("task_created", {"task_id": "b"})
+                broadcaster.publish("task_completed", {"task_id": "a"})
+
+            worker = threading.Thread(target=publish_burst)
+            worker.start()
+            worker.join()
+            first = await subscription.get(timeout=1)
+            return subscription, first
+
+        subscription, first = asyncio.run(scenario())
+        self.assertEqual((first["type"], first["data"]["task_id"]), ("task_created", "b"))
+        self.assertEqual(_drain(subscription), [("task_completed", "a")])
+        stats = broadcaster.stats()
+        self.assertEqual(stats["published"], 4)
+        self.assertEqual(stats["batches"], 1)
+        self.assertEqual(stats["coalesced"], 2)
+
+    def test_slow_subscriber_is_bounded_and_notified_of_drops(self) -> None:
+        broadcaster = EventBroadcaster(buffer_size=3)
+
+        async def scenario():
+            subscription = broadcaster.subscribe()
+            broadcaster.publish("task_started", {"task_id": "s"})
+            for idx in range(4):
+                broadcaster.publish("task_created", {"task_id": f"t{idx}"})
+            await asyncio.sleep(0)
+            lagged = await subscription.get(timeout=1)
+            return subscription, lagged
+
+        subscription, lagged = asyncio.run(scenario())
+        self.assertEqual(lagged, {"type": "lagged", "data": {"dropped": 2}})
+        # The coalescable event is evicted first, then the oldest remaining one.
+        self.assertEqual(_drain(subscription), [("task_created", "t1"), ("task_created", "t2"), ("task_created", "t3")])
+        self.assertEqual(broadcaster.stats()["dropped"], 2)
+
+        broadcaster.unsubscribe(subscription)
+        self.assertEqual(broadcaster.stats()["subscribers"], 0)
+        self.assertEqual(broadcaster.stats()["dropped"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
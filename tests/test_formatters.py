@@ -11,6 +11,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 from src.formatters import (
     chunk_content_by_max_words,
     chunk_content_by_max_bytes,
+    iter_chunks_by_max_bytes,
     slice_at_max_bytes,
     TRUNCATION_SUFFIX,
     MIN_MAX_WORDS,
@@ -94,6 +95,36 @@ class TestChunkContentByMaxWords(unittest.TestCase):
         self.assertIn(str(MIN_MAX_WORDS), str(ctx.exception))
 
 
+class TestIterChunksByMaxBytes(unittest.TestCase):
+    """Tests for the incremental iter_chunks_by_max_bytes chunker."""
+
+    def test_chunks_fit_and_rejoin_to_original(self):
+        sections = [f"## 股票{i}\n" + "分析" * 20 for i in range(10)]
+        chunks = list(iter_chunks_by_max_bytes(sections, 300))
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk.encode("utf-8")), 300)
+        self.assertEqual("\n".join(chunks), "\n".join(sections))
+
+    def test_yields_before_input_is_exhausted(self):
+        consumed = []
+
+        def sections():
+            for i in range(5):
+                consumed.append(i)
+                yield "X" * 100
+
+        first = next(iter_chunks_by_max_bytes(sections(), 250))
+        self.assertEqual(first, "X" * 100 + "\n" + "X" * 100)
+        self.assertEqual(consumed, [0, 1, 2])
+
+    def test_oversized_section_is_force_split(self):
+        chunks = list(iter_chunks_by_max_bytes(["short", "Y" * 500, "tail"], 200))
+        self.assertEqual(chunks[0], "short")
+        self.assertEqual(chunks[-1], "tail")
+        self.assertIn(TRUNCATION_SUFFIX, chunks[1])
+
+
 class TestChunkContentByMaxBytes(unittest.TestCase):
     """Tests for chunk_content_by_max_bytes."""
 
@@ -5,8 +5,12 @@ Tests for fundamental adapter helpers.
 
 import os
 import sys
+import tempfile
+import threading
+import time
 import unittest
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
 from unittest.mock import patch
 
 import pandas as pd
@@ -19,6 +23,13 @@ from data_provider.fundamental_adapter import (
     _extract_latest_row,
     _parse_dividend_plan_to_per_share,
 )
+from data_provider.fundamental_executor import FundamentalExecutor
+from data_provider.fundamental_table_cache import (
+    FundamentalTableCache,
+    MarketTable,
+    latest_report_period,
+    refresh_token,
+)
 
 
 class TestFundamentalAdapter(unittest.TestCase):
@@ -171,5 +182,181 @@ class TestFundamentalAdapter(unittest.TestCase):
         self.assertAlmostEqual(payload.get("ttm_cash_dividend_per_share"), 0.3, places=6)
 
 
+class TestFundamentalTableCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def _market_df(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "股票代码": ["600000", "SH600519", "000001.SZ"],
+                "净资产收益率": [8.0, 30.0, 10.0],
+            }
+        )
+
+    def test_refresh_token_follows_report_calendar(self) -> None:
+        self.assertEqual(latest_report_period(date(2026, 10, 19)), date(2026, 9, 30))
+        self.assertEqual(latest_report_period(date(2026, 2, 1)), date(2025, 12, 31))
+        # Disclosure window: refresh daily.
+        self.assertEqual(refresh_token("report", date(2026, 10, 19)), "2026-09-30@2026-10-19")
+        # Outside disclosure window: one download per report period.
+        self.assertEqual(refresh_token("report", date(2026, 11, 2)), "2026-09-30")
+        self.assertEqual(refresh_token("report", date(2026, 12, 20)), "2026-09-30")
+        self.assertEqual(refresh_token("daily", date(2026, 11, 2)), "2026-11-02")
+
+    def test_market_table_downloaded_once_and_indexed_by_code(self) -> None:
+        cache = FundamentalTableCache(cache_dir=self._tmp.name, today=lambda: date(2026, 11, 2))
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return self._market_df()
+
+        for _ in range(3):
+            table = cache.get_table("stock_financial_analysis_indicator", loader)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(table.rows_for("600519").iloc[0]["净资产收益率"], 30.0)
+        self.assertEqual(table.rows_for("000001").iloc[0]["净资产收益率"], 10.0)
+        missing = table.rows_for("300750")
+        self.assertTrue(missing.empty)
+        self.assertIn("股票代码", missing.columns)
+
+        # A fresh process-level cache reuses the persisted table.
+        reloaded = FundamentalTableCache(cache_dir=self._tmp.name, today=lambda: date(2026, 11, 2))
+        table = reloaded.get_table("stock_financial_analysis_indicator", loader)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(reloaded.stats["disk_hits"], 1)
+        self.assertEqual(table.rows_for("600519").iloc[0]["净资产收益率"], 30.0)
+
+    def test_index_covers_every_code_column(self) -> None:
+        frame = pd.DataFrame(
+            {
+                "股票代码": ["600519", "000001"],
+                "证券代码": ["600519", "300750"],
+                "净资产收益率": [30.0, 10.0],
+            }
+        )
+        table = MarketTable.build("stock_gdfx_top_10_em", "t", frame, 0.0)
+
+        self.assertEqual(list(table.rows_for("600519").index), [0])
+        self.assertEqual(table.rows_for("300750").iloc[0]["净资产收益率"], 10.0)
+
+    def test_concurrent_callers_share_one_slow_download(self) -> None:
+        cache = FundamentalTableCache(cache_dir=None, today=lambda: date(2026, 11, 2))
+        calls = []
+
+        def slow_loader():
+            calls.append(1)
+            time.sleep(0.3)
+            return self._market_df()
+
+        tables = []
+        threads = [
+            threading.Thread(
+                target=lambda: tables.append(cache.get_table("stock_yjbb_em", slow_loader))
+            )
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(tables), 4)
+        self.assertTrue(all(table is tables[0] for table in tables))
+        self.assertEqual(cache.stats["lock_timeouts"], 0)
+
+    def test_waiter_past_its_fetch_budget_skips_instead_of_downloading(self) -> None:
+        cache = FundamentalTableCache(cache_dir=None, today=lambda: date(2026, 11, 2))
+        executor = FundamentalExecutor(max_workers=2, name="table-cache-test")
+        self.addCleanup(executor.shutdown, False)
+        release = threading.Event()
+        started = threading.Event()
+        calls = []
+
+        def hung_loader():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return self._market_df()
+
+        holder = threading.Thread(
+            target=cache.get_table, args=("stock_lhb_detail_em", hung_loader), daemon=True
+        )
+        holder.start()
+        self.assertTrue(started.wait(5))
+        try:
+            begin = time.monotonic()
+            result, err, _ = executor.run(
+                lambda: cache.get_table("stock_lhb_detail_em", hung_loader), 0.2, "waiter"
+            )
+            elapsed = time.monotonic() - begin
+            # Keep the download hung until the waiter has passed its deadline.
+            time.sleep(0.3)
+        finally:
+            release.set()
+            holder.join(5)
+
+        self.assertIsNone(result)
+        self.assertLess(elapsed, 2)
+        # The waiter gives up at its deadline and never starts a second download.
+        self.assertEqual(cache.stats["lock_timeouts"], 1)
+        self.assertEqual(len(calls), 1)
+
+    def test_daily_table_expires_after_ttl(self) -> None:
+        now = [1000.0]
+        cache = FundamentalTableCache(
+            cache_dir=None,
+            daily_ttl_seconds=60,
+            clock=lambda: now[0],
+            today=lambda: date(2026, 11, 2),
+        )
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return self._market_df()
+
+        cache.get_table("stock_lhb_detail_em", loader)
+        now[0] += 30
+        cache.get_table("stock_lhb_detail_em", loader)
+        self.assertEqual(len(calls), 1)
+        now[0] += 60
+        cache.get_table("stock_lhb_detail_em", loader)
+        self.assertEqual(len(calls), 2)
+
+    def test_adapter_serves_market_wide_candidates_from_cache(self) -> None:
+        cache = FundamentalTableCache(cache_dir=None, today=lambda: date(2026, 11, 2))
+        adapter = AkshareFundamentalAdapter(table_cache=cache)
+        calls = []
+
+        def market_wide(**kwargs):
+            calls.append(kwargs)
+            if kwargs:
+                raise ValueError("per-stock endpoint unavailable")
+            return self._market_df()
+
+        fake_ak = SimpleNamespace(stock_financial_analysis_indicator=market_wide)
+        candidates = [
+            ("stock_financial_analysis_indicator", {"symbol": "600519"}),
+            ("stock_financial_analysis_indicator", {}),
+        ]
+        with patch.dict(sys.modules, {"akshare": fake_ak}):
+            first, source, errors = adapter._call_df_candidates(candidates, stock_code="600519")
+            second, _, _ = adapter._call_df_candidates(
+                [("stock_financial_analysis_indicator", {})], stock_code="000001"
+            )
+
+        self.assertEqual(source, "stock_financial_analysis_indicator")
+        self.assertEqual(errors, ["stock_financial_analysis_indicator:ValueError"])
+        self.assertEqual(len(first), 1)
+        self.assertEqual(first.iloc[0]["净资产收益率"], 30.0)
+        self.assertEqual(second.iloc[0]["净资产收益率"], 10.0)
+        # One per-stock attempt + one market-wide download.
+        self.assertEqual(calls, [{"symbol": "600519"}, {}])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -7,13 +7,19 @@ import os
 import sys
 import time
 import unittest
-from threading import BoundedSemaphore, Event
+from threading import Event
 from types import SimpleNamespace
 from unittest.mock import patch
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from data_provider.base import DataFetcherManager
+from data_provider.fundamental_executor import (
+    FundamentalExecutor,
+    _shared_executors,
+    fundamental_cancelled,
+    get_fundamental_executor,
+)
 
 
 class _DummyFetcher:
@@ -290,7 +296,7 @@ class TestFundamentalContext(unittest.TestCase):
 
     def test_run_with_timeout_limits_hanging_workers(self) -> None:
         manager = DataFetcherManager(fetchers=[])
-        manager._fundamental_timeout_slots = BoundedSemaphore(1)
+        manager._fundamental_executor = FundamentalExecutor(max_workers=1, max_in_flight=1)
 
         unblock = Event()
 
@@ -310,6 +316,107 @@ class TestFundamentalContext(unittest.TestCase):
             unblock.set()
             time.sleep(0.02)
 
+        stats = manager.get_fundamental_executor_stats()
+        self.assertEqual(stats["timed_out"], 1)
+        self.assertEqual(stats["rejected"], 1)
+
+    def test_resized_shared_executor_shuts_down_the_old_pool(self) -> None:
+        name = "fundamental-resize-test"
+        self.addCleanup(_shared_executors.pop, name, None)
+        old = get_fundamental_executor(name, max_workers=2)
+        self.assertEqual(old.run(lambda: 1, 1.0, "warm")[0], 1)
+        old_threads = list(old._threads)
+
+        new = get_fundamental_executor(name, max_workers=3)
+
+        self.assertIsNot(new, old)
+        for thread in old_threads:
+            thread.join(timeout=1.0)
+            self.assertFalse(thread.is_alive())
+        result, err, _ = old.run(lambda: 1, 1.0, "late")
+        self.assertIsNone(result)
+        self.assertIn("shut down", err or "")
+        self.assertEqual(new.run(lambda: 2, 1.0, "next")[0], 2)
+
+    def test_run_with_timeout_cancels_cooperatively_and_reports_leaks(self) -> None:
+        manager = DataFetcherManager(fetchers=[])
+        manager._fundamental_executor = FundamentalExecutor(max_workers=1, max_in_flight=2)
+        observed_cancel = Event()
+        release = Event()
+
+        def _polling_task():
+            deadline = time.time() + 1.0
+            while time.time() < deadline and not fundamental_cancelled():
+                time.sleep(0.005)
+            if fundamental_cancelled():
+                observed_cancel.set()
+            release.wait(timeout=1.0)
+            return "late"
+
+        result, err, _ = manager._run_with_timeout(_polling_task, 0.02, "poll")
+        self.assertIsNone(result)
+        self.assertEqual(err, "poll timeout")
+        self.assertTrue(observed_cancel.wait(timeout=1.0))
+        self.assertEqual(manager.get_fundamental_executor_stats()["leaked_running"], 1)
+
+        release.set()
+        # Once the leaked task finishes, the worker is reusable.
+        result, err, _ = manager._run_with_timeout(lambda: 42, 1.0, "next")
+        self.assertEqual(result, 42)
+        self.assertIsNone(err)
+        stats = manager.get_fundamental_executor_stats()
+        self.assertEqual(stats["leaked_running"], 0)
+        self.assertEqual(stats["overrun"], 1)
+
+    def test_fundamental_blocks_run_concurrently_within_budget(self) -> None:
+        manager = DataFetcherManager(fetchers=[])
+        cfg = SimpleNamespace(
+            enable_fundamental_pipeline=True,
+            fundamental_cache_ttl_seconds=0,
+            fundamental_stage_timeout_seconds=1.5,
+            fundamental_fetch_timeout_seconds=0.8,
+            fundamental_retry_max=1,
+        )
+        bundle = {
+            "status": "not_supported",
+            "growth": {},
+            "earnings": {},
+            "institution": {},
+            "source_chain": [],
+            "errors": [],
+        }
+
+        def _slow_block(_stock_code: str, budget_seconds: float = 0.0):
+            time.sleep(0.2)
+            return {"status": "ok", "source_chain": [], "errors": [], "data": {}}
+
+        def _slow_quote(_stock_code: str):
+            time.sleep(0.2)
+            return None
+
+        def _slow_bundle(_self, _stock_code: str):
+            time.sleep(0.2)
+            return bundle
+
+        started = time.time()
+        with patch("src.config.get_config", return_value=cfg), \
+                patch.object(manager, "get_realtime_quote", side_effect=_slow_quote), \
+                patch(
+                    "data_provider.fundamental_adapter.AkshareFundamentalAdapter.get_fundamental_bundle",
+                    new=_slow_bundle,
+                ), \
+                patch.object(manager, "get_capital_flow_context", side_effect=_slow_block), \
+                patch.object(manager, "get_dragon_tiger_context", side_effect=_slow_block), \
+                patch.object(manager, "get_board_context", side_effect=_slow_block):
+            ctx = manager.get_fundamental_context("600519")
+        elapsed = time.time() - started
+
+        # Five 0.2s blocks would take 1.0s sequentially.
+        self.assertLess(elapsed, 0.7)
+        self.assertEqual(ctx["coverage"]["capital_flow"], "ok")
+        self.assertEqual(ctx["coverage"]["dragon_tiger"], "ok")
+        self.assertEqual(ctx["coverage"]["boards"], "ok")
+
     def test_infer_block_status_treats_all_null_payload_as_non_ok(self) -> None:
         self.assertEqual(
             DataFetcherManager._infer_block_status(
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Tests for deferred heavy imports and the --profile-startup report."""
+
+import os
+import subprocess
+import sys
+import types
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.startup_profile import parse_importtime, summarize
+from src.utils.lazy_import import lazy_module
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+class LazyModuleTestCase(unittest.TestCase):
+    def test_resolves_through_sys_modules_on_attribute_access(self) -> None:
+        fake = types.ModuleType("_dsa_fake_heavy")
+        fake.value = 1
+        proxy = lazy_module("_dsa_fake_heavy")
+        self.assertIn("not loaded", repr(proxy))
+        with patch.dict(sys.modules, {"_dsa_fake_heavy": fake}):
+            self.assertEqual(proxy.value, 1)
+            proxy.value = 2
+            self.assertEqual(fake.value, 2)
+            self.assertIn("'_dsa_fake_heavy' (loaded)", repr(proxy))
+
+    def test_unknown_module_raises_import_error_on_use(self) -> None:
+        proxy = lazy_module("_dsa_missing_module")
+        with self.assertRaises(ImportError):
+            proxy.anything
+
+
+class LazyStartupImportTestCase(unittest.TestCase):
+    def test_main_import_skips_heavy_dependencies(self) -> None:
+        code = (
+            "import sys, main, data_provider, src.analyzer, src.search_service\n"
+            "heavy = ['litellm', 'newspaper', 'data_provider.efinance_fetcher', 'src.core.pipeline']\n"
+            "print(','.join(m for m in heavy if m in sys.modules))\n"
+        )
+        proc = subprocess.run(
+            [sys.executable, "-c", code], cwd=_ROOT, capture_output=True, text=True, timeout=120
+        )
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertEqual(proc.stdout.strip(), "")
+
+    def test_data_provider_exports_resolve_lazily(self) -> None:
+        import data_provider
+        from data_provider.base import FETCHER_REGISTRY, load_fetcher_class
+
+        self.assertIs(data_provider.AkshareFetcher, load_fetcher_class("akshare"))
+        self.assertEqual(list(FETCHER_REGISTRY)[0], "efinance")
+        with self.assertRaises(ValueError):
+            load_fetcher_class("unknown")
+        with self.assertRaises(AttributeError):
+            data_provider.NoSuchFetcher
+
+
+class StartupProfileParseTestCase(unittest.TestCase):
+    def test_parse_and_summarize_importtime_output(self) -> None:
+        stderr = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       100 |        100 |   json",
+            "import time:      2000 |       2500 |     pandas.core",
+            "import time:       500 |       3000 |   pandas",
+            "import time:       400 |       3500 | main",
+            "Traceback noise that should be ignored",
+        ])
+        records = parse_importtime(stderr)
+        self.assertEqual([(r.module, r.depth) for r in records],
+                         [("json", 1), ("pandas.core", 2), ("pandas", 1), ("main", 0)])
+
+        summary = summarize(records, "main", top=2)
+        self.assertEqual(summary["total_ms"], 3.5)
+        self.assertEqual(summary["packages"], [("pandas", 2.5), ("main", 0.4)])
+        self.assertEqual(summary["slowest"][0], ("pandas.core", 2.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""Tests for the on-disk LLM analysis result cache."""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+try:
+    import litellm  # noqa: F401
+except ModuleNotFoundError:
+    sys.modules["litellm"] = MagicMock()
+
+from src.analyzer import GeminiAnalyzer
+from src.config import Config
+from src.services.llm_response_cache import LLMResponseCache
+
+
+class _Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class LLMResponseCacheTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.clock = _Clock()
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _cache(self, **kwargs) -> LLMResponseCache:
+        return LLMResponseCache(self.temp_dir.name, clock=self.clock, **kwargs)
+
+    def test_key_ignores_diagnostics_and_small_price_moves(self) -> None:
+        cache = self._cache()
+        base = {"code": "600519", "realtime": {"price": 1500.0, "volume": 100000, "source": "efinance"}}
+        jitter = {"code": "600519", "realtime": {"price": 1501.0, "volume": 102000, "source": "akshare"}}
+        moved = {"code": "600519", "realtime": {"price": 1530.0, "volume": 100000, "source": "efinance"}}
+
+        key = cache.make_key(base, "新闻", "openai/m", "v1")
+        self.assertEqual(key, cache.make_key(jitter, " 新闻\n", "openai/m", "v1"))
+        self.assertNotEqual(key, cache.make_key(moved, "新闻", "openai/m", "v1"))
+        self.assertNotEqual(key, cache.make_key(base, "另一条新闻", "openai/m", "v1"))
+        self.assertNotEqual(key, cache.make_key(base, "新闻", "openai/other", "v1"))
+        self.assertNotEqual(key, cache.make_key(base, "新闻", "openai/m", "v2"))
+
+    def test_entries_expire_and_oldest_are_evicted(self) -> None:
+        cache = self._cache(ttl_seconds=60, max_entries=2)
+        for index in range(3):
+            self.clock.now += 1
+            cache.put(f"k{index}", {"value": index})
+            os.utime(os.path.join(self.temp_dir.name, f"k{index}.pkl"), (self.clock.now, self.clock.now))
+
+        self.assertIsNone(cache.get("k0"))
+        self.assertEqual(cache.get("k2"), {"value": 2})
+
+        self.clock.now += 61
+        self.assertIsNone(cache.get("k2"))
+        self.assertEqual(cache.stats["hits"], 1)
+        self.assertGreaterEqual(cache.stats["evictions"], 1)
+
+
+class AnalyzerResponseCacheTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        with patch.object(GeminiAnalyzer, "_init_litellm", return_value=None):
+            self.analyzer = GeminiAnalyzer()
+        self.config = Config(
+            stock_list=[],
+            litellm_model="openai/test",
+            gemini_request_delay=0,
+            report_integrity_enabled=False,
+            llm_response_cache_enabled=True,
+            llm_response_cache_dir=self.temp_dir.name,
+        )
+        self.response = json.dumps({
+            "stock_name": "贵州茅台",
+            "sentiment_score": 70,
+            "trend_prediction": "看多",
+            "operation_advice": "持有",
+            "confidence_level": "中",
+            "analysis_summary": "趋势完好",
+        }, ensure_ascii=False)
+        self.context = {
+            "code": "600519",
+            "stock_name": "贵州茅台",
+            "date": "2026-03-16",
+            "today": {"close": 1500.0},
+            "realtime": {"price": 1500.0},
+        }
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_repeat_analysis_hits_cache_unless_force_refresh(self) -> None:
+        with patch.object(self.analyzer, "_get_runtime_config", return_value=self.config), \
+                patch.object(self.analyzer, "is_available", return_value=True), \
+                patch.object(
+                    self.analyzer, "_call_litellm", return_value=(self.response, "openai/test", {})
+                ) as call_llm, \
+                patch("src.analyzer.persist_llm_usage") as persist_usage:
+            first = self.analyzer.analyze(self.context)
+            second = self.analyzer.analyze(dict(self.context, realtime={"price": 1501.0}))
+            self.analyzer.analyze(self.context, force_refresh=True)
+
+        self.assertTrue(first.success)
+        self.assertEqual(second.sentiment_score, first.sentiment_score)
+        self.assertEqual(call_llm.call_count, 2)
+        call_types = [item.kwargs["call_type"] for item in persist_usage.call_args_list]
+        self.assertEqual(call_types, ["analysis", "analysis_cache_hit", "analysis"])
+
+    def test_placeholder_filled_result_is_not_cached(self) -> None:
+        config = Config(
+            stock_list=[],
+            litellm_model="openai/test",
+            gemini_request_delay=0,
+            report_integrity_enabled=True,
+            report_integrity_retry=0,
+            llm_response_cache_enabled=True,
+            llm_response_cache_dir=self.temp_dir.name,
+        )
+        with patch.object(self.analyzer, "_get_runtime_config", return_value=config), \
+                patch.object(self.analyzer, "is_available", return_value=True), \
+                patch.object(
+                    self.analyzer, "_call_litellm", return_value=(self.response, "openai/test", {})
+                ) as call_llm, \
+                patch("src.analyzer.persist_llm_usage") as persist_usage:
+            first = self.analyzer.analyze(self.context)
+            self.analyzer.analyze(self.context)
+            self.analyzer.analyze_batch([(self.context, None), (dict(self.context, code="000001"), None)])
+
+        self.assertTrue(first.success)
+        self.assertTrue(first.placeholder_filled)
+        # Both single analyses and the batch reach the LLM again.
+        self.assertGreaterEqual(call_llm.call_count, 3)
+        call_types = [item.kwargs["call_type"] for item in persist_usage.call_args_list]
+        self.assertNotIn("analysis_cache_hit", call_types)
+
+
+if __name__ == "__main__":
+    unittest.main()
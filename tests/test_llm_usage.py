@@ -3,12 +3,15 @@
 
 import sys
 import os
+import tempfile
 import unittest
 from datetime import datetime, timedelta
+from pathlib import Path
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from src.storage import DatabaseManager, LLMUsage, persist_llm_usage
+from src.services.llm_usage_recorder import LLMUsageRecorder
+from src.storage import DatabaseManager, LLMUsage, LLMUsageHourly, persist_llm_usage
 
 
 def _fresh_db() -> DatabaseManager:
@@ -148,6 +151,25 @@ class TestGetLLMUsageSummary(unittest.TestCase):
         self.assertEqual(by_model["gemini/gemini-2.5-flash"]["calls"], 3)
         self.assertEqual(by_model["openai/gpt-4o"]["calls"], 2)
 
+    def test_cache_hits_are_reported_apart_from_calls(self):
+        with self.db.session_scope() as session:
+            for _ in range(2):
+                session.add(LLMUsage(
+                    call_type="analysis_cache_hit",
+                    model="gemini/gemini-2.5-flash",
+                    prompt_tokens=0,
+                    completion_tokens=0,
+                    total_tokens=0,
+                    called_at=datetime.now(),
+                ))
+        from_dt, to_dt = self._today_range()
+        result = self.db.get_llm_usage_summary(from_dt, to_dt)
+        self.assertEqual(result["total_calls"], 5)
+        self.assertEqual(result["cache_hits"], 2)
+        self.assertNotIn("analysis_cache_hit", {r["call_type"] for r in result["by_call_type"]})
+        by_model = {r["model"]: r for r in result["by_model"]}
+        self.assertEqual(by_model["gemini/gemini-2.5-flash"]["calls"], 3)
+
     def test_empty_range_returns_zeros(self):
         future = datetime(2099, 1, 1)
         result = self.db.get_llm_usage_summary(future, future)
@@ -196,5 +218,162 @@ class TestPersistUsageHelper(unittest.TestCase):
             self.fail(f"persist_llm_usage raised unexpectedly: {exc}")
 
 
+class TestHourlyRollups(unittest.TestCase):
+    def setUp(self):
+        self.db = _fresh_db()
+        base = datetime(2026, 3, 2, 10, 0)
+        self.db.record_llm_usage_batch([
+            {"call_type": "analysis", "model": "m1", "total_tokens": 1, "called_at": base + timedelta(minutes=30)},
+            {"call_type": "analysis", "model": "m1", "total_tokens": 10, "called_at": base + timedelta(minutes=50)},
+            {"call_type": "agent", "model": "m2", "total_tokens": 100, "called_at": base + timedelta(hours=1, minutes=5)},
+            {"call_type": "agent", "model": "m1", "total_tokens": 1000, "called_at": base + timedelta(hours=2, minutes=40)},
+            {"call_type": "agent", "model": "m1", "total_tokens": 10000, "called_at": base + timedelta(hours=2, minutes=55)},
+        ])
+        self.base = base
+
+    def tearDown(self):
+        DatabaseManager.reset_instance()
+
+    def test_batch_write_folds_hourly_rollups(self):
+        with self.db.session_scope() as session:
+            buckets = {
+                (r.bucket.hour, r.call_type, r.model): (r.calls, r.total_tokens)
+                for r in session.query(LLMUsageHourly).all()
+            }
+        self.assertEqual(buckets, {
+            (10, "analysis", "m1"): (2, 11),
+            (11, "agent", "m2"): (1, 100),
+            (12, "agent", "m1"): (2, 11000),
+        })
+
+    def test_summary_combines_rollups_with_partial_edge_hours(self):
+        from_dt = self.base + timedelta(minutes=45)
+        to_dt = self.base + timedelta(hours=2, minutes=50)
+        result = self.db.get_llm_usage_summary(from_dt, to_dt)
+        self.assertEqual(result["total_calls"], 3)
+        self.assertEqual(result["total_tokens"], 1110)
+        self.assertEqual(
+            [(r["model"], r["calls"], r["total_tokens"]) for r in result["by_model"]],
+            [("m1", 2, 1010), ("m2", 1, 100)],
+        )
+        # Folding is idempotent: a second summary never double counts.
+        self.assertEqual(self.db.get_llm_usage_summary(from_dt, to_dt), result)
+
+    def test_rows_inserted_directly_are_counted_before_and_after_folding(self):
+        with self.db.session_scope() as session:
+            session.add(LLMUsage(call_type="agent", model="m3", total_tokens=7,
+                                 called_at=self.base + timedelta(hours=1, minutes=30)))
+        from_dt, to_dt = self.base, self.base + timedelta(hours=3)
+        self.assertEqual(self.db.get_llm_usage_summary(from_dt, to_dt)["total_tokens"], 11118)
+        self.assertEqual(self.db.refresh_llm_usage_rollups(), 0)
+
+
+class TestLLMUsageRecorder(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.wal = Path(self._temp_dir.name) / "llm_usage.wal"
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def _wal_files(self):
+        return sorted(p.name for p in Path(self._temp_dir.name).glob("llm_usage.wal*"))
+
+    def _data_files(self):
+        return [name for name in self._wal_files() if not name.endswith(".lock")]
+
+    def test_flush_writes_one_batch_and_removes_wal(self):
+        batches = []
+        recorder = LLMUsageRecorder(batches.append, wal_path=self.wal, batch_size=100, flush_interval=60)
+        for i in range(3):
+            recorder.record({"call_type": "agent", "model": "m", "total_tokens": i})
+        self.assertEqual(self._data_files(), [recorder._active_path.name])
+        self.assertEqual(recorder.flush(), 3)
+        self.assertEqual([len(b) for b in batches], [3])
+        self.assertEqual(self._data_files(), [])
+        recorder.close()
+        self.assertEqual(self._wal_files(), [])
+
+    def test_batch_size_wakes_background_flush(self):
+        batches = []
+        recorder = LLMUsageRecorder(batches.append, wal_path=None, batch_size=2, flush_interval=60)
+        recorder.record({"call_type": "agent", "model": "m"})
+        recorder.record({"call_type": "agent", "model": "m"})
+        for _ in range(100):
+            if batches:
+                break
+            recorder._thread.join(0.01)
+        self.assertEqual(sum(len(b) for b in batches), 2)
+        recorder.close()
+
+    def test_unflushed_rows_are_replayed_after_crash(self):
+        def broken_sink(rows):
+            raise RuntimeError("database is locked")
+
+        crashed = LLMUsageRecorder(broken_sink, wal_path=self.wal, batch_size=100, flush_interval=60)
+        crashed.record({"call_type": "analysis", "model": "m", "total_tokens": 5})
+        self.assertEqual(crashed.flush(), 0)
+        crashed.record({"call_type": "analysis", "model": "m", "total_tokens": 6})
+        self.assertEqual(crashed.pending(), 2)
+        # Simulate a torn final line from a crash mid-write.
+        with open(crashed._active_path, "a", encoding="utf-8") as fh:
+            fh.write('{"call_type": "anal')
+        # Process death releases the owner lock without cleaning up the files.
+        crashed._close_wal_locked()
+        crashed._owner_lock.close()
+
+        batches = []
+        restarted = LLMUsageRecorder(batches.append, wal_path=self.wal, batch_size=100, flush_interval=60)
+        self.assertEqual(restarted.replayed, 2)
+        self.assertEqual(restarted.flush(), 2)
+        self.assertEqual([r["total_tokens"] for r in batches[0]], [5, 6])
+        self.assertIsInstance(batches[0][0]["called_at"], datetime)
+        restarted.close()
+        self.assertEqual(self._wal_files(), [])
+
+    def test_live_process_wal_is_not_replayed_by_another(self):
+        api_batches, worker_batches = [], []
+        api = LLMUsageRecorder(api_batches.append, wal_path=self.wal, batch_size=100, flush_interval=60)
+        api.record({"call_type": "analysis", "model": "m", "total_tokens": 1})
+
+        worker = LLMUsageRecorder(worker_batches.append, wal_path=self.wal, batch_size=100, flush_interval=60)
+        worker.record({"call_type": "agent", "model": "m", "total_tokens": 2})
+        self.assertEqual(worker.replayed, 0)
+        self.assertEqual(worker.flush(), 1)
+
+        api.record({"call_type": "analysis", "model": "m", "total_tokens": 3})
+        self.assertEqual(api.flush(), 2)
+        self.assertEqual([r["total_tokens"] for r in api_batches[0]], [1, 3])
+        self.assertEqual([r["total_tokens"] for r in worker_batches[0]], [2])
+        api.close()
+        worker.close()
+        self.assertEqual(self._wal_files(), [])
+
+    def test_file_database_buffers_until_flush(self):
+        DatabaseManager.reset_instance()
+        db = DatabaseManager(db_url=f"sqlite:///{Path(self._temp_dir.name) / 'usage.db'}")
+        try:
+            persist_llm_usage({"total_tokens": 42}, "m", call_type="agent")
+            self.assertIsNotNone(db.get_llm_usage_recorder())
+            self.assertEqual(db.flush_llm_usage(), 1)
+            with db.session_scope() as session:
+                self.assertEqual([r.total_tokens for r in session.query(LLMUsage).all()], [42])
+        finally:
+            DatabaseManager.reset_instance()
+        self.assertEqual(self._wal_files(), [])
+
+
+    def test_summary_includes_buffered_rows(self):
+        DatabaseManager.reset_instance()
+        db = DatabaseManager(db_url=f"sqlite:///{Path(self._temp_dir.name) / 'usage.db'}")
+        try:
+            persist_llm_usage({"total_tokens": 7}, "m", call_type="agent")
+            now = datetime.now()
+            summary = db.get_llm_usage_summary(now - timedelta(hours=1), now + timedelta(minutes=1))
+            self.assertEqual((summary["total_calls"], summary["total_tokens"]), (1, 7))
+        finally:
+            DatabaseManager.reset_instance()
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -6,7 +6,7 @@ import tempfile
 import unittest
 from pathlib import Path
 from types import SimpleNamespace
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from tests.litellm_stub import ensure_litellm_stub
 
@@ -98,7 +98,7 @@ class MainScheduleModeTestCase(unittest.TestCase):
             scheduled_call,
             {"schedule_time": "18:00", "run_immediately": True, "background_tasks": []},
         )
-        run_full_analysis.assert_called_once_with(config, args, None)
+        run_full_analysis.assert_called_once_with(config, args, None, use_task_queue=False)
         warning_log.assert_any_call(
             "定时模式下检测到 --stocks 参数；计划执行将忽略启动时股票快照，并在每次运行前重新读取最新的 STOCK_LIST。"
         )
@@ -116,6 +116,40 @@ class MainScheduleModeTestCase(unittest.TestCase):
         self.assertEqual(exit_code, 0)
         run_full_analysis.assert_called_once_with(config, args, ["600519", "000001"])
 
+    def test_scheduled_run_submits_to_scheduled_lane_when_enabled(self) -> None:
+        args = self._make_args(schedule=True)
+        config = self._make_config(
+            schedule_use_task_queue=True,
+            report_type="simple",
+            market_review_enabled=False,
+        )
+        config.refresh_stock_list = lambda: None
+        config.stock_list = ["600519", "000001"]
+        queue = MagicMock()
+        queue.submit_tasks_batch.return_value = ([MagicMock(), MagicMock()], [])
+
+        def fake_run_with_schedule(task, schedule_time, run_immediately, background_tasks=None):
+            task()
+
+        with patch("main.parse_arguments", return_value=args), \
+             patch("main.get_config", return_value=config), \
+             patch("main.setup_logging"), \
+             patch("main._compute_trading_day_filter", return_value=(["600519", "000001"], None, False)), \
+             patch("src.core.pipeline.StockAnalysisPipeline") as pipeline_cls, \
+             patch("src.services.task_queue.get_task_queue", return_value=queue), \
+             patch("src.scheduler.run_with_schedule", side_effect=fake_run_with_schedule):
+            exit_code = main.main()
+
+        self.assertEqual(exit_code, 0)
+        pipeline_cls.return_value.run.assert_not_called()
+        queue.submit_tasks_batch.assert_called_once_with(
+            ["600519", "000001"],
+            report_type="simple",
+            notify=True,
+            lane="scheduled",
+            requester="scheduler",
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Tests for the cached, single-flight Markdown-to-image render service."""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src import md2img
+
+
+class RenderServiceTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        md2img._render_service.clear()
+        self.calls = []
+        self._lock = threading.Lock()
+
+        def fake_render(text):
+            with self._lock:
+                self.calls.append(text)
+            time.sleep(0.05)
+            return f"png:{text}".encode("utf-8")
+
+        patchers = [
+            patch.object(md2img, "_markdown_to_image_wkhtml", side_effect=fake_render),
+            patch.object(md2img, "_configured_engine", return_value="wkhtmltoimage"),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(md2img._render_service.clear)
+
+    def test_same_content_is_rendered_once_and_cached(self) -> None:
+        self.assertEqual(md2img.markdown_to_image("# A"), b"png:# A")
+        self.assertEqual(md2img.markdown_to_image("# A"), b"png:# A")
+        self.assertEqual(self.calls, ["# A"])
+        self.assertEqual((md2img._render_service.hits, md2img._render_service.misses), (1, 1))
+
+    def test_concurrent_requests_share_one_render(self) -> None:
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(md2img.markdown_to_image("# B")))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [b"png:# B"] * 5)
+        self.assertEqual(self.calls, ["# B"])
+
+    def test_markdown_to_images_keeps_order_and_skips_empty(self) -> None:
+        images = md2img.markdown_to_images(["# X", "", "# Y", "# X", "z" * 20], max_chars=10)
+        self.assertEqual(images, [b"png:# X", None, b"png:# Y", b"png:# X", None])
+        self.assertEqual(sorted(self.calls), ["# X", "# Y"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -143,3 +143,64 @@ class TestResolveNameToCode:
         result = resolve_name_to_code("aaaaaaa")
         assert result is None
         mock_akshare.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# StockNameIndex
+# ---------------------------------------------------------------------------
+
+class TestStockNameIndex:
+    def _index(self):
+        from src.services.stock_name_index import StockNameIndex
+
+        return StockNameIndex([
+            ("600519", "贵州茅台"),
+            ("000001", "平安银行"),
+            ("601318", "中国平安"),
+            ("BABA", "阿里巴巴"),
+            ("09988", "阿里巴巴"),
+        ])
+
+    def test_exact_and_ambiguous(self):
+        index = self._index()
+        assert index.lookup("贵州茅台") == "600519"
+        assert index.lookup("阿里巴巴") is None
+        assert index.is_ambiguous("阿里巴巴") is True
+
+    def test_partial_codes_use_bigram_postings(self):
+        index = self._index()
+        assert index.partial_codes("平安") == ["000001", "601318"]
+        assert index.partial_codes("茅台") == ["600519"]
+        assert index.partial_codes("阿里") == ["BABA", "09988"]
+        assert index.partial_codes("不存在") == []
+
+    def test_close_matches_equal_full_difflib_scan(self):
+        import difflib
+
+        index = self._index()
+        names = list(index.name_to_code)
+        for query in ("贵州茅苔", "平安银形", "中国平平", "完全无关的名字"):
+            for cutoff in (0.8, 0.7):
+                assert index.close_matches(query, cutoff) == difflib.get_close_matches(
+                    query, names, n=1, cutoff=cutoff
+                )
+
+    def test_pinyin_and_initials(self):
+        pytest.importorskip("pypinyin")
+        index = self._index()
+        assert index.lookup_pinyin("guizhoumaotai") == "600519"
+        assert index.lookup_initials("GZMT") == "600519"
+
+
+def test_resolve_name_to_code_uses_indexed_pinyin():
+    pytest.importorskip("pypinyin")
+    assert resolve_name_to_code("guizhoumaotai") == "600519"
+
+
+def test_resolve_name_to_code_prefers_initials_for_lowercase_letters():
+    pytest.importorskip("pypinyin")
+    assert resolve_name_to_code("gzmt") == "600519"
+    assert resolve_name_to_code("payh") == "000001"
+    # Upper-case letters and letters without an initials hit stay tickers.
+    assert resolve_name_to_code("GZMT") == "GZMT"
+    assert resolve_name_to_code("aapl") == "AAPL"
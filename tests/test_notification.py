@@ -16,6 +16,8 @@ TODO:
 """
 import os
 import sys
+import threading
+import time
 import unittest
 from unittest import mock
 from typing import Optional
@@ -292,6 +294,55 @@ class TestNotificationServiceReportGeneration(unittest.TestCase):
         self.assertNotIn("技术面", out)
         self.assertNotIn("消息面", out)
 
+    @mock.patch("src.notification.get_config")
+    def test_dashboard_sections_are_lazy_and_join_to_full_report(self, mock_get_config: mock.MagicMock):
+        mock_get_config.return_value = _make_config(report_renderer_enabled=False)
+        service = NotificationService()
+        results = [
+            AnalysisResult(
+                code=code,
+                name=name,
+                sentiment_score=score,
+                trend_prediction="看多",
+                operation_advice="持有",
+                analysis_summary="稳健",
+                buy_reason="趋势向上",
+            )
+            for code, name, score in (("600519", "贵州茅台", 80), ("000001", "平安银行", 60))
+        ]
+
+        with mock.patch("src.notification.datetime") as mock_datetime:
+            mock_datetime.now.return_value.strftime.return_value = "2026-03-20 15:00:00"
+            sections = list(service.iter_dashboard_report_sections(results, report_date="2026-03-20"))
+            full = service.generate_dashboard_report(results, report_date="2026-03-20")
+
+        # header + one section per stock + footer
+        self.assertEqual(len(sections), 4)
+        self.assertIn("600519", sections[1])
+        self.assertNotIn("000001", sections[1])
+        self.assertEqual("\n".join(sections), full)
+
+    def test_feishu_stream_chunked_pushes_each_chunk_as_it_fills(self):
+        service = NotificationService.__new__(NotificationService)
+        sent = []
+        produced = []
+
+        def sections():
+            for i in range(4):
+                produced.append(i)
+                yield f"section-{i}-" + "x" * 80
+
+        reply_client = mock.MagicMock()
+        reply_client.send_to_chat.side_effect = lambda chat_id, chunk: sent.append((len(produced), chunk)) or True
+
+        with mock.patch("time.sleep"):
+            ok = service._send_feishu_stream_chunked(reply_client, "chat", sections(), max_bytes=200)
+
+        self.assertTrue(ok)
+        self.assertEqual(len(sent), 2)
+        # The first chunk went out before the last section was generated.
+        self.assertLess(sent[0][0], 4)
+
     @mock.patch("src.notification.get_config")
     def test_generate_single_stock_report_localizes_english_fallback(self, mock_get_config: mock.MagicMock):
         mock_get_config.return_value = _make_config(report_renderer_enabled=False, report_language="en")
@@ -583,6 +634,92 @@ class TestNotificationServiceReportGeneration(unittest.TestCase):
         self.assertTrue(ok)
         self.assertAlmostEqual(mock_post.call_count, 4, delta=1)
 
+    @mock.patch("src.notification.get_config")
+    def test_send_dispatches_channels_concurrently_with_timeout(self, mock_get_config: mock.MagicMock):
+        cfg = _make_config(
+            wechat_webhook_url="https://wechat.example",
+            feishu_webhook_url="https://feishu.example",
+            pushplus_token="token",
+            notification_channel_timeout=1,
+        )
+        mock_get_config.return_value = cfg
+        service = NotificationService()
+        release = threading.Event()
+
+        def slow_ok(_content):
+            time.sleep(0.3)
+            return True
+
+        def hang(_content):
+            release.wait(5)
+            return True
+
+        with mock.patch.object(service, "send_to_wechat", side_effect=slow_ok), \
+                mock.patch.object(service, "send_to_feishu", side_effect=RuntimeError("boom")), \
+                mock.patch.object(service, "send_to_pushplus", side_effect=hang):
+            started = time.perf_counter()
+            ok = service.send("hello")
+            elapsed = time.perf_counter() - started
+            release.set()
+
+        self.assertTrue(ok)
+        self.assertLess(elapsed, 2)
+        self.assertEqual(len(service.last_channel_latencies), 3)
+        self.assertGreaterEqual(min(service.last_channel_latencies.values()), 0)
+        self.assertEqual(max(service.last_channel_latencies.values()), 1000)
+
+    @mock.patch("src.notification.get_config")
+    def test_single_channel_send_honours_channel_timeout(self, mock_get_config: mock.MagicMock):
+        mock_get_config.return_value = _make_config(
+            wechat_webhook_url="https://wechat.example",
+            notification_channel_timeout=1,
+        )
+        service = NotificationService()
+        release = threading.Event()
+
+        def hang(_content):
+            release.wait(5)
+            return True
+
+        with mock.patch.object(service, "send_to_wechat", side_effect=hang):
+            started = time.perf_counter()
+            ok = service.send("hello")
+            elapsed = time.perf_counter() - started
+            release.set()
+
+        self.assertFalse(ok)
+        self.assertLess(elapsed, 2)
+        self.assertEqual(service.last_channel_latencies, {"企业微信": 1000})
+
+    @mock.patch("src.notification.get_config")
+    def test_concurrent_sends_keep_their_own_channel_latencies(self, mock_get_config: mock.MagicMock):
+        mock_get_config.return_value = _make_config(wechat_webhook_url="https://wechat.example")
+        service = NotificationService()
+        slow_started = threading.Event()
+
+        def send_to_wechat(content):
+            if content == "slow":
+                slow_started.set()
+                time.sleep(0.3)
+            return True
+
+        seen = {}
+
+        def slow_send():
+            service.send("slow")
+            seen["slow"] = service.last_channel_latencies
+
+        with mock.patch.object(service, "send_to_wechat", side_effect=send_to_wechat):
+            worker = threading.Thread(target=slow_send)
+            worker.start()
+            self.assertTrue(slow_started.wait(5))
+            service.send("fast")
+            worker.join(5)
+            seen["fast"] = service.last_channel_latencies
+
+        self.assertGreaterEqual(seen["slow"]["企业微信"], 300)
+        self.assertLess(seen["fast"]["企业微信"], 300)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -138,5 +138,39 @@ class TestPipelineWechatOnlyImageRouting(unittest.TestCase):
         )
 
 
+class TestPipelineContextStreaming(unittest.TestCase):
+    def test_context_channel_consumes_sections_while_other_channels_get_full_report(self):
+        pipeline = StockAnalysisPipeline.__new__(StockAnalysisPipeline)
+        notifier = MagicMock()
+        notifier._markdown_to_image_channels = set()
+        notifier.get_available_channels.return_value = [NotificationChannel.PUSHPLUS]
+        produced = []
+
+        def sections(results, report_type):
+            for index in range(3):
+                produced.append(index)
+                yield f"section-{index}"
+
+        seen_by_context = []
+
+        def send_to_context(stream):
+            # 只读前两段（模拟中途失败），剩余片段由流水线补齐
+            for section in stream:
+                seen_by_context.append((section, len(produced)))
+                if len(seen_by_context) == 2:
+                    return False
+            return True
+
+        notifier.iter_aggregate_report_sections.side_effect = sections
+        notifier.send_to_context.side_effect = send_to_context
+        pipeline.notifier = notifier
+        pipeline.config = SimpleNamespace(stock_email_groups=[])
+
+        pipeline._send_notifications([SimpleNamespace(code="000001")], ReportType.FULL)
+
+        self.assertEqual(seen_by_context, [("section-0", 1), ("section-1", 2)])
+        notifier.send_to_pushplus.assert_called_once_with("section-0\nsection-1\nsection-2")
+
+
 if __name__ == "__main__":
     unittest.main()
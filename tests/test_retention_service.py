@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""Tests for the time-series retention / archival job."""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import func, select
+
+from src.services.retention_service import RetentionService
+from src.storage import (
+    AnalysisHistory,
+    BacktestResult,
+    ConversationMessage,
+    ConversationSession,
+    DatabaseManager,
+    FundamentalSnapshot,
+    LLMUsage,
+    NewsIntel,
+)
+
+NOW = datetime(2026, 6, 15, 12, 0, 0)
+
+
+class RetentionServiceTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = Path(self.temp_dir.name)
+        self.archive_dir = root / "archive"
+        DatabaseManager.reset_instance()
+        self.db = DatabaseManager(db_url=f"sqlite:///{root / 'retention.db'}")
+
+    def tearDown(self) -> None:
+        DatabaseManager.reset_instance()
+        self.temp_dir.cleanup()
+
+    def _config(self, **overrides) -> SimpleNamespace:
+        values = {
+            "retention_news_days": 30,
+            "retention_fundamental_days": 30,
+            "retention_analysis_days": 0,
+            "retention_llm_usage_days": 0,
+            "retention_conversation_days": 0,
+            "retention_batch_size": 2,
+            "retention_archive_dir": str(self.archive_dir),
+            "retention_vacuum_mode": "INCREMENTAL",
+        }
+        values.update(overrides)
+        return SimpleNamespace(**values)
+
+    def _run(self, **overrides):
+        return RetentionService(db=self.db, config=self._config(**overrides), now=NOW).run()
+
+    def _count(self, model) -> int:
+        with self.db.get_session() as session:
+            return session.execute(select(func.count()).select_from(model)).scalar()
+
+    def _read_archive(self, table: str, month: str):
+        with gzip.open(self.archive_dir / table / f"{month}.jsonl.gz", "rt", encoding="utf-8") as fh:
+            return [json.loads(line) for line in fh]
+
+    def test_archives_expired_rows_by_month_and_deletes_in_batches(self) -> None:
+        with self.db.session_scope() as session:
+            for i, age in enumerate((200, 190, 100, 5)):
+                session.add(NewsIntel(
+                    code="600519", title=f"news-{i}", url=f"https://example.com/{i}",
+                    snippet="x" * 3000, fetched_at=NOW - timedelta(days=age),
+                ))
+                session.add(FundamentalSnapshot(
+                    query_id=f"q{i}", code="600519", payload="{}", created_at=NOW - timedelta(days=age),
+                ))
+
+        report = self._run()
+
+        self.assertEqual(self._count(NewsIntel), 1)
+        self.assertEqual(self._count(FundamentalSnapshot), 1)
+        by_table = {item.table: item for item in report.tables}
+        self.assertEqual(by_table["news_intel"].deleted, 3)
+        self.assertEqual(by_table["news_intel"].archived, 3)
+        self.assertNotIn("analysis_history", by_table)  # 0 天 = 永久保留
+
+        archived = self._read_archive("news_intel", "2025-11") + self._read_archive("news_intel", "2025-12")
+        self.assertEqual(sorted(row["title"] for row in archived), ["news-0", "news-1"])
+        self.assertEqual(len(self._read_archive("news_intel", "2026-03")), 1)
+        self.assertGreater(report.bytes_before, 0)
+        self.assertEqual(self.db.get_database_size()["free_bytes"], 0)
+
+    def test_analysis_history_removes_dependent_backtests(self) -> None:
+        with self.db.session_scope() as session:
+            old = AnalysisHistory(
+                query_id="old", code="600519", raw_result="r" * 2000, created_at=NOW - timedelta(days=400),
+            )
+            recent = AnalysisHistory(query_id="new", code="600519", created_at=NOW - timedelta(days=1))
+            session.add_all([old, recent])
+            session.flush()
+            session.add(BacktestResult(
+                analysis_history_id=old.id, code="600519", analysis_date=date(2025, 5, 11),
+                evaluated_at=NOW - timedelta(days=390),
+            ))
+
+        self._run(retention_analysis_days=365)
+
+        self.assertEqual(self._count(AnalysisHistory), 1)
+        self.assertEqual(self._count(BacktestResult), 0)
+        rows = self._read_archive("analysis_history", "2025-05")
+        self.assertEqual(rows[0]["raw_result"], "r" * 2000)
+        self.assertEqual(len(self._read_archive("backtest_results", "2025-05")), 1)
+
+    def test_llm_usage_is_rolled_up_before_delete(self) -> None:
+        start = NOW - timedelta(days=120)
+        for hours in (0, 1, 2):
+            self.db.record_llm_usage_batch([{
+                "call_type": "analysis", "model": "m", "prompt_tokens": 1,
+                "completion_tokens": 2, "total_tokens": 3, "called_at": start + timedelta(hours=hours),
+            }])
+        before = self.db.get_llm_usage_summary(start - timedelta(hours=1), NOW)
+
+        self._run(retention_llm_usage_days=90)
+
+        self.assertEqual(self._count(LLMUsage), 0)
+        after = self.db.get_llm_usage_summary(start - timedelta(hours=1), NOW)
+        self.assertEqual(after["total_calls"], before["total_calls"])
+        self.assertEqual(after["total_tokens"], 9)
+
+    def test_conversations_expire_as_whole_sessions(self) -> None:
+        self.db.save_conversation_message("old", "user", "hello")
+        self.db.save_conversation_message("old", "assistant", "hi")
+        self.db.save_conversation_message("active", "user", "still here")
+        with self.db.session_scope() as session:
+            session.query(ConversationSession).filter_by(session_id="old").update(
+                {"last_active": NOW - timedelta(days=60)}
+            )
+            session.query(ConversationMessage).filter_by(session_id="old").update(
+                {"created_at": NOW - timedelta(days=60)}
+            )
+
+        report = self._run(retention_conversation_days=30, retention_archive_dir="off")
+
+        self.assertEqual(self.db.get_conversation_messages("old"), [])
+        self.assertEqual(len(self.db.get_conversation_messages("active")), 1)
+        self.assertEqual(self._count(ConversationSession), 1)
+        self.assertEqual(report.tables[-1].deleted, 2)
+        self.assertEqual(report.tables[-1].archived, 0)
+        self.assertFalse(self.archive_dir.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Tests for the stock_freshness index and its use in pipeline resume checks."""
+
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tests.litellm_stub import ensure_litellm_stub
+
+ensure_litellm_stub()
+
+from src.config import Config
+from src.core.pipeline import StockAnalysisPipeline
+from src.storage import DatabaseManager, StockDaily, StockFreshness
+
+
+class StockFreshnessIndexTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(self._temp_dir.name, "test_freshness.db")
+        Config._instance = None
+        DatabaseManager.reset_instance()
+        self.db = DatabaseManager.get_instance()
+
+    def tearDown(self) -> None:
+        DatabaseManager.reset_instance()
+        self._temp_dir.cleanup()
+
+    @staticmethod
+    def _bars(*days):
+        return pd.DataFrame([{"date": d, "close": 10.0} for d in days])
+
+    def test_save_daily_data_advances_index(self) -> None:
+        self.db.save_daily_data(self._bars(date(2026, 3, 2), date(2026, 3, 3)), "600519", "TestData")
+        self.assertEqual(self.db.get_freshness_map(["600519"]), {"600519": date(2026, 3, 3)})
+
+        # Re-saving an older window must not move the index backwards.
+        self.db.save_daily_data(self._bars(date(2026, 2, 27)), "600519", "TestData")
+        self.assertEqual(self.db.get_freshness_map(["600519", "000001"]), {"600519": date(2026, 3, 3)})
+
+    def test_missing_entries_are_backfilled_from_stock_daily(self) -> None:
+        with self.db.session_scope() as session:
+            session.add(StockDaily(code="000001", date=date(2026, 3, 2), close=1.0))
+            session.add(StockDaily(code="000001", date=date(2026, 3, 4), close=1.0))
+
+        self.assertEqual(self.db.get_freshness_map(), {"000001": date(2026, 3, 4)})
+        with self.db.session_scope() as session:
+            self.assertEqual(session.get(StockFreshness, "000001").last_date, date(2026, 3, 4))
+
+
+class PipelineFreshnessTestCase(unittest.TestCase):
+    def test_resume_check_uses_preloaded_map(self) -> None:
+        pipeline = StockAnalysisPipeline.__new__(StockAnalysisPipeline)
+        pipeline.db = MagicMock()
+        pipeline.fetcher_manager = MagicMock()
+        pipeline.fetcher_manager.get_stock_name.return_value = "name"
+        pipeline._freshness_map = {"600519": date(2026, 3, 6)}
+
+        with patch.object(StockAnalysisPipeline, "_latest_session_date", return_value=date(2026, 3, 6)):
+            self.assertEqual(pipeline.fetch_and_save_stock_data("600519"), (True, None))
+
+        pipeline.db.has_today_data.assert_not_called()
+        pipeline.fetcher_manager.get_daily_data.assert_not_called()
+
+        pipeline.fetcher_manager.get_daily_data.return_value = (None, "Test")
+        with patch.object(StockAnalysisPipeline, "_latest_session_date", return_value=date(2026, 3, 9)):
+            self.assertEqual(pipeline.fetch_and_save_stock_data("600519"), (False, "获取数据为空"))
+        pipeline.fetcher_manager.get_daily_data.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
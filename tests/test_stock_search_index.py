@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Tests for the in-memory stock search index and its sharded export."""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.services.stock_search_index import (
+    StockSearchIndex,
+    build_sharded_index,
+    load_stock_search_index,
+    write_sharded_index,
+)
+
+ROWS = [
+    ["600519.SH", "600519", "贵州茅台", "guizhoumaotai", "gzmt", ["茅台"], "CN", "stock", True, 100],
+    ["000001.SZ", "000001", "平安银行", "pinganyinhang", "payh", ["平银"], "CN", "stock", True, 100],
+    ["601318.SH", "601318", "中国平安", "zhongguopingan", "zgpa", [], "CN", "stock", True, 120],
+    ["600000.SH", "600000", "浦发银行", "pufayinhang", "pfyh", [], "CN", "stock", False, 100],
+    ["00700.HK", "00700", "腾讯控股", "tengxunkonggu", "txkg", [], "HK", "stock", True, 100],
+    ["AAPL", "AAPL", "APPLE", "APPLE", "APPLE", [], "US", "stock", True, 100],
+]
+
+
+class StockSearchIndexTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        path = Path(self._temp_dir.name) / "stocks.index.json"
+        path.write_text(json.dumps(ROWS, ensure_ascii=False), encoding="utf-8")
+        self.index = load_stock_search_index([path])
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def _codes(self, query, **kwargs):
+        return [(r["canonical_code"], r["score"]) for r in self.index.search(query, **kwargs)]
+
+    def test_ranks_exact_then_prefix_then_contains_like_web_client(self) -> None:
+        self.assertEqual(self._codes("600519.sh"), [("600519.SH", 100)])
+        self.assertEqual(self._codes("茅台"), [("600519.SH", 97)])
+        self.assertEqual(self._codes("gzmt"), [("600519.SH", 96)])
+        # Same score: higher popularity first.
+        self.assertEqual(self._codes("60"), [("601318.SH", 80), ("600519.SH", 80)])
+        self.assertEqual(self._codes("平安"), [("000001.SZ", 79), ("601318.SH", 59)])
+        self.assertEqual(self._codes("pingan"), [("601318.SH", 58), ("000001.SZ", 58)])
+        self.assertEqual(self._codes("yinhang"), [("000001.SZ", 58)])
+        result = self.index.search("aap")[0]
+        self.assertEqual((result["match_type"], result["match_field"]), ("prefix", "code"))
+
+    def test_active_only_and_limit(self) -> None:
+        self.assertEqual(self._codes("浦发"), [])
+        self.assertEqual(self._codes("浦发", active_only=False), [("600000.SH", 79)])
+        self.assertEqual(len(self.index.search("6", limit=2)), 2)
+        self.assertEqual(self.index.search("   "), [])
+
+    def test_sharded_export_round_trips(self) -> None:
+        manifest, shards = build_sharded_index(ROWS, shard_rows=2)
+        self.assertEqual(manifest["count"], len(ROWS))
+        self.assertEqual([s["file"] for s in manifest["shards"]], ["cn-0.json", "cn-1.json", "hk-0.json", "us-0.json"])
+        self.assertEqual(shards["cn-0.json"]["canonicalCode"], [".SH", ".SZ"])
+        self.assertEqual(shards["us-0.json"]["canonicalCode"], [None])
+        self.assertEqual(shards["us-0.json"]["pinyinFull"], [0])
+        self.assertEqual(shards["cn-0.json"]["market"], "CN")
+        self.assertEqual(shards["cn-1.json"]["active"], [True, False])
+
+        out_dir = Path(self._temp_dir.name) / "stocks.index"
+        out_dir.mkdir()
+        (out_dir / "stale-9.json").write_text("{}", encoding="utf-8")
+        write_sharded_index(ROWS, out_dir, shard_rows=2)
+        self.assertEqual(
+            sorted(p.name for p in out_dir.iterdir()),
+            ["cn-0.json", "cn-1.json", "hk-0.json", "manifest.json", "us-0.json"],
+        )
+
+    def test_search_endpoint_uses_prebuilt_index(self) -> None:
+        from api.v1.endpoints.stocks import search_stocks
+
+        with patch("api.v1.endpoints.stocks.get_stock_search_index", return_value=self.index):
+            response = search_stocks(q="txkg", limit=5, active_only=True)
+        self.assertEqual(response.items[0].canonical_code, "00700.HK")
+        self.assertEqual(response.items[0].match_field, "pinyin")
+
+    def test_index_from_items_without_optional_fields(self) -> None:
+        index = StockSearchIndex([{"canonicalCode": "X.US", "displayCode": "X", "nameZh": "示例"}])
+        self.assertEqual(index.search("示例")[0]["score"], 98)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,11 +2,15 @@
 import unittest
 import sys
 import os
+import tempfile
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
 
 # Ensure src module can be imported
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.storage import DatabaseManager
+from src.storage import ConversationMessage, ConversationSession, DatabaseManager
 
 class TestStorage(unittest.TestCase):
     
@@ -91,5 +95,83 @@ class TestStorage(unittest.TestCase):
 
         DatabaseManager.reset_instance()
 
+    def test_chat_session_header_tracks_title_count_and_pagination(self):
+        DatabaseManager.reset_instance()
+        db = DatabaseManager(db_url="sqlite:///:memory:")
+
+        db.save_conversation_message("web:a", "assistant", "hello")
+        db.save_conversation_message("web:a", "user", "分析 600519" * 20)
+        db.save_conversation_message("web:b", "user", "second")
+        db.save_conversation_message("web:a", "assistant", "reply")
+
+        sessions = db.get_chat_sessions(session_prefix="web")
+        self.assertEqual([s["session_id"] for s in sessions], ["web:a", "web:b"])
+        self.assertEqual(sessions[0]["message_count"], 3)
+        self.assertEqual(sessions[0]["title"], ("分析 600519" * 20)[:60])
+        self.assertEqual(
+            [s["session_id"] for s in db.get_chat_sessions(limit=1, offset=1, session_prefix="web")],
+            ["web:b"],
+        )
+
+        db.delete_conversation_session("web:a")
+        self.assertEqual([s["session_id"] for s in db.get_chat_sessions()], ["web:b"])
+
+        DatabaseManager.reset_instance()
+
+    def test_chat_sessions_backfill_headers_for_legacy_messages(self):
+        DatabaseManager.reset_instance()
+        db = DatabaseManager(db_url="sqlite:///:memory:")
+
+        # Messages written before the header table existed
+        with db.session_scope() as session:
+            session.add_all([
+                ConversationMessage(session_id="old:1", role="user", content="legacy title"),
+                ConversationMessage(session_id="old:1", role="assistant", content="answer"),
+                ConversationMessage(session_id="old:2", role="assistant", content="no user yet"),
+            ])
+        # A legacy session that receives a new message rebuilds its header from history
+        db.save_conversation_message("old:2", "user", "follow up")
+
+        sessions = {s["session_id"]: s for s in db.get_chat_sessions()}
+        self.assertEqual(sessions["old:1"]["title"], "legacy title")
+        self.assertEqual(sessions["old:1"]["message_count"], 2)
+        self.assertEqual(sessions["old:2"]["title"], "follow up")
+        self.assertEqual(sessions["old:2"]["message_count"], 2)
+        with db.session_scope() as session:
+            self.assertEqual(session.query(ConversationSession).count(), 2)
+
+        DatabaseManager.reset_instance()
+
+    def test_sqlite_file_database_applies_pragmas_and_read_only_pool(self):
+        DatabaseManager.reset_instance()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = DatabaseManager(db_url=f"sqlite:///{os.path.join(temp_dir, 'tuned.db')}")
+            try:
+                with db.get_session() as session:
+                    self.assertEqual(session.execute(text("PRAGMA journal_mode")).scalar(), "wal")
+                    self.assertEqual(session.execute(text("PRAGMA synchronous")).scalar(), 1)  # NORMAL
+                    self.assertEqual(session.execute(text("PRAGMA busy_timeout")).scalar(), 5000)
+                    self.assertEqual(session.execute(text("PRAGMA query_only")).scalar(), 0)
+
+                db.save_conversation_message("web:1", "user", "hello")
+                self.assertEqual([s["session_id"] for s in db.get_chat_sessions()], ["web:1"])
+                with db.get_read_session() as session:
+                    self.assertEqual(session.execute(text("PRAGMA query_only")).scalar(), 1)
+                    with self.assertRaises(OperationalError):
+                        session.execute(text("DELETE FROM conversation_messages"))
+            finally:
+                DatabaseManager.reset_instance()
+
+    def test_memory_database_shares_one_engine_without_pragmas(self):
+        DatabaseManager.reset_instance()
+        db = DatabaseManager(db_url="sqlite:///:memory:")
+        try:
+            self.assertIs(db._read_engine, db._engine)
+            with db.get_session() as session:
+                self.assertEqual(session.execute(text("PRAGMA journal_mode")).scalar(), "memory")
+        finally:
+            DatabaseManager.reset_instance()
+
+
 if __name__ == '__main__':
     unittest.main()
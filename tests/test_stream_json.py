@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""Tests for streamed dashboard JSON parsing and early aborts."""
+
+import json
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+try:
+    import litellm  # noqa: F401
+except ModuleNotFoundError:
+    sys.modules["litellm"] = MagicMock()
+
+from src.analyzer import GeminiAnalyzer
+from src.config import Config
+from src.utils.stream_json import DashboardStreamMonitor, StreamAbort
+
+REPORT = {
+    "stock_name": "贵州茅台",
+    "sentiment_score": 72,
+    "operation_advice": "持有",
+    "analysis_summary": "趋势完好, 回踩支撑",
+    "dashboard": {
+        "core_conclusion": {"one_sentence": "持有观察"},
+        "intelligence": {"risk_alerts": []},
+        "battle_plan": {"sniper_points": {"stop_loss": 1400}},
+    },
+}
+
+
+def _feed(monitor: DashboardStreamMonitor, text: str, size: int = 5) -> None:
+    for start in range(0, len(text), size):
+        monitor.feed(text[start:start + size])
+        if monitor.closed:
+            return
+
+
+def _stream(text: str, size: int = 7):
+    for start in range(0, len(text), size):
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text[start:start + size]))])
+
+
+class DashboardStreamMonitorTestCase(unittest.TestCase):
+    def test_reports_fields_and_stops_at_object_end(self) -> None:
+        seen = []
+        monitor = DashboardStreamMonitor(
+            expected_fields=list(REPORT),
+            on_field=lambda name, done, expected: seen.append((name, done, expected)),
+        )
+        text = "```json\n" + json.dumps(REPORT, ensure_ascii=False) + "\n```\n以上为分析, 仅供参考。" * 20
+
+        _feed(monitor, text)
+
+        self.assertTrue(monitor.closed)
+        self.assertEqual([name for name, _, _ in seen], list(REPORT))
+        self.assertEqual(seen[-1][1:], (5, 5))
+        self.assertEqual(monitor.fields["dashboard"]["core_conclusion"]["one_sentence"], "持有观察")
+        self.assertLess(len(monitor.text), len(text))
+
+    def test_aborts_on_prose_repetition_and_bad_fields(self) -> None:
+        with self.assertRaises(StreamAbort) as prose:
+            _feed(DashboardStreamMonitor(prose_limit=100), "这只股票近期走势较强，成交量有所放大。" * 20)
+        self.assertEqual(prose.exception.reason, "no_json")
+
+        looping = '{"analysis_summary": "' + "均线多头排列，量能温和放大，短期有望继续上行；" * 60
+        with self.assertRaises(StreamAbort) as repetition:
+            _feed(DashboardStreamMonitor(), looping)
+        self.assertEqual(repetition.exception.reason, "repetition")
+
+        with self.assertRaises(StreamAbort) as bad_field:
+            _feed(DashboardStreamMonitor(), '{"stock_name": "茅台", "sentiment_score": "偏强", "dashboard": {}}')
+        self.assertEqual(bad_field.exception.reason, "bad_field")
+
+        # 最后一次尝试只报告进度，不再中止
+        monitor = DashboardStreamMonitor(abort_enabled=False, prose_limit=100)
+        _feed(monitor, "这只股票近期走势较强。" * 50)
+        self.assertFalse(monitor.closed)
+
+
+class AnalyzerStreamingTestCase(unittest.TestCase):
+    def test_aborted_stream_is_reprompted_and_progress_reported(self) -> None:
+        with patch.object(GeminiAnalyzer, "_init_litellm", return_value=None):
+            analyzer = GeminiAnalyzer()
+        config = Config(
+            stock_list=[],
+            litellm_model="openai/test",
+            gemini_request_delay=0,
+            report_integrity_enabled=True,
+            llm_stream_enabled=True,
+        )
+        fake_litellm = MagicMock()
+        fake_litellm.completion.side_effect = [
+            _stream("好的，下面我先介绍一下这家公司的基本情况。" * 60),
+            _stream(json.dumps(REPORT, ensure_ascii=False) + "\n补充说明。" * 30),
+        ]
+        events = []
+
+        with patch.object(analyzer, "_get_runtime_config", return_value=config), \
+                patch.object(analyzer, "is_available", return_value=True), \
+                patch("src.analyzer.litellm", fake_litellm), \
+                patch("src.analyzer.persist_llm_usage") as persist_usage:
+            result = analyzer.analyze(
+                {"code": "600519", "stock_name": "贵州茅台", "today": {}},
+                progress_callback=events.append,
+            )
+
+        self.assertTrue(result.success)
+        self.assertEqual(result.sentiment_score, 72)
+        self.assertEqual(fake_litellm.completion.call_count, 2)
+        self.assertTrue(fake_litellm.completion.call_args.kwargs["stream"])
+        retry_prompt = fake_litellm.completion.call_args.kwargs["messages"][-1]["content"]
+        self.assertIn("已被中止", retry_prompt)
+        self.assertNotIn("补充说明", result.raw_response)
+        call_types = [item.kwargs["call_type"] for item in persist_usage.call_args_list]
+        self.assertEqual(call_types, ["analysis_stream_aborted", "analysis"])
+        self.assertEqual(events[0]["type"], "llm_stream_restart")
+        self.assertEqual([event["field"] for event in events[1:]], list(REPORT))
+
+    def test_fallback_model_streams_into_a_fresh_monitor(self) -> None:
+        with patch.object(GeminiAnalyzer, "_init_litellm", return_value=None):
+            analyzer = GeminiAnalyzer()
+        config = Config(
+            stock_list=[],
+            litellm_model="openai/test",
+            litellm_fallback_models=["openai/backup"],
+            gemini_request_delay=0,
+            report_integrity_enabled=False,
+            llm_stream_enabled=True,
+        )
+        text = json.dumps(REPORT, ensure_ascii=False)
+
+        def dropped_stream():
+            yield from _stream(text[:60])
+            raise ConnectionError("connection reset")
+
+        fake_litellm = MagicMock()
+        fake_litellm.completion.side_effect = [dropped_stream(), _stream(text)]
+        events = []
+
+        with patch.object(analyzer, "_get_runtime_config", return_value=config), \
+                patch.object(analyzer, "is_available", return_value=True), \
+                patch("src.analyzer.litellm", fake_litellm), \
+                patch("src.analyzer.persist_llm_usage") as persist_usage:
+            result = analyzer.analyze(
+                {"code": "600519", "stock_name": "贵州茅台", "today": {}},
+                progress_callback=events.append,
+            )
+
+        self.assertTrue(result.success)
+        self.assertEqual(result.raw_response, text)
+        self.assertEqual(persist_usage.call_args.args[1], "openai/backup")
+        backup_events = events[[event["field"] for event in events].index("stock_name", 1):]
+        self.assertEqual([event["fields_done"] for event in backup_events], list(range(1, len(REPORT) + 1)))
+
+    def test_aborted_stream_usage_is_recorded_under_streaming_model(self) -> None:
+        with patch.object(GeminiAnalyzer, "_init_litellm", return_value=None):
+            analyzer = GeminiAnalyzer()
+        config = Config(
+            stock_list=[],
+            litellm_model="openai/test",
+            litellm_fallback_models=["openai/backup"],
+            gemini_request_delay=0,
+            report_integrity_enabled=False,
+            llm_stream_enabled=True,
+        )
+        fake_litellm = MagicMock()
+        fake_litellm.completion.side_effect = [
+            ConnectionError("primary down"),
+            _stream("好的，下面我先介绍一下这家公司的基本情况。" * 60),
+            _stream(json.dumps(REPORT, ensure_ascii=False)),
+        ]
+
+        with patch.object(analyzer, "_get_runtime_config", return_value=config), \
+                patch.object(analyzer, "is_available", return_value=True), \
+                patch("src.analyzer.litellm", fake_litellm), \
+                patch("src.analyzer.persist_llm_usage") as persist_usage:
+            result = analyzer.analyze({"code": "600519", "stock_name": "贵州茅台", "today": {}})
+
+        self.assertTrue(result.success)
+        aborted = persist_usage.call_args_list[0]
+        self.assertEqual(aborted.kwargs["call_type"], "analysis_stream_aborted")
+        self.assertEqual(aborted.args[1], "openai/backup")
+        self.assertGreater(aborted.args[0]["prompt_tokens"], 0)
+        self.assertEqual(
+            aborted.args[0]["total_tokens"],
+            aborted.args[0]["prompt_tokens"] + aborted.args[0]["completion_tokens"],
+        )
+
+    def test_usage_chunk_after_closing_brace_is_read(self) -> None:
+        text = json.dumps(REPORT, ensure_ascii=False)
+
+        def chunks():
+            yield from _stream(text + "\n以上仅供参考。")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None), finish_reason="stop")])
+            yield SimpleNamespace(
+                choices=[],
+                usage=SimpleNamespace(prompt_tokens=5000, completion_tokens=120, total_tokens=5120),
+            )
+
+        monitor = DashboardStreamMonitor(expected_fields=list(REPORT))
+        streamed, usage = GeminiAnalyzer._consume_stream(chunks(), monitor, prompt_tokens=10)
+
+        self.assertTrue(streamed.startswith(text))
+        self.assertNotIn("参考", streamed)
+        self.assertEqual(usage["prompt_tokens"], 5000)
+        self.assertEqual(usage["total_tokens"], 5120)
+
+    def test_stream_without_usage_estimates_prompt_tokens(self) -> None:
+        monitor = DashboardStreamMonitor(expected_fields=list(REPORT))
+        _, usage = GeminiAnalyzer._consume_stream(
+            _stream(json.dumps(REPORT, ensure_ascii=False)), monitor, prompt_tokens=5000
+        )
+
+        self.assertEqual(usage["prompt_tokens"], 5000)
+        self.assertEqual(usage["total_tokens"], 5000 + usage["completion_tokens"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Tests for the precomputed trading calendar service."""
+
+import os
+import sys
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core.trading_calendar import TradingCalendarService
+from src.services.backtest_service import BacktestService
+
+
+def _service_with_sessions(days):
+    service = TradingCalendarService()
+    service._sessions["cn"] = np.array(days, dtype="datetime64[D]")
+    return service
+
+
+# 2025-12-29 .. 2026-01-09 with the 2026-01-01/02 holiday removed.
+_CN_SESSIONS = [
+    "2025-12-29", "2025-12-30", "2025-12-31",
+    "2026-01-05", "2026-01-06", "2026-01-07", "2026-01-08", "2026-01-09",
+]
+
+
+class TradingCalendarServiceTestCase(unittest.TestCase):
+    def test_session_queries_use_precomputed_array(self) -> None:
+        service = _service_with_sessions(_CN_SESSIONS)
+
+        self.assertFalse(service.is_session("cn", date(2026, 1, 2)))
+        self.assertTrue(service.is_session("cn", date(2026, 1, 5)))
+        self.assertEqual(service.previous_session("cn", date(2026, 1, 5)), date(2025, 12, 31))
+        self.assertEqual(service.next_session("cn", date(2025, 12, 31)), date(2026, 1, 5))
+        self.assertEqual(service.latest_session("cn", date(2026, 1, 3)), date(2025, 12, 31))
+        self.assertEqual(service.latest_session("cn", date(2026, 1, 6)), date(2026, 1, 6))
+        self.assertEqual(
+            service.sessions_between("cn", date(2025, 12, 31), date(2026, 1, 6)),
+            [date(2025, 12, 31), date(2026, 1, 5), date(2026, 1, 6)],
+        )
+        self.assertEqual(service.nth_session_after("cn", date(2025, 12, 30), 3), date(2026, 1, 6))
+
+    def test_calendar_built_once_per_market(self) -> None:
+        service = TradingCalendarService()
+        with patch.object(
+            service,
+            "_build_sessions",
+            return_value=np.array(_CN_SESSIONS, dtype="datetime64[D]"),
+        ) as build:
+            for _ in range(5):
+                service.is_session("cn", date(2026, 1, 5))
+            service.precompute(["cn"])
+        self.assertEqual(build.call_count, 1)
+
+    def test_unknown_market_falls_back_to_weekdays(self) -> None:
+        service = TradingCalendarService()
+        # Unknown market: is_session keeps fail-open semantics.
+        self.assertTrue(service.is_session(None, date(2026, 1, 3)))
+        self.assertEqual(service.latest_session(None, date(2026, 1, 4)), date(2026, 1, 2))
+        self.assertEqual(service.next_session(None, date(2026, 1, 2)), date(2026, 1, 5))
+        self.assertEqual(
+            service.sessions_between(None, date(2026, 1, 2), date(2026, 1, 5)),
+            [date(2026, 1, 2), date(2026, 1, 5)],
+        )
+        self.assertEqual(service.nth_session_after(None, date(2026, 1, 3), 1), date(2026, 1, 5))
+
+    def test_backtest_forward_window_uses_trading_sessions(self) -> None:
+        service = _service_with_sessions(_CN_SESSIONS)
+        with patch("src.services.backtest_service.get_trading_calendar", return_value=service), \
+                patch("src.services.backtest_service.get_market_today", return_value=date(2026, 1, 6)):
+            end = BacktestService._forward_window_end(
+                code="600519", analysis_date=date(2025, 12, 31), eval_window_days=2
+            )
+            self.assertEqual(end, date(2026, 1, 6))
+            self.assertTrue(
+                BacktestService._forward_window_elapsed(
+                    code="600519", analysis_date=date(2025, 12, 31), eval_window_days=2
+                )
+            )
+            # Three sessions after 12-31 end on 01-07, which is still in the future.
+            self.assertFalse(
+                BacktestService._forward_window_elapsed(
+                    code="600519", analysis_date=date(2025, 12, 31), eval_window_days=3
+                )
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()